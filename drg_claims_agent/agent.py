@@ -22,7 +22,9 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config import (
     DATABRICKS_HOST,
     DATABRICKS_TOKEN,
+    DRG_AGENT_STRICT,
     GENIE_SPACE_ID,
+    DRG_TOOL_SERVER,
     LLM_ENDPOINT,
     validate_production_settings,
     verify_bundled_reference_data,
@@ -34,6 +36,11 @@ from tools.icd_validate import icd_code_validate, cc_mcc_check
 from tools.drg_shift import drg_shift_analysis
 from tools.mce_validate import mce_code_check
 from tools.pcs_v43_1 import v43_1_pcs_check
+from tools.batch_audit import batch_claim_audit
+from tools.drg_index import drg_principal_diagnoses, icd_family_drgs, drg_pdx_overlap
+from tools.grouper import drg_group_claim
+from tools.code_search import code_search, search_index
+from tools.skill_sections import skill_index, skill_sections
 
 DRG_SYSTEM_PROMPT = """\
 You are a DRG Claims Analysis Agent -- an expert healthcare data analyst \
@@ -66,17 +73,27 @@ The `healthcare.claims.drg_claims` table has these columns:
 
 ## Tools and Routing
 
-Use the RIGHT tool for each question type:
+Use the RIGHT tool for each question type. Every reference tool takes an optional \
+`verbosity`: 'brief' when you only need the verdict or numbers, 'normal' (default, \
+compact JSON; long record lists come as columns/rows), 'full' only if asked for raw output.
 
 ### Data / SQL questions --> Claims Data Analyst (sub-agent)
 Use for ANY question that requires querying the claims table: aggregates, \
 counts, averages, comparisons, trends, filtering, grouping.
 Examples: "top DRGs by cost", "readmission rates by provider", "Q1 vs Q2 LOS"
 
+### Words instead of codes --> code_search (tool)
+When the user describes a diagnosis or DRG in words ("acute kidney failure", \
+"sepsis due to E. coli", "heart failure DRG with MCC"), resolve it to codes with \
+code_search FIRST (kind='icd' or 'drg' to narrow), then call the exact-code tools \
+with the top match. Never guess an ICD-10 or DRG code from memory.
+Example: "Is acute kidney failure a CC or an MCC?"
+
 ### DRG reference lookups --> drg_lookup (tool)
 Use when the user asks about a specific DRG's **CMS Table 5** metadata: relative \
 weight, GMLOS/AMLOS, MDC, medical vs surgical. This is NOT in the claims table. \
-For ICD-10 to DRG validation use `icd_code_validate` instead.
+For ICD-10 to DRG validation use `icd_code_validate` instead. When the question \
+is about a past claim or fiscal year, pass `discharge_date` (FY2023 / v40 onward).
 Example: "What is the CMS weight for DRG 871?"
 
 ### DRG family / severity tiers --> drg_family_lookup (tool)
@@ -90,13 +107,16 @@ Example: "Is ICD M16.11 correct for DRG 470?"
 
 ### DRG shift / provider comparison --> drg_shift_analysis (tool)
 Use when the user asks about DRG coding variation ACROSS providers for the \
-same condition. Compares MCC capture rates and flags outliers.
-Available families: heart_failure, pneumonia, sepsis, stroke, hip_knee_replacement, uti.
+same condition. Compares MCC capture rates against peer baselines, case mix, and \
+flags outliers. Accepts a curated family (heart_failure, pneumonia, sepsis, stroke, \
+hip_knee_replacement, uti) or ANY member DRG code of a CC/MCC family (e.g. '190'). \
+Pass `claims_path` when the user names a claims extract.
 Example: "Show DRG shift patterns for heart failure across hospitals"
 
 ### CC/MCC classification check --> cc_mcc_check (tool)
 Use to check if a secondary diagnosis code is CC, MCC, or non-CC.
-Essential for auditing MCC-level DRG assignments.
+Essential for auditing MCC-level DRG assignments. Pass `discharge_date` for claims \
+from earlier fiscal years -- CC/MCC status changes every October.
 Example: "Is N17.9 an MCC?"
 
 ### Medicare Code Editor (MCE) claim edits --> mce_code_check (tool)
@@ -113,6 +133,28 @@ see if a procedure code is in that list and the published description/footnotes.
 This is not a full PCS validator — only the 80-code announcement.
 Example: "Is 0F9480D one of the new FY2026 procedure codes?"
 
+### Bulk claim audits (files / extracts) --> batch_claim_audit (tool)
+Use when more than a handful of claims must be audited, or the user points at a \
+claims extract (Parquet / CSV / JSONL). Runs the Appendix B, CC/MCC, MCE, V43.1 PCS \
+and LOS checks for every claim in one call and writes a findings file; report the \
+summary counts and the file path. Do NOT loop icd_code_validate over many claims.
+Example: "Audit all claims in /data/q1_inpatient.parquet"
+When the reference tools come with `<tool>_batch` forms (e.g. cc_mcc_check_batch), \
+check a short list of codes with one batch call instead of one call per code.
+
+### Expected DRG for a claim --> drg_group_claim (tool)
+Use when the user gives a PDX plus secondary diagnoses (and optionally procedures / \
+the billed DRG) and asks which DRG the claim should group to, or whether the billed \
+DRG is right. Returns the expected DRG, weight, the CC/MCC codes driving severity, \
+and the weight delta vs the assigned DRG. Do NOT reason the grouping out yourself.
+Example: "PDX I50.23 with N17.9 and E11.9, billed 291 -- correct?"
+
+### Reverse / set questions on Appendix B --> drg_principal_diagnoses, icd_family_drgs, drg_pdx_overlap (tools)
+- "Which principal diagnoses justify DRG 871?" --> drg_principal_diagnoses (optional icd_prefix)
+- "Which DRGs does the I50 family map to?" --> icd_family_drgs
+- "Overlap of valid PDX between DRG 291 and 292?" --> drg_pdx_overlap
+These answer from a precomputed index; never page through icd_code_validate for them.
+
 ### Compliance audits --> Plan + multiple tools
 For audits: (1) plan with write_todos, (2) query data via analyst, \
 (3) validate each claim with icd_code_validate, (4) check LOS outliers \
@@ -150,44 +192,73 @@ Plan complex multi-step analyses before executing them.
 
 The runtime also injects a **Skills** section listing domain skills under `/skills/`. When a user
 question matches a skill's description (DRG fundamentals, MCE, audit guidelines, PCS v43.1, etc.),
-use `read_file` on that skill's `SKILL.md` path with a **high line limit** (e.g. 1000) before
-answering, then follow that workflow. Do not skip this for complex policy or audit questions.
+call `skill_sections` with the question (and the skill name when you know it) before answering,
+then follow the workflow in the sections it returns. Only `read_file` a whole `SKILL.md` (high
+line limit, e.g. 1000) when those sections do not cover the question. Do not skip this for
+complex policy or audit questions.
 """
 
 COMPLIANCE_AUDITOR_PROMPT = """\
 You are the **compliance-auditor** sub-agent: validate DRG and diagnosis coding using the tools \
 you are given. Be precise, cite tool outputs, and flag issues by severity. If the task matches a \
-skill under `/skills/` (audit, MCC, MCE, DRG shifts), read that skill's SKILL.md via `read_file` \
-(with a sufficient line limit) before finalizing your answer.
+skill under `/skills/` (audit, MCC, MCE, DRG shifts), load the relevant sections with \
+`skill_sections` (read the full SKILL.md via `read_file` only if they fall short) before \
+finalizing your answer.
 """
 
 
-def create_drg_agent():
+def create_drg_agent(
+    host: str | None = None,
+    token: str | None = None,
+    llm_endpoint: str | None = None,
+    genie_space_id: str | None = None,
+    tool_server: str | None = None,
+    strict: bool | None = None,
+):
     """Build and return the DRG claims analysis agent.
 
     Uses DeepAgents with GenieAgent for data queries and custom sub-agents
     for compliance auditing. Falls back to a simple LangGraph agent if
     DeepAgents is not installed.
+
+    Arguments override the ``config`` / environment values; the Streamlit app
+    passes the connection form so one compiled agent can be shared by every
+    session using the same workspace (see ``app.py``). The compiled graph
+    holds no per-conversation state and is safe to reuse across threads.
+    Its LLM and Genie clients get their own ``WorkspaceClient`` for ``host`` /
+    ``token``; nothing is written to the (process-wide) environment, so
+    agents for different users never swap credentials.
+
+    ``strict`` (default ``DRG_AGENT_STRICT``) rejects placeholder connection
+    settings before anything is built.
+
+    ``tool_server`` ("stdio" or an MCP URL, default ``DRG_TOOL_SERVER``) runs
+    the seven reference tools in ``tool_server.py`` instead of in-process.
     """
-    strict = os.getenv("DRG_AGENT_STRICT", "0").lower() in ("1", "true", "yes")
-    if strict:
-        validate_production_settings()
+    host = host or DATABRICKS_HOST
+    token = token or DATABRICKS_TOKEN
+    genie_space_id = genie_space_id or GENIE_SPACE_ID
+    if DRG_AGENT_STRICT if strict is None else strict:
+        validate_production_settings(host, token, genie_space_id)
     try:
         verify_bundled_reference_data()
     except (OSError, ValueError) as e:
         logger.error("Bundled reference data check failed: %s", e)
         raise
+    skill_index()  # split and index the SKILL.md sections once, before the first question
+    search_index()  # and build code_search's BM25 index (~2 s)
 
+    from databricks.sdk import WorkspaceClient
     from databricks_langchain import ChatDatabricks
     from databricks_langchain.genie import GenieAgent
 
-    os.environ.setdefault("DATABRICKS_HOST", DATABRICKS_HOST)
-    os.environ.setdefault("DATABRICKS_TOKEN", DATABRICKS_TOKEN)
-
-    llm = ChatDatabricks(endpoint=LLM_ENDPOINT)
+    # pat: ignore any other auth (OAuth, profiles) configured in the environment
+    workspace = WorkspaceClient(host=host, token=token, auth_type="pat")
+    llm = ChatDatabricks(endpoint=llm_endpoint or LLM_ENDPOINT, workspace_client=workspace)
+    reference_tools = _reference_tools(DRG_TOOL_SERVER if tool_server is None else tool_server)
 
     genie = GenieAgent(
-        genie_space_id=GENIE_SPACE_ID,
+        genie_space_id=genie_space_id,
         genie_agent_name="claims-data-analyst",
         description=(
             "Query the DRG claims database using natural language. "
@@ -196,6 +267,7 @@ def create_drg_agent():
             "This agent writes SQL on the fly against the "
             "healthcare.claims.drg_claims table."
         ),
+        client=workspace,
     )
 
     try:
@@ -216,13 +288,14 @@ def create_drg_agent():
         agent = create_deep_agent(
             model=llm,
             tools=[
-                drg_lookup,
-                drg_family_lookup,
-                icd_code_validate,
-                cc_mcc_check,
-                drg_shift_analysis,
-                mce_code_check,
-                v43_1_pcs_check,
+                *reference_tools,
+                batch_claim_audit,
+                drg_principal_diagnoses,
+                icd_family_drgs,
+                drg_pdx_overlap,
+                drg_group_claim,
+                code_search,
+                skill_sections,
             ],
             system_prompt=DRG_SYSTEM_PROMPT,
             backend=_backend,
@@ -247,13 +320,14 @@ def create_drg_agent():
                     ),
                     system_prompt=COMPLIANCE_AUDITOR_PROMPT,
                     tools=[
-                        drg_lookup,
-                        drg_family_lookup,
-                        icd_code_validate,
-                        cc_mcc_check,
-                        drg_shift_analysis,
-                        mce_code_check,
-                        v43_1_pcs_check,
+                        *reference_tools,
+                        batch_claim_audit,
+                        drg_principal_diagnoses,
+                        icd_family_drgs,
+                        drg_pdx_overlap,
+                        drg_group_claim,
+                        code_search,
+                        skill_sections,
                     ],
                     skills=["/skills/"],
                 ),
@@ -266,10 +340,35 @@ def create_drg_agent():
         logger.warning(
             "deepagents not installed, falling back to simple LangGraph agent"
         )
-        return _create_fallback_agent(llm, genie)
+        return _create_fallback_agent(llm, genie, reference_tools)
+
+
+REFERENCE_TOOLS = (
+    drg_lookup,
+    drg_family_lookup,
+    icd_code_validate,
+    cc_mcc_check,
+    drg_shift_analysis,
+    mce_code_check,
+    v43_1_pcs_check,
+)
+
+
+def _reference_tools(tool_server: str) -> list:
+    """The seven reference tools, in-process or proxied to the MCP tool server
+    together with their ``<name>_batch`` endpoints."""
+    if not tool_server:
+        return list(REFERENCE_TOOLS)
+    from tool_client import connect
+    from tool_server import BATCH_SUFFIX
 
+    names = [t.name for t in REFERENCE_TOOLS]
+    tools = connect(tool_server).tools(names + [name + BATCH_SUFFIX for name in names])
+    logger.info("Reference tools served by %s", tool_server)
+    return tools
 
-def _create_fallback_agent(llm, genie):
+
+def _create_fallback_agent(llm, genie, reference_tools=REFERENCE_TOOLS):
     """Simple LangGraph ReAct agent as fallback when DeepAgents is unavailable."""
     from typing import Annotated, Any, Optional, Sequence, TypedDict
 
@@ -280,13 +379,14 @@ def _create_fallback_agent(llm, genie):
     from langgraph.prebuilt.tool_node import ToolNode
 
     all_tools = [
-        drg_lookup,
-        drg_family_lookup,
-        icd_code_validate,
-        cc_mcc_check,
-        drg_shift_analysis,
-        mce_code_check,
-        v43_1_pcs_check,
+        *reference_tools,
+        batch_claim_audit,
+        drg_principal_diagnoses,
+        icd_family_drgs,
+        drg_pdx_overlap,
+        drg_group_claim,
+        code_search,
+        skill_sections,
     ]
 
     class AgentState(TypedDict):
@@ -320,10 +420,64 @@ def _create_fallback_agent(llm, genie):
     return wf.compile()
 
 
+def _text(content) -> str:
+    """Text of a message / chunk ``content`` (plain string or content blocks)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            b.get("text", "") if isinstance(b, dict) else str(b)
+            for b in content
+            if isinstance(b, str) or (isinstance(b, dict) and b.get("type") == "text")
+        )
+    return ""
+
+
+def stream_drg_agent(agent, messages: list):
+    """Run the agent with ``agent.stream`` and yield UI events as they happen.
+
+    Events (tuples):
+      ("token", text)                        -- answer text delta from the main model
+      ("tool_call", name, args)              -- the model asked for a tool
+      ("tool_result", name, content)         -- that tool returned
+      ("final", text)                        -- the complete last answer
+
+    Tokens from models running inside tools (sub-agents) are not forwarded;
+    their work shows up as the ``task`` tool call / result. Closing the
+    generator (e.g. a Stop button in the UI) stops the run at the next step.
+    """
+    answer_id, answer = None, ""
+    for mode, chunk in agent.stream({"messages": messages}, stream_mode=["messages", "updates"]):
+        if mode == "messages":
+            msg, meta = chunk
+            if "|" in (meta or {}).get("langgraph_checkpoint_ns", ""):
+                continue  # nested graph (sub-agent) inside a tool call
+            if getattr(msg, "type", "") not in ("AIMessageChunk", "ai"):
+                continue
+            delta = _text(msg.content)
+            if not delta:
+                continue
+            if msg.id != answer_id:  # a new model turn replaces the answer so far
+                answer_id, answer = msg.id, ""
+            answer += delta
+            yield ("token", delta)
+            continue
+        for update in (chunk or {}).values():
+            for msg in (update or {}).get("messages", []) if isinstance(update, dict) else []:
+                if getattr(msg, "tool_calls", None):
+                    for call in msg.tool_calls:
+                        yield ("tool_call", call["name"], call.get("args", {}))
+                elif getattr(msg, "type", "") == "tool":
+                    yield ("tool_result", msg.name, _text(msg.content))
+    yield ("final", answer)
+
+
 if __name__ == "__main__":
+    import fast_path
+
     agent = create_drg_agent()
-    result = agent.invoke(
-        {"messages": [{"role": "user", "content": "What is DRG 470?"}]}
+    result = fast_path.invoke(
+        agent, {"messages": [{"role": "user", "content": "What is DRG 470?"}]}
     )
     for msg in result["messages"]:
         print(f"[{msg.type}] {msg.content[:200] if msg.content else msg.tool_calls}")
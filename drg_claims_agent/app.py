@@ -10,6 +10,8 @@ Run:  streamlit run app.py
 
 import os
 import json
+import time
+import hashlib
 import streamlit as st
 
 try:
@@ -106,6 +108,20 @@ with st.sidebar:
         if st.button(s, key=f"sample_{s[:20]}", use_container_width=True):
             st.session_state.pending_input = s
 
+    if connected:
+        try:
+            import fast_path
+
+            fp = fast_path.STATS.snapshot()
+            if fp["questions"]:
+                saved = fp["estimated_latency_saved_s"]
+                st.caption(
+                    f"Fast path: {fp['fast_path_hits']}/{fp['questions']} answered directly "
+                    f"({fp['hit_rate_pct']}%)" + (f", ~{saved}s saved" if saved is not None else "")
+                )
+        except ImportError:
+            pass
+
     st.markdown("---")
     if st.button("Clear Chat", use_container_width=True):
         st.session_state.messages = []
@@ -339,32 +355,86 @@ def get_demo_response(msg: str) -> str:
     return DEMO["default"]
 
 
-def call_agent(user_msg: str, history: list) -> str:
-    """Call the DeepAgents agent via the agent module."""
-    try:
-        os.environ["DATABRICKS_HOST"] = db_host
-        os.environ["DATABRICKS_TOKEN"] = db_token
-        os.environ["LLM_ENDPOINT"] = llm_ep
-        os.environ["GENIE_SPACE_ID"] = genie_id
-        os.environ["DRG_AGENT_STRICT"] = _env("DRG_AGENT_STRICT", "0")
+@st.cache_resource(show_spinner="Connecting to Databricks...", max_entries=8)
+def _shared_agent(host: str, llm_endpoint: str, genie_space_id: str, strict: bool, token_key: str, _token: str):
+    """One compiled agent per workspace / endpoint / Genie space for the whole process.
+
+    Every session with the same connection settings reuses it (no per-session
+    graph, skills backend or clients). ``token_key`` (a hash) is part of the
+    cache key so a different token gets its own agent; the token itself is not hashed
+    by Streamlit (leading underscore). The agent's clients are bound to this
+    host / token; nothing goes through the process environment, which every
+    session shares.
+    """
+    from agent import create_drg_agent
+
+    return create_drg_agent(
+        host=host, token=_token, llm_endpoint=llm_endpoint, genie_space_id=genie_space_id, strict=strict
+    )
+
 
-        from agent import create_drg_agent
+def _get_agent():
+    strict = _env("DRG_AGENT_STRICT", "0").lower() in ("1", "true", "yes")
+    token_key = hashlib.sha256(db_token.encode("utf-8")).hexdigest()[:16]
+    return _shared_agent(db_host, llm_ep, genie_id, strict, token_key, db_token)
 
-        if "agent_instance" not in st.session_state:
-            st.session_state.agent_instance = create_drg_agent()
 
-        agent = st.session_state.agent_instance
-        msgs = [{"role": m["role"], "content": m["content"]} for m in history]
-        msgs.append({"role": "user", "content": user_msg})
+def _request_stop() -> None:
+    st.session_state.stop_requested = True
 
-        result = agent.invoke({"messages": msgs})
 
-        for msg in reversed(result["messages"]):
-            if hasattr(msg, "content") and msg.content and getattr(msg, "type", "") == "ai":
-                return msg.content
-        return str(result)
+def stream_agent(user_msg: str, history: list, answer_box, steps) -> str:
+    """Stream the agent's answer into ``answer_box`` and tool steps into ``steps``.
+
+    The partial answer is mirrored in ``st.session_state.inflight`` so a run
+    stopped by the Stop button (or any other rerun) keeps what was shown.
+    """
+    import fast_path
+
+    # Simple reference questions never need the agent (or its start-up cost).
+    answer = fast_path.route(user_msg)
+    if answer is not None:
+        fast_path.STATS.record_hit(answer.intent, answer.elapsed_ms)
+        steps.update(label=f"Answered from reference data ({answer.tool})", state="complete")
+        return answer.text
+
+    from agent import stream_drg_agent
+
+    msgs = [{"role": m["role"], "content": m["content"]} for m in history]
+    msgs.append({"role": "user", "content": user_msg})
+    started = time.perf_counter()
+    first_token = None
+    text, final = "", ""
+    st.session_state.inflight = {"prompt": user_msg, "text": ""}
+    try:
+        agent = _get_agent()
+        for event in stream_drg_agent(agent, msgs):
+            kind = event[0]
+            if kind == "token":
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                text += event[1]
+                st.session_state.inflight["text"] = text
+                answer_box.markdown(text + "▌")
+            elif kind == "tool_call":
+                text = ""  # the text so far was the model thinking aloud before a tool
+                answer_box.markdown("")
+                steps.update(label=f"Running {event[1]}...")
+                steps.markdown(f"🔧 `{event[1]}` {json.dumps(event[2])[:200]}")
+            elif kind == "tool_result":
+                steps.markdown(f"✓ `{event[1]}` returned {len(event[2]):,} chars")
+            else:
+                final = event[1]
     except Exception as e:
+        st.session_state.pop("inflight", None)
+        steps.update(label="Failed", state="error")
         return f"Error: {e}\n\nMake sure Databricks credentials are correct and `deepagents` is installed."
+    st.session_state.pop("inflight", None)
+    total = time.perf_counter() - started
+    fast_path.STATS.record_agent(total * 1000.0)
+    ttft = f"first token {first_token:.1f}s, " if first_token is not None else ""
+    steps.update(label=f"Done ({ttft}total {total:.1f}s)", state="complete")
+    return final or text or "The agent returned no answer."
 
 
 # ── Chat State ───────────────────────────────────────────────────
@@ -373,6 +443,17 @@ if "messages" not in st.session_state:
 if "reports" not in st.session_state:
     st.session_state.reports = []
 
+# A run that was still streaming when the script reran (Stop button, or any other
+# widget) never reached its append below -- keep what the user already saw.
+_interrupted = st.session_state.pop("inflight", None)
+if _interrupted is not None:
+    reason = "Stopped." if st.session_state.pop("stop_requested", False) else "Interrupted."
+    partial = _interrupted["text"].strip()
+    st.session_state.messages.append(
+        {"role": "assistant", "content": (partial + "\n\n" if partial else "") + f"_{reason}_"}
+    )
+st.session_state.pop("stop_requested", None)
+
 # ── Main Layout ──────────────────────────────────────────────────
 with col_main:
     for message in st.session_state.messages:
@@ -397,12 +478,16 @@ with col_main:
             st.markdown(prompt)
 
         with st.chat_message("assistant", avatar="🏥"):
-            with st.spinner("Analyzing..."):
-                if connected:
-                    response = call_agent(prompt, st.session_state.messages[:-1])
-                else:
+            if connected:
+                st.button("⏹ Stop", key="stop_run", on_click=_request_stop)
+                steps = st.status("Thinking...", expanded=False)
+                answer_box = st.empty()
+                response = stream_agent(prompt, st.session_state.messages[:-1], answer_box, steps)
+                answer_box.markdown(response)
+            else:
+                with st.spinner("Analyzing..."):
                     response = get_demo_response(prompt)
-            st.markdown(response)
+                st.markdown(response)
 
         st.session_state.messages.append({"role": "assistant", "content": response})
 
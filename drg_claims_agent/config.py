@@ -17,6 +17,27 @@ GENIE_SPACE_ID = os.getenv("GENIE_SPACE_ID", "01f0abcd1234567890abcdef")
 
 LLM_ENDPOINT = os.getenv("LLM_ENDPOINT", "databricks-meta-llama-3-3-70b-instruct")
 
+# Where bulk tools (batch claim audit, etc.) write their findings files
+BATCH_OUTPUT_DIR = os.getenv(
+    "DRG_BATCH_OUTPUT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+)
+
+# Claims extract (Parquet / CSV / JSONL with provider_id, provider_name, drg_code)
+# for drg_shift_analysis; empty -> bundled sample cohorts
+DRG_SHIFT_CLAIMS_PATH = os.getenv("DRG_SHIFT_CLAIMS_PATH", "")
+
+# Providers below this many claims in a family are listed but never flagged
+DRG_SHIFT_MIN_CLAIMS = int(os.getenv("DRG_SHIFT_MIN_CLAIMS", "1"))
+
+# Answer simple reference questions (DRG weight, ICD-DRG validity, CC/MCC, MCE,
+# V43.1 PCS) straight from the tools instead of the agent loop; 0 disables
+DRG_FAST_PATH = os.getenv("DRG_FAST_PATH", "1").lower() in ("1", "true", "yes")
+
+# Where the seven reference tools (drg_lookup ... v43_1_pcs_check) run:
+# "" in-process, "stdio" to spawn tool_server.py, or the URL of a running
+# server (e.g. http://127.0.0.1:8765/mcp) shared by several agent processes
+DRG_TOOL_SERVER = os.getenv("DRG_TOOL_SERVER", "").strip()
+
 # Set to 1 / true in production so missing or placeholder Databricks creds fail fast
 DRG_AGENT_STRICT = os.getenv("DRG_AGENT_STRICT", "0").lower() in (
     "1",
@@ -25,10 +46,12 @@ DRG_AGENT_STRICT = os.getenv("DRG_AGENT_STRICT", "0").lower() in (
 )
 
 
-def _is_placeholder_databricks_config() -> bool:
-    host = (DATABRICKS_HOST or "").lower()
-    tok = (DATABRICKS_TOKEN or "").strip()
-    space = (GENIE_SPACE_ID or "").lower()
+def _is_placeholder_databricks_config(
+    host: str | None = None, token: str | None = None, genie_space_id: str | None = None
+) -> bool:
+    host = (host or DATABRICKS_HOST or "").lower()
+    tok = (token or DATABRICKS_TOKEN or "").strip()
+    space = (genie_space_id or GENIE_SPACE_ID or "").lower()
     if "your-workspace" in host:
         return True
     if "01f0abcd" in space:
@@ -46,15 +69,18 @@ def _is_placeholder_databricks_config() -> bool:
     return False
 
 
-def validate_production_settings() -> None:
+def validate_production_settings(
+    host: str | None = None, token: str | None = None, genie_space_id: str | None = None
+) -> None:
     """Raise ValueError if Databricks settings are missing or look like template values.
 
+    Checks the given connection values, else the ones from the environment.
     Enable by setting environment variable ``DRG_AGENT_STRICT=1`` before
     creating the agent (recommended for any deployed environment).
     """
-    if not DATABRICKS_HOST.startswith("https://"):
+    if not (host or DATABRICKS_HOST).startswith("https://"):
         raise ValueError("DATABRICKS_HOST must be an https:// workspace URL")
-    if _is_placeholder_databricks_config():
+    if _is_placeholder_databricks_config(host, token, genie_space_id):
         raise ValueError(
             "Databricks configuration looks unset or still uses .env.example placeholders. "
             "Set DATABRICKS_HOST, DATABRICKS_TOKEN, GENIE_SPACE_ID, and LLM_ENDPOINT "
@@ -73,6 +99,7 @@ def verify_bundled_reference_data() -> None:
         "v43_1_new_pcs_codes.json": lambda d: d.get("count") == 80,
         "icd_to_drg.json": lambda d: len(d) > 50_000,
         "cc_mcc_list.json": lambda d: len(d) > 15_000,
+        os.path.join("versions", "manifest.json"): lambda d: len(d.get("versions", [])) >= 5,
     }
     for fname, check in must.items():
         path = os.path.join(base, fname)
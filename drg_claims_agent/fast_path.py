@@ -0,0 +1,370 @@
+"""
+Deterministic fast path for simple reference questions.
+
+Questions like "What is the CMS weight for DRG 871?" or "Is ICD M16.11 correct
+for DRG 470?" need exactly one reference tool call, yet through the DeepAgents
+loop they cost several LLM round trips (plus skill reads) before that call.
+``route`` recognizes such questions -- explicit DRG / ICD-10-CM / ICD-10-PCS
+codes plus an unambiguous intent keyword -- runs the tool directly and renders
+a templated markdown answer in a few milliseconds.
+
+Anything it is not sure about returns ``None`` and goes to the agent:
+  - data / claims / audit / report wording (needs Genie or planning)
+  - more than one intent, or codes that do not fit the intent
+  - codes the reference data does not know, or tool errors
+  - a fiscal year or grouper version the tool cannot take, or that names
+    several grouper versions (FY2026 is V43 and V43.1)
+
+"FY2023" / "V41" in a DRG lookup or CC/MCC question becomes the first
+discharge date of that version, so the answer comes from (and names) that
+year's tables.
+
+``invoke`` wraps ``agent.invoke`` with the router and keeps ``STATS``: hit
+rate per intent, fast-path latency, and the agent latency saved (hits x the
+running mean of agent calls that did go through the loop).
+
+Disable with DRG_FAST_PATH=0.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from config import DRG_FAST_PATH
+from tools.drg_index import DRG_INDEX
+from tools.drg_lookup import CC_MCC_LIST, MS_DRG_REFERENCE, drg_family_lookup, drg_lookup
+from tools.icd_validate import cc_mcc_check, icd_code_validate
+from tools.mce_validate import MCE_DATA, mce_code_check
+from tools.pcs_v43_1 import v43_1_pcs_check
+from tools.reference_store import MANIFEST, version_for_date
+
+logger = logging.getLogger(__name__)
+
+# ── Code and keyword patterns ────────────────────────────────────
+_RE_DRG = re.compile(r"\b(?:MS-)?DRG\s*(?:code\s*)?#?\s*(\d{1,3})\b", re.I)
+_RE_ICD = re.compile(r"\b([A-TV-Z]\d[0-9A-Z](?:\.?[0-9A-Z]{1,4})?)\b", re.I)
+_RE_PCS = re.compile(r"\b([0-9A-HJ-NP-Z]{7})\b")
+_RE_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_RE_AGE = re.compile(r"\b(\d{1,3})[- ]?(?:years?|yrs?|y/?o)\b", re.I)
+# "V43.1", "version 42", "FY2026" look like codes to the ICD pattern
+_RE_NOT_CODES = re.compile(r"\bv(?:ersion\s*)?\d{2}(?:\.\d)?\b|\bFY\s*\d{2,4}\b|\bQ[1-4]\b", re.I)
+_RE_FY = re.compile(r"\bFY\s*(\d{4}|\d{2})\b", re.I)
+_RE_VERSION = re.compile(r"\bv(?:ersion\s*)?(\d{2}(?:\.\d)?)\b", re.I)
+# intents whose tool takes a discharge date
+_DATED = ("lookup", "cc_mcc")
+
+# Wording that needs claims data, planning or prose -- always the agent's job.
+_AGENT_ONLY = re.compile(
+    r"\b(claims?|provider|hospital|payer|patients? (?:with|who)|audit|report|compare|trend|shift|"
+    r"upcod\w*|top|how many|average|total|rate|explain|why|summar\w*|write|all)\b",
+    re.I,
+)
+
+_INTENTS: dict[str, re.Pattern] = {
+    "validate": re.compile(r"\b(valid|correct|match(?:es)?|appropriate|justif\w*|map(?:s|ped)? to|allowed)\b", re.I),
+    "family": re.compile(r"\b(severity (?:tiers?|levels?)|tiers?|family|spread)\b", re.I),
+    "cc_mcc": re.compile(r"\b(mcc|cc|comorbidit\w*|complications?)\b", re.I),
+    "mce": re.compile(r"\b(mce|medicare code edit\w*|code edits?|age conflict|unacceptable principal)\b", re.I),
+    "pcs": re.compile(r"\b(new (?:pcs|procedure)|v43\.1|april 2026|announcement)\b", re.I),
+    "lookup": re.compile(
+        r"\b(weight|relative weight|gmlos|amlos|mean los|length of stay|los|mdc|"
+        r"medical or surgical|description|what is)\b",
+        re.I,
+    ),
+}
+
+_DISCLAIMER = "_Reference data for coding/billing review, not clinical decision-making._"
+
+
+@dataclass
+class FastPathAnswer:
+    intent: str
+    tool: str
+    text: str
+    elapsed_ms: float
+
+
+class FastPathStats:
+    """Thread-safe hit/miss counters; the Streamlit app and scripts share one instance."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.questions = 0
+        self.hits = 0
+        self.hits_by_intent: dict[str, int] = {}
+        self.fast_ms = 0.0
+        self.agent_calls = 0
+        self.agent_ms = 0.0
+
+    def record_hit(self, intent: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.questions += 1
+            self.hits += 1
+            self.hits_by_intent[intent] = self.hits_by_intent.get(intent, 0) + 1
+            self.fast_ms += elapsed_ms
+
+    def record_agent(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.questions += 1
+            self.agent_calls += 1
+            self.agent_ms += elapsed_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            mean_agent = self.agent_ms / self.agent_calls if self.agent_calls else None
+            mean_fast = self.fast_ms / self.hits if self.hits else None
+            saved = (mean_agent - mean_fast) * self.hits if mean_agent is not None and self.hits else None
+            return {
+                "questions": self.questions,
+                "fast_path_hits": self.hits,
+                "hit_rate_pct": round(100.0 * self.hits / self.questions, 1) if self.questions else 0.0,
+                "hits_by_intent": dict(self.hits_by_intent),
+                "mean_fast_path_ms": round(mean_fast, 2) if mean_fast is not None else None,
+                "mean_agent_ms": round(mean_agent, 1) if mean_agent is not None else None,
+                "estimated_latency_saved_s": round(saved / 1000.0, 2) if saved is not None else None,
+            }
+
+
+STATS = FastPathStats()
+
+
+# ── Recognition ──────────────────────────────────────────────────
+def _norm_icd(code: str) -> str:
+    return code.upper().replace(".", "")
+
+
+def _known_icd(icd: str) -> bool:
+    if icd in DRG_INDEX.icd_drgs or icd in CC_MCC_LIST:
+        return True
+    mce_lists = [MCE_DATA.get(k, {}) for k in ("manifestation_not_pdx", "questionable_admission_pdx", "unacceptable_pdx")]
+    mce_lists += MCE_DATA.get("age_conflict_lists", {}).values()
+    return any(icd in codes for codes in mce_lists)
+
+
+def _extract(question: str) -> dict:
+    text = _RE_NOT_CODES.sub(" ", question)
+    drgs = [d.zfill(3) for d in _RE_DRG.findall(text)]
+    pcs = [c for c in _RE_PCS.findall(text.upper()) if c[0].isdigit() and sum(ch.isdigit() for ch in c) >= 2]
+    without_drg = _RE_DRG.sub(" ", text)
+    icds = [_norm_icd(c) for c in _RE_ICD.findall(without_drg) if _norm_icd(c) not in pcs]
+    age = _RE_AGE.search(question)
+    date = _RE_DATE.search(question)
+    return {
+        "drgs": list(dict.fromkeys(drgs)),
+        "icds": list(dict.fromkeys(icds)),
+        "pcs": list(dict.fromkeys(pcs)),
+        "age": int(age.group(1)) if age else None,
+        "discharge_date": date.group(1) if date else "",
+    }
+
+
+def _reference_date(question: str) -> str | None:
+    """First discharge date of the grouper version an FY / version mention
+    names ("" if there is none; None if it names an unknown or several
+    versions)."""
+    versions = set()
+    for fy in _RE_FY.findall(question):
+        fy = fy if len(fy) == 4 else "20" + fy
+        versions.add(tuple(v["version"] for v in MANIFEST["versions"] if v["fiscal_year"] == fy))
+    versions |= {(v,) if any(m["version"] == v for m in MANIFEST["versions"]) else () for v in _RE_VERSION.findall(question)}
+    if not versions:
+        return ""
+    if len(versions) > 1 or len(next(iter(versions))) != 1:
+        return None
+    (version,) = versions.pop()
+    return next(v["start"] for v in MANIFEST["versions"] if v["version"] == version)
+
+
+def _classify(question: str, codes: dict) -> str | None:
+    """Exactly one intent whose code shape matches, else None."""
+    drgs, icds, pcs = codes["drgs"], codes["icds"], codes["pcs"]
+    hits = {name for name, rx in _INTENTS.items() if rx.search(question)}
+    # "MCC" also appears in DRG titles / tier questions; "what is" is generic.
+    if "family" in hits:
+        hits.discard("cc_mcc")
+        hits.discard("lookup")
+    if "mce" in hits:
+        hits.discard("validate")
+    if len(hits) > 1:
+        hits.discard("lookup")
+
+    if hits == {"validate"} and len(drgs) == 1 and len(icds) == 1 and not pcs:
+        return "validate"
+    if hits == {"family"} and len(drgs) == 1 and not icds and not pcs:
+        return "family"
+    if hits == {"cc_mcc"} and len(icds) == 1 and not drgs and not pcs:
+        return "cc_mcc"
+    if hits == {"mce"} and len(icds) == 1 and not drgs and not pcs:
+        return "mce"
+    if hits <= {"pcs", "lookup"} and len(pcs) == 1 and not drgs and not icds and ("pcs" in hits or "procedure" in question.lower()):
+        return "pcs"
+    if hits == {"lookup"} and len(drgs) == 1 and not icds and not pcs:
+        return "lookup"
+    return None
+
+
+# ── Templates ────────────────────────────────────────────────────
+def _version_line(d: dict) -> str:
+    if "reference_version" in d:
+        return f"\n\nGrouper **V{d['reference_version']}** (FY{d['fiscal_year']}, discharges {d['discharges']})."
+    return ""
+
+
+def _render_lookup(d: dict) -> str:
+    return (
+        f"**MS-DRG {d['drg_code']} -- {d['description']}**\n\n"
+        "| Field | Value |\n|---|---|\n"
+        f"| MDC | {d['mdc']} |\n"
+        f"| Type | {d['type']} |\n"
+        f"| Relative weight | {d['relative_weight']:.4f} |\n"
+        f"| GMLOS | {d['geometric_mean_los']} days |\n"
+        f"| AMLOS | {d['arithmetic_mean_los']} days |"
+        + _version_line(d)
+    )
+
+
+def _render_family(d: dict) -> str:
+    rows = "".join(
+        f"| {tier.upper()} | {t['drg_code']} | {t['description']} | {t['relative_weight']:.4f} | {t['geometric_mean_los']} |\n"
+        for tier, t in d["tiers"].items()
+    )
+    return (
+        f"**{d['label']}** severity tiers\n\n"
+        "| Tier | DRG | Description | Weight | GMLOS |\n|---|---|---|---|---|\n"
+        f"{rows}\n"
+        f"Weight spread top vs bottom tier: **{d['weight_spread_pct']:.1f}%** (shift risk: {d['shift_risk']})."
+    )
+
+
+def _render_validate(d: dict) -> str | None:
+    if d.get("valid") is None:
+        return None
+    verdict = "**Valid**" if d["valid"] else "**Not valid -- coding error**"
+    text = f"{verdict}: ICD-10 **{d['icd_code']}** for MS-DRG **{d['drg_code']}** ({d['drg_description']}).\n\n{d['reasoning']}"
+    if d.get("suggested_drgs"):
+        rows = "".join(f"| {s['drg_code']} | {s['description']} | {s['relative_weight']} |\n" for s in d["suggested_drgs"])
+        text += "\n\n| Suggested DRG | Description | Weight |\n|---|---|---|\n" + rows
+    return text
+
+
+def _render_cc_mcc(d: dict) -> str:
+    return (
+        f"**{d['icd_code']}** is **{d['classification']}** ({d['description']}).\n\n"
+        f"{d['severity_impact']}." + _version_line(d)
+    )
+
+
+def _render_mce(d: dict) -> str:
+    if not d["flags"]:
+        head = f"MCE {d['mce_version']}: no edits triggered for **{d['icd_code']}**."
+    else:
+        rows = "".join(f"| {f['edit']} | {f.get('detail', '')} |\n" for f in d["flags"])
+        head = f"MCE {d['mce_version']} edits for **{d['icd_code']}**:\n\n| Edit | Detail |\n|---|---|\n{rows}"
+    return head + (f"\n\n{d['summary']}" if d.get("summary") else "")
+
+
+def _render_pcs(d: dict) -> str:
+    if not d["in_v43_1_new_80"]:
+        return f"**{d['pcs']}** is **not** one of the 80 new ICD-10-PCS codes effective {d['effective']} (V43.1)."
+    text = (
+        f"**{d['pcs']}** is a new V43.1 ICD-10-PCS code (effective {d['effective']}): {d['description']}."
+    )
+    if d.get("or_procedure"):
+        text += f"\n\nO.R. procedure: **{d['or_procedure']}**."
+    if d.get("footnote_explanation"):
+        text += f" {d['footnote_explanation']}"
+    return text
+
+
+def _run(intent: str, codes: dict, question: str) -> tuple[str, str | None]:
+    if intent == "lookup":
+        tool, args, render = drg_lookup, {"drg_code": codes["drgs"][0], "discharge_date": codes["discharge_date"]}, _render_lookup
+    elif intent == "family":
+        tool, args, render = drg_family_lookup, {"drg_code": codes["drgs"][0]}, _render_family
+    elif intent == "validate":
+        tool, args, render = icd_code_validate, {"icd_code": codes["icds"][0], "drg_code": codes["drgs"][0]}, _render_validate
+    elif intent == "cc_mcc":
+        tool, args, render = cc_mcc_check, {"icd_code": codes["icds"][0], "discharge_date": codes["discharge_date"]}, _render_cc_mcc
+    elif intent == "mce":
+        args = {"icd_code": codes["icds"][0], "is_principal": "secondary" not in question.lower()}
+        if codes["age"] is not None:
+            args["patient_age"] = codes["age"]
+        tool, render = mce_code_check, _render_mce
+    else:
+        tool, args, render = v43_1_pcs_check, {"pcs_code": codes["pcs"][0]}, _render_pcs
+    raw = tool.invoke({**args, "verbosity": "full"})  # templates read the record lists
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return tool.name, None
+    if not isinstance(data, dict) or "error" in data:
+        return tool.name, None
+    return tool.name, render(data)
+
+
+def route(question: str) -> FastPathAnswer | None:
+    """Answer ``question`` from the reference tools, or None to use the agent."""
+    if not DRG_FAST_PATH or not question or _AGENT_ONLY.search(question):
+        return None
+    start = time.perf_counter()
+    codes = _extract(question)
+    intent = _classify(question, codes)
+    if intent is None:
+        return None
+    if intent == "lookup" or intent == "family":
+        if codes["drgs"][0] not in MS_DRG_REFERENCE:
+            return None
+    elif intent in ("validate", "cc_mcc", "mce") and not _known_icd(codes["icds"][0]):
+        return None
+    ref_date = _reference_date(question)
+    if ref_date is None:
+        return None
+    if ref_date:
+        if intent == "pcs":  # the tool is the V43.1 list itself
+            if version_for_date(ref_date) != "43.1":
+                return None
+        elif intent not in _DATED:
+            return None
+        elif not codes["discharge_date"]:
+            codes["discharge_date"] = ref_date
+        elif version_for_date(codes["discharge_date"]) != version_for_date(ref_date):
+            return None
+    try:
+        tool_name, body = _run(intent, codes, question)
+    except Exception as e:  # never let the shortcut break the chat
+        logger.warning("Fast path %s failed, using agent: %s", intent, e)
+        return None
+    if body is None:
+        return None
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    text = f"{body}\n\n{_DISCLAIMER}"
+    return FastPathAnswer(intent=intent, tool=tool_name, text=text, elapsed_ms=elapsed_ms)
+
+
+def invoke(agent, payload: dict, **kwargs) -> dict:
+    """``agent.invoke`` with the fast path in front (same input / output shape).
+
+    Fast-path results come back as ``{"messages": [..., AIMessage], "fast_path": {...}}``.
+    """
+    messages = payload.get("messages") or []
+    last = messages[-1] if messages else None
+    question = last.get("content") if isinstance(last, dict) else getattr(last, "content", "")
+    answer = route(question if isinstance(question, str) else "")
+    if answer is not None:
+        from langchain_core.messages import AIMessage
+
+        STATS.record_hit(answer.intent, answer.elapsed_ms)
+        logger.info("Fast path hit: %s via %s in %.1f ms", answer.intent, answer.tool, answer.elapsed_ms)
+        return {
+            "messages": [*messages, AIMessage(content=answer.text)],
+            "fast_path": {"intent": answer.intent, "tool": answer.tool, "elapsed_ms": round(answer.elapsed_ms, 2)},
+        }
+    start = time.perf_counter()
+    result = agent.invoke(payload, **kwargs)
+    STATS.record_agent((time.perf_counter() - start) * 1000.0)
+    return result
@@ -0,0 +1,146 @@
+"""
+LangChain tools backed by the MCP tool server (``tool_server.py``).
+
+``DRG_TOOL_SERVER`` selects where the seven reference tools run:
+
+  - ""         in-process (default): the agent imports ``tools/`` directly
+  - "stdio"    spawn ``tool_server.py`` as a child process, talk over stdin/stdout
+  - "http://host:port/mcp"  connect to a running server (shared by many agents)
+
+``connect(target)`` returns one ``ToolServerClient`` per target for the life
+of the process. The MCP session runs on a private event-loop thread, so the
+synchronous LangChain tools it hands out can be called from any thread (the
+agent's ToolNode, Streamlit sessions) and share one connection.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import os
+import sys
+import threading
+from typing import Any
+
+from langchain_core.tools import StructuredTool, ToolException
+
+_SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool_server.py")
+_CONNECT_TIMEOUT_S = 120.0  # the server loads and warms the CMS tables before answering
+_CALL_TIMEOUT_S = 120.0
+
+
+class ToolServerClient:
+    """One MCP session to the DRG tool server, driven from a background loop."""
+
+    def __init__(self, target: str, timeout: float = _CALL_TIMEOUT_S) -> None:
+        self.target = target
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="drg-tool-client", daemon=True)
+        self._thread.start()
+        self._session = None
+        self._closed: asyncio.Event | None = None
+        self._ready = threading.Event()
+        self._error: BaseException | None = None
+        self._runner = asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+        if not self._ready.wait(_CONNECT_TIMEOUT_S):
+            self.close()
+            raise TimeoutError(f"DRG tool server {target!r} did not answer within {_CONNECT_TIMEOUT_S:.0f}s")
+        if self._error is not None:
+            self.close()
+            raise ConnectionError(f"Could not connect to DRG tool server {target!r}: {self._error}") from self._error
+        self.tool_specs = self._call(self._session.list_tools()).tools
+
+    def _server(self):
+        if self.target == "stdio":
+            from mcp import StdioServerParameters
+
+            return StdioServerParameters(
+                command=sys.executable, args=[_SERVER_SCRIPT], cwd=os.path.dirname(_SERVER_SCRIPT)
+            )
+        return self.target
+
+    async def _run(self) -> None:
+        # The session is entered and exited in this one task (anyio scopes
+        # require it); calls from other threads are scheduled onto the loop.
+        from mcp import Client
+
+        self._closed = asyncio.Event()
+        try:
+            async with Client(self._server()) as session:
+                self._session = session
+                self._ready.set()
+                await self._closed.wait()
+        except BaseException as e:
+            self._error = e
+            raise
+        finally:
+            self._ready.set()
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(self.timeout)
+
+    def call(self, name: str, arguments: dict[str, Any]) -> str:
+        """Call a server tool and return its text output."""
+        result = self._call(self._session.call_tool(name, arguments))
+        text = "".join(getattr(block, "text", "") for block in result.content)
+        if result.is_error:
+            raise ToolException(text)
+        return text
+
+    def tools(self, names=None) -> list[StructuredTool]:
+        """LangChain tools for the server's tools (all, or ``names`` in that order)."""
+        specs = {spec.name: spec for spec in self.tool_specs}
+        missing = [n for n in names or () if n not in specs]
+        if missing:
+            raise ValueError(f"DRG tool server {self.target!r} does not serve: {', '.join(missing)}")
+        return [self._as_tool(specs[n]) for n in (names or specs)]
+
+    def _as_tool(self, spec) -> StructuredTool:
+        def run(**kwargs):
+            return self.call(spec.name, kwargs)
+
+        return StructuredTool(
+            name=spec.name,
+            description=spec.description or "",
+            args_schema=spec.input_schema,
+            func=run,
+            handle_tool_error=True,
+        )
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        if self._closed is not None:
+            self._loop.call_soon_threadsafe(self._closed.set)
+            try:
+                self._runner.result(10)
+            except Exception:
+                pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+        self._loop.close()
+
+
+_CLIENTS: dict[str, ToolServerClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def connect(target: str) -> ToolServerClient:
+    """Shared client for ``target`` ("stdio" or an http(s) URL)."""
+    target = target.strip()
+    if target != "stdio" and not target.startswith(("http://", "https://")):
+        raise ValueError(f"DRG_TOOL_SERVER must be 'stdio' or an http(s) URL, got {target!r}")
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(target)
+        if client is None:
+            client = _CLIENTS[target] = ToolServerClient(target)
+        return client
+
+
+@atexit.register
+def _close_all() -> None:
+    with _CLIENTS_LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
@@ -0,0 +1,161 @@
+"""
+DRG reference tools as a long-lived MCP tool server.
+
+Serves the seven reference tools (drg_lookup, drg_family_lookup,
+icd_code_validate, cc_mcc_check, drg_shift_analysis, mce_code_check,
+v43_1_pcs_check) from one process that loads the CMS tables once and keeps
+its indexes warm, so agent processes (Streamlit workers, notebooks, batch
+jobs) share it instead of each paying the load and first-call cost.
+
+Every tool keeps its in-process name, arguments and output. Each also has a
+``<name>_batch`` endpoint taking a list of argument dicts, answered in one
+round trip:
+
+  cc_mcc_check_batch(calls=[{"icd_code": "N17.9"}, {"icd_code": "E11.9"}])
+  -> {"count": 2, "results": [<cc_mcc_check result>, ...]}
+
+Point the agent at the server with ``DRG_TOOL_SERVER`` (see ``tool_client.py``).
+
+Usage (from drg_claims_agent/):
+  python tool_server.py                                 # stdio (spawned by the client)
+  python tool_server.py --transport http --port 8765    # http://127.0.0.1:8765/mcp
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mcp.server.mcpserver import MCPServer  # noqa: E402
+
+from tools.drg_lookup import drg_family_lookup, drg_lookup  # noqa: E402
+from tools.drg_shift import drg_shift_analysis  # noqa: E402
+from tools.encoding import DEFAULT_VERBOSITY, encode  # noqa: E402
+from tools.icd_validate import cc_mcc_check, icd_code_validate  # noqa: E402
+from tools.mce_validate import mce_code_check  # noqa: E402
+from tools.pcs_v43_1 import v43_1_pcs_check  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+SERVED_TOOLS = (
+    drg_lookup,
+    drg_family_lookup,
+    icd_code_validate,
+    cc_mcc_check,
+    drg_shift_analysis,
+    mce_code_check,
+    v43_1_pcs_check,
+)
+BATCH_SUFFIX = "_batch"
+MAX_BATCH_CALLS = 5000
+DEFAULT_HTTP_PATH = "/mcp"
+
+# One representative call per tool, run at startup so lazy caches (ICD
+# suggestion index, reference versions, shift cohorts) are built before the
+# first request rather than during it.
+_WARMUP_CALLS = (
+    (drg_lookup, {"drg_code": "871"}),
+    (drg_lookup, {"drg_code": "8711"}),
+    (drg_family_lookup, {"drg_code": "291"}),
+    (icd_code_validate, {"icd_code": "J18.9", "drg_code": "470"}),
+    (icd_code_validate, {"icd_code": "Z00.0", "drg_code": "470"}),
+    (cc_mcc_check, {"icd_code": "N17.9"}),
+    (drg_shift_analysis, {"family_name": "heart_failure"}),
+    (mce_code_check, {"icd_code": "N40.0", "patient_age": 5}),
+    (v43_1_pcs_check, {"pcs_code": "0F9480D"}),
+)
+
+
+def _parse(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return {"error": text}
+
+
+def run_batch(tool, calls: list[dict[str, Any]], verbosity: str = DEFAULT_VERBOSITY) -> str:
+    """Run ``tool`` once per argument dict; failures are reported per call."""
+    if len(calls) > MAX_BATCH_CALLS:
+        return encode({"error": f"At most {MAX_BATCH_CALLS} calls per batch, got {len(calls)}"}, verbosity)
+    results = []
+    for args in calls:
+        if not isinstance(args, dict):
+            results.append({"error": f"Each call must be an object of {tool.name} arguments"})
+            continue
+        try:
+            results.append(_parse(tool.invoke({**args, "verbosity": verbosity})))
+        except Exception as e:  # bad arguments for one call must not sink the batch
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return encode({"count": len(results), "results": results}, verbosity)
+
+
+def _batch_endpoint(tool):
+    def batch(calls: list[dict[str, Any]], verbosity: str = DEFAULT_VERBOSITY) -> str:
+        return run_batch(tool, calls, verbosity)
+
+    fields = ", ".join(k for k in tool.args if k != "verbosity")
+    description = (
+        f"Batch form of {tool.name}: run it once per entry of `calls`, each an object of "
+        f"{tool.name} arguments ({fields}), and return {{count, results}} in input order.\n\n"
+        f"{tool.name}: {tool.description}"
+    )
+    return batch, description
+
+
+def warm_up() -> None:
+    for tool, args in _WARMUP_CALLS:
+        try:
+            tool.invoke(args)
+        except Exception as e:
+            logger.warning("Warm-up call %s(%s) failed: %s", tool.name, args, e)
+
+
+def build_server(warm: bool = True) -> MCPServer:
+    """MCP server exposing ``SERVED_TOOLS`` and their ``_batch`` endpoints."""
+    server = MCPServer(
+        name="drg-reference-tools",
+        instructions="CMS MS-DRG V43.1 reference lookups and validations (DRG, ICD-10-CM, CC/MCC, MCE, PCS).",
+    )
+    for tool in SERVED_TOOLS:
+        server.add_tool(tool.func, name=tool.name, description=tool.description, structured_output=False)
+        batch, description = _batch_endpoint(tool)
+        server.add_tool(batch, name=tool.name + BATCH_SUFFIX, description=description, structured_output=False)
+    if warm:
+        warm_up()
+    return server
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Serve the DRG reference tools over MCP.")
+    ap.add_argument("--transport", choices=("stdio", "http"), default="stdio")
+    ap.add_argument("--host", default="127.0.0.1", help="HTTP bind address")
+    ap.add_argument("--port", type=int, default=8765, help="HTTP port")
+    ap.add_argument("--path", default=DEFAULT_HTTP_PATH, help="HTTP endpoint path")
+    args = ap.parse_args()
+
+    # stdout is the protocol channel under stdio; keep logs on stderr, and
+    # quiet there since they surface in the spawning agent's console
+    logging.basicConfig(level=logging.WARNING if args.transport == "stdio" else logging.INFO, stream=sys.stderr)
+    server = build_server()
+    if args.transport == "stdio":
+        server.run("stdio")
+    else:
+        logger.info("DRG tool server on http://%s:%d%s", args.host, args.port, args.path)
+        server.run(
+            "streamable-http",
+            host=args.host,
+            port=args.port,
+            streamable_http_path=args.path,
+            json_response=True,
+            stateless_http=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
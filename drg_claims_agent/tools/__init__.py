@@ -3,6 +3,11 @@ from tools.icd_validate import icd_code_validate, cc_mcc_check
 from tools.drg_shift import drg_shift_analysis
 from tools.mce_validate import mce_code_check
 from tools.pcs_v43_1 import v43_1_pcs_check
+from tools.batch_audit import batch_claim_audit
+from tools.drg_index import drg_principal_diagnoses, icd_family_drgs, drg_pdx_overlap
+from tools.grouper import drg_group_claim
+from tools.code_search import code_search
+from tools.skill_sections import skill_sections
 
 __all__ = [
     "drg_lookup",
@@ -12,4 +17,11 @@ __all__ = [
     "drg_shift_analysis",
     "mce_code_check",
     "v43_1_pcs_check",
+    "batch_claim_audit",
+    "drg_principal_diagnoses",
+    "icd_family_drgs",
+    "drg_pdx_overlap",
+    "drg_group_claim",
+    "code_search",
+    "skill_sections",
 ]
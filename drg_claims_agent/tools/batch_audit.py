@@ -0,0 +1,435 @@
+"""
+Batch Claim Audit -- bulk counterpart of the per-code validation tools.
+
+``icd_code_validate``, ``cc_mcc_check``, ``mce_code_check`` and
+``v43_1_pcs_check`` answer one code per LLM tool call. This module runs the
+same checks over a whole claims extract (DataFrame, Parquet, CSV or JSONL)
+with lookups precomputed once per grouper version, and emits one findings row
+per claim. Table 5, Appendix C and MCE come from the version in effect on the
+claim's discharge date (v40 - v43.1, see ``reference_store.py``).
+
+Checks (severity follows skills/audit-guidelines):
+  - PDX vs assigned DRG per CMS Appendix B            (CRITICAL)
+  - MCC-level DRG without an MCC secondary (App. C)   (CRITICAL)
+  - CC-level DRG without a CC/MCC secondary           (WARNING)
+  - MCE edits 4 / 6 / 8 / 9                           (WARNING / CRITICAL)
+  - V43.1 new PCS codes, incl. use before 2026-04-01  (ADVISORY / CRITICAL)
+  - LOS outliers vs Table 5 GMLOS / AMLOS             (WARNING)
+  - Assigned DRG vs local grouper expected DRG         (WARNING)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from langchain_core.tools import tool
+
+from config import BATCH_OUTPUT_DIR
+from tools.claims_io import DEFAULT_BATCH_SIZE, explode_codes, iter_claim_batches
+from tools.drg_index import DRG_INDEX
+from tools.drg_lookup import CC_MCC_LIST
+from tools.encoding import DEFAULT_VERBOSITY, encode
+from tools.grouper import CC_LEVEL, CONFIDENT_BASES, group_batch
+from tools.mce_validate import AGE_BOUNDS
+from tools.pcs_v43_1 import V43_1_PCS
+from tools.reference_store import VERSIONS, ReferenceVersion, load_version, version_positions
+
+SEVERITY_RANK = {"PASS": 0, "ADVISORY": 1, "WARNING": 2, "CRITICAL": 3}
+_RANK_TO_SEVERITY = {v: k for k, v in SEVERITY_RANK.items()}
+
+_NEW_PCS = frozenset(e["pcs"] for e in V43_1_PCS.get("procedures", []))
+_PCS_EFFECTIVE = pd.Timestamp(V43_1_PCS.get("effective_date", "2026-04-01"))
+
+
+class _AuditTables:
+    """Lookups for one grouper version, built once and shared by every batch."""
+
+    def __init__(self, ref: ReferenceVersion) -> None:
+        self.version = ref.version
+        drg, mce = ref.drg, ref.mce
+        self.drg = drg
+        self.cc_level = (
+            CC_LEVEL if ref.cc_mcc is CC_MCC_LIST
+            else pd.Series({icd: e["level"] for icd, e in ref.cc_mcc.items()}, dtype=object)
+        )
+        self.age_rules = pd.DataFrame(
+            [
+                (icd, bucket, *AGE_BOUNDS[bucket])
+                for bucket, codes in mce["age_conflict_lists"].items()
+                for icd in codes
+            ],
+            columns=["code", "bucket", "age_lo", "age_hi"],
+        )
+        self.manifestation = frozenset(mce["manifestation_not_pdx"])
+        self.questionable = frozenset(mce["questionable_admission_pdx"])
+        self.unacceptable = frozenset(mce["unacceptable_pdx"]) - {"Z5189"}
+        # Severity-split DRGs whose title *requires* a CC/MCC on the claim.
+        self.mcc_drgs = frozenset(
+            code for code, ref in drg.items() if ref["description"].endswith(" WITH MCC")
+        )
+        self.cc_drgs = frozenset(
+            code for code, ref in drg.items() if ref["description"].endswith((" WITH CC", " WITH CC/MCC"))
+        )
+        self.weight = pd.Series({c: r["relative_weight"] for c, r in drg.items()}, dtype=float)
+        self.gmlos = pd.Series({c: r["geometric_mean_los"] for c, r in drg.items()}, dtype=float)
+        self.amlos = pd.Series({c: r["arithmetic_mean_los"] for c, r in drg.items()}, dtype=float)
+
+
+@lru_cache(maxsize=len(VERSIONS))  # a multi-year batch touches every version
+def _tables(version: str) -> _AuditTables:
+    return _AuditTables(load_version(version))
+
+
+FINDING_COLUMNS = [
+    "claim_id",
+    "drg_code",
+    "principal_diagnosis",
+    "reference_version",
+    "pdx_valid_for_drg",
+    "expected_drg",
+    "expected_weight",
+    "mcc_count",
+    "cc_count",
+    "mce_edits",
+    "new_v43_1_pcs",
+    "finding_count",
+    "max_severity",
+    "findings",
+]
+
+
+def audit_batch(df: pd.DataFrame) -> pd.DataFrame:
+    """Audit one normalized claims batch (see ``tools.claims_io``).
+
+    Each claim is checked against the grouper version in effect on its
+    discharge date (``tools.reference_store``). Returns one row per claim with
+    the ``FINDING_COLUMNS`` schema; ``findings`` holds a list of
+    ``{"severity", "check", "detail"}`` dicts.
+    """
+    pos = version_positions(df["discharge_date"])
+    present = np.unique(pos)
+    if len(present) == 1:
+        return _audit_version(df, _tables(VERSIONS[present[0]]))
+    parts, order = [], []
+    for p in present:
+        rows = np.flatnonzero(pos == p)
+        parts.append(_audit_version(df.iloc[rows].reset_index(drop=True), _tables(VERSIONS[p])))
+        order.append(rows)
+    out = pd.concat(parts, ignore_index=True)
+    return out.iloc[np.argsort(np.concatenate(order), kind="stable")].reset_index(drop=True)
+
+
+def _audit_version(df: pd.DataFrame, t: _AuditTables) -> pd.DataFrame:
+    """``audit_batch`` for claims that all fall under one grouper version."""
+    n = len(df)
+    pdx = df["principal_diagnosis"].to_numpy(dtype=object)
+    drg = df["drg_code"].to_numpy(dtype=object)
+    findings: list[list[dict]] = [[] for _ in range(n)]
+    mce_edits: list[list[str]] = [[] for _ in range(n)]
+
+    def add(mask: np.ndarray, severity: str, check: str, detail) -> None:
+        for i in np.flatnonzero(mask):
+            findings[i].append(
+                {"severity": severity, "check": check, "detail": detail(i) if callable(detail) else detail}
+            )
+
+    # Appendix B: PDX vs assigned DRG --------------------------------------
+    drg_known = np.fromiter((d in t.drg for d in drg), dtype=bool, count=n)
+    pdx_known, pair_valid = DRG_INDEX.validate_pairs(pdx, drg)
+    add(~drg_known, "CRITICAL", "unknown_drg", lambda i: f"DRG '{drg[i]}' is not in CMS Table 5 (v{t.version}).")
+    add(
+        ~pdx_known,
+        "WARNING",
+        "pdx_not_in_appendix_b",
+        lambda i: f"Principal diagnosis '{pdx[i]}' not found in CMS Appendix B.",
+    )
+    add(
+        pdx_known & drg_known & ~pair_valid,
+        "CRITICAL",
+        "pdx_drg_mismatch",
+        lambda i: (
+            f"ICD-10 {pdx[i]} does NOT map to MS-DRG {drg[i]} per Appendix B. "
+            f"Valid DRGs: {', '.join(sorted(DRG_INDEX.icd_drgs[pdx[i]])[:10])}."
+        ),
+    )
+
+    # Appendix C: CC/MCC on secondaries (a repeat of the PDX does not count) --
+    sdx_rows, sdx_codes = explode_codes(df["secondary_diagnoses"])
+    sdx_levels = sdx_codes.map(t.cc_level).to_numpy(dtype=object)
+    counted = sdx_codes.to_numpy(dtype=object) != pdx[sdx_rows]
+    mcc_count = np.bincount(sdx_rows[counted & (sdx_levels == "MCC")], minlength=n)
+    cc_count = np.bincount(sdx_rows[counted & (sdx_levels == "CC")], minlength=n)
+    is_mcc_drg = np.fromiter((d in t.mcc_drgs for d in drg), dtype=bool, count=n)
+    is_cc_drg = np.fromiter((d in t.cc_drgs for d in drg), dtype=bool, count=n)
+    add(
+        is_mcc_drg & (mcc_count == 0),
+        "CRITICAL",
+        "mcc_drg_without_mcc",
+        lambda i: f"MCC-level DRG {drg[i]} but no MCC on the secondary diagnoses (Appendix C).",
+    )
+    add(
+        is_cc_drg & (mcc_count + cc_count == 0),
+        "WARNING",
+        "cc_drg_without_cc",
+        lambda i: f"CC-level DRG {drg[i]} but no CC/MCC on the secondary diagnoses (Appendix C).",
+    )
+
+    # MCE edit 4: age conflicts on PDX and secondaries --------------------
+    age = df["patient_age"].to_numpy(dtype=float)
+    if not np.isnan(age).all():
+        codes = pd.DataFrame(
+            {
+                "row": np.concatenate([np.arange(n), sdx_rows]),
+                "code": np.concatenate([pdx, sdx_codes.to_numpy(dtype=object)]),
+            }
+        )
+        hits = codes.merge(t.age_rules, on="code", how="inner")
+        hits["age"] = age[hits["row"].to_numpy()]
+        hits = hits[hits["age"].notna() & ((hits["age"] < hits["age_lo"]) | (hits["age"] > hits["age_hi"]))]
+        for row, code, bucket, lo, hi, a in hits.drop_duplicates(["row", "code"]).itertuples(index=False):
+            edit = f"4 Age conflict ({bucket} list)"
+            mce_edits[row].append(edit)
+            findings[row].append(
+                {
+                    "severity": "WARNING",
+                    "check": "mce_age_conflict",
+                    "detail": f"{edit}: ICD {code} is for ages {lo}-{hi}; patient age {int(a)}.",
+                }
+            )
+
+    # MCE edits 6 / 8 / 9 on the principal diagnosis ----------------------
+    has_sdx = np.fromiter((len(v) > 0 for v in df["secondary_diagnoses"]), dtype=bool, count=n)
+    pdx_edits = [
+        (t.manifestation, "CRITICAL", "6 Manifestation not allowed as principal diagnosis"),
+        (t.questionable, "WARNING", "8 Questionable admission (when used as principal)"),
+        (t.unacceptable, "CRITICAL", "9 Unacceptable principal diagnosis"),
+    ]
+    for code_set, severity, edit in pdx_edits:
+        mask = np.fromiter((p in code_set for p in pdx), dtype=bool, count=n)
+        for i in np.flatnonzero(mask):
+            mce_edits[i].append(edit)
+        add(mask, severity, "mce_pdx_edit", lambda i, e=edit: f"{e}: {pdx[i]}.")
+    z5189 = (pdx == "Z5189") & ~has_sdx
+    for i in np.flatnonzero(z5189):
+        mce_edits[i].append("9 Unacceptable principal — Z51.89 (no secondary diagnosis)")
+    add(z5189, "CRITICAL", "mce_pdx_edit", "9 Unacceptable principal: Z51.89 without a secondary diagnosis.")
+
+    # V43.1 new PCS codes --------------------------------------------------
+    pcs_rows, pcs_codes = explode_codes(df["procedures"])
+    is_new = pcs_codes.isin(_NEW_PCS).to_numpy()
+    new_pcs: list[list[str]] = [[] for _ in range(n)]
+    for row, code in zip(pcs_rows[is_new], pcs_codes[is_new]):
+        new_pcs[row].append(code)
+    discharge = df["discharge_date"]
+    early = (discharge < _PCS_EFFECTIVE).to_numpy() & np.fromiter((bool(v) for v in new_pcs), bool, n)
+    add(
+        early,
+        "CRITICAL",
+        "pcs_before_effective_date",
+        lambda i: (
+            f"PCS {', '.join(new_pcs[i])} is new in V43.1 (effective {_PCS_EFFECTIVE.date()}) "
+            f"but discharge date is {discharge.iloc[i].date()}."
+        ),
+    )
+    add(
+        np.fromiter((bool(v) for v in new_pcs), bool, n) & ~early,
+        "ADVISORY",
+        "new_v43_1_pcs",
+        lambda i: f"PCS {', '.join(new_pcs[i])} is one of the 80 new V43.1 codes.",
+    )
+
+    # LOS outliers vs Table 5 ---------------------------------------------
+    los = df["length_of_stay"].to_numpy(dtype=float)
+    if not np.isnan(los).all():
+        drg_s = pd.Series(drg, dtype=object)
+        gmlos = drg_s.map(t.gmlos).to_numpy(dtype=float)
+        amlos = drg_s.map(t.amlos).to_numpy(dtype=float)
+        with np.errstate(invalid="ignore"):
+            short = los < 0.5 * gmlos
+            long = los > 2.0 * amlos
+        add(short, "WARNING", "los_short_stay", lambda i: f"LOS {los[i]:g} < 0.5 x GMLOS {gmlos[i]:g}.")
+        add(long, "WARNING", "los_long_stay", lambda i: f"LOS {los[i]:g} > 2.0 x AMLOS {amlos[i]:g}.")
+
+    # Local grouper: expected DRG within the assigned DRG's family -----------
+    grouped = group_batch(df, mcc_count, cc_count)
+    expected = grouped["expected_drg"].to_numpy(dtype=object)
+    expected_weight = pd.Series(expected, dtype=object).map(t.weight).to_numpy(dtype=float)
+    confident = grouped["grouping_basis"].isin(CONFIDENT_BASES).to_numpy() & grouped["expected_drg"].notna().to_numpy()
+    add(
+        confident & drg_known & (expected != drg),
+        "WARNING",
+        "drg_regroup_mismatch",
+        lambda i: (
+            f"Local grouper expects DRG {expected[i]} (weight {expected_weight[i]:g}) from the PDX "
+            f"and CC/MCC secondaries; assigned DRG {drg[i]} "
+            f"(weight {t.weight[drg[i]]:g}, v{t.version})."
+        ),
+    )
+
+    max_rank = [max((SEVERITY_RANK[f["severity"]] for f in fs), default=0) for fs in findings]
+    return pd.DataFrame(
+        {
+            "claim_id": df["claim_id"].to_numpy(),
+            "drg_code": drg,
+            "principal_diagnosis": pdx,
+            "reference_version": t.version,
+            "pdx_valid_for_drg": np.where(pdx_known, pair_valid, None),
+            "expected_drg": expected,
+            "expected_weight": expected_weight,
+            "mcc_count": mcc_count,
+            "cc_count": cc_count,
+            "mce_edits": mce_edits,
+            "new_v43_1_pcs": new_pcs,
+            "finding_count": [len(fs) for fs in findings],
+            "max_severity": [_RANK_TO_SEVERITY[r] for r in max_rank],
+            "findings": findings,
+        },
+        columns=FINDING_COLUMNS,
+    )
+
+
+def audit_claims(source: str | pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+    """Audit a whole claims extract in memory and return the findings frame."""
+    parts = [audit_batch(b) for b in iter_claim_batches(source, batch_size)]
+    if not parts:
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("claim_id", pa.string()),
+            ("drg_code", pa.string()),
+            ("principal_diagnosis", pa.string()),
+            ("reference_version", pa.string()),
+            ("pdx_valid_for_drg", pa.bool_()),
+            ("expected_drg", pa.string()),
+            ("expected_weight", pa.float64()),
+            ("mcc_count", pa.int64()),
+            ("cc_count", pa.int64()),
+            ("mce_edits", pa.list_(pa.string())),
+            ("new_v43_1_pcs", pa.list_(pa.string())),
+            ("finding_count", pa.int64()),
+            ("max_severity", pa.string()),
+            ("findings", pa.string()),  # JSON array of {severity, check, detail}
+        ]
+    )
+
+
+def audit_claims_to_file(
+    source: str | pd.DataFrame,
+    output_path: str | None = None,
+    output_format: str = "jsonl",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict:
+    """Stream an extract through ``audit_batch`` and write findings to disk.
+
+    Memory is bounded by ``batch_size``. Returns a summary dict with counts by
+    severity / check, a sample of critical findings and the output path.
+    """
+    fmt = output_format.strip().lower()
+    if fmt not in ("jsonl", "parquet"):
+        raise ValueError("output_format must be 'jsonl' or 'parquet'")
+    if not output_path:
+        os.makedirs(BATCH_OUTPUT_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(BATCH_OUTPUT_DIR, f"claim_audit_{stamp}.{fmt}")
+
+    started = time.perf_counter()
+    total = flagged = 0
+    by_severity = {k: 0 for k in SEVERITY_RANK}
+    by_check: dict[str, int] = {}
+    by_version: dict[str, int] = {}
+    sample: list[dict] = []
+    fh = writer = None
+    try:
+        if fmt == "jsonl":
+            fh = open(output_path, "w", encoding="utf-8")
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        for batch in iter_claim_batches(source, batch_size):
+            if batch.empty:  # e.g. a header-only CSV
+                continue
+            out = audit_batch(batch)
+            total += len(out)
+            flagged += int((out["finding_count"] > 0).sum())
+            for sev, cnt in out["max_severity"].value_counts().items():
+                by_severity[sev] += int(cnt)
+            for ver, cnt in out["reference_version"].value_counts().items():
+                by_version[ver] = by_version.get(ver, 0) + int(cnt)
+            for fs in out["findings"]:
+                for f in fs:
+                    by_check[f["check"]] = by_check.get(f["check"], 0) + 1
+            if len(sample) < 10:
+                crit = out[out["max_severity"] == "CRITICAL"].head(10 - len(sample))
+                for r in crit.itertuples(index=False):
+                    top = next(f for f in r.findings if f["severity"] == "CRITICAL")
+                    sample.append({"claim_id": r.claim_id, "drg_code": r.drg_code, **top})
+            if fh is not None:
+                out.to_json(fh, orient="records", lines=True, force_ascii=False)
+            else:
+                out = out.assign(findings=[json.dumps(fs, ensure_ascii=False) for fs in out["findings"]])
+                table = pa.Table.from_pandas(out, schema=_parquet_schema(), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+        if fmt == "parquet" and writer is None:  # no claims: still a readable, empty findings file
+            pq.write_table(_parquet_schema().empty_table(), output_path)
+    finally:
+        if fh is not None:
+            fh.close()
+        if writer is not None:
+            writer.close()
+
+    return {
+        "claims_audited": total,
+        "claims_with_findings": flagged,
+        "pct_with_findings": round(flagged / total * 100, 1) if total else 0.0,
+        "by_max_severity": by_severity,
+        "findings_by_check": dict(sorted(by_check.items(), key=lambda kv: -kv[1])),
+        "claims_by_reference_version": dict(sorted(by_version.items())),
+        "sample_critical_findings": sample,
+        "output_file": os.path.abspath(output_path),
+        "output_format": fmt,
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+@tool
+def batch_claim_audit(claims_path: str, output_format: str = "jsonl", verbosity: str = DEFAULT_VERBOSITY) -> str:
+    """Audit an entire claims extract in bulk (no per-claim tool calls) and
+    write one findings row per claim to a JSONL or Parquet file.
+
+    Runs, for every claim: PDX vs assigned DRG (Appendix B), MCC/CC-level DRG
+    without a qualifying secondary (Appendix C), MCE v43.1 edits (age conflict,
+    manifestation / questionable / unacceptable principal), V43.1 new PCS codes
+    (incl. use before 2026-04-01) and LOS outliers vs Table 5.
+
+    Use this instead of calling icd_code_validate / cc_mcc_check / mce_code_check
+    claim by claim whenever more than a handful of claims must be audited.
+    Returns a summary (counts by severity and check, sample critical findings)
+    plus the path of the findings file.
+
+    Args:
+        claims_path: Parquet / CSV / JSONL file (or Parquet folder) with columns
+            principal_diagnosis, drg_code and optionally claim_id,
+            secondary_diagnoses, procedures, patient_age, discharge_date,
+            length_of_stay.
+        output_format: 'jsonl' (default) or 'parquet'.
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
+    """
+    try:
+        summary = audit_claims_to_file(claims_path.strip(), output_format=output_format)
+    except (OSError, ValueError) as e:
+        return encode({"error": str(e), "claims_path": claims_path}, verbosity)
+    return encode(summary, verbosity, prose=("detail",))
@@ -0,0 +1,173 @@
+"""
+Latency of the DRG reference tools in-process versus through the MCP tool server.
+
+For each mode it reports:
+  - startup:  seconds until the first answer is possible
+                in-process  fresh interpreter importing the tools + first call
+                stdio       spawning tool_server.py (load + warm-up) + handshake
+                http        connecting to an already running server
+  - per call: p50 / p95 / mean milliseconds over the benchmark calls
+  - batch:    milliseconds per call when the same calls go through the
+              ``<tool>_batch`` endpoints (one round trip per tool)
+
+Usage (from drg_claims_agent/):
+  python tools/bench_tool_server.py [--rounds 20] [--url http://127.0.0.1:8765/mcp] [--json]
+
+Without --url an HTTP server is started on a free local port for the run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, _ROOT)
+
+CALLS = [
+    ("drg_lookup", {"drg_code": "871"}),
+    ("drg_lookup", {"drg_code": "8711"}),
+    ("drg_family_lookup", {"drg_code": "291"}),
+    ("icd_code_validate", {"icd_code": "M16.11", "drg_code": "470"}),
+    ("icd_code_validate", {"icd_code": "J18.9", "drg_code": "470"}),
+    ("cc_mcc_check", {"icd_code": "N17.9"}),
+    ("cc_mcc_check", {"icd_code": "E11.9"}),
+    ("drg_shift_analysis", {"family_name": "heart_failure"}),
+    ("mce_code_check", {"icd_code": "N40.0", "patient_age": 5}),
+    ("v43_1_pcs_check", {"pcs_code": "0F9480D"}),
+]
+
+_COLD_IMPORT = (
+    "import sys, time; t = time.perf_counter(); sys.path.insert(0, {root!r}); "
+    "from tools.drg_lookup import drg_lookup; import tools.icd_validate, tools.drg_shift, "
+    "tools.mce_validate, tools.pcs_v43_1; drg_lookup.invoke({{'drg_code': '871'}}); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _summary(samples_ms: list[float]) -> dict:
+    ordered = sorted(samples_ms)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+def _time_calls(call, rounds: int) -> list[float]:
+    samples = []
+    for _ in range(rounds):
+        for name, args in CALLS:
+            t = time.perf_counter()
+            call(name, args)
+            samples.append((time.perf_counter() - t) * 1000)
+    return samples
+
+
+def _time_batches(call, rounds: int) -> float:
+    by_tool: dict[str, list[dict]] = {}
+    for name, args in CALLS:
+        by_tool.setdefault(name, []).append(args)
+    t = time.perf_counter()
+    for _ in range(rounds):
+        for name, calls in by_tool.items():
+            call(name + "_batch", {"calls": calls})
+    return (time.perf_counter() - t) * 1000 / (rounds * len(CALLS))
+
+
+def bench_in_process(rounds: int) -> dict:
+    cold = float(subprocess.run(
+        [sys.executable, "-c", _COLD_IMPORT.format(root=_ROOT)], capture_output=True, text=True, check=True
+    ).stdout.strip())
+    from tool_server import SERVED_TOOLS
+
+    by_name = {t.name: t for t in SERVED_TOOLS}
+    call = lambda name, args: by_name[name].invoke(args)  # noqa: E731
+    _time_calls(call, 1)  # same warm state the server reaches at startup
+    return {"mode": "in-process", "startup_s": round(cold, 3), **_summary(_time_calls(call, rounds)), "batch_ms": None}
+
+
+def bench_server(target: str, rounds: int) -> dict:
+    from tool_client import ToolServerClient
+
+    t = time.perf_counter()
+    client = ToolServerClient(target)
+    startup = time.perf_counter() - t
+    try:
+        _time_calls(client.call, 1)
+        samples = _time_calls(client.call, rounds)
+        batch = _time_batches(client.call, rounds)
+    finally:
+        client.close()
+    mode = "stdio" if target == "stdio" else "http"
+    return {"mode": mode, "startup_s": round(startup, 3), **_summary(samples), "batch_ms": round(batch, 3)}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_http_server() -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(_ROOT, "tool_server.py"), "--transport", "http", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc, f"http://127.0.0.1:{port}/mcp"
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("tool_server.py exited during startup")
+            time.sleep(0.2)
+    proc.kill()
+    raise TimeoutError("tool_server.py did not start listening within 120s")
+
+
+def run(rounds: int = 20, url: str = "") -> dict:
+    rows = [bench_in_process(rounds), bench_server("stdio", rounds)]
+    proc = None
+    if not url:
+        proc, url = _start_http_server()
+    try:
+        rows.append(bench_server(url, rounds))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+    return {"calls_per_round": len(CALLS), "rounds": rounds, "results": rows}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark DRG tools in-process vs. MCP tool server.")
+    ap.add_argument("--rounds", type=int, default=20, help="Passes over the benchmark calls per mode")
+    ap.add_argument("--url", default="", help="Running tool server URL (default: start one)")
+    ap.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = ap.parse_args()
+    report = run(args.rounds, args.url)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['rounds']} rounds x {report['calls_per_round']} calls")
+    print(f"{'mode':<12} {'startup s':>10} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9} {'batch ms/call':>14}")
+    for r in report["results"]:
+        batch = "-" if r["batch_ms"] is None else f"{r['batch_ms']:.3f}"
+        print(
+            f"{r['mode']:<12} {r['startup_s']:>10.3f} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} "
+            f"{r['mean_ms']:>9.3f} {batch:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
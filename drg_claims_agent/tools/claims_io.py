@@ -0,0 +1,219 @@
+"""
+Claims extract I/O for the bulk (non-LLM) tools.
+
+Reads claims from a pandas DataFrame or a Parquet / CSV / JSONL / JSON file and
+normalizes them to one canonical frame so every batch engine sees the same
+columns regardless of where the extract came from (Genie export, Databricks
+``COPY INTO`` dump, hand-built CSV).
+
+Canonical columns:
+  claim_id, provider_id, provider_name, drg_code, principal_diagnosis,
+  secondary_diagnoses (list[str]), procedures (list[str]), patient_age,
+  discharge_date, length_of_stay
+
+Large files are read in record batches (``iter_claim_batches``) so memory stays
+bounded by the batch size, not the extract size. A ``.json`` file is one JSON
+array of claim objects and is read whole; use JSONL for large extracts.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import re
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BATCH_SIZE = 200_000
+
+# Alternate column names seen in extracts -> canonical name.
+_COLUMN_ALIASES = {
+    "pdx": "principal_diagnosis",
+    "principal_dx": "principal_diagnosis",
+    "principal_diagnosis_code": "principal_diagnosis",
+    "sdx": "secondary_diagnoses",
+    "secondary_dx": "secondary_diagnoses",
+    "secondary_diagnosis_codes": "secondary_diagnoses",
+    "pcs": "procedures",
+    "pcs_codes": "procedures",
+    "procedure_codes": "procedures",
+    "drg": "drg_code",
+    "assigned_drg": "drg_code",
+    "ms_drg": "drg_code",
+    "age": "patient_age",
+    "los": "length_of_stay",
+    "provider": "provider_id",
+}
+
+_LIST_COLUMNS = ("secondary_diagnoses", "procedures")
+_SPLIT_RE = re.compile(r"[;,|\s]+")
+
+
+def norm_icd(code) -> str:
+    """Upper-case, dot-free ICD-10 code ('' for missing)."""
+    if code is None or (isinstance(code, float) and code != code):
+        return ""
+    return str(code).strip().upper().replace(".", "")
+
+
+def norm_drg(code) -> str:
+    """Three-digit MS-DRG code ('' for missing). '71' -> '071', 'DRG 871' -> '871'."""
+    if code is None or (isinstance(code, float) and code != code):
+        return ""
+    s = str(code).strip().upper().replace("MS-DRG ", "").replace("DRG ", "")
+    if s.endswith(".0"):  # CSV readers turn 871 into 871.0
+        s = s[:-2]
+    return s.zfill(3) if s.isdigit() else s
+
+
+def _as_code_list(value) -> list[str]:
+    """Parse an array-ish cell (list, numpy array, JSON text, delimited text)."""
+    if value is None:
+        return []
+    if isinstance(value, float) and value != value:
+        return []
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return []
+        if text.startswith("["):
+            try:
+                value = json.loads(text)
+            except ValueError:
+                value = _SPLIT_RE.split(text.strip("[]"))
+        else:
+            value = _SPLIT_RE.split(text)
+    out = []
+    for v in value:
+        c = norm_icd(v).strip("'\"")
+        if c:
+            out.append(c)
+    return out
+
+
+def _map_unique(values, fn) -> np.ndarray:
+    """Apply ``fn`` once per distinct value (claims repeat a few thousand codes)."""
+    codes, uniques = pd.factorize(pd.Series(values, copy=False), use_na_sentinel=True)
+    lookup = np.array([fn(u) for u in uniques] + [fn(None)], dtype=object)
+    return lookup[codes]
+
+
+def normalize_claims(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename aliases, coerce types and parse list columns (returns a new frame)."""
+    df = df.rename(columns={c: _COLUMN_ALIASES.get(c.lower(), c.lower()) for c in df.columns})
+    if "drg_code" not in df.columns:
+        raise ValueError(
+            f"Claims extract must include a drg_code column (got: {', '.join(df.columns)})."
+        )
+    out = pd.DataFrame(index=df.index)
+    if "claim_id" in df.columns:
+        out["claim_id"] = df["claim_id"].astype(str)
+    else:
+        out["claim_id"] = "ROW" + df.index.astype(str)
+    for col in ("provider_id", "provider_name"):
+        if col in df.columns:
+            out[col] = df[col].astype(str)
+    out["drg_code"] = _map_unique(df["drg_code"], norm_drg)
+    out["principal_diagnosis"] = (
+        _map_unique(df["principal_diagnosis"], norm_icd) if "principal_diagnosis" in df.columns else ""
+    )
+    for col in _LIST_COLUMNS:
+        # Absent list columns share one empty list; nothing downstream mutates them.
+        out[col] = [_as_code_list(v) for v in df[col]] if col in df.columns else [[]] * len(df)
+    if "procedures" in df.columns:
+        out["procedures"] = [[c[:7] for c in codes] for codes in out["procedures"]]
+    out["patient_age"] = (
+        pd.to_numeric(df["patient_age"], errors="coerce") if "patient_age" in df.columns else float("nan")
+    )
+    out["length_of_stay"] = (
+        pd.to_numeric(df["length_of_stay"], errors="coerce") if "length_of_stay" in df.columns else float("nan")
+    )
+    out["discharge_date"] = (
+        pd.to_datetime(df["discharge_date"], errors="coerce") if "discharge_date" in df.columns else pd.NaT
+    )
+    return out.reset_index(drop=True)
+
+
+def explode_codes(lists: pd.Series) -> tuple[np.ndarray, pd.Series]:
+    """Flatten a list column into (row position, code) arrays."""
+    lens = np.fromiter((len(v) for v in lists), dtype=np.int64, count=len(lists))
+    rows = np.repeat(np.arange(len(lists)), lens)
+    codes = pd.Series(list(itertools.chain.from_iterable(lists)), dtype=object)
+    return rows, codes
+
+
+def _file_kind(path: str) -> str:
+    lower = path.lower()
+    if lower.endswith((".parquet", ".pq")) or os.path.isdir(path):
+        return "parquet"
+    if lower.endswith((".csv", ".csv.gz", ".txt")):
+        return "csv"
+    if lower.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if lower.endswith(".json"):
+        return "json"
+    raise ValueError(f"Unsupported claims file type: {path} (use .parquet, .csv, .jsonl or .json)")
+
+
+def iter_claim_batches(
+    source: str | pd.DataFrame,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    columns: list[str] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield normalized claim batches from a DataFrame or a file path.
+
+    Parquet is streamed with ``pyarrow`` record batches (a directory is read as a
+    dataset); CSV and JSONL use pandas' chunked readers, a JSON array is read
+    whole and then batched. ``columns`` optionally restricts a Parquet or CSV
+    read to the (canonical) columns a caller needs.
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), batch_size):
+            yield normalize_claims(source.iloc[start : start + batch_size])
+        return
+
+    path = os.path.expanduser(str(source))
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Claims file not found: {path}")
+    kind = _file_kind(path)
+    if kind == "parquet":
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(path, format="parquet")
+        if columns:
+            wanted = set(columns)
+            columns = [
+                c for c in dataset.schema.names if _COLUMN_ALIASES.get(c.lower(), c.lower()) in wanted
+            ]
+        offset = 0
+        for batch in dataset.to_batches(columns=columns or None, batch_size=batch_size):
+            if batch.num_rows:
+                frame = batch.to_pandas()
+                frame.index = pd.RangeIndex(offset, offset + len(frame))
+                offset += len(frame)
+                yield normalize_claims(frame)
+    elif kind == "csv":
+        usecols = None
+        if columns:
+            wanted = set(columns)
+            usecols = lambda c: _COLUMN_ALIASES.get(c.lower(), c.lower()) in wanted  # noqa: E731
+        for chunk in pd.read_csv(
+            path, chunksize=batch_size, dtype=str, keep_default_na=False, usecols=usecols
+        ):
+            yield normalize_claims(chunk)
+    elif kind == "jsonl":
+        for chunk in pd.read_json(path, lines=True, chunksize=batch_size, dtype=False):
+            yield normalize_claims(chunk)
+    else:
+        yield from iter_claim_batches(pd.read_json(path, orient="records", dtype=False), batch_size)
+
+
+def load_claims(source: str | pd.DataFrame) -> pd.DataFrame:
+    """Read a whole claims extract into one normalized DataFrame."""
+    batches = list(iter_claim_batches(source))
+    if not batches:
+        return normalize_claims(pd.DataFrame(columns=["principal_diagnosis", "drg_code"]))
+    return pd.concat(batches, ignore_index=True)
@@ -0,0 +1,212 @@
+"""
+Free-text search over ICD-10-CM descriptions and MS-DRG titles.
+
+Turns "acute kidney failure" or "sepsis due to e coli" into ranked codes in
+one call, so the agent stops guessing codes and retrying the exact-code tools.
+
+The index is built once -- by ``create_drg_agent``, or else on first use
+(about 2 s) -- over:
+  - ICD-10-CM descriptions from Appendix B (``ICD_TO_DRG``) and Appendix C
+    (``CC_MCC_LIST``), one document per code
+  - MS-DRG titles from Table 5 (``MS_DRG_REFERENCE``)
+
+Ranking is BM25 over word tokens. Each term's postings (document ids plus the
+precomputed BM25 weight) are NumPy arrays, so a query is a handful of
+vectorized scatter-adds into one score array and an ``argpartition``.
+Query words missing from the vocabulary are expanded to vocabulary words that
+start with them ("pneumon" -> pneumonia, pneumonitis) or share most of their
+character trigrams ("sepssis" -> sepsis), weighted by similarity.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+from langchain_core.tools import tool
+
+from tools.drg_index import DRG_INDEX
+from tools.drg_lookup import CC_MCC_LIST, ICD_TO_DRG, MS_DRG_REFERENCE
+from tools.encoding import DEFAULT_VERBOSITY, encode
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CODES_COLUMN = re.compile(r"^codes\s+")
+_STOPWORDS = frozenset({"a", "an", "and", "by", "due", "for", "in", "of", "on", "or", "the", "to"})
+_K1, _B = 1.2, 0.75
+_PREFIX_MIN, _PREFIX_WEIGHT, _PREFIX_TERMS = 3, 0.8, 8
+_TRIGRAM_MIN_SIMILARITY, _TRIGRAM_TERMS = 0.5, 3
+_MAX_DRGS_SHOWN = 6
+KINDS = ("all", "icd", "drg")
+
+
+def _tokens(text: str) -> list[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def _trigrams(word: str) -> set[str]:
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _icd_description(code: str) -> str:
+    text = ICD_TO_DRG.get(code, {}).get("description") or CC_MCC_LIST.get(code, {}).get("description", "")
+    # Appendix C descriptions carry a leading "codes" column artefact
+    return _CODES_COLUMN.sub("", text).strip()
+
+
+class CodeSearchIndex:
+    """BM25 inverted index over code descriptions with fuzzy term expansion."""
+
+    def __init__(self, documents: list[tuple[str, str, str]]) -> None:
+        """``documents``: (kind, code, description) triples."""
+        self.kinds = np.array([d[0] for d in documents])
+        self.codes = [d[1] for d in documents]
+        self.descriptions = [d[2] for d in documents]
+        counts = [Counter(_tokens(d[2])) for d in documents]
+        lengths = np.array([sum(c.values()) for c in counts], dtype=np.float32)
+        avg = float(lengths.mean()) if len(lengths) else 1.0
+
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        for doc, c in enumerate(counts):
+            for term, tf in c.items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(doc)
+                tfs.append(tf)
+
+        n = len(documents)
+        self.postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        for term, (ids, tfs) in postings.items():
+            ids_a = np.array(ids, dtype=np.int32)
+            tf = np.array(tfs, dtype=np.float32)
+            idf = np.log(1.0 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = _K1 * (1.0 - _B + _B * lengths[ids_a] / avg)
+            self.postings[term] = (ids_a, (idf * tf * (_K1 + 1.0) / (tf + norm)).astype(np.float32))
+
+        # trigram -> ids into ``vocabulary``; shared-trigram counts for a
+        # misspelt word are then one ``bincount`` over a few postings
+        self.vocabulary = sorted(self.postings)
+        gram_terms: dict[str, list[int]] = {}
+        for term_id, term in enumerate(self.vocabulary):
+            for gram in _trigrams(term):
+                gram_terms.setdefault(gram, []).append(term_id)
+        self._trigram_terms = {g: np.array(ids, dtype=np.int32) for g, ids in gram_terms.items()}
+        self._gram_count = np.array([len(_trigrams(t)) for t in self.vocabulary], dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def expand(self, word: str) -> dict[str, float]:
+        """Vocabulary terms standing in for ``word`` with their weights."""
+        if word in self.postings:
+            return {word: 1.0}
+        out: dict[str, float] = {}
+        if len(word) >= _PREFIX_MIN:
+            lo = bisect.bisect_left(self.vocabulary, word)
+            hits = []
+            while lo < len(self.vocabulary) and self.vocabulary[lo].startswith(word):
+                hits.append(self.vocabulary[lo])
+                lo += 1
+            for term in sorted(hits, key=len)[:_PREFIX_TERMS]:
+                out[term] = _PREFIX_WEIGHT
+        grams = _trigrams(word)
+        lists = [self._trigram_terms[g] for g in grams if g in self._trigram_terms]
+        if lists:
+            shared = np.bincount(np.concatenate(lists), minlength=len(self.vocabulary))
+            dice = 2.0 * shared / (len(grams) + self._gram_count)
+            close = np.flatnonzero(dice >= _TRIGRAM_MIN_SIMILARITY)
+            for term_id in sorted(close, key=lambda i: (-dice[i], self.vocabulary[i]))[:_TRIGRAM_TERMS]:
+                term = self.vocabulary[term_id]
+                out[term] = max(out.get(term, 0.0), float(dice[term_id]))
+        return out
+
+    def search(self, query: str, kind: str = "all", limit: int = 10) -> tuple[list[tuple[int, float]], dict]:
+        """Top ``limit`` (document id, score) pairs and the fuzzy expansions used."""
+        scores = np.zeros(len(self.codes), dtype=np.float32)
+        expanded: dict[str, list[str]] = {}
+        for word in dict.fromkeys(_tokens(query)):
+            terms = self.expand(word)
+            if terms and word not in terms:
+                expanded[word] = list(terms)
+            for term, weight in terms.items():
+                ids, w = self.postings[term]
+                scores[ids] += w * weight
+        if kind != "all":
+            scores[self.kinds != kind] = 0.0
+        hits = np.flatnonzero(scores)
+        if not len(hits) or limit <= 0:
+            return [], expanded
+        if len(hits) > limit:
+            # keep ties at the cut so the description-length tiebreak sees them
+            cut = np.partition(scores[hits], len(hits) - limit)[len(hits) - limit]
+            hits = hits[scores[hits] >= cut]
+        ranked = sorted(hits, key=lambda i: (-scores[i], len(self.descriptions[i]), self.codes[i]))[:limit]
+        return [(int(i), float(scores[i])) for i in ranked], expanded
+
+
+@lru_cache(maxsize=1)
+def search_index() -> CodeSearchIndex:
+    icds = sorted(set(ICD_TO_DRG) | set(CC_MCC_LIST))
+    documents = [("icd", code, _icd_description(code)) for code in icds]
+    documents += [("drg", code, ref.get("description", "")) for code, ref in sorted(MS_DRG_REFERENCE.items())]
+    return CodeSearchIndex([d for d in documents if d[2]])
+
+
+def _result(index: CodeSearchIndex, doc: int, score: float) -> dict:
+    code, kind = index.codes[doc], str(index.kinds[doc])
+    if kind == "icd":
+        drgs = sorted(DRG_INDEX.drgs_for_icd(code))
+        shown = " ".join(drgs[:_MAX_DRGS_SHOWN]) + (f" +{len(drgs) - _MAX_DRGS_SHOWN}" if len(drgs) > _MAX_DRGS_SHOWN else "")
+        cc_mcc = CC_MCC_LIST.get(code, {}).get("level", "Non-CC")
+        weight = None
+    else:
+        shown, cc_mcc = "", None
+        weight = MS_DRG_REFERENCE.get(code, {}).get("relative_weight")
+    return {
+        "code": code,
+        "kind": kind,
+        "description": index.descriptions[doc],
+        "score": round(score, 2),
+        "cc_mcc": cc_mcc,
+        "drgs": shown,
+        "relative_weight": weight,
+    }
+
+
+@tool
+def code_search(query: str, kind: str = "all", limit: int = 10, verbosity: str = DEFAULT_VERBOSITY) -> str:
+    """Find ICD-10-CM diagnosis codes and MS-DRG codes from a free-text
+    description, e.g. 'acute kidney failure', 'sepsis due to e coli',
+    'heart failure with mcc'.
+
+    Ranks codes by how well their CMS description matches the words
+    (misspellings and word stems are tolerated). ICD results include the
+    CC/MCC class and the DRGs the code groups to as principal diagnosis;
+    DRG results include the relative weight. Use it to resolve a described
+    condition to codes BEFORE calling the exact-code tools.
+
+    Args:
+        query: Words describing the diagnosis or DRG.
+        kind: 'icd' for diagnosis codes only, 'drg' for DRGs only, or 'all' (default).
+        limit: Maximum number of codes to return (default 10).
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
+    """
+    kind = (kind or "all").strip().lower()
+    if kind not in KINDS:
+        return encode({"error": f"kind must be one of {', '.join(KINDS)}"}, verbosity)
+    if not _tokens(query or ""):
+        return encode({"error": "Describe the diagnosis or DRG in words (e.g. 'acute kidney failure')."}, verbosity)
+    index = search_index()
+    hits, expanded = index.search(query, kind, max(1, min(int(limit), 50)))
+    out = {
+        "query": query,
+        "match_count": len(hits),
+        "results": [_result(index, doc, score) for doc, score in hits],
+    }
+    if expanded:
+        out["fuzzy_terms"] = expanded
+    if not hits:
+        out["note"] = "No description matched; try fewer or more general words."
+    return encode(out, verbosity, prose=("note", "fuzzy_terms"))
@@ -0,0 +1,220 @@
+"""
+Bidirectional ICD-10 <-> MS-DRG index over CMS Appendix B, built once at import.
+
+  - ICD -> frozenset of DRGs          (``icd_code_validate``, grouping)
+  - DRG -> sorted array of PDX codes  ("which diagnoses justify DRG 871")
+  - sorted ICD array for prefix ranges ("which DRGs does the I50 family map to")
+  - sorted int64 (icd_id, drg_id) keys for vectorized pair validation in bulk
+
+Set questions (overlap of valid PDX between DRGs 291 and 292, DRGs shared by a
+diagnosis category) are answered with NumPy set routines on the pre-sorted
+arrays, so they cost microseconds instead of a scan of all 65K codes.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from langchain_core.tools import tool
+
+from tools.drg_lookup import ICD_TO_DRG, MS_DRG_REFERENCE
+from tools.encoding import DEFAULT_VERBOSITY, encode
+
+_EMPTY = np.array([], dtype="<U8")
+
+
+def _norm_icd(code: str) -> str:
+    return code.strip().upper().replace(".", "")
+
+
+def _norm_drg(code: str) -> str:
+    return code.strip().replace("MS-DRG ", "").replace("DRG ", "")
+
+
+class DrgIndex:
+    """Precomputed Appendix B lookups in both directions."""
+
+    def __init__(self, icd_to_drg: dict) -> None:
+        self.icd_drgs: dict[str, frozenset] = {
+            icd: frozenset(d for m in entry["mappings"] for d in m["drgs"])
+            for icd, entry in icd_to_drg.items()
+        }
+        by_drg: dict[str, list[str]] = {}
+        for icd, drgs in self.icd_drgs.items():
+            for d in drgs:
+                by_drg.setdefault(d, []).append(icd)
+        self.drg_icds: dict[str, np.ndarray] = {
+            d: np.array(sorted(codes)) for d, codes in by_drg.items()
+        }
+        self.icds: np.ndarray = np.array(sorted(self.icd_drgs)) if self.icd_drgs else _EMPTY
+
+        # Integer pair keys for bulk membership tests: icd_id * n_drg + drg_id.
+        self._icd_pos = pd.Index(self.icds)
+        self._drg_pos = pd.Index(sorted(by_drg))
+        n_drg = max(len(self._drg_pos), 1)
+        icd_ids = self._icd_pos.get_indexer(
+            [icd for icd, drgs in self.icd_drgs.items() for _ in drgs]
+        )
+        drg_ids = self._drg_pos.get_indexer([d for drgs in self.icd_drgs.values() for d in drgs])
+        self._n_drg = n_drg
+        self._pair_keys = np.sort(icd_ids.astype(np.int64) * n_drg + drg_ids)
+
+    # -- single lookups ------------------------------------------------------
+    def drgs_for_icd(self, icd: str) -> frozenset:
+        return self.icd_drgs.get(_norm_icd(icd), frozenset())
+
+    def icds_for_drg(self, drg: str) -> np.ndarray:
+        return self.drg_icds.get(_norm_drg(drg), _EMPTY)
+
+    def is_valid(self, icd: str, drg: str) -> bool:
+        return _norm_drg(drg) in self.drgs_for_icd(icd)
+
+    # -- prefix / set queries ------------------------------------------------
+    def icds_with_prefix(self, prefix: str, within: np.ndarray | None = None) -> np.ndarray:
+        """Codes starting with ``prefix`` (range slice of a sorted array)."""
+        arr = self.icds if within is None else within
+        p = _norm_icd(prefix)
+        if not p:
+            return arr
+        lo = np.searchsorted(arr, p, side="left")
+        hi = np.searchsorted(arr, p + "\uffff", side="left")
+        return arr[lo:hi]
+
+    def drgs_for_prefix(self, prefix: str) -> Counter:
+        """DRG -> number of codes under ``prefix`` that map to it."""
+        counts: Counter = Counter()
+        for icd in self.icds_with_prefix(prefix):
+            counts.update(self.icd_drgs[icd])
+        return counts
+
+    def pdx_overlap(self, drg_a: str, drg_b: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(shared, only_a, only_b) principal-diagnosis arrays for two DRGs."""
+        a, b = self.icds_for_drg(drg_a), self.icds_for_drg(drg_b)
+        return (
+            np.intersect1d(a, b, assume_unique=True),
+            np.setdiff1d(a, b, assume_unique=True),
+            np.setdiff1d(b, a, assume_unique=True),
+        )
+
+    # -- bulk ----------------------------------------------------------------
+    def validate_pairs(self, icds, drgs) -> tuple[np.ndarray, np.ndarray]:
+        """Vectorized (pdx_known, pair_valid) for aligned ICD / DRG sequences."""
+        icd_ids = self._icd_pos.get_indexer(icds)
+        drg_ids = self._drg_pos.get_indexer(drgs)
+        known = icd_ids >= 0
+        keys = icd_ids.astype(np.int64) * self._n_drg + drg_ids
+        pos = np.searchsorted(self._pair_keys, keys)
+        pos[pos >= len(self._pair_keys)] = 0
+        hit = self._pair_keys[pos] == keys if len(self._pair_keys) else np.zeros(len(keys), bool)
+        return known, known & (drg_ids >= 0) & hit
+
+
+DRG_INDEX = DrgIndex(ICD_TO_DRG)
+
+
+def _categories(codes: np.ndarray, top: int = 15) -> list[dict]:
+    """Three-character ICD categories with code counts, most frequent first."""
+    counts = Counter(c[:3] for c in codes)
+    return [{"category": k, "codes": v} for k, v in counts.most_common(top)]
+
+
+@tool
+def drg_principal_diagnoses(
+    drg_code: str, icd_prefix: str = "", limit: int = 25, verbosity: str = DEFAULT_VERBOSITY
+) -> str:
+    """List the ICD-10-CM principal diagnoses that justify an MS-DRG per CMS
+    Appendix B (reverse of icd_code_validate).
+
+    Use for "which principal diagnoses are valid for DRG 871?" or, with a
+    prefix, "which I50 codes group to DRG 291?". Returns the total count, the
+    top 3-character categories and a sample of codes with descriptions.
+
+    Args:
+        drg_code: MS-DRG code (e.g. '871').
+        icd_prefix: Optional ICD-10 prefix filter (e.g. 'A41', 'I50.2').
+        limit: Max sample codes to return (default 25).
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
+    """
+    code = _norm_drg(drg_code)
+    icds = DRG_INDEX.icds_with_prefix(icd_prefix, within=DRG_INDEX.icds_for_drg(code))
+    ref = MS_DRG_REFERENCE.get(code)
+    return encode({
+        "drg_code": code,
+        "drg_description": ref["description"] if ref else f"Unknown DRG {code}",
+        "icd_prefix": _norm_icd(icd_prefix) or None,
+        "principal_diagnosis_count": int(len(icds)),
+        "top_categories": _categories(icds),
+        "sample": [
+            {"icd_code": c, "description": ICD_TO_DRG[c]["description"]}
+            for c in icds[: max(limit, 0)]
+        ],
+    }, verbosity)
+
+
+@tool
+def icd_family_drgs(icd_prefix: str, verbosity: str = DEFAULT_VERBOSITY) -> str:
+    """Find every MS-DRG that principal diagnoses under an ICD-10 prefix
+    group to (CMS Appendix B), e.g. 'I50' (heart failure) or 'A41' (sepsis).
+
+    Use for "which DRGs does this diagnosis family map to?" and to see the
+    severity split (MCC / CC / base) a PDX family can land in.
+
+    Args:
+        icd_prefix: ICD-10-CM category or prefix (e.g. 'I50', 'J18', 'N17.9').
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
+    """
+    prefix = _norm_icd(icd_prefix)
+    if len(prefix) < 3:
+        return encode({"error": "Provide at least a 3-character ICD-10 category (e.g. 'I50')."}, verbosity)
+    icds = DRG_INDEX.icds_with_prefix(prefix)
+    counts = DRG_INDEX.drgs_for_prefix(prefix)
+    drgs = []
+    for drg, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])):
+        ref = MS_DRG_REFERENCE.get(drg, {})
+        drgs.append({
+            "drg_code": drg,
+            "description": ref.get("description"),
+            "relative_weight": ref.get("relative_weight"),
+            "icd_codes_mapping": n,
+        })
+    return encode({
+        "icd_prefix": prefix,
+        "icd_code_count": int(len(icds)),
+        "drg_count": len(drgs),
+        "drgs": drgs,
+    }, verbosity)
+
+
+@tool
+def drg_pdx_overlap(
+    drg_code_a: str, drg_code_b: str, limit: int = 25, verbosity: str = DEFAULT_VERBOSITY
+) -> str:
+    """Compare the valid principal diagnoses of two MS-DRGs (CMS Appendix B):
+    shared codes, codes valid only for one, and Jaccard overlap.
+
+    Use for "overlap of valid PDX between DRG 291 and 292" or to check whether
+    two DRGs are severity tiers of the same condition.
+
+    Args:
+        drg_code_a: First MS-DRG (e.g. '291').
+        drg_code_b: Second MS-DRG (e.g. '292').
+        limit: Max sample codes per list (default 25).
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
+    """
+    a, b = _norm_drg(drg_code_a), _norm_drg(drg_code_b)
+    shared, only_a, only_b = DRG_INDEX.pdx_overlap(a, b)
+    union = len(shared) + len(only_a) + len(only_b)
+    return encode({
+        "drg_a": a,
+        "drg_b": b,
+        "shared_count": int(len(shared)),
+        f"only_{a}_count": int(len(only_a)),
+        f"only_{b}_count": int(len(only_b)),
+        "jaccard": round(len(shared) / union, 4) if union else 0.0,
+        "shared_categories": _categories(shared),
+        "shared_sample": shared[:limit].tolist(),
+        f"only_{a}_sample": only_a[:limit].tolist(),
+        f"only_{b}_sample": only_b[:limit].tolist(),
+    }, verbosity)
@@ -10,8 +10,11 @@ Data sources (all from CMS FY 2026 IPPS Final Rule):
 
 import json
 import os
+import re
 from langchain_core.tools import tool
 
+from tools.encoding import DEFAULT_VERBOSITY, NearestCodeIndex, encode
+
 _DIR = os.path.dirname(__file__)
 
 with open(os.path.join(_DIR, "drg_reference_data.json"), "r", encoding="utf-8") as _f:
@@ -70,36 +73,103 @@ DRG_FAMILIES = {
     },
 }
 
+# Severity suffixes CMS uses in MS-DRG titles -> tier. "WITH CC/MCC" is the
+# upper tier of a two-way split, so it is treated as the CC tier.
+_SEVERITY_SUFFIXES = [
+    (re.compile(r"\s+(?:WITH|AND) MCC(?: OR .*)?$"), "mcc"),
+    (re.compile(r"\s+WITH CC/MCC(?: OR .*)?$"), "cc"),
+    (re.compile(r"\s+WITH CC(?: OR .*)?$"), "cc"),
+    (re.compile(r"\s+WITHOUT CC/MCC$"), "base"),
+    (re.compile(r"\s+WITHOUT MCC$"), "base"),
+]
+
+
+def _split_severity(title: str) -> tuple[str, str] | None:
+    """'HEART FAILURE AND SHOCK WITH MCC' -> ('HEART FAILURE AND SHOCK', 'mcc')."""
+    for pattern, tier in _SEVERITY_SUFFIXES:
+        m = pattern.search(title)
+        if m:
+            return title[: m.start()].strip(" ,"), tier
+    return None
+
+
+def derive_drg_families(reference: dict, curated: dict | None = None) -> dict:
+    """Group MS-DRGs into severity families from their Table 5 titles.
+
+    DRGs whose titles share a stem (text before the CC/MCC suffix) and MDC form
+    one family keyed by a slug of the stem. Only stems with two or more tiers
+    are kept. Curated families take precedence and keep their short names.
+    """
+    stems: dict[tuple[str, str], dict] = {}
+    for code in sorted(reference):
+        split = _split_severity(reference[code]["description"])
+        if not split:
+            continue
+        stem, tier = split
+        fam = stems.setdefault((stem, reference[code].get("mdc", "")), {})
+        fam.setdefault(tier, code)
+
+    curated = curated or {}
+    taken = {c for fam in curated.values() for c in (fam["mcc"], fam["cc"], fam["base"]) if c}
+    families: dict[str, dict] = dict(curated)
+    for (stem, mdc), tiers in stems.items():
+        if len(tiers) < 2 or taken.intersection(tiers.values()):
+            continue
+        key = re.sub(r"[^a-z0-9]+", "_", stem.lower()).strip("_")
+        if key in families:
+            key = f"{key}_mdc{mdc}"
+        families[key] = {
+            "label": stem.title(),
+            "mcc": tiers.get("mcc"),
+            "cc": tiers.get("cc"),
+            "base": tiers.get("base"),
+            "icd_prefixes": [],
+        }
+    return families
+
+
+ALL_DRG_FAMILIES = derive_drg_families(MS_DRG_REFERENCE, DRG_FAMILIES)
+
 _DRG_TO_FAMILY = {}
-for fam_name, fam in DRG_FAMILIES.items():
+for fam_name, fam in ALL_DRG_FAMILIES.items():
     for tier in ("mcc", "cc", "base"):
         code = fam[tier]
         if code:
             _DRG_TO_FAMILY[code] = (fam_name, tier)
 
+# Bounded "did you mean" suggestions for unknown codes
+_DRG_CODES = NearestCodeIndex(MS_DRG_REFERENCE)
+_FAMILY_DRG_INDEX = NearestCodeIndex(_DRG_TO_FAMILY)
+
 
 @tool
-def drg_family_lookup(drg_code: str) -> str:
+def drg_family_lookup(drg_code: str, verbosity: str = DEFAULT_VERBOSITY) -> str:
     """Look up the DRG family for a given MS-DRG code and return all
     severity tiers (MCC / CC / base) with their relative weights.
 
     Use this to understand DRG shift -- which severity levels exist
     for the same clinical condition and the payment spread between them.
+    Covers every MS-DRG with a CC/MCC split in its title, not only the
+    curated families.
 
     Args:
         drg_code: Any MS-DRG code in a family (e.g. '291', '292', '293').
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
     """
     code = drg_code.strip().replace("MS-DRG ", "").replace("DRG ", "")
     entry = _DRG_TO_FAMILY.get(code)
     if not entry:
-        available = ", ".join(sorted(_DRG_TO_FAMILY.keys()))
-        return (
-            f"DRG '{code}' is not part of a known DRG family. "
-            f"Known family members: {available}. "
-            f"Available families: {', '.join(DRG_FAMILIES.keys())}"
-        )
+        return encode({
+            "error": (
+                f"DRG '{code}' is not part of a known DRG family "
+                f"(no CC/MCC severity split in its title). "
+                f"{len(ALL_DRG_FAMILIES)} families cover {len(_DRG_TO_FAMILY)} DRGs."
+            ),
+            "nearest_family_drgs": _FAMILY_DRG_INDEX.nearest(code),
+            "curated_families": list(DRG_FAMILIES),
+        }, verbosity)
     fam_name, _ = entry
-    fam = DRG_FAMILIES[fam_name]
+    fam = ALL_DRG_FAMILIES[fam_name]
     tiers = {}
     for tier in ("mcc", "cc", "base"):
         tier_code = fam[tier]
@@ -115,37 +185,47 @@ def drg_family_lookup(drg_code: str) -> str:
     weights = [t["relative_weight"] for t in tiers.values()]
     spread = ((max(weights) - min(weights)) / min(weights) * 100) if len(weights) > 1 else 0
 
-    return json.dumps({
+    return encode({
         "family": fam_name,
         "label": fam["label"],
         "icd_prefixes": fam["icd_prefixes"],
         "tiers": tiers,
         "weight_spread_pct": round(spread, 1),
         "shift_risk": "HIGH" if spread > 80 else "MODERATE" if spread > 40 else "LOW",
-    }, indent=2)
+    }, verbosity)
 
 
 @tool
-def drg_lookup(drg_code: str) -> str:
+def drg_lookup(drg_code: str, discharge_date: str = "", verbosity: str = DEFAULT_VERBOSITY) -> str:
     """Look up CMS Table 5 reference data for a given MS-DRG code.
 
     Returns: description, relative weight, geometric and arithmetic mean LOS,
     MDC, and type (medical/surgical) from `drg_reference_data.json` (all 770 DRGs).
+    Pass the claim's discharge date to use the Table 5 of the grouper version
+    in effect then (v40 / FY2023 onward).
     For ICD-10 principal diagnosis vs DRG pairing use `icd_code_validate` (Appendix B).
     For CC/MCC on a secondary code use `cc_mcc_check` (Appendix C).
 
     Args:
         drg_code: The MS-DRG code to look up (e.g. '470', '871').
+        discharge_date: Optional discharge date (YYYY-MM-DD); default is the current version.
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
     """
     code = drg_code.strip().replace("MS-DRG ", "").replace("DRG ", "")
-    info = MS_DRG_REFERENCE.get(code)
+    table, version = MS_DRG_REFERENCE, {}
+    if discharge_date.strip():
+        from tools.reference_store import reference_for_date
+
+        ref = reference_for_date(discharge_date.strip())
+        table, version = ref.drg, ref.summary()
+    info = table.get(code)
     if not info:
-        available = ", ".join(sorted(MS_DRG_REFERENCE.keys()))
-        return (
-            f"DRG code '{code}' not found in reference data. "
-            f"Available codes: {available}"
-        )
-    return json.dumps(
-        {"drg_code": code, **info},
-        indent=2,
-    )
+        index = _DRG_CODES if table is MS_DRG_REFERENCE else NearestCodeIndex(table)
+        return encode({
+            "error": f"DRG code '{code}' not found in reference data ({len(table)} DRGs).",
+            "did_you_mean": [
+                {"drg_code": c, "description": table[c]["description"]} for c in index.nearest(code)
+            ],
+            **version,
+        }, verbosity)
+    return encode({"drg_code": code, **info, **version}, verbosity)
@@ -6,11 +6,24 @@ severity assignment for the same clinical condition.
 level DRGs (base / CC / MCC) for patients with the same principal
 diagnosis.  A high MCC capture rate relative to peers may indicate
 superior clinical documentation -- or potential upcoding.
+
+Families come from ``ALL_DRG_FAMILIES`` (curated families plus every MS-DRG
+title with a CC/MCC split). Claims are streamed once from a Parquet / CSV /
+JSONL extract (``DRG_SHIFT_CLAIMS_PATH`` or the ``claims_path`` argument) into
+a provider x DRG count table; every family is then analyzed from that table
+without re-reading the file. Without an extract, ``SAMPLE_SHIFT_DATA`` is used.
 """
 
-import json
+import os
+from functools import lru_cache
+
+import pandas as pd
 from langchain_core.tools import tool
-from tools.drg_lookup import DRG_FAMILIES, MS_DRG_REFERENCE
+
+from config import DRG_SHIFT_CLAIMS_PATH, DRG_SHIFT_MIN_CLAIMS
+from tools.claims_io import DEFAULT_BATCH_SIZE, iter_claim_batches, norm_drg
+from tools.drg_lookup import ALL_DRG_FAMILIES, DRG_FAMILIES, MS_DRG_REFERENCE, _DRG_TO_FAMILY
+from tools.encoding import DEFAULT_VERBOSITY, encode
 
 
 SAMPLE_SHIFT_DATA = {
@@ -178,88 +191,196 @@ SAMPLE_SHIFT_DATA = {
 }
 
 
-def _analyze_family(family_name: str) -> dict:
-    """Run DRG shift analysis for one DRG family across providers."""
-    fam = DRG_FAMILIES.get(family_name)
-    if not fam:
-        return {"error": f"Unknown family '{family_name}'. Available: {', '.join(DRG_FAMILIES.keys())}"}
+_TIERS = ("mcc", "cc", "base")
+_FAMILY_OF = pd.Series({code: fam for code, (fam, _) in _DRG_TO_FAMILY.items()}, dtype=object)
+_TIER_OF = pd.Series({code: tier for code, (_, tier) in _DRG_TO_FAMILY.items()}, dtype=object)
+_WEIGHT = pd.Series(
+    {code: ref.get("relative_weight", 0) for code, ref in MS_DRG_REFERENCE.items()}, dtype=float
+)
+_SHIFT_COLUMNS = ["provider_id", "provider_name", "drg_code"]
 
-    data = SAMPLE_SHIFT_DATA.get(family_name)
-    if not data:
-        return {"error": f"No claims data available for family '{family_name}'."}
 
-    tier_codes = {
-        tier: fam[tier] for tier in ("mcc", "cc", "base") if fam[tier]
-    }
-    tier_weights = {}
-    for tier, code in tier_codes.items():
-        ref = MS_DRG_REFERENCE.get(code, {})
-        tier_weights[code] = ref.get("relative_weight", 0)
+class ShiftAggregator:
+    """Provider x DRG claim counts, accumulated one claims batch at a time."""
 
-    providers = []
-    all_mcc_rates = []
+    _COMPACT_EVERY = 16
 
-    for prov_id, prov_data in data.items():
-        total = len(prov_data["claims"])
-        counts = {}
-        for tier, code in tier_codes.items():
-            cnt = sum(1 for c in prov_data["claims"] if c["drg"] == code)
-            counts[tier] = {"drg": code, "count": cnt, "pct": round(cnt / total * 100, 1)}
+    def __init__(self) -> None:
+        self._parts: list[pd.DataFrame] = []
+        self._names: dict[str, str] = {}
+        self.claims_read = 0
 
-        mcc_code = tier_codes.get("mcc")
-        mcc_rate = counts.get("mcc", {}).get("pct", 0)
-        all_mcc_rates.append(mcc_rate)
+    def update(self, batch: pd.DataFrame) -> None:
+        if "provider_id" not in batch.columns:
+            raise ValueError("DRG shift analysis needs a provider_id column in the claims extract.")
+        self.claims_read += len(batch)
+        counts = batch.groupby(["provider_id", "drg_code"], sort=False).size()
+        self._parts.append(counts.rename("claims").reset_index())
+        if len(self._parts) >= self._COMPACT_EVERY:
+            self._parts = [self._merged()]
+        if "provider_name" in batch.columns:
+            first = batch.drop_duplicates("provider_id")
+            for pid, name in zip(first["provider_id"], first["provider_name"]):
+                self._names.setdefault(pid, name)
 
-        avg_weight = sum(
-            tier_weights.get(c["drg"], 0) for c in prov_data["claims"]
-        ) / total
+    def _merged(self) -> pd.DataFrame:
+        parts = pd.concat(self._parts, ignore_index=True)
+        return parts.groupby(["provider_id", "drg_code"], sort=False, as_index=False)["claims"].sum()
+
+    def frame(self) -> pd.DataFrame:
+        """One row per (provider, DRG) with claim count, family, tier and weight."""
+        if not self._parts:
+            return pd.DataFrame(
+                columns=["provider_id", "drg_code", "claims", "provider_name", "family", "tier", "weight"]
+            )
+        df = self._merged()
+        df["claims"] = df["claims"].astype("int64")
+        df["provider_name"] = df["provider_id"].map(self._names).fillna(df["provider_id"])
+        df["family"] = df["drg_code"].map(_FAMILY_OF)
+        df["tier"] = df["drg_code"].map(_TIER_OF)
+        df["weight"] = df["drg_code"].map(_WEIGHT).fillna(0.0)
+        return df
+
+
+def aggregate_shift(source, batch_size: int = DEFAULT_BATCH_SIZE) -> pd.DataFrame:
+    """Single pass over a claims extract -> provider x DRG table (see ``ShiftAggregator``)."""
+    agg = ShiftAggregator()
+    for batch in iter_claim_batches(source, batch_size, columns=_SHIFT_COLUMNS):
+        agg.update(batch)
+    return agg.frame()
+
+
+@lru_cache(maxsize=1)
+def _sample_frame() -> pd.DataFrame:
+    rows = [
+        {"provider_id": pid, "provider_name": prov["name"], "drg_code": c["drg"]}
+        for fam in SAMPLE_SHIFT_DATA.values()
+        for pid, prov in fam.items()
+        for c in prov["claims"]
+    ]
+    return aggregate_shift(pd.DataFrame(rows))
+
+
+@lru_cache(maxsize=4)
+def _file_frame(path: str, mtime: float, size: int) -> pd.DataFrame:
+    return aggregate_shift(path)
 
-        providers.append({
-            "provider_id": prov_id,
-            "provider_name": prov_data["name"],
-            "total_claims": total,
-            "distribution": counts,
-            "mcc_capture_rate_pct": mcc_rate,
-            "avg_drg_weight": round(avg_weight, 4),
-        })
 
-    peer_avg_mcc = round(sum(all_mcc_rates) / len(all_mcc_rates), 1) if all_mcc_rates else 0
+def _shift_frame(claims_path: str = "") -> tuple[pd.DataFrame, str]:
+    """Aggregated table for the configured extract (cached per file version) or the sample."""
+    path = (claims_path or DRG_SHIFT_CLAIMS_PATH or "").strip()
+    if not path:
+        return _sample_frame(), "sample"
+    path = os.path.expanduser(path)
+    st = os.stat(path)
+    return _file_frame(path, st.st_mtime, st.st_size), path
+
+
+def _resolve_family(name: str) -> str | None:
+    key = name.strip().lower().replace(" ", "_")
+    if key in ALL_DRG_FAMILIES:
+        return key
+    entry = _DRG_TO_FAMILY.get(norm_drg(name))
+    return entry[0] if entry else None
+
+
+def _analyze_family(
+    family_name: str,
+    frame: pd.DataFrame | None = None,
+    max_providers: int = 50,
+    min_claims: int = DRG_SHIFT_MIN_CLAIMS,
+) -> dict:
+    """Run DRG shift analysis for one DRG family across providers."""
+    key = _resolve_family(family_name)
+    if not key:
+        return {
+            "error": (
+                f"Unknown family '{family_name}'. Use a family name or any member DRG code "
+                f"({len(ALL_DRG_FAMILIES)} families). Curated: {', '.join(DRG_FAMILIES.keys())}"
+            )
+        }
+    fam = ALL_DRG_FAMILIES[key]
+    if frame is None:
+        frame, _ = _shift_frame()
+    rows = frame[frame["family"] == key]
+    if rows.empty:
+        return {"error": f"No claims data available for family '{key}'."}
+
+    tier_codes = {tier: fam[tier] for tier in _TIERS if fam[tier]}
+    tier_weights = {code: MS_DRG_REFERENCE.get(code, {}).get("relative_weight", 0) for code in tier_codes.values()}
+    capture = "mcc" if "mcc" in tier_codes else "cc"
+
+    # providers in the order they first appear in the claims, as listed before
+    table = (
+        rows.pivot_table(index="provider_id", columns="tier", values="claims", aggfunc="sum", fill_value=0)
+        .reindex(index=rows["provider_id"].unique(), columns=list(tier_codes), fill_value=0)
+    )
+    total = table.sum(axis=1)
+    weight_sum = (rows["claims"] * rows["weight"]).groupby(rows["provider_id"]).sum().reindex(table.index)
+    pct = (table.div(total, axis=0) * 100).round(1)
+    rate = pct[capture] if capture in pct else pd.Series(0.0, index=table.index)
+    avg_weight = weight_sum / total
+    names = rows.drop_duplicates("provider_id").set_index("provider_id")["provider_name"]
+
+    peer_avg = round(float(rate.mean()), 1)
+    all_claims = int(total.sum())
+    case_mix = float(weight_sum.sum()) / all_claims
+    ratio = rate / peer_avg if peer_avg > 0 else pd.Series(float("nan"), index=table.index)
+    eligible = total >= min_claims
+    high = eligible & (ratio >= 1.8)
+    low = eligible & (ratio <= 0.5) & (peer_avg > 20)
 
     flags = []
-    for p in providers:
-        rate = p["mcc_capture_rate_pct"]
-        if peer_avg_mcc > 0:
-            ratio = rate / peer_avg_mcc
-            p["vs_peer_avg"] = f"{'+' if rate > peer_avg_mcc else ''}{round(rate - peer_avg_mcc, 1)}%"
-            p["mcc_ratio_to_peer"] = round(ratio, 2)
-            if ratio >= 1.8:
-                flags.append({
-                    "provider": p["provider_name"],
-                    "severity": "HIGH",
-                    "finding": (
-                        f"MCC capture rate {rate}% is {ratio:.1f}x the peer "
-                        f"average of {peer_avg_mcc}%. Potential upcoding or "
-                        f"superior clinical documentation. Recommend chart review."
-                    ),
-                })
-            elif ratio <= 0.5 and peer_avg_mcc > 20:
-                flags.append({
-                    "provider": p["provider_name"],
-                    "severity": "MODERATE",
-                    "finding": (
-                        f"MCC capture rate {rate}% is only {ratio:.1f}x the peer "
-                        f"average of {peer_avg_mcc}%. Possible undercoding -- "
-                        f"documentation improvement could increase revenue."
-                    ),
-                })
+    for pid in table.index[high | low]:
+        r, x = float(rate[pid]), float(ratio[pid])
+        if high[pid]:
+            flags.append({
+                "provider": names[pid],
+                "severity": "HIGH",
+                "finding": (
+                    f"MCC capture rate {r}% is {x:.1f}x the peer "
+                    f"average of {peer_avg}%. Potential upcoding or "
+                    f"superior clinical documentation. Recommend chart review."
+                ),
+            })
         else:
-            p["vs_peer_avg"] = "N/A"
-            p["mcc_ratio_to_peer"] = None
+            flags.append({
+                "provider": names[pid],
+                "severity": "MODERATE",
+                "finding": (
+                    f"MCC capture rate {r}% is only {x:.1f}x the peer "
+                    f"average of {peer_avg}%. Possible undercoding -- "
+                    f"documentation improvement could increase revenue."
+                ),
+            })
+
+    shown = table.index
+    if len(shown) > max_providers:
+        farthest = (rate - peer_avg).abs().sort_values(ascending=False).index[:max_providers]
+        shown = table.index[table.index.isin(farthest)]
+
+    providers = []
+    for pid in shown:
+        r = float(rate[pid])
+        providers.append({
+            "provider_id": pid,
+            "provider_name": names[pid],
+            "total_claims": int(total[pid]),
+            "distribution": {
+                tier: {"drg": code, "count": int(table.at[pid, tier]), "pct": float(pct.at[pid, tier])}
+                for tier, code in tier_codes.items()
+            },
+            "mcc_capture_rate_pct": r,
+            "avg_drg_weight": round(float(avg_weight[pid]), 4),
+            "vs_peer_avg": f"{'+' if r > peer_avg else ''}{round(r - peer_avg, 1)}%" if peer_avg > 0 else "N/A",
+            "mcc_ratio_to_peer": round(float(ratio[pid]), 2) if peer_avg > 0 else None,
+            "case_mix_vs_peer": round(float(avg_weight[pid]) - case_mix, 4),
+        })
 
     weights_spread = max(tier_weights.values()) - min(tier_weights.values()) if tier_weights else 0
 
     return {
-        "family": family_name,
+        "family": key,
         "label": fam["label"],
         "drg_tiers": {
             tier: {
@@ -268,8 +389,19 @@ def _analyze_family(family_name: str) -> dict:
             }
             for tier, code in tier_codes.items()
         },
+        "capture_tier": capture,
         "weight_spread": round(weights_spread, 4),
-        "peer_avg_mcc_rate_pct": peer_avg_mcc,
+        "peer_avg_mcc_rate_pct": peer_avg,
+        "peer_baseline": {
+            "providers": int(len(table)),
+            "claims": all_claims,
+            "pooled_capture_rate_pct": round(float(table[capture].sum()) / all_claims * 100, 1)
+            if capture in table else 0.0,
+            "median_capture_rate_pct": round(float(rate.median()), 1),
+            "p90_capture_rate_pct": round(float(rate.quantile(0.9)), 1),
+            "case_mix_index": round(case_mix, 4),
+        },
+        "providers_shown": len(providers),
         "providers": providers,
         "flags": flags,
         "recommendation": (
@@ -280,12 +412,15 @@ def _analyze_family(family_name: str) -> dict:
 
 
 @tool
-def drg_shift_analysis(family_name: str) -> str:
+def drg_shift_analysis(
+    family_name: str, claims_path: str = "", max_providers: int = 50, verbosity: str = DEFAULT_VERBOSITY
+) -> str:
     """Analyze DRG shift patterns across providers for a given DRG family.
 
     Compares how different hospitals assign severity-level DRGs (base, CC,
     MCC) for the same clinical condition. Identifies providers with
-    unusually high or low MCC capture rates relative to peers.
+    unusually high or low MCC capture rates relative to peers, with peer
+    baselines (mean / pooled / median / p90 capture rate) and case mix.
 
     A high MCC capture rate may indicate:
       - Superior clinical documentation (legitimate)
@@ -294,12 +429,26 @@ def drg_shift_analysis(family_name: str) -> str:
     A low MCC capture rate may indicate:
       - Undercoding and missed revenue opportunity
 
-    Available families: heart_failure, pneumonia, sepsis,
-    hip_knee_replacement, stroke, uti.
+    Families: curated (heart_failure, pneumonia, sepsis,
+    hip_knee_replacement, stroke, uti) or any MS-DRG with a CC/MCC split --
+    pass the family key or simply a member DRG code (e.g. '190' for COPD).
 
     Args:
         family_name: The DRG family to analyze (e.g. 'heart_failure',
-                     'pneumonia', 'sepsis').
+                     'pneumonia', 'sepsis') or a member DRG code.
+        claims_path: Optional Parquet / CSV / JSONL claims extract with
+                     provider_id, provider_name and drg_code columns.
+                     Defaults to DRG_SHIFT_CLAIMS_PATH, else sample data.
+        max_providers: Max providers listed (those deviating most from peers
+                       when there are more, in provider order); flags cover
+                       everyone, in provider order.
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
     """
-    result = _analyze_family(family_name.strip().lower().replace(" ", "_"))
-    return json.dumps(result, indent=2)
+    try:
+        frame, source = _shift_frame(claims_path)
+    except (OSError, ValueError) as e:
+        return encode({"error": str(e)}, verbosity)
+    result = _analyze_family(family_name, frame, max_providers=max(max_providers, 1))
+    if "error" not in result:
+        result["data_source"] = source
+    return encode(result, verbosity, prose=("recommendation", "provider_name"))
@@ -0,0 +1,148 @@
+"""
+Shared output encoding for the DRG tools.
+
+Tool results are pasted verbatim into the LLM context, so every byte is paid
+for on each call (latency and cost). ``encode`` renders a tool's result dict
+at one of three verbosity levels:
+
+  - "brief":  compact JSON, record lists as columns/rows, explanatory prose
+              fields (e.g. ``reasoning``) dropped
+  - "normal": compact JSON, lists of 4+ uniform records as columns/rows (default)
+  - "full":   the original indented JSON with every field (UI / debugging)
+
+A record list ``[{"a": 1, "b": 2}, {"a": 3, "b": 4}, ...]`` becomes
+``{"columns": ["a", "b"], "rows": [[1, 2], [3, 4], ...]}``; nested dicts in
+the records are flattened to dotted column names.
+
+``NearestCodeIndex`` bounds "not found" suggestions: instead of every known
+code it returns the few codes one edit away or sharing the longest prefix.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+
+VERBOSITY = ("brief", "normal", "full")
+DEFAULT_VERBOSITY = "normal"
+_TABLE_MIN_ROWS = 4
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _flatten(record: dict, prefix: str = "") -> dict | None:
+    out = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            inner = _flatten(value, f"{name}.")
+            if inner is None:
+                return None
+            out.update(inner)
+        elif isinstance(value, _SCALARS):
+            out[name] = value
+        else:
+            return None
+    return out
+
+
+def _as_table(items: list) -> dict | None:
+    if len(items) < _TABLE_MIN_ROWS or not all(isinstance(x, dict) for x in items):
+        return None
+    flat = [_flatten(x) for x in items]
+    if any(f is None for f in flat):
+        return None
+    columns = list(flat[0])
+    if any(list(f) != columns for f in flat[1:]):
+        return None
+    return {"columns": columns, "rows": [[f[c] for c in columns] for f in flat]}
+
+
+def _compact(value, drop: frozenset):
+    if isinstance(value, dict):
+        return {k: _compact(v, drop) for k, v in value.items() if k not in drop}
+    if isinstance(value, list):
+        items = [_compact(v, drop) for v in value]
+        return _as_table(items) or items
+    return value
+
+
+def encode(data, verbosity: str = DEFAULT_VERBOSITY, prose: tuple[str, ...] = ()) -> str:
+    """Serialize a tool result; ``prose`` names fields dropped at "brief"."""
+    level = (verbosity or DEFAULT_VERBOSITY).strip().lower()
+    if level == "full":
+        return json.dumps(data, indent=2)
+    drop = frozenset(prose) if level == "brief" else frozenset()
+    return json.dumps(_compact(data, drop), separators=(",", ":"), ensure_ascii=False)
+
+
+def _deletes(code: str) -> set[str]:
+    return {code[:i] + code[i + 1:] for i in range(len(code))}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+class NearestCodeIndex:
+    """Sorted code list plus a one-deletion neighbourhood map (symmetric delete).
+
+    ``nearest`` returns up to ``k`` codes: first those within one edit of the
+    query (typos, transpositions, a dropped or extra character), then the
+    codes sorting next to it under the longest shared prefix. The deletion map
+    is only built for small vocabularies (DRGs, families); large ones (ICD-10)
+    use the prefix neighbours alone.
+    """
+
+    def __init__(self, codes, typo_index: bool | None = None) -> None:
+        self.codes: list[str] = sorted(set(codes))
+        self._known = set(self.codes)
+        self._deletes: dict[str, list[str]] | None = None
+        if typo_index if typo_index is not None else len(self.codes) <= 5000:
+            self._deletes = {}
+            for code in self.codes:
+                for variant in _deletes(code):
+                    self._deletes.setdefault(variant, []).append(code)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _prefix_neighbours(self, query: str, k: int):
+        """Codes nearest ``query`` in sort order, longest shared prefix first."""
+        for size in range(len(query), 0, -1):
+            prefix = query[:size]
+            lo = bisect.bisect_left(self.codes, prefix)
+            hi = bisect.bisect_left(self.codes, prefix + "\uffff")
+            at = bisect.bisect_left(self.codes, query, lo, hi)
+            positions = sorted(range(max(lo, at - k), min(hi, at + k)), key=lambda i: (abs(i - at + 0.5), i))
+            for i in positions:
+                yield self.codes[i]
+
+    def nearest(self, query: str, k: int = 5) -> list[str]:
+        query = query.strip().upper()
+        if not query or k <= 0:
+            return []
+        found: list[str] = []
+        if self._deletes is not None:
+            near = set(self._deletes.get(query, ()))
+            for variant in _deletes(query):
+                if variant in self._known:
+                    near.add(variant)
+                near.update(self._deletes.get(variant, ()))
+            near.discard(query)
+            numeric = query.isdigit()
+            found = sorted(
+                near,
+                key=lambda c: (_edit_distance(query, c), abs(int(c) - int(query)) if numeric and c.isdigit() else 0, c),
+            )[:k]
+        for code in self._prefix_neighbours(query, k):
+            if len(found) >= k:
+                break
+            if code != query and code not in found:
+                found.append(code)
+        return found
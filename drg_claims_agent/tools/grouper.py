@@ -0,0 +1,213 @@
+"""
+Local MS-DRG grouper -- expected DRG for a claim from the bundled CMS tables.
+
+Not the CMS GROUPER: there is no surgical hierarchy, O.R. procedure table or
+PDX-based CC exclusion list (Appendix C part 2) in this repo. It answers the
+question auditors actually ask -- "given this PDX and these secondaries, which
+severity tier of which DRG family should the claim land in?" -- deterministically
+and without an LLM:
+
+  1. Candidate DRGs for the PDX from Appendix B (``DRG_INDEX``).
+  2. Candidates grouped by severity family (``ALL_DRG_FAMILIES``); the family of
+     the assigned DRG wins when given, otherwise surgical families when the
+     claim has procedures, medical otherwise, lowest DRG number first.
+  3. Claim severity from Appendix C (MCC > CC > none; a repeat of the PDX does
+     not count), mapped to the family tier with CMS-style fallbacks
+     (e.g. CC on a "WITH MCC / WITHOUT MCC" split -> WITHOUT MCC).
+
+``group_claim`` handles one claim; ``group_batch`` resolves each distinct
+(PDX, severity, surgical, assigned DRG) combination once and broadcasts it, so
+a million claims regroup in well under a minute.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from langchain_core.tools import tool
+
+from tools.claims_io import _as_code_list, explode_codes, norm_drg, norm_icd
+from tools.drg_index import DRG_INDEX
+from tools.drg_lookup import ALL_DRG_FAMILIES, CC_MCC_LIST, MS_DRG_REFERENCE, _DRG_TO_FAMILY
+from tools.encoding import DEFAULT_VERBOSITY, encode
+
+CC_LEVEL = pd.Series({icd: e["level"] for icd, e in CC_MCC_LIST.items()}, dtype=object)
+
+# Tier to use for a claim severity, in order of preference when a family lacks a tier.
+_TIER_ORDER = {
+    "mcc": ("mcc", "cc", "base"),
+    "cc": ("cc", "base", "mcc"),
+    "base": ("base", "cc", "mcc"),
+}
+_DRG_TYPE = {code: ref["type"] for code, ref in MS_DRG_REFERENCE.items()}
+# Bases that make the expected DRG trustworthy enough to compare with the assigned one.
+CONFIDENT_BASES = frozenset({"assigned_drg_family", "assigned_drg", "single_group"})
+
+GROUP_COLUMNS = ["expected_drg", "expected_weight", "severity", "family", "grouping_basis"]
+
+
+@lru_cache(maxsize=262_144)
+def _resolve(pdx: str, severity: str, surgical: bool, hint: str) -> tuple[str | None, str | None, str]:
+    """(expected DRG, family key, basis) for one distinct claim signature."""
+    candidates = DRG_INDEX.icd_drgs.get(pdx)
+    if not candidates:
+        return None, None, "pdx_not_in_appendix_b"
+
+    groups: dict[str, set] = {}
+    for d in candidates:
+        fam = _DRG_TO_FAMILY.get(d)
+        groups.setdefault(fam[0] if fam else d, set()).add(d)
+
+    hint_fam = _DRG_TO_FAMILY.get(hint, (None,))[0]
+    if hint_fam in groups:
+        key, basis = hint_fam, "assigned_drg_family"
+    elif hint in groups:
+        key, basis = hint, "assigned_drg"
+    elif len(groups) == 1:
+        key, basis = next(iter(groups)), "single_group"
+    else:
+        want = "Surgical" if surgical else "Medical"
+        typed = [k for k in groups if any(_DRG_TYPE.get(d) == want for d in groups[k])] or list(groups)
+        key = min(typed, key=lambda k: min(groups[k]))
+        basis = "lowest_surgical_drg" if surgical else "lowest_medical_drg"
+
+    members = groups[key]
+    fam = ALL_DRG_FAMILIES.get(key)
+    if fam:
+        order = _TIER_ORDER[severity]
+        for tier in order:
+            if fam[tier] and fam[tier] in members:
+                return fam[tier], key, basis
+        for tier in order:
+            if fam[tier]:
+                return fam[tier], key, basis
+    return min(members), None, basis
+
+
+def _severity(mcc_count, cc_count) -> np.ndarray:
+    return np.where(np.asarray(mcc_count) > 0, "mcc", np.where(np.asarray(cc_count) > 0, "cc", "base"))
+
+
+def severity_counts(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Per-claim (MCC count, CC count) on the secondaries, ignoring repeats of the PDX."""
+    pdx = df["principal_diagnosis"].to_numpy(dtype=object)
+    rows, codes = explode_codes(df["secondary_diagnoses"])
+    levels = codes.map(CC_LEVEL).to_numpy(dtype=object)
+    counted = codes.to_numpy(dtype=object) != pdx[rows]
+    n = len(df)
+    return (
+        np.bincount(rows[counted & (levels == "MCC")], minlength=n),
+        np.bincount(rows[counted & (levels == "CC")], minlength=n),
+    )
+
+
+def group_batch(df: pd.DataFrame, mcc_count=None, cc_count=None) -> pd.DataFrame:
+    """Expected DRG for every claim in a normalized batch (see ``tools.claims_io``).
+
+    ``drg_code`` (when present) is used only as a family hint. Pass precomputed
+    ``mcc_count`` / ``cc_count`` to skip re-reading the secondaries. Returns a
+    frame aligned with ``df`` holding ``GROUP_COLUMNS``.
+    """
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame(columns=GROUP_COLUMNS)
+    if mcc_count is None or cc_count is None:
+        mcc_count, cc_count = severity_counts(df)
+    keys = pd.MultiIndex.from_arrays(
+        [
+            df["principal_diagnosis"].to_numpy(dtype=object),
+            _severity(mcc_count, cc_count),
+            np.fromiter((len(v) > 0 for v in df["procedures"]), dtype=bool, count=n),
+            df["drg_code"].to_numpy(dtype=object) if "drg_code" in df.columns else np.full(n, "", dtype=object),
+        ]
+    )
+    codes, uniques = keys.factorize()
+    resolved = [_resolve(*u) for u in uniques]
+    expected = np.array([r[0] for r in resolved], dtype=object)[codes]
+    weights = pd.Series(expected, dtype=object).map(
+        {c: r["relative_weight"] for c, r in MS_DRG_REFERENCE.items()}
+    )
+    return pd.DataFrame(
+        {
+            "expected_drg": expected,
+            "expected_weight": weights.to_numpy(dtype=float),
+            "severity": keys.get_level_values(1).to_numpy(),
+            "family": np.array([r[1] for r in resolved], dtype=object)[codes],
+            "grouping_basis": np.array([r[2] for r in resolved], dtype=object)[codes],
+        },
+        columns=GROUP_COLUMNS,
+    )
+
+
+def group_claim(
+    principal_diagnosis: str,
+    secondary_diagnoses: list[str] | None = None,
+    procedures: list[str] | None = None,
+    assigned_drg: str | None = None,
+) -> dict:
+    """Expected DRG for one claim, with the candidates and severity drivers."""
+    pdx = norm_icd(principal_diagnosis)
+    sdx = [norm_icd(c) for c in secondary_diagnoses or [] if norm_icd(c)]
+    drivers = [
+        {"icd_code": c, "level": CC_MCC_LIST[c]["level"]} for c in sdx if c != pdx and c in CC_MCC_LIST
+    ]
+    levels = {d["level"] for d in drivers}
+    severity = "mcc" if "MCC" in levels else "cc" if "CC" in levels else "base"
+    hint = norm_drg(assigned_drg) if assigned_drg else ""
+    expected, family, basis = _resolve(pdx, severity, bool(procedures), hint)
+
+    result = {
+        "principal_diagnosis": pdx,
+        "severity": severity,
+        "severity_drivers": drivers,
+        "candidate_drgs": sorted(DRG_INDEX.icd_drgs.get(pdx, ())),
+        "family": family,
+        "grouping_basis": basis,
+        "expected_drg": expected,
+    }
+    if expected:
+        ref = MS_DRG_REFERENCE.get(expected, {})
+        result["expected_description"] = ref.get("description")
+        result["expected_weight"] = ref.get("relative_weight")
+    if hint:
+        assigned = MS_DRG_REFERENCE.get(hint, {})
+        result["assigned_drg"] = hint
+        result["assigned_weight"] = assigned.get("relative_weight")
+        result["matches_assigned"] = expected == hint
+        if expected and assigned and expected != hint:
+            result["weight_delta"] = round(assigned["relative_weight"] - result["expected_weight"], 4)
+    return result
+
+
+@tool
+def drg_group_claim(
+    principal_diagnosis: str,
+    secondary_diagnoses: str = "",
+    procedures: str = "",
+    assigned_drg: str = "",
+    verbosity: str = DEFAULT_VERBOSITY,
+) -> str:
+    """Compute the expected MS-DRG for a claim locally (no Genie, no guessing)
+    from its principal diagnosis, secondary diagnoses and procedures.
+
+    Uses Appendix B for candidate DRGs and Appendix C CC/MCC levels for the
+    severity tier (MCC / CC / base) within the DRG family. Pass the assigned
+    DRG to compare: the result shows whether it matches and the weight delta.
+    Approximate: no surgical hierarchy or PDX-based CC exclusions.
+
+    Args:
+        principal_diagnosis: ICD-10-CM principal diagnosis (e.g. 'I50.23').
+        secondary_diagnoses: Comma-separated secondary ICD-10-CM codes (e.g. 'N17.9, E11.9').
+        procedures: Comma-separated ICD-10-PCS codes, if any.
+        assigned_drg: Optional DRG billed on the claim (e.g. '291').
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
+    """
+    result = group_claim(
+        principal_diagnosis,
+        _as_code_list(secondary_diagnoses),
+        _as_code_list(procedures),
+        assigned_drg or None,
+    )
+    return encode(result, verbosity, prose=("expected_description",))
@@ -6,13 +6,22 @@ Appendix C (18,432 CC/MCC classifications) from the MS-DRG V43.1
 Definitions Manual for validation.
 """
 
-import json
+from functools import lru_cache
+
 from langchain_core.tools import tool
 from tools.drg_lookup import ICD_TO_DRG, CC_MCC_LIST, MS_DRG_REFERENCE
+from tools.drg_index import DRG_INDEX
+from tools.encoding import DEFAULT_VERBOSITY, NearestCodeIndex, encode
+from tools.reference_store import reference_for_date
+
+
+@lru_cache(maxsize=1)
+def _icd_index() -> NearestCodeIndex:
+    return NearestCodeIndex(DRG_INDEX.icds)
 
 
 @tool
-def icd_code_validate(icd_code: str, drg_code: str) -> str:
+def icd_code_validate(icd_code: str, drg_code: str, verbosity: str = DEFAULT_VERBOSITY) -> str:
     """Validate whether a principal ICD-10 diagnosis code is clinically
     appropriate for the assigned MS-DRG code.
 
@@ -30,6 +39,7 @@ def icd_code_validate(icd_code: str, drg_code: str) -> str:
     Args:
         icd_code: The ICD-10-CM principal diagnosis code (e.g. 'M16.11', 'A41.9').
         drg_code: The MS-DRG code assigned to the claim (e.g. '470', '871').
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
     """
     code = drg_code.strip().replace("MS-DRG ", "").replace("DRG ", "")
     icd = icd_code.strip().upper().replace(".", "")
@@ -39,7 +49,7 @@ def icd_code_validate(icd_code: str, drg_code: str) -> str:
 
     icd_entry = ICD_TO_DRG.get(icd)
     if not icd_entry:
-        return json.dumps({
+        return encode({
             "valid": None,
             "icd_code": icd,
             "drg_code": code,
@@ -49,16 +59,14 @@ def icd_code_validate(icd_code: str, drg_code: str) -> str:
                 f"({len(ICD_TO_DRG)} codes loaded). Check the code format -- "
                 f"CMS uses codes without dots (e.g., M1611 not M16.11)."
             ),
-        }, indent=2)
-
-    all_drgs = set()
-    for mapping in icd_entry["mappings"]:
-        all_drgs.update(mapping["drgs"])
+            "nearest_icd_codes": _icd_index().nearest(icd),
+        }, verbosity)
 
+    all_drgs = DRG_INDEX.icd_drgs[icd]
     is_valid = code in all_drgs
 
     if is_valid:
-        return json.dumps({
+        return encode({
             "valid": True,
             "icd_code": icd,
             "icd_description": icd_entry["description"],
@@ -70,7 +78,7 @@ def icd_code_validate(icd_code: str, drg_code: str) -> str:
                 f"CMS Appendix B. Coding appears appropriate."
             ),
             "all_possible_drgs": sorted(all_drgs),
-        }, indent=2)
+        }, verbosity, prose=("reasoning", "drg_description"))
 
     suggested = []
     for drg in sorted(all_drgs):
@@ -82,7 +90,7 @@ def icd_code_validate(icd_code: str, drg_code: str) -> str:
                 "relative_weight": ref["relative_weight"],
             })
 
-    return json.dumps({
+    return encode({
         "valid": False,
         "icd_code": icd,
         "icd_description": icd_entry["description"],
@@ -95,27 +103,34 @@ def icd_code_validate(icd_code: str, drg_code: str) -> str:
             f"This is a DRG coding error."
         ),
         "suggested_drgs": suggested,
-    }, indent=2)
+    }, verbosity, prose=("reasoning", "drg_description"))
 
 
 @tool
-def cc_mcc_check(icd_code: str) -> str:
+def cc_mcc_check(icd_code: str, discharge_date: str = "", verbosity: str = DEFAULT_VERBOSITY) -> str:
     """Check whether an ICD-10 diagnosis code is classified as CC
     (Complication/Comorbidity), MCC (Major CC), or non-CC by CMS.
 
     Uses the official CMS Appendix C (18,432 CC/MCC classifications).
     This is important for auditing MCC-level DRG assignments -- a claim
     coded with an MCC-level DRG should have at least one qualifying MCC
-    on the secondary diagnosis list.
+    on the secondary diagnosis list. Pass the discharge date to use the
+    Appendix C of the grouper version in effect then (v40 / FY2023 onward).
 
     Args:
         icd_code: The ICD-10-CM diagnosis code to check (e.g. 'N17.9', 'J96.01').
+        discharge_date: Optional discharge date (YYYY-MM-DD); default is the current version.
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
     """
     icd = icd_code.strip().upper().replace(".", "")
+    cc_mcc, version = CC_MCC_LIST, {}
+    if discharge_date.strip():
+        ref = reference_for_date(discharge_date.strip())
+        cc_mcc, version = ref.cc_mcc, ref.summary()
 
-    entry = CC_MCC_LIST.get(icd)
+    entry = cc_mcc.get(icd)
     if entry:
-        return json.dumps({
+        return encode({
             "icd_code": icd,
             "classification": entry["level"],
             "description": entry["description"],
@@ -124,11 +139,13 @@ def cc_mcc_check(icd_code: str) -> str:
                 if entry["level"] == "MCC"
                 else "Bumps DRG to middle severity tier (CC level)"
             ),
-        }, indent=2)
+            **version,
+        }, verbosity, prose=("severity_impact",))
 
-    return json.dumps({
+    return encode({
         "icd_code": icd,
         "classification": "Non-CC",
         "description": "Not found in CMS CC/MCC list",
         "severity_impact": "No severity bump -- does not affect DRG assignment",
-    }, indent=2)
+        **version,
+    }, verbosity, prose=("severity_impact",))
@@ -0,0 +1,270 @@
+"""
+Reference-data ingestion pipeline: builds the multi-version store read by
+``reference_store.py`` (MS-DRG v40 - v43.1, FY2023 - FY2026).
+
+For every grouper version in ``VERSION_SPECS`` it produces:
+  - Table 5 weights / LOS      -> versions/v<ver>/drg_weights.json
+                                  (the current FY reuses drg_reference_data.json)
+  - Appendix C CC/MCC list     -> versions/v<ver>/cc_mcc_overlay.json
+                                  (delta against cc_mcc_list.json, rebuilt by
+                                  walking the published FY add/delete lists back)
+  - MCE definitions            -> versions/v<ver>/mce.json via ``parse_mce``
+                                  when a CMS text file is given with --mce,
+                                  otherwise the newest ingested MCE is inherited
+  - New ICD-10-PCS announcement -> v<ver>_new_pcs_codes.json via
+                                  ``parse_v43_1_announcement.parse``
+and writes versions/manifest.json with the discharge-date interval of each
+version.
+
+Usage (from drg_claims_agent/):
+  python tools/ingest_reference.py
+  python tools/ingest_reference.py --cms-dir /path/to/cms --mce 42="/dl/Definitions of Medicare Code Edits_v_42.txt"
+
+``--cms-dir`` holds cms_bundle.sqlite, as written by the nextgen backend's
+scripts/ingest_cms.py: Table 5 per FY from its ``drg_catalog`` table and the
+Appendix C add/delete lists from ``cc_mcc_changes``. It defaults to the
+nextgen backend's data/cms folder in this repo.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+try:
+    from tools.parse_mce import parse_mce
+    from tools.parse_v43_1_announcement import parse as parse_pcs_announcement
+except ImportError:  # run as a script: python tools/ingest_reference.py
+    from parse_mce import parse_mce
+    from parse_v43_1_announcement import parse as parse_pcs_announcement
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.normpath(os.path.join(_DIR, ".."))
+_VERSIONS_DIR = os.path.join(_DIR, "versions")
+_DEFAULT_CMS_DIR = os.path.normpath(
+    os.path.join(_ROOT, "..", "nextgen_agentic_intelligence", "backend", "data", "cms")
+)
+
+# Bundled current-year files (paths relative to tools/)
+BASE_FISCAL_YEAR = "2026"
+BASE_DRG_FILE = "drg_reference_data.json"
+BASE_CC_MCC_FILE = "cc_mcc_list.json"
+BASE_MCE_FILE = "mce_reference.json"
+CMS_BUNDLE_FILE = "cms_bundle.sqlite"
+
+# Grouper versions and the discharge dates they apply to (inclusive).
+VERSION_SPECS = [
+    {"version": "40", "fiscal_year": "2023", "start": "2022-10-01", "end": "2023-09-30"},
+    {"version": "41", "fiscal_year": "2024", "start": "2023-10-01", "end": "2024-09-30"},
+    {"version": "42", "fiscal_year": "2025", "start": "2024-10-01", "end": "2025-09-30"},
+    {"version": "43", "fiscal_year": "2026", "start": "2025-10-01", "end": "2026-03-31"},
+    {
+        "version": "43.1",
+        "fiscal_year": "2026",
+        "start": "2026-04-01",
+        "end": "2026-09-30",
+        "mce": BASE_MCE_FILE,
+        "pcs_announcement": os.path.join("reference", "v43_1_pcs_announcement.txt"),
+    },
+]
+
+_TYPE_NAMES = {"MED": "Medical", "SURG": "Surgical"}
+
+
+def _slug(version: str) -> str:
+    return "v" + version.replace(".", "_")
+
+
+def _write_json(rel_path: str, data, indent: int | None = 1) -> str:
+    path = os.path.join(_DIR, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    return rel_path.replace(os.sep, "/")
+
+
+def _load_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_cms_bundle(cms_dir: str) -> tuple[dict, dict]:
+    """cms_bundle.sqlite -> ({fy: [Table 5 records]}, {fy: {mcc_additions,
+    mcc_deletions, cc_additions, cc_deletions}}), in published order."""
+    path = os.path.join(cms_dir, CMS_BUNDLE_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; build it with the nextgen backend's scripts/ingest_cms.py")
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    con.row_factory = sqlite3.Row
+    try:
+        catalog: dict[str, list[dict]] = {}
+        for r in con.execute(
+            "SELECT fy, drg, title, mdc, type, severity, weight, gmlos, amlos FROM drg_catalog ORDER BY fy, drg"
+        ):
+            catalog.setdefault(r["fy"], []).append({k: r[k] for k in r.keys() if k != "fy"})
+        changes: dict[str, dict[str, list[dict]]] = {}
+        for r in con.execute("SELECT fy, list, action, code, description FROM cc_mcc_changes ORDER BY seq"):
+            key = f"{r['list']}_{r['action']}s"
+            changes.setdefault(r["fy"], {}).setdefault(key, []).append(
+                {"code": r["code"], "description": r["description"]}
+            )
+    finally:
+        con.close()
+    return catalog, changes
+
+
+def drg_weights_from_catalog(records: list[dict], mdc_labels: dict[str, str]) -> dict:
+    """drg_catalog records for one FY -> drg_reference_data.json shape."""
+    out = {}
+    for r in records:
+        mdc = r.get("mdc") or ""
+        out[r["drg"]] = {
+            "description": r["title"],
+            "mdc": mdc_labels.get(mdc, mdc),
+            "type": _TYPE_NAMES.get(r.get("type"), r.get("type") or ""),
+            "relative_weight": r["weight"],
+            "geometric_mean_los": r["gmlos"],
+            "arithmetic_mean_los": r["amlos"],
+        }
+    return dict(sorted(out.items()))
+
+
+def previous_cc_mcc(levels: dict[str, str], changes: dict) -> dict[str, str]:
+    """Undo one fiscal year's Appendix C changes: FY levels -> FY-1 levels.
+
+    A code added as MCC that was also deleted from CC was a CC the year before
+    (and vice versa); plain additions did not qualify before; deletions did.
+    """
+    def codes(key: str) -> set[str]:
+        return {c["code"].upper().replace(".", "") for c in changes.get(key, [])}
+
+    mcc_add, mcc_del = codes("mcc_additions"), codes("mcc_deletions")
+    cc_add, cc_del = codes("cc_additions"), codes("cc_deletions")
+    prev = dict(levels)
+    for code in mcc_add | cc_add:
+        prev.pop(code, None)
+    for code in mcc_del:
+        prev[code] = "MCC"
+    for code in cc_del:
+        prev[code] = "CC"
+    return prev
+
+
+def _descriptions(changes_by_fy: dict) -> dict[str, str]:
+    out = {}
+    for changes in changes_by_fy.values():
+        for items in changes.values():
+            for c in items:
+                out.setdefault(c["code"].upper().replace(".", ""), c.get("description", ""))
+    return out
+
+
+def build(cms_dir: str = _DEFAULT_CMS_DIR, mce_sources: dict[str, str] | None = None) -> dict:
+    """Run the pipeline and write the version files plus versions/manifest.json."""
+    mce_sources = mce_sources or {}
+    base_drg = _load_json(os.path.join(_DIR, BASE_DRG_FILE))
+    base_cc = _load_json(os.path.join(_DIR, BASE_CC_MCC_FILE))
+    catalog, changes = load_cms_bundle(cms_dir)
+    mdc_labels = {ref["mdc"].split(" - ")[0]: ref["mdc"] for ref in base_drg.values()}
+    descriptions = _descriptions(changes)
+
+    # Appendix C per FY, walking back from the bundled current list.
+    levels_by_fy = {BASE_FISCAL_YEAR: {code: e["level"] for code, e in base_cc.items()}}
+    fy = int(BASE_FISCAL_YEAR)
+    oldest = min(int(s["fiscal_year"]) for s in VERSION_SPECS)
+    while fy > oldest:
+        levels_by_fy[str(fy - 1)] = previous_cc_mcc(levels_by_fy[str(fy)], changes.get(str(fy), {}))
+        fy -= 1
+    base_levels = levels_by_fy[BASE_FISCAL_YEAR]
+
+    manifest_versions = []
+    mce_file, mce_from = BASE_MCE_FILE, "43.1"
+    # Newest first so versions without their own MCE text inherit the next newer one.
+    for spec in sorted(VERSION_SPECS, key=lambda s: s["start"], reverse=True):
+        ver, fy = spec["version"], spec["fiscal_year"]
+        slug = _slug(ver)
+        entry = {k: spec[k] for k in ("version", "fiscal_year", "start", "end")}
+        entry["grouper"] = f"ICD-10 MS-DRG V{ver}"
+
+        if fy == BASE_FISCAL_YEAR:
+            entry["drg_weights"] = BASE_DRG_FILE
+        elif fy in catalog:
+            entry["drg_weights"] = _write_json(
+                os.path.join("versions", slug, "drg_weights.json"),
+                drg_weights_from_catalog(catalog[fy], mdc_labels),
+            )
+        else:
+            raise ValueError(f"No Table 5 data for FY{fy} in {cms_dir}")
+
+        levels = levels_by_fy[fy]
+        if levels == base_levels:
+            entry["cc_mcc_overlay"] = None
+        else:
+            overlay = {
+                "base": BASE_CC_MCC_FILE,
+                "fiscal_year": fy,
+                "remove": sorted(set(base_levels) - set(levels)),
+                "set": {
+                    code: {
+                        "level": lvl,
+                        "description": base_cc.get(code, {}).get("description") or descriptions.get(code, ""),
+                    }
+                    for code, lvl in sorted(levels.items())
+                    if base_levels.get(code) != lvl
+                },
+            }
+            entry["cc_mcc_overlay"] = _write_json(os.path.join("versions", slug, "cc_mcc_overlay.json"), overlay)
+
+        if ver in mce_sources:
+            mce_file = _write_json(
+                os.path.join("versions", slug, "mce.json"), parse_mce(mce_sources[ver], version=ver), indent=0
+            )
+            mce_from = ver
+        elif spec.get("mce"):
+            mce_file, mce_from = spec["mce"], ver
+        entry["mce"] = mce_file
+        entry["mce_source"] = f"v{mce_from}" if mce_from == ver else f"inherited from v{mce_from}"
+
+        entry["new_pcs"] = None
+        if spec.get("pcs_announcement"):
+            pcs = parse_pcs_announcement(
+                os.path.join(_ROOT, spec["pcs_announcement"]), effective_date=spec["start"], version=ver
+            )
+            entry["new_pcs"] = _write_json(f"{slug}_new_pcs_codes.json", pcs, indent=2)
+        manifest_versions.append(entry)
+
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "note": "Paths are relative to drg_claims_agent/tools. Appendix B (icd_to_drg.json) is single-version.",
+        "versions": sorted(manifest_versions, key=lambda v: v["start"]),
+    }
+    _write_json(os.path.join("versions", "manifest.json"), manifest, indent=2)
+    return manifest
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Build the multi-version MS-DRG reference store.")
+    ap.add_argument("--cms-dir", default=_DEFAULT_CMS_DIR, help="Folder with cms_bundle.sqlite")
+    ap.add_argument(
+        "--mce",
+        action="append",
+        default=[],
+        metavar="VERSION=PATH",
+        help="CMS 'Definitions of Medicare Code Edits' text for a version (repeatable)",
+    )
+    args = ap.parse_args()
+    mce_sources = dict(item.split("=", 1) for item in args.mce)
+    manifest = build(args.cms_dir, mce_sources)
+    for v in manifest["versions"]:
+        print(
+            f"  v{v['version']:<5} {v['start']} .. {v['end']}  weights={v['drg_weights']}  "
+            f"cc_mcc_overlay={v['cc_mcc_overlay']}  mce={v['mce_source']}"
+        )
+    print("Wrote", os.path.join(_VERSIONS_DIR, "manifest.json"))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ import json
 import os
 from langchain_core.tools import tool
 
+from tools.encoding import DEFAULT_VERBOSITY, encode
+
 _DIR = os.path.dirname(__file__)
 with open(os.path.join(_DIR, "mce_reference.json"), "r", encoding="utf-8") as f:
     MCE_DATA: dict = json.load(f)
@@ -26,31 +28,32 @@ def _norm_icd(code: str) -> str:
     return code.strip().upper().replace(".", "")
 
 
+# Inclusive patient-age bounds for each MCE age-conflict list (MCE_DATA["age_ranges"]).
+AGE_BOUNDS: dict[str, tuple[int, int]] = {
+    "perinatal": (0, 0),
+    "pediatric": (0, 17),
+    "maternity": (9, 64),
+    "adult": (15, 124),
+}
+
+
 def _age_conflict(age: int, icd: str) -> dict | None:
     for bucket, d in _AGE.items():
         if icd not in d:
             continue
+        lo, hi = AGE_BOUNDS[bucket]
+        if lo <= age <= hi:
+            continue
         desc = d[icd]
-        if bucket == "perinatal" and age != 0:
+        if bucket == "perinatal":
             return {
                 "edit": "4 Age conflict (perinatal list)",
                 "detail": f"ICD {icd} is restricted to newborns (age 0). Patient age {age}. {desc}",
             }
-        if bucket == "pediatric" and not (0 <= age <= 17):
-            return {
-                "edit": "4 Age conflict (pediatric list)",
-                "detail": f"ICD {icd} is for ages 0-17. Patient age {age}. {desc}",
-            }
-        if bucket == "maternity" and not (9 <= age <= 64):
-            return {
-                "edit": "4 Age conflict (maternity list)",
-                "detail": f"ICD {icd} is for ages 9-64. Patient age {age}. {desc}",
-            }
-        if bucket == "adult" and not (15 <= age <= 124):
-            return {
-                "edit": "4 Age conflict (adult list)",
-                "detail": f"ICD {icd} is for ages 15-124. Patient age {age}. {desc}",
-            }
+        return {
+            "edit": f"4 Age conflict ({bucket} list)",
+            "detail": f"ICD {icd} is for ages {lo}-{hi}. Patient age {age}. {desc}",
+        }
     return None
 
 
@@ -60,6 +63,7 @@ def mce_code_check(
     is_principal: bool = True,
     patient_age: int | None = None,
     has_secondary_diagnosis: bool | None = None,
+    verbosity: str = DEFAULT_VERBOSITY,
 ) -> str:
     """Screen one ICD-10-CM code against **Medicare Code Editor (MCE) v43.1** rules
     (Definitions of Medicare Code Edits, not MS-DRG grouping).
@@ -79,6 +83,7 @@ def mce_code_check(
         is_principal: If True, apply PDX-only edits (6, 8, 9). If False, only age rules apply.
         patient_age: Patient age in full years, if known (triggers age conflict checks).
         has_secondary_diagnosis: For Z51.89 principal: True if at least one secondary DX exists.
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
     """
     icd = _norm_icd(icd_code)
     out: dict = {
@@ -94,9 +99,10 @@ def mce_code_check(
             out["flags"].append(ac)
 
     if not is_principal:
-        return json.dumps(
+        return encode(
             {**out, "summary": f"MCE: {len(out['flags'])} issue(s) (principal-only edits skipped)."},
-            indent=2,
+            verbosity,
+            prose=("source",),
         )
 
     if icd in _MAN:
@@ -151,4 +157,4 @@ def mce_code_check(
     else:
         out["summary"] = f"MCE: {n} potential edit(s) — review for billing/coding workflow."
 
-    return json.dumps(out, indent=2)
+    return encode(out, verbosity, prose=("source",))
@@ -0,0 +1,128 @@
+"""
+Token cost of DRG tool outputs, before and after the shared encoder.
+
+For a fixed set of representative tool calls it prints the tokens each call
+adds to the LLM context:
+  - before:  the original output (indented JSON, full "available codes" lists
+             in the not-found branches)
+  - full / normal / brief: the ``verbosity`` levels of ``tools/encoding.py``
+
+Tokens are counted with tiktoken (cl100k_base) when it and its encoding file
+are available, else estimated (word / punctuation pieces at ~4 chars per
+token, one token per newline + indent).
+
+Usage (from drg_claims_agent/):
+  python tools/measure_tokens.py [--claims /path/to/claims.parquet] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from tools.drg_index import drg_pdx_overlap, drg_principal_diagnoses, icd_family_drgs  # noqa: E402
+from tools.drg_lookup import ALL_DRG_FAMILIES, DRG_FAMILIES, MS_DRG_REFERENCE, _DRG_TO_FAMILY  # noqa: E402
+from tools.drg_lookup import drg_family_lookup, drg_lookup  # noqa: E402
+from tools.drg_shift import drg_shift_analysis  # noqa: E402
+from tools.grouper import drg_group_claim  # noqa: E402
+from tools.icd_validate import cc_mcc_check, icd_code_validate  # noqa: E402
+from tools.mce_validate import mce_code_check  # noqa: E402
+from tools.pcs_v43_1 import v43_1_pcs_check  # noqa: E402
+
+_PIECES = re.compile(r"\n[ ]*|\w+|[^\w\s]")  # a newline plus its indent is ~1 token
+
+
+def _counter():
+    try:
+        import tiktoken
+
+        enc = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(enc.encode(text)), "tiktoken cl100k_base"
+    except Exception:  # not installed, or no network to fetch the encoding file
+        def estimate(text: str) -> int:
+            return sum(math.ceil(len(p) / 4) for p in _PIECES.findall(text))
+
+        return estimate, "estimate (~4 chars per word piece, 1 per line indent)"
+
+
+# Original not-found messages, reproduced so "before" is the real old cost.
+def _old_drg_not_found(code: str) -> str:
+    return f"DRG code '{code}' not found in reference data. Available codes: {', '.join(sorted(MS_DRG_REFERENCE))}"
+
+
+def _old_family_not_found(code: str) -> str:
+    return (
+        f"DRG '{code}' is not part of a known DRG family (no CC/MCC severity split in its title). "
+        f"{len(ALL_DRG_FAMILIES)} families cover {len(_DRG_TO_FAMILY)} DRGs; "
+        f"curated families: {', '.join(DRG_FAMILIES.keys())}"
+    )
+
+
+def cases(claims_path: str = "") -> list[tuple[str, object, dict, str | None]]:
+    """(label, tool, args, original output or None = same as verbosity 'full')."""
+    out = [
+        ("drg_lookup 871", drg_lookup, {"drg_code": "871"}, None),
+        ("drg_lookup typo 8711", drg_lookup, {"drg_code": "8711"}, _old_drg_not_found("8711")),
+        ("drg_family_lookup 291", drg_family_lookup, {"drg_code": "291"}, None),
+        ("drg_family_lookup 999 (no family)", drg_family_lookup, {"drg_code": "999"}, _old_family_not_found("999")),
+        ("icd_code_validate M16.11/470", icd_code_validate, {"icd_code": "M16.11", "drg_code": "470"}, None),
+        ("icd_code_validate J18.9/470", icd_code_validate, {"icd_code": "J18.9", "drg_code": "470"}, None),
+        ("cc_mcc_check N17.9", cc_mcc_check, {"icd_code": "N17.9"}, None),
+        ("mce_code_check N40.0 age 5", mce_code_check, {"icd_code": "N40.0", "patient_age": 5}, None),
+        ("v43_1_pcs_check 0F9480D", v43_1_pcs_check, {"pcs_code": "0F9480D"}, None),
+        ("drg_principal_diagnoses 871", drg_principal_diagnoses, {"drg_code": "871"}, None),
+        ("icd_family_drgs I50", icd_family_drgs, {"icd_prefix": "I50"}, None),
+        ("drg_pdx_overlap 291/292", drg_pdx_overlap, {"drg_code_a": "291", "drg_code_b": "292"}, None),
+        (
+            "drg_group_claim I50.23 + N17.9",
+            drg_group_claim,
+            {"principal_diagnosis": "I50.23", "secondary_diagnoses": "N17.9, E11.9", "assigned_drg": "291"},
+            None,
+        ),
+        ("drg_shift_analysis heart_failure", drg_shift_analysis, {"family_name": "heart_failure"}, None),
+    ]
+    if claims_path:
+        out.append((
+            "drg_shift_analysis 291 (extract)",
+            drg_shift_analysis,
+            {"family_name": "291", "claims_path": claims_path},
+            None,
+        ))
+    return out
+
+
+def measure(claims_path: str = "") -> dict:
+    count, method = _counter()
+    rows = []
+    for label, fn, args, original in cases(claims_path):
+        levels = {v: count(fn.invoke({**args, "verbosity": v})) for v in ("full", "normal", "brief")}
+        before = count(original) if original is not None else levels["full"]
+        rows.append({"call": label, "before": before, **levels})
+    totals = {k: sum(r[k] for r in rows) for k in ("before", "full", "normal", "brief")}
+    return {"token_counter": method, "calls": rows, "totals": totals}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Measure tokens per DRG tool call by verbosity.")
+    ap.add_argument("--claims", default="", help="Optional claims extract for a drg_shift_analysis case")
+    ap.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = ap.parse_args()
+    report = measure(args.claims)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"Token counter: {report['token_counter']}")
+    print(f"{'call':<36} {'before':>8} {'full':>8} {'normal':>8} {'brief':>8} {'saved':>7}")
+    for r in report["calls"] + [{"call": "TOTAL", **report["totals"]}]:
+        saved = 100.0 * (1 - r["normal"] / r["before"]) if r["before"] else 0.0
+        print(f"{r['call']:<36} {r['before']:>8} {r['full']:>8} {r['normal']:>8} {r['brief']:>8} {saved:>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ One-time (or re-run) parser: CMS "Definitions of Medicare Code Edits" text file
 Usage:
   python tools/parse_mce.py [path-to-Definitions-of-Medicare-Code-Edits.txt]
 
-Default input path (Windows) can be overridden; output is always tools/mce_reference.json
+Default input path (Windows) can be overridden; output is always tools/mce_reference.json.
+Other MCE versions go through ``ingest_reference.py --mce <version>=<path>``.
 """
 
 from __future__ import annotations
@@ -37,7 +38,9 @@ def _split_code_desc(line: str) -> tuple[str, str] | None:
     return None
 
 
-def parse_mce(path: str, encoding: str = "cp1252") -> dict:
+def parse_mce(path: str, encoding: str = "cp1252", version: str = "43.1", release: str = "April 2026") -> dict:
+    """Parse one MCE definitions text file. ``version`` / ``release`` only label the output,
+    so the same parser serves every grouper version (see ``ingest_reference.py``)."""
     with open(path, "r", encoding=encoding, errors="replace") as f:
         lines = f.readlines()
 
@@ -53,7 +56,7 @@ def parse_mce(path: str, encoding: str = "cp1252") -> dict:
     # Z51.89 exception from narrative (asterisk)
     special: dict = {
         "Z5189": {
-            "note": "Acceptable as principal only when a secondary diagnosis is also coded; otherwise MCE may flag REQUIRES SECONDARY DX per CMS v43.1 MCE doc.",
+            "note": f"Acceptable as principal only when a secondary diagnosis is also coded; otherwise MCE may flag REQUIRES SECONDARY DX per CMS v{version} MCE doc.",
         }
     }
 
@@ -145,8 +148,8 @@ def parse_mce(path: str, encoding: str = "cp1252") -> dict:
             sections["unacceptable_pdx"][code] = desc
 
     return {
-        "source": "CMS Definitions of Medicare Code Edits (MCE) ICD-10 v43.1 April 2026",
-        "mce_version": "43.1",
+        "source": f"CMS Definitions of Medicare Code Edits (MCE) ICD-10 v{version} {release}",
+        "mce_version": version,
         "age_ranges": {
             "perinatal": "age 0 years only (newborn/perinatal)",
             "pediatric": "age 0 through 17 (inclusive)",
@@ -56,8 +56,15 @@ def _is_or_following_line(s: str) -> bool:
     return False
 
 
-def parse() -> dict:
-    with open(_SRC, "r", encoding="utf-8") as f:
+def parse(
+    src: str = _SRC, effective_date: str = "2026-04-01", version: str = "43.1", release: str = "April 2026"
+) -> dict:
+    """Parse a CMS "new ICD-10-PCS codes" announcement table (defaults: V43.1).
+
+    ``ingest_reference.py`` calls this for any grouper version whose release
+    came with such an announcement.
+    """
+    with open(src, "r", encoding="utf-8") as f:
         raw_lines = [ln.rstrip() for ln in f.readlines()]
 
     # Skip header until table body
@@ -128,10 +135,12 @@ def parse() -> dict:
         procedures.append(rec)
 
     return {
-        "source": "CMS web announcement: ICD-10 MS-DRGs V43.1 new ICD-10-PCS codes (April 2026)",
-        "effective_date": "2026-04-01",
-        "grouper_version": "ICD-10 MS-DRG V43.1",
-        "mce_version_note": "MCE V43.1: edits validate ICD-10 codes on claims for discharges on or after 2026-04-01",
+        "source": f"CMS web announcement: ICD-10 MS-DRGs V{version} new ICD-10-PCS codes ({release})",
+        "effective_date": effective_date,
+        "grouper_version": f"ICD-10 MS-DRG V{version}",
+        "mce_version_note": (
+            f"MCE V{version}: edits validate ICD-10 codes on claims for discharges on or after {effective_date}"
+        ),
         "footnote_legend": {
             "*": (
                 "Non-O.R. procedure: no assigned MDC/MS-DRG in the announcement table; "
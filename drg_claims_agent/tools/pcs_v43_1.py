@@ -6,11 +6,14 @@ import json
 import os
 from langchain_core.tools import tool
 
+from tools.encoding import DEFAULT_VERBOSITY, encode
+
 _DIR = os.path.dirname(__file__)
 with open(os.path.join(_DIR, "v43_1_new_pcs_codes.json"), "r", encoding="utf-8") as f:
     V43_1_PCS: dict = json.load(f)
 
 _BY_PCS: dict = {e["pcs"]: e for e in V43_1_PCS.get("procedures", [])}
+_PROSE = ("source", "footnote_explanation")
 
 
 def _norm_pcs(code: str) -> str:
@@ -19,7 +22,7 @@ def _norm_pcs(code: str) -> str:
 
 
 @tool
-def v43_1_pcs_check(pcs_code: str) -> str:
+def v43_1_pcs_check(pcs_code: str, verbosity: str = DEFAULT_VERBOSITY) -> str:
     """Check whether an ICD-10-PCS code is one of the **80 new procedure codes** in
     **ICD-10 MS-DRG / Grouper & MCE V43.1** effective **April 1, 2026** (CMS web announcement).
 
@@ -29,26 +32,28 @@ def v43_1_pcs_check(pcs_code: str) -> str:
 
     Args:
         pcs_code: ICD-10-PCS code (7 characters, with or without dots).
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
     """
     code = _norm_pcs(pcs_code)
     if len(code) != 7 or not any(c.isdigit() for c in code):
-        return json.dumps(
+        return encode(
             {
                 "error": "Provide a 7-character ICD-10-PCS code (e.g. 0F9480D).",
                 "input": pcs_code,
             },
-            indent=2,
+            verbosity,
         )
     e = _BY_PCS.get(code)
     if not e:
-        return json.dumps(
+        return encode(
             {
                 "in_v43_1_new_80": False,
                 "pcs": code,
                 "effective": V43_1_PCS.get("effective_date"),
                 "source": V43_1_PCS.get("source"),
             },
-            indent=2,
+            verbosity,
+            prose=_PROSE,
         )
     out = {
         "in_v43_1_new_80": True,
@@ -63,4 +68,4 @@ def v43_1_pcs_check(pcs_code: str) -> str:
         k = e["cms_table_footnote"]
         if k in leg:
             out["footnote_explanation"] = leg[k]
-    return json.dumps(out, indent=2)
+    return encode(out, verbosity, prose=_PROSE)
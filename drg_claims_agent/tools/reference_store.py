@@ -0,0 +1,117 @@
+"""
+Version-aware reference lookups: discharge date -> MS-DRG grouper version ->
+that version's Table 5 weights, Appendix C CC/MCC list and MCE tables.
+
+``versions/manifest.json`` (built by ``ingest_reference.py``) lists v40 - v43.1
+with their discharge-date ranges. Dates are resolved through a pandas
+``IntervalIndex`` (vectorized for batches); a version's files are read only when
+a claim first needs it and kept in a small LRU, so a run over current-year
+claims never loads the historical tables.
+
+Dates before the oldest version resolve to the oldest one; missing dates and
+dates after the newest resolve to the current version (the behaviour of the
+single-version tools).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from tools.drg_lookup import CC_MCC_LIST, MS_DRG_REFERENCE
+from tools.mce_validate import MCE_DATA
+
+_DIR = os.path.dirname(__file__)
+
+with open(os.path.join(_DIR, "versions", "manifest.json"), "r", encoding="utf-8") as _f:
+    MANIFEST: dict = json.load(_f)
+
+_SPECS: dict[str, dict] = {v["version"]: v for v in MANIFEST["versions"]}
+VERSIONS: list[str] = [v["version"] for v in MANIFEST["versions"]]  # oldest -> newest
+CURRENT_VERSION = VERSIONS[-1]
+
+# [start, end + 1 day) so discharge timestamps with a time part still match.
+_INTERVALS = pd.IntervalIndex.from_arrays(
+    pd.to_datetime([v["start"] for v in MANIFEST["versions"]]),
+    pd.to_datetime([v["end"] for v in MANIFEST["versions"]]) + pd.Timedelta(days=1),
+    closed="left",
+)
+
+# Files already held in memory by the single-version tools.
+_SHARED = {
+    "drg_reference_data.json": MS_DRG_REFERENCE,
+    "mce_reference.json": MCE_DATA,
+}
+
+
+def _load(rel_path: str):
+    if rel_path in _SHARED:
+        return _SHARED[rel_path]
+    with open(os.path.join(_DIR, rel_path), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ReferenceVersion:
+    """Reference tables for one grouper version (see ``load_version``)."""
+
+    def __init__(self, spec: dict) -> None:
+        self.version: str = spec["version"]
+        self.fiscal_year: str = spec["fiscal_year"]
+        self.start: str = spec["start"]
+        self.end: str = spec["end"]
+        self.mce_source: str = spec.get("mce_source", "")
+        self.drg: dict = _load(spec["drg_weights"])
+        self.mce: dict = _load(spec["mce"])
+        overlay = spec.get("cc_mcc_overlay")
+        if overlay:
+            delta = _load(overlay)
+            cc_mcc = dict(CC_MCC_LIST)
+            for code in delta["remove"]:
+                cc_mcc.pop(code, None)
+            cc_mcc.update(delta["set"])
+            self.cc_mcc: dict = cc_mcc
+        else:
+            self.cc_mcc = CC_MCC_LIST
+
+    def summary(self) -> dict:
+        return {
+            "reference_version": self.version,
+            "fiscal_year": self.fiscal_year,
+            "discharges": f"{self.start} to {self.end}",
+        }
+
+
+@lru_cache(maxsize=len(VERSIONS))  # every version stays loaded
+def load_version(version: str) -> ReferenceVersion:
+    """Tables for ``version`` ('40' .. '43.1'), loaded on first use."""
+    spec = _SPECS.get(version)
+    if spec is None:
+        raise KeyError(f"Unknown grouper version '{version}'. Available: {', '.join(VERSIONS)}")
+    return ReferenceVersion(spec)
+
+
+def version_positions(dates) -> np.ndarray:
+    """Vectorized discharge date -> index into ``VERSIONS`` (see module docstring for edges)."""
+    dt = pd.to_datetime(pd.Series(dates, copy=False), errors="coerce")
+    if getattr(dt.dt, "tz", None) is not None:
+        dt = dt.dt.tz_localize(None)
+    pos = _INTERVALS.get_indexer(pd.DatetimeIndex(dt))
+    before = (pos < 0) & (dt < _INTERVALS[0].left).to_numpy()
+    pos[before] = 0
+    pos[pos < 0] = len(VERSIONS) - 1
+    return pos
+
+
+def version_for_date(date) -> str:
+    """Grouper version for one discharge date ('' / None -> current version)."""
+    if date is None or date == "":
+        return CURRENT_VERSION
+    return VERSIONS[int(version_positions([date])[0])]
+
+
+def reference_for_date(date) -> ReferenceVersion:
+    return load_version(version_for_date(date))
@@ -0,0 +1,200 @@
+"""
+Section-level retrieval over the agent skills (``skills/*/SKILL.md``).
+
+Reading a whole SKILL.md puts every workflow, table and report template of
+that skill into the context, though a question usually needs one or two
+parts. The skill index splits each SKILL.md at its ``##`` / ``###`` headings
+(headings inside fenced code blocks, e.g. report templates, stay with their
+section) and indexes every section with BM25 over its skill name, heading
+path and text (``CodeSearchIndex`` from ``code_search.py``, so stems and
+typos match too).
+
+``skill_sections`` returns the top-k sections for a question within a token
+budget and reports how many tokens that saves against reading the full
+SKILL.md of every skill the sections came from.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import yaml
+from langchain_core.tools import tool
+
+from tools.code_search import CodeSearchIndex
+from tools.encoding import DEFAULT_VERBOSITY, encode
+
+SKILLS_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "skills"))
+_FRONT_MATTER = re.compile(r"\A---\n(.*?)\n---\n", re.S)
+_HEADING = re.compile(r"^(#{1,3})\s+(.+?)\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_PIECES = re.compile(r"\n[ ]*|\w+|[^\w\s]")
+DEFAULT_K = 3
+DEFAULT_TOKEN_BUDGET = 1200
+
+
+def estimate_tokens(text: str) -> int:
+    """Word / punctuation pieces at ~4 chars per token (as ``measure_tokens.py``)."""
+    return sum(math.ceil(len(p) / 4) for p in _PIECES.findall(text))
+
+
+@dataclass(frozen=True)
+class SkillSection:
+    skill: str
+    heading: str  # "Red Flags to Check > 2. DRG Upcoding (CRITICAL)"
+    text: str
+    tokens: int
+
+
+@dataclass(frozen=True)
+class Skill:
+    name: str
+    description: str
+    path: str
+    tokens: int  # whole SKILL.md, what read_file would put in context
+
+
+def split_sections(skill: str, body: str) -> list[SkillSection]:
+    """Sections of a SKILL.md body at level-2 / level-3 headings outside code fences."""
+    sections: list[SkillSection] = []
+    title, path, lines = "", [], []
+    in_fence = False
+
+    def flush() -> None:
+        text = "\n".join(lines).strip()
+        if text and ("\n" in text or not _HEADING.match(text)):  # heading-only parents carry nothing
+            heading = " > ".join(path) if path else (title or "Overview")
+            sections.append(SkillSection(skill, heading, text, estimate_tokens(text)))
+
+    for line in body.splitlines():
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match and len(match.group(1)) == 1 and not title:
+            title = match.group(2)
+            continue
+        if match and len(match.group(1)) > 1:
+            flush()
+            level, text = len(match.group(1)), match.group(2)
+            path = (path[:1] if level == 3 and path else []) + [text]
+            lines = [line]
+            continue
+        lines.append(line)
+    flush()
+    return sections
+
+
+class SkillIndex:
+    """All skills under ``skills_dir``, split into searchable sections."""
+
+    def __init__(self, skills_dir: str = SKILLS_DIR) -> None:
+        self.skills: dict[str, Skill] = {}
+        self.sections: list[SkillSection] = []
+        for entry in sorted(os.listdir(skills_dir)) if os.path.isdir(skills_dir) else []:
+            path = os.path.join(skills_dir, entry, "SKILL.md")
+            if not os.path.isfile(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                raw = f.read()
+            meta, body = {}, raw
+            match = _FRONT_MATTER.match(raw)
+            if match:
+                meta = yaml.safe_load(match.group(1)) or {}
+                body = raw[match.end():]
+            name = str(meta.get("name") or entry)
+            self.skills[name] = Skill(name, str(meta.get("description", "")), path, estimate_tokens(raw))
+            self.sections.extend(split_sections(name, body))
+        self._index = CodeSearchIndex([
+            # heading words twice: a section titled "HRRP" is about HRRP
+            (s.skill, str(i), f"{s.skill.replace('-', ' ')} {s.heading} {s.heading} {s.text}")
+            for i, s in enumerate(self.sections)
+        ])
+
+    def search(self, question: str, skill: str = "", k: int = DEFAULT_K) -> list[tuple[SkillSection, float]]:
+        hits, _ = self._index.search(question, skill or "all", k)
+        return [(self.sections[int(self._index.codes[doc])], score) for doc, score in hits]
+
+
+@lru_cache(maxsize=1)
+def skill_index() -> SkillIndex:
+    return SkillIndex()
+
+
+def select_sections(
+    question: str, skill: str = "", k: int = DEFAULT_K, token_budget: int = DEFAULT_TOKEN_BUDGET
+) -> dict:
+    """Top ``k`` sections that fit ``token_budget`` plus the token accounting."""
+    index = skill_index()
+    picked, used = [], 0
+    # rank a few extra so a section over budget can give way to a smaller one
+    for section, score in index.search(question, skill, max(k, 1) * 3):
+        if len(picked) >= k:
+            break
+        if used + section.tokens > token_budget:
+            if picked:
+                continue
+            # the best match alone is over budget: return its head rather than nothing
+            cut = len(section.text) * token_budget // max(section.tokens, 1)
+            section = SkillSection(section.skill, section.heading, section.text[:cut] + "\n...", token_budget)
+        picked.append((section, score))
+        used += section.tokens
+    skills = sorted({s.skill for s, _ in picked})
+    full = sum(index.skills[name].tokens for name in skills)
+    return {
+        "sections": picked,
+        "skills": skills,
+        "tokens_returned": used,
+        "tokens_full_skills": full,
+        "tokens_saved": max(full - used, 0),
+    }
+
+
+@tool
+def skill_sections(
+    question: str,
+    skill: str = "",
+    k: int = DEFAULT_K,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    verbosity: str = DEFAULT_VERBOSITY,
+) -> str:
+    """Load only the parts of the agent skills (/skills/*/SKILL.md) relevant
+    to a question: the top-k headed sections that fit a token budget.
+
+    Use this INSTEAD of read_file on a whole SKILL.md. Each section comes
+    with its skill and heading path; read the full file only if the sections
+    returned do not cover the question. Reports the context tokens saved
+    versus reading the full SKILL.md of the skills involved.
+
+    Args:
+        question: The user's question or the policy / workflow topic needed.
+        skill: Optional skill name to search within (e.g. 'audit-guidelines', 'medicare-mce').
+        k: Maximum number of sections to return (default 3).
+        token_budget: Maximum estimated tokens of section text (default 1200).
+        verbosity: 'brief' (smallest, no explanatory text), 'normal' (default) or 'full'.
+    """
+    index = skill_index()
+    skill = (skill or "").strip()
+    if skill and skill not in index.skills:
+        return encode({"error": f"Unknown skill '{skill}'", "skills": sorted(index.skills)}, verbosity)
+    result = select_sections(question or "", skill, max(1, min(int(k), 10)), max(100, int(token_budget)))
+    if not result["sections"]:
+        return encode({
+            "question": question,
+            "error": "No skill section matched; pick a skill below and read its SKILL.md.",
+            "skills": {name: s.description for name, s in index.skills.items()},
+        }, verbosity, prose=("skills",))
+    return encode({
+        "sections": [
+            {"skill": s.skill, "heading": s.heading, "score": round(score, 2), "text": s.text}
+            for s, score in result["sections"]
+        ],
+        "tokens_returned": result["tokens_returned"],
+        "tokens_full_skills": result["tokens_full_skills"],
+        "tokens_saved": result["tokens_saved"],
+        "full_skill_paths": [f"/skills/{os.path.basename(os.path.dirname(index.skills[n].path))}/SKILL.md"
+                             for n in result["skills"]],
+    }, verbosity, prose=("full_skill_paths",))
@@ -2,8 +2,9 @@
 
 The supervisor is a compiled LangGraph graph. It plans with todos, keeps working
 memory in a virtual filesystem, and routes work to the subagents via the
-built-in `task` tool. A MemorySaver checkpointer gives per-thread conversation
-memory so the chat UI can keep context across turns.
+built-in `task` tool. A checkpointer (`checkpoint.py`: SQLite by default, shared
+by every worker) gives per-thread conversation memory so the chat UI can keep
+context across turns and a paused approval can be resumed on any worker.
 
 Subagents are assembled at agent-construction time (not import time) so that
 runtime Genie configuration determines the DRG agent's live-vs-mock tools and
@@ -15,8 +16,7 @@ from functools import lru_cache
 
 from deepagents import create_deep_agent
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
-
+from .checkpoint import get_checkpointer
 from .config import get_settings
 from .prompts import SUPERVISOR_PROMPT
 from .subagents import (
@@ -26,6 +26,7 @@ from .subagents import (
     SEARCH_SUBAGENT,
     build_data_subagent,
     build_drg_subagent,
+    has_data_subagent,
 )
 
 _DATA_AGENT_ROUTE = (
@@ -67,6 +68,15 @@ def _build_subagents() -> list[dict]:
     return subs
 
 
+def subagent_names() -> list[str]:
+    """Names of the subagents ``_build_subagents`` returns, without building them."""
+    static = (APPEALS_SUBAGENT, CALLCENTER_SUBAGENT, CONTEXT_SUBAGENT, SEARCH_SUBAGENT)
+    names = ["drg-agent"] + [s["name"] for s in static]
+    if has_data_subagent():
+        names.append("data-agent")
+    return names
+
+
 @lru_cache
 def get_agent():
     """Return the singleton compiled supervisor deep agent."""
@@ -82,6 +92,6 @@ def get_agent():
     # `checkpointer` gives per-thread memory. Older deepagents builds don't
     # accept it in create_deep_agent; fall back gracefully if so.
     try:
-        return create_deep_agent(checkpointer=MemorySaver(), **common)
+        return create_deep_agent(checkpointer=get_checkpointer(), **common)
     except TypeError:
         return create_deep_agent(**common)
@@ -0,0 +1,270 @@
+"""Durable, bounded conversation checkpointer for the supervisor graph.
+
+The supervisor keeps each thread's history (and any paused human-in-the-loop
+interrupt) in a LangGraph checkpointer. An in-process ``MemorySaver`` pins that
+state to one worker's RAM and never frees it, so this module provides:
+
+* a persistent async checkpointer chosen by ``CHECKPOINTER``:
+    - ``sqlite`` (default): ``AsyncSqliteSaver`` on ``CHECKPOINT_DB_PATH`` in WAL
+      mode. Every uvicorn worker opens the same file, so ``/api/resume`` can land
+      on any worker.
+    - ``memory``: the old single-process ``MemorySaver``.
+    - ``package.module:factory``: any other saver (e.g. Postgres). The factory
+      takes the settings and returns a saver, or an awaitable of one.
+* per-thread activity tracking (``touch``) and TTL pruning (``prune_idle``) of
+  threads idle longer than ``CHECKPOINT_TTL_SECONDS``, so storage stays flat
+  under sustained traffic. ``main.py`` runs the pruner in the background.
+* the thread's current question, recorded with its activity, so a
+  ``/api/resume`` served by another worker can still label its trace
+  (``question``). Traces themselves and DataFrame result handles stay in the
+  worker that ran the turn.
+
+The async saver must be created on the server's event loop, so ``main.py``
+opens it in the FastAPI lifespan. Until then (tests, scripts) ``get_checkpointer``
+hands out a process-local ``MemorySaver``.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import inspect
+import logging
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+
+from .config import Settings, get_settings
+
+log = logging.getLogger(__name__)
+
+_ACTIVITY_DDL = """
+CREATE TABLE IF NOT EXISTS thread_activity (
+    thread_id TEXT PRIMARY KEY,
+    last_active REAL NOT NULL,
+    question TEXT
+);
+CREATE INDEX IF NOT EXISTS thread_activity_last_active ON thread_activity (last_active);
+"""
+
+
+# --------------------------------------------------------------------------
+# Activity stores (when was each thread last used)
+# --------------------------------------------------------------------------
+class _MemoryActivity:
+    """Process-local activity map, for savers that live in one process."""
+
+    def __init__(self) -> None:
+        self._last: dict[str, float] = {}
+        self._questions: dict[str, str] = {}
+
+    async def touch(self, thread_id: str, now: float, question: Optional[str] = None) -> None:
+        self._last[thread_id] = now
+        if question is not None:
+            self._questions[thread_id] = question
+
+    async def question(self, thread_id: str) -> str:
+        return self._questions.get(thread_id, "")
+
+    async def idle_since(self, cutoff: float) -> list[str]:
+        return [tid for tid, ts in self._last.items() if ts < cutoff]
+
+    async def forget(self, thread_ids: list[str]) -> None:
+        for tid in thread_ids:
+            self._last.pop(tid, None)
+            self._questions.pop(tid, None)
+
+    async def count(self) -> int:
+        return len(self._last)
+
+
+class _SqliteActivity:
+    """``thread_activity`` table next to the checkpoints, shared by all workers."""
+
+    def __init__(self, saver: Any) -> None:
+        self._saver = saver
+        self._ready = False
+
+    async def _conn(self):
+        if not self._ready:
+            await self._saver.setup()  # connects and creates the checkpoint tables
+            async with self._saver.lock:
+                conn = self._saver.conn
+                await conn.executescript(_ACTIVITY_DDL)
+                async with conn.execute("PRAGMA table_info(thread_activity)") as cur:
+                    columns = {row[1] for row in await cur.fetchall()}
+                if "question" not in columns:  # table created before questions were kept
+                    await conn.execute("ALTER TABLE thread_activity ADD COLUMN question TEXT")
+                await conn.commit()
+            self._ready = True
+        return self._saver.conn
+
+    async def touch(self, thread_id: str, now: float, question: Optional[str] = None) -> None:
+        conn = await self._conn()
+        async with self._saver.lock:
+            await conn.execute(
+                "INSERT INTO thread_activity (thread_id, last_active, question) VALUES (?, ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET last_active = excluded.last_active, "
+                "question = COALESCE(excluded.question, thread_activity.question)",
+                (thread_id, now, question),
+            )
+            await conn.commit()
+
+    async def question(self, thread_id: str) -> str:
+        conn = await self._conn()
+        async with self._saver.lock:
+            async with conn.execute(
+                "SELECT question FROM thread_activity WHERE thread_id = ?", (thread_id,)
+            ) as cur:
+                row = await cur.fetchone()
+        return (row[0] if row else None) or ""
+
+    async def idle_since(self, cutoff: float) -> list[str]:
+        conn = await self._conn()
+        async with self._saver.lock:
+            async with conn.execute(
+                "SELECT thread_id FROM thread_activity WHERE last_active < ?", (cutoff,)
+            ) as cur:
+                return [row[0] for row in await cur.fetchall()]
+
+    async def forget(self, thread_ids: list[str]) -> None:
+        if not thread_ids:
+            return
+        conn = await self._conn()
+        async with self._saver.lock:
+            await conn.executemany(
+                "DELETE FROM thread_activity WHERE thread_id = ?", [(t,) for t in thread_ids]
+            )
+            await conn.commit()
+
+    async def count(self) -> int:
+        conn = await self._conn()
+        async with self._saver.lock:
+            async with conn.execute("SELECT COUNT(*) FROM thread_activity") as cur:
+                return (await cur.fetchone())[0]
+
+
+# --------------------------------------------------------------------------
+# Open / close
+# --------------------------------------------------------------------------
+_saver: Optional[BaseCheckpointSaver] = None
+_activity: Any = None
+_fallback: Optional[MemorySaver] = None
+
+
+async def _sqlite_saver(path: str) -> BaseCheckpointSaver:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # timeout -> SQLite busy timeout, so concurrent workers wait instead of failing
+    conn = await aiosqlite.connect(path, timeout=30)
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver
+
+
+async def _factory_saver(spec: str, settings: Settings) -> BaseCheckpointSaver:
+    module_name, _, attr = spec.partition(":")
+    if not module_name or not attr:
+        raise ValueError(
+            f"CHECKPOINTER must be 'sqlite', 'memory' or 'package.module:factory', got {spec!r}"
+        )
+    factory = getattr(importlib.import_module(module_name), attr)
+    saver = factory(settings)
+    if inspect.isawaitable(saver):
+        saver = await saver
+    if not isinstance(saver, BaseCheckpointSaver):
+        raise TypeError(f"{spec} returned {type(saver).__name__}, not a BaseCheckpointSaver")
+    return saver
+
+
+async def open_checkpointer(settings: Optional[Settings] = None) -> BaseCheckpointSaver:
+    """Create the configured checkpointer on the running loop (idempotent)."""
+    global _saver, _activity
+    if _saver is not None:
+        return _saver
+    settings = settings or get_settings()
+    kind = (settings.CHECKPOINTER or "sqlite").strip()
+    if kind == "sqlite":
+        saver = await _sqlite_saver(settings.CHECKPOINT_DB_PATH)
+        activity: Any = _SqliteActivity(saver)
+    elif kind == "memory":
+        saver, activity = MemorySaver(), _MemoryActivity()
+    else:
+        saver, activity = await _factory_saver(kind, settings), _MemoryActivity()
+    _saver, _activity = saver, activity
+    log.info("Checkpointer: %s (%s)", kind, type(saver).__name__)
+    return saver
+
+
+async def close_checkpointer() -> None:
+    """Close the checkpointer's connection, if it has one."""
+    global _saver, _activity
+    saver, _saver, _activity = _saver, None, None
+    conn = getattr(saver, "conn", None)
+    if conn is not None and hasattr(conn, "close"):
+        result = conn.close()
+        if inspect.isawaitable(result):
+            await result
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """The opened checkpointer, or a process-local ``MemorySaver`` before that."""
+    global _fallback
+    if _saver is not None:
+        return _saver
+    if _fallback is None:
+        _fallback = MemorySaver()
+    return _fallback
+
+
+# --------------------------------------------------------------------------
+# Activity + TTL pruning
+# --------------------------------------------------------------------------
+async def touch(thread_id: str, now: Optional[float] = None, question: Optional[str] = None) -> None:
+    """Mark a thread as used (each chat turn and resume); a chat turn also
+    records its ``question``."""
+    if _activity is not None:
+        await _activity.touch(thread_id, time.time() if now is None else now, question)
+
+
+async def question(thread_id: str) -> str:
+    """The thread's current question as recorded by ``touch`` ("" if unknown)."""
+    return await _activity.question(thread_id) if _activity is not None else ""
+
+
+async def prune_idle(ttl_seconds: Optional[float] = None, now: Optional[float] = None) -> list[str]:
+    """Delete every thread idle for longer than ``ttl_seconds``; return their ids."""
+    if _saver is None or _activity is None:
+        return []
+    ttl = get_settings().CHECKPOINT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    if ttl <= 0:
+        return []
+    cutoff = (time.time() if now is None else now) - ttl
+    idle = await _activity.idle_since(cutoff)
+    for thread_id in idle:
+        await _saver.adelete_thread(thread_id)
+    await _activity.forget(idle)
+    if idle:
+        log.info("Pruned %d idle thread(s) from the checkpointer", len(idle))
+    return idle
+
+
+async def tracked_threads() -> int:
+    """Number of threads with checkpoint activity on record."""
+    return await _activity.count() if _activity is not None else 0
+
+
+async def prune_forever(interval_seconds: float, on_pruned=None) -> None:
+    """Background task: ``prune_idle`` every ``interval_seconds``."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            pruned = await prune_idle()
+            if pruned and on_pruned is not None:
+                on_pruned(pruned)
+        except Exception:  # noqa: BLE001 - keep the pruner alive
+            log.exception("Checkpoint pruning failed")
@@ -5,10 +5,38 @@ the official CMS IPPS Final Rule files (Table 5 = MS-DRG catalog; Tables 6 =
 ICD-10 / CC / MCC changes) plus a verified per-year rule-highlights file.
 
 Covers FY2023-FY2026 (MS-DRG v40-v43).
+
+The multi-year data is one SQLite file, ``cms_bundle.sqlite``: every FY's DRG
+catalog and changes, and every FY's CC / MCC list (as runs of years per code)
+with its additions and deletions, in typed columns. It is opened read-only and
+memory-mapped, one connection per thread; CC / MCC questions ("was N17.9 an MCC
+in FY2023?") are primary-key reads, never a full load. The catalog and changes
+(~4k rows) are read into memory once for the indexes below. ``ipps_rules.json``
+and ``icd10_updates.json`` stay small JSON files.
+
+Lookups go through indexes built once, on first use:
+
+* ``_drg_index``: per FY, an inverted index over the DRG titles for
+  ``search_drgs``. Results are ranked with BM25. Query words match title words
+  exactly, by stem ("replacements" -> "replacement"), by prefix ("septic" ->
+  "septicemia") or, for typos, by close spelling ("pnuemonia" -> "pneumonia").
+  Those looser matches score progressively lower. Titles matching every query
+  word are returned when there are any; otherwise the best partial matches.
+* ``_changes_index``: DRG -> change history, FY -> changes by type, and the
+  per-FY change-type counts, for ``get_drg`` / ``get_changes``.
+
+``scripts/bench_cms_lookups.py`` times the query functions.
 """
 from __future__ import annotations
 
+import bisect
+import difflib
 import json
+import math
+import re
+import sqlite3
+import threading
+from collections import defaultdict
 from functools import lru_cache
 from pathlib import Path
 from typing import Optional
@@ -18,6 +46,11 @@ LATEST_FY = "2026"
 FYS = ["2023", "2024", "2025", "2026"]
 
 
+BUNDLE = "cms_bundle.sqlite"
+_MMAP_BYTES = 64 * 1024 * 1024
+_local = threading.local()
+
+
 def _load(name: str) -> dict | list:
     path = _DIR / name
     if not path.exists():
@@ -25,9 +58,47 @@ def _load(name: str) -> dict | list:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def _bundle() -> Optional[sqlite3.Connection]:
+    """This thread's read-only connection to the bundle (None if not ingested)."""
+    path = _DIR / BUNDLE
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == path:
+        return conn
+    if not path.exists():
+        return None
+    # immutable: no locking or change detection; ingest swaps in a new file
+    conn = sqlite3.connect(f"{path.as_uri()}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA mmap_size={_MMAP_BYTES}")
+    _local.conn, _local.path = conn, path
+    return conn
+
+
+def _query(sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+    conn = _bundle()
+    return conn.execute(sql, params).fetchall() if conn is not None else []
+
+
+def _dicts(sql: str, drop_nulls: bool = False) -> list[dict]:
+    """All rows of a query as plain dicts (tuples + zip: ~2x faster than Row)."""
+    conn = _bundle()
+    if conn is None:
+        return []
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(sql)
+    cols = [d[0] for d in cur.description]
+    if drop_nulls:
+        return [{k: v for k, v in zip(cols, row) if v is not None} for row in cur]
+    return [dict(zip(cols, row)) for row in cur]
+
+
 @lru_cache(maxsize=1)
 def _catalog() -> dict:
-    return _load("ms_drg_catalog.json")  # {fy: [records]}
+    catalog: dict[str, list] = defaultdict(list)  # {fy: [records]}
+    for rec in _dicts("SELECT * FROM drg_catalog ORDER BY fy, drg"):
+        catalog[rec.pop("fy")].append(rec)
+    return dict(catalog)
 
 
 @lru_cache(maxsize=1)
@@ -37,7 +108,8 @@ def _catalog_index() -> dict:
 
 @lru_cache(maxsize=1)
 def _changes() -> list:
-    return _load("drg_changes.json")
+    return _dicts("SELECT fy, change_type, drg, title, old_title, new_title FROM drg_changes ORDER BY seq",
+                  drop_nulls=True)
 
 
 @lru_cache(maxsize=1)
@@ -46,22 +118,145 @@ def _rules() -> dict:
 
 
 @lru_cache(maxsize=1)
-def _cc_mcc() -> dict:
-    return _load("cc_mcc_list.json")
+def _icd10() -> dict:
+    return _load("icd10_updates.json")
 
 
 @lru_cache(maxsize=1)
-def _icd10() -> dict:
-    return _load("icd10_updates.json")
+def _cc_mcc_fys() -> list[str]:
+    row = _query("SELECT value FROM meta WHERE key = 'cc_mcc_fys'")
+    return json.loads(row[0]["value"]) if row else []
+
+
+# --- indexes -----------------------------------------------------------------
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("a an and or of the for in on to by drg drgs ms".split())
+_BM25_K1, _BM25_B = 1.2, 0.75
+# weight of a query word matched by stem / prefix / close spelling vs exactly
+_STEM_WEIGHT, _PREFIX_WEIGHT, _FUZZY_WEIGHT = 0.9, 0.6, 0.5
+_PHRASE_BONUS = 1.0  # added when the whole query appears in the title as typed
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ies", "es", "s", "ing", "ed", "al"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[: -len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def _words(text: str) -> list[str]:
+    return [w for w in _WORD.findall((text or "").lower()) if w not in _STOPWORDS]
+
+
+class _SearchIndex:
+    """BM25 inverted index over one FY's DRG titles.
+
+    Each posting already holds the word's BM25 score in that title, so a query
+    only sums dict entries.
+    """
+
+    def __init__(self, records: list[dict]) -> None:
+        self.records = records
+        counts: dict[str, dict[int, int]] = defaultdict(dict)
+        lengths = []
+        for i, rec in enumerate(records):
+            words = _words(rec.get("title", ""))
+            lengths.append(len(words))
+            for w in words:
+                counts[w][i] = counts[w].get(i, 0) + 1
+        avg = (sum(lengths) / len(lengths)) if lengths else 1.0
+        n = len(records)
+        self.postings: dict[str, dict[int, float]] = {}
+        for w, docs in counts.items():
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.postings[w] = {
+                i: idf * tf * (_BM25_K1 + 1) / (tf + _BM25_K1 * (1 - _BM25_B + _BM25_B * lengths[i] / avg))
+                for i, tf in docs.items()
+            }
+        self.vocab = sorted(self.postings)
+        self.stems: dict[str, list[str]] = defaultdict(list)
+        for w in self.vocab:
+            self.stems[_stem(w)].append(w)
+        self._expansions: dict[str, dict[str, float]] = {}
+
+    def _expand(self, word: str) -> dict[str, float]:
+        """Title words a query word matches, with their weights (memoized)."""
+        cached = self._expansions.get(word)
+        if cached is not None:
+            return cached
+        matches: dict[str, float] = {}
+        if word in self.postings:
+            matches[word] = 1.0
+        for w in self.stems.get(_stem(word), ()):
+            matches.setdefault(w, _STEM_WEIGHT)
+        if len(word) >= 5:  # "with" must not prefix-match "without"
+            for w in self.vocab[bisect.bisect_left(self.vocab, word):]:
+                if not w.startswith(word):
+                    break
+                matches.setdefault(w, _PREFIX_WEIGHT)
+        if not matches and len(word) >= 4:
+            near = [w for w in self.vocab if abs(len(w) - len(word)) <= 2 and w[0] == word[0]]
+            for w in difflib.get_close_matches(word, near, n=3, cutoff=0.8):
+                matches[w] = _FUZZY_WEIGHT
+        if len(self._expansions) < 10_000:
+            self._expansions[word] = matches
+        return matches
+
+    def search(self, query: str) -> list[tuple[float, dict]]:
+        words = list(dict.fromkeys(_words(query)))
+        scores: dict[int, float] = defaultdict(float)
+        matched: dict[int, int] = defaultdict(int)
+        for word in words:
+            best: dict[int, float] = {}
+            for w, weight in self._expand(word).items():
+                for i, s in self.postings[w].items():
+                    s *= weight
+                    if s > best.get(i, 0.0):
+                        best[i] = s
+            for i, s in best.items():
+                scores[i] += s
+                matched[i] += 1
+        phrase = " ".join((query or "").lower().split())
+        # titles matching every query word, if there are any; else the best partial ones
+        if any(m == len(words) for m in matched.values()):
+            scores = {i: s for i, s in scores.items() if matched[i] == len(words)}
+        ranked = []
+        for i, score in scores.items():
+            if matched[i] < len(words):
+                score *= matched[i] / len(words)
+            if phrase and phrase in self.records[i]["title"].lower():
+                score += _PHRASE_BONUS
+            ranked.append((round(score, 3), self.records[i]))
+        ranked.sort(key=lambda hit: (-hit[0], hit[1]["drg"]))
+        return ranked
 
 
 @lru_cache(maxsize=1)
-def _cc_mcc_changes() -> dict:
-    return _load("cc_mcc_changes.json")
+def _drg_index() -> dict[str, _SearchIndex]:
+    return {fy: _SearchIndex(recs) for fy, recs in _catalog().items()}
+
+
+@lru_cache(maxsize=1)
+def _changes_index() -> dict:
+    """{"by_drg": {drg: [changes]}, "by_fy": {fy: [changes]},
+    "by_fy_type": {fy: {type: [changes]}}, "summary": {fy: {type: count}}}"""
+    by_drg: dict[str, list] = defaultdict(list)
+    by_fy: dict[str, list] = defaultdict(list)
+    by_fy_type: dict[str, dict[str, list]] = defaultdict(lambda: defaultdict(list))
+    for c in _changes():
+        by_drg[c.get("drg")].append(c)
+        by_fy[c.get("fy")].append(c)
+        by_fy_type[c.get("fy")][c.get("change_type")].append(c)
+    return {
+        "by_drg": dict(by_drg),
+        "by_fy": dict(by_fy),
+        "by_fy_type": {fy: dict(types) for fy, types in by_fy_type.items()},
+        "summary": {fy: {t: len(items) for t, items in types.items()} for fy, types in by_fy_type.items()},
+    }
 
 
 def available() -> bool:
-    return bool(_catalog())
+    return _bundle() is not None
 
 
 def _norm_fy(fy) -> str:
@@ -78,7 +273,7 @@ def _norm_drg(drg) -> str:
 
 # --- queries ---------------------------------------------------------------
 def drg_change_history(drg: str) -> list[dict]:
-    return [c for c in _changes() if c.get("drg") == drg]
+    return list(_changes_index()["by_drg"].get(drg, ()))
 
 
 def get_drg(drg: str, fy=LATEST_FY) -> dict:
@@ -105,12 +300,13 @@ def get_drg(drg: str, fy=LATEST_FY) -> dict:
 
 def get_changes(fy=LATEST_FY, change_type: str = "all") -> dict:
     fy = _norm_fy(fy)
-    items = [c for c in _changes() if c.get("fy") == fy]
+    index = _changes_index()
     if change_type and change_type != "all":
-        items = [c for c in items if c.get("change_type") == change_type]
-    summary: dict[str, int] = {}
-    for c in items:
-        summary[c["change_type"]] = summary.get(c["change_type"], 0) + 1
+        items = list(index["by_fy_type"].get(fy, {}).get(change_type, ()))
+        summary = {change_type: len(items)} if items else {}
+    else:
+        items = list(index["by_fy"].get(fy, ()))
+        summary = dict(index["summary"].get(fy, {}))
     return {"fy": fy, "change_type": change_type, "summary": summary, "changes": items}
 
 
@@ -121,11 +317,16 @@ def get_rule(fy=LATEST_FY) -> dict:
 
 
 def search_drgs(query: str, fy=LATEST_FY, limit: int = 25) -> dict:
+    """DRGs whose titles match ``query``, best first (each with its ``score``)."""
     fy = _norm_fy(fy)
-    q = (query or "").strip().lower()
-    recs = _catalog().get(fy, [])
-    hits = [r for r in recs if q in r["title"].lower()] if q else []
-    return {"fy": fy, "query": query, "count": len(hits), "results": hits[:limit]}
+    index = _drg_index().get(fy)
+    hits = index.search(query) if index and (query or "").strip() else []
+    return {
+        "fy": fy,
+        "query": query,
+        "count": len(hits),
+        "results": [{**rec, "score": score} for score, rec in hits[:limit]],
+    }
 
 
 def compare_drg(drg: str, fy1: str, fy2: str) -> dict:
@@ -146,15 +347,22 @@ def compare_drg(drg: str, fy1: str, fy2: str) -> dict:
     }
 
 
-def cc_mcc_status(icd10: str) -> dict:
+def cc_mcc_status(icd10: str, fy=LATEST_FY) -> dict:
+    """A code's severity tier in ``fy``, plus its tier in every loaded FY."""
     code = (icd10 or "").strip().upper()
-    data = _cc_mcc()
-    mcc, cc = data.get("mcc", {}), data.get("cc", {})
-    if code in mcc:
-        return {"icd10": code, "tier": "MCC", "description": mcc[code], "fy": data.get("fy")}
-    if code in cc:
-        return {"icd10": code, "tier": "CC", "description": cc[code], "fy": data.get("fy")}
-    return {"icd10": code, "tier": "neither (NonCC)", "fy": data.get("fy")}
+    fy = _norm_fy(fy)
+    runs = _query("SELECT first_fy, last_fy, tier FROM cc_mcc WHERE code = ?", (code,))
+    by_fy = {}
+    for y in _cc_mcc_fys():
+        by_fy[y] = next((r["tier"] for r in runs if r["first_fy"] <= y <= r["last_fy"]), "NonCC")
+    tier = by_fy.get(fy, "NonCC")
+    out = {"icd10": code, "tier": tier if tier != "NonCC" else "neither (NonCC)", "fy": fy}
+    if runs:
+        row = _query("SELECT description FROM icd10_codes WHERE code = ?", (code,))
+        if row:
+            out["description"] = row[0]["description"]
+    out["by_fy"] = by_fy
+    return out
 
 
 def get_icd10_updates(fy=LATEST_FY) -> dict:
@@ -168,17 +376,20 @@ def get_icd10_updates(fy=LATEST_FY) -> dict:
 def get_cc_mcc_changes(fy=LATEST_FY, limit: int = 25) -> dict:
     """Per-year additions/deletions to the MCC and CC lists (counts + a sample)."""
     fy = _norm_fy(fy)
-    ch = _cc_mcc_changes().get(fy)
-    if not ch:
-        return {"fy": fy, "note": f"No CC/MCC change data for FY{fy}."}
-
-    def cap(items: list) -> dict:
-        return {"count": len(items), "sample": items[:limit]}
-
-    return {
-        "fy": fy,
-        "mcc_additions": cap(ch.get("mcc_additions", [])),
-        "mcc_deletions": cap(ch.get("mcc_deletions", [])),
-        "cc_additions": cap(ch.get("cc_additions", [])),
-        "cc_deletions": cap(ch.get("cc_deletions", [])),
+    counts = {
+        (r["list"], r["action"]): r["n"]
+        for r in _query(
+            "SELECT list, action, COUNT(*) AS n FROM cc_mcc_changes WHERE fy = ? GROUP BY list, action", (fy,)
+        )
     }
+    if not counts:
+        return {"fy": fy, "note": f"No CC/MCC change data for FY{fy}."}
+    out: dict = {"fy": fy}
+    for lst, action in (("mcc", "addition"), ("mcc", "deletion"), ("cc", "addition"), ("cc", "deletion")):
+        sample = _query(
+            "SELECT code, description FROM cc_mcc_changes WHERE fy = ? AND list = ? AND action = ? "
+            "ORDER BY seq LIMIT ?",
+            (fy, lst, action, limit),
+        )
+        out[f"{lst}_{action}s"] = {"count": counts.get((lst, action), 0), "sample": [dict(r) for r in sample]}
+    return out
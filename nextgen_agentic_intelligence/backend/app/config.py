@@ -38,6 +38,21 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
 
+    # --- Conversation checkpoints -------------------------------------------
+    # "sqlite" (durable, shared by all uvicorn workers), "memory" (one process),
+    # or "package.module:factory" returning any LangGraph checkpoint saver.
+    CHECKPOINTER: str = "sqlite"
+    CHECKPOINT_DB_PATH: str = str(_ENV_FILE.parent / "data" / "checkpoints.sqlite")
+    # Threads idle longer than this are deleted (0 keeps them forever).
+    CHECKPOINT_TTL_SECONDS: int = 86400
+    CHECKPOINT_PRUNE_INTERVAL_SECONDS: int = 600
+
+    # --- Flow traces ---------------------------------------------------------
+    # Per-thread step traces ("Show flow", /api/trace) kept in memory: at most
+    # this many threads, each dropped after this long without activity.
+    TRACE_MAX_THREADS: int = 1000
+    TRACE_TTL_SECONDS: int = 3600
+
     # --- Databricks Genie (Stage 2) -----------------------------------------
     # PAT auth: the databricks-sdk auto-detects these env vars. For Azure the
     # host looks like https://adb-XXXXXXXX.azuredatabricks.net
@@ -51,15 +66,66 @@ class Settings(BaseSettings):
     # (default "drg"). Leave blank to fall back to Stage-1 mock tools.
     GENIE_SPACES: str = ""
 
-    # Max result rows returned to the LLM (keeps the context bounded).
+    # Max result rows returned to the LLM per call (result_rows page size cap).
     GENIE_MAX_ROWS: int = 50
+    # Results up to this many rows are shown inline; larger ones as a summary,
+    # with the rows kept server-side under a handle (app/genie/results.py).
+    GENIE_INLINE_ROWS: int = 10
+    # Memory budget of result handles (DataFrames; a downloaded result stays in
+    # its Parquet file under GENIE_RESULTS_DIR and costs only its bookkeeping).
+    GENIE_RESULT_MAX_MB: float = 256
+    GENIE_RESULT_TTL_SECONDS: int = 3600
     # Per-question wait budget for Genie (SQL generation + warehouse execution).
     GENIE_TIMEOUT_SECONDS: int = 180
+    # Status polling backoff for async Genie / SQL calls: the first wait, growing
+    # ~1.5x per poll up to the max.
+    GENIE_POLL_INITIAL_SECONDS: float = 0.25
+    GENIE_POLL_MAX_SECONDS: float = 3.0
     # SQL warehouse for executing approved/edited SQL. If blank, it's resolved
     # automatically from the Genie space's configured warehouse.
     GENIE_WAREHOUSE_ID: str = ""
-    # Where approved (question -> SQL) "tools" are persisted so repeats skip HITL.
-    SAVED_QUERIES_PATH: str = str(_ENV_FILE.parent / "data" / "saved_queries.json")
+    # Where approved (question -> SQL) "tools" are persisted so repeats skip HITL
+    # (SQLite; a legacy saved_queries.json beside it is imported once).
+    SAVED_QUERIES_PATH: str = str(_ENV_FILE.parent / "data" / "saved_queries.db")
+    # Warehouse results of read-only SQL are reused for this long (a space can
+    # set its own cache_ttl_seconds in GENIE_SPACES; 0 disables), in a cache of
+    # at most this many MB (least recently used evicted first).
+    SQL_CACHE_TTL_SECONDS: float = 300
+    SQL_CACHE_MAX_MB: float = 256
+    # Large (EXTERNAL_LINKS) results are downloaded here as Parquet, this many
+    # chunks at a time, retrying a failed chunk this many times.
+    GENIE_RESULTS_DIR: str = str(_ENV_FILE.parent / "data" / "results")
+    GENIE_DOWNLOAD_CONCURRENCY: int = 4
+    GENIE_DOWNLOAD_RETRIES: int = 3
+    # Result files not read for this long are deleted (keep it at least
+    # GENIE_RESULT_TTL_SECONDS), then the oldest while the folder is over this
+    # many MB; swept before each download.
+    GENIE_RESULTS_RETENTION_SECONDS: int = 3600
+    GENIE_RESULTS_DISK_MB: float = 10240
+
+    # --- Web search (app/tools/search_tools.py) -----------------------------
+    # Engines raced by the async path, in order ("langchain", "ddgs"); each
+    # gets this long, and gives the one before it this head start.
+    SEARCH_ENGINES: str = "langchain,ddgs"
+    SEARCH_ENGINE_TIMEOUT_SECONDS: float = 8.0
+    SEARCH_HEDGE_SECONDS: float = 0.5
+    # Results are reused for this long per normalized query (0 disables).
+    SEARCH_CACHE_PATH: str = str(_ENV_FILE.parent / "data" / "search_cache.sqlite")
+    SEARCH_CACHE_TTL_SECONDS: float = 21600
+
+    # --- Fast router (app/router.py) ----------------------------------------
+    # A local classifier trained on labeled questions sends a thread's first
+    # question straight to a subagent, skipping the supervisor's routing LLM
+    # call, when it is at least this confident (0-1), its top score (mean
+    # cosine similarity) is at least ROUTER_MIN_SCORE and leads the runner-up
+    # by ROUTER_MIN_MARGIN. Others go through the supervisor as before.
+    ROUTER_ENABLED: bool = True
+    ROUTER_CONFIDENCE: float = 0.9
+    ROUTER_MIN_SCORE: float = 0.2
+    ROUTER_MIN_MARGIN: float = 0.15
+    ROUTER_EXAMPLES_PATH: str = str(_ENV_FILE.parent / "data" / "router_examples.jsonl")
+    ROUTER_NEIGHBORS: int = 5
+    ROUTER_TEMPERATURE: float = 0.03
 
     @property
     def databricks_configured(self) -> bool:
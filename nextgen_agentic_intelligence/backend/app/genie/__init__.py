@@ -7,6 +7,7 @@ a LangChain tool.
 from .client import GenieClient, GenieResult, get_genie_client
 from .hitl_tools import build_data_query_tools
 from .registry import GenieSpace, load_genie_spaces
+from .result_tools import build_result_tools
 from .tools import genie_tools_for
 
 __all__ = [
@@ -17,4 +18,5 @@ __all__ = [
     "GenieSpace",
     "genie_tools_for",
     "build_data_query_tools",
+    "build_result_tools",
 ]
@@ -1,7 +1,7 @@
 """Thin, robust wrapper over the Databricks Genie Conversation API.
 
-Call sequence (handled by the SDK's ``*_and_wait`` helpers, which poll to a
-terminal status for us):
+Call sequence for the synchronous ``ask`` (the SDK's ``*_and_wait`` helpers
+poll to a terminal status for us):
 
     start_conversation_and_wait(space_id, content) -> GenieMessage
     create_message_and_wait(space_id, conversation_id, content) -> GenieMessage  # follow-ups
@@ -15,6 +15,16 @@ Result extraction (verified against the Genie API docs / SDK):
     columns      -> statement_response.manifest.schema.columns[].name
     rows         -> statement_response.result.data_array   (may be None -> guard)
 
+Async (``aask`` / ``arun_sql``): the tools the agents run on the server's event
+loop use these. They start the message / statement without waiting
+(``start_conversation`` / ``create_message`` / ``execute_statement`` with
+``wait_timeout="0s"``), then poll ``get_message`` / ``get_statement`` with
+``asyncio.sleep`` between polls. The delay starts at ``GENIE_POLL_INITIAL_SECONDS``
+and grows ~1.5x (with jitter) to ``GENIE_POLL_MAX_SECONDS``, so quick answers are
+picked up quickly and long ones are not hammered. Only the individual HTTP
+calls run in worker threads, so no thread is held for the whole wait and
+several Genie questions (parallel tool calls) proceed concurrently.
+
 Important SDK behaviors handled here:
     * ``GenieMessage.status`` is a ``MessageStatus`` *enum* (not a str), so we
       normalize via ``.value`` before comparing — otherwise ``str(status)`` is
@@ -23,8 +33,12 @@ Important SDK behaviors handled here:
       ``TimeoutError``) rather than returning a FAILED status, so the except
       block classifies those. The terminal-status branch is kept as defense.
     * ``data_array`` is inline only for small results. Large results (>~25 MB)
-      use the EXTERNAL_LINKS disposition; ``data_array`` is empty and we surface
-      a clear note instead of silently returning zero rows.
+      use the EXTERNAL_LINKS disposition; ``data_array`` is empty and the chunks
+      are downloaded into a local Parquet file (``external_results.py``). An
+      INLINE ``run_sql`` that fails for size is re-run with EXTERNAL_LINKS.
+    * Every result, inline or downloaded, is stored server-side under a handle
+      (``results.py``); the LLM gets the rows of small results and a compact
+      summary of larger ones, and reads the rest through the result tools.
     * Exception text is scrubbed of the host/token before being shown to the
       LLM/UI; full detail is logged server-side.
     * The SDK import is lazy so the backend still boots when databricks-sdk is
@@ -32,21 +46,37 @@ Important SDK behaviors handled here:
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import random
+import re
 import threading
+import time
 from dataclasses import asdict, dataclass, field
 from datetime import timedelta
-from functools import lru_cache
-from typing import Any, Optional
+from functools import lru_cache, partial
+from typing import Any, Iterator, Optional
 
 from ..config import get_settings
+from . import result_cache
+from .external_results import (
+    ExternalResult,
+    download_external_result,
+    download_external_result_sync,
+)
+from .results import store_file, store_rows
 
 logger = logging.getLogger(__name__)
 
 # Terminal statuses (compared against MessageStatus.value strings).
 _TERMINAL_OK = {"COMPLETED"}
 _TERMINAL_BAD = {"FAILED", "CANCELLED", "QUERY_RESULT_EXPIRED"}
+# Statement states that are still in flight.
+_STATEMENT_RUNNING = ("PENDING", "RUNNING")
+# How a statement fails when its result is over the ~25 MiB INLINE limit
+_INLINE_TOO_LARGE = re.compile(r"inline\b.{0,40}\b(limit|exceed)|exceed.{0,40}\binline|EXTERNAL_LINKS|\b25 ?MiB", re.I)
+_BACKOFF_FACTOR = 1.5
 
 
 def _status_str(status: Any) -> str:
@@ -57,6 +87,14 @@ def _status_str(status: Any) -> str:
     return str(getattr(status, "value", None) or status or "")
 
 
+def _poll_delays(initial: float, maximum: float) -> Iterator[float]:
+    """Jittered, growing sleep intervals between status polls."""
+    delay = initial
+    while True:
+        yield delay * random.uniform(0.8, 1.2)
+        delay = min(delay * _BACKOFF_FACTOR, maximum)
+
+
 @dataclass
 class GenieResult:
     """Normalized, LLM-friendly result of one Genie question."""
@@ -76,10 +114,20 @@ class GenieResult:
     message_id: Optional[str] = None
     error: Optional[str] = None
     note: Optional[str] = None
+    # EXTERNAL_LINKS results: the full result on local disk
+    result_file: Optional[str] = None
+    # The full result stored server-side (results.py) and, when it is too big
+    # to inline, its summary
+    handle: Optional[str] = None
+    summary: Optional[dict] = None
 
     def to_json(self) -> str:
-        # Compact (no indent) to keep LLM context small; rows already capped.
-        return json.dumps(asdict(self), default=str, ensure_ascii=False)
+        # Compact (no indent) to keep LLM context small. Rows of a summarized
+        # result stay server-side under the handle.
+        data = asdict(self)
+        if self.summary is not None:
+            data.pop("rows")
+        return json.dumps(data, default=str, ensure_ascii=False)
 
 
 class GenieClient:
@@ -147,8 +195,7 @@ class GenieClient:
             question=question,
             conversation_id=conversation_id,
         )
-        s = get_settings()
-        timeout = timedelta(seconds=s.GENIE_TIMEOUT_SECONDS)
+        timeout = timedelta(seconds=get_settings().GENIE_TIMEOUT_SECONDS)
         try:
             w = self._client()
             if conversation_id:
@@ -159,23 +206,77 @@ class GenieClient:
                 msg = w.genie.start_conversation_and_wait(
                     space_id, question, timeout=timeout
                 )
-        except TimeoutError as exc:
+        except Exception as exc:  # noqa: BLE001 - report, don't crash the agent
+            return self._ask_failed(result, exc)
+        return self._finish_ask(result, msg, space_id, conversation_id)
+
+    async def aask(
+        self,
+        space_id: str,
+        question: str,
+        space_name: str = "",
+        conversation_id: Optional[str] = None,
+    ) -> GenieResult:
+        """Async ``ask``: same result, polled without blocking the event loop."""
+        result = GenieResult(
+            space=space_name or space_id,
+            space_id=space_id,
+            question=question,
+            conversation_id=conversation_id,
+        )
+        s = get_settings()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + s.GENIE_TIMEOUT_SECONDS
+        try:
+            w = await asyncio.to_thread(self._client)
+            if conversation_id:
+                started = await asyncio.to_thread(
+                    w.genie.create_message, space_id, conversation_id, question
+                )
+            else:
+                started = await asyncio.to_thread(w.genie.start_conversation, space_id, question)
+            get_message = partial(
+                w.genie.get_message,
+                space_id=space_id,
+                conversation_id=started.conversation_id,
+                message_id=started.message_id,
+            )
+            delays = _poll_delays(s.GENIE_POLL_INITIAL_SECONDS, s.GENIE_POLL_MAX_SECONDS)
+            while True:
+                msg = await asyncio.to_thread(get_message)
+                status = _status_str(getattr(msg, "status", None))
+                if status in _TERMINAL_OK or status in _TERMINAL_BAD:
+                    break
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"timed out, current status: {status}")
+                await asyncio.sleep(min(next(delays), remaining))
+        except Exception as exc:  # noqa: BLE001 - report, don't crash the agent
+            return self._ask_failed(result, exc)
+        # terminal-bad statuses are returned here (not raised), and handled there
+        return await asyncio.to_thread(self._finish_ask, result, msg, space_id, conversation_id)
+
+    # -- helpers -----------------------------------------------------------
+    def _ask_failed(self, result: GenieResult, exc: Exception) -> GenieResult:
+        if isinstance(exc, TimeoutError):
             logger.warning("Genie timeout: %s", self._scrub(str(exc)))
             result.status = "TIMEOUT"
             result.error = (
-                f"Genie did not complete within {s.GENIE_TIMEOUT_SECONDS}s. "
+                f"Genie did not complete within {get_settings().GENIE_TIMEOUT_SECONDS}s. "
                 "Try a more specific or aggregated question."
             )
             return result
-        except Exception as exc:  # noqa: BLE001 - report, don't crash the agent
-            logger.warning("Genie request failed: %s", self._scrub(str(exc)))
-            # The SDK's *_and_wait raises OperationFailed when a message reaches a
-            # terminal-bad status; its message embeds the status string.
-            if exc.__class__.__name__ == "OperationFailed":
-                result.status = "FAILED"
-            result.error = self._safe_error("Genie request failed", exc)
-            return result
+        logger.warning("Genie request failed: %s", self._scrub(str(exc)))
+        # The SDK's *_and_wait raises OperationFailed when a message reaches a
+        # terminal-bad status; its message embeds the status string.
+        if exc.__class__.__name__ == "OperationFailed":
+            result.status = "FAILED"
+        result.error = self._safe_error("Genie request failed", exc)
+        return result
 
+    def _finish_ask(
+        self, result: GenieResult, msg: Any, space_id: str, conversation_id: Optional[str]
+    ) -> GenieResult:
         result.conversation_id = getattr(msg, "conversation_id", None) or conversation_id
         # Prefer the canonical message_id; fall back to legacy id.
         result.message_id = getattr(msg, "message_id", None) or getattr(msg, "id", None)
@@ -222,7 +323,6 @@ class GenieClient:
             )
         return result
 
-    # -- helpers -----------------------------------------------------------
     def _attach_rows(self, result: GenieResult, space_id: str, attachment_id: str) -> None:
         try:
             w = self._client()
@@ -233,23 +333,49 @@ class GenieClient:
             if sr is None:
                 result.note = "Query produced no statement_response (no result set)."
                 return
-            cols, rows, truncated, external = _extract_rows(
-                sr, get_settings().GENIE_MAX_ROWS
-            )
+            cols, rows, truncated, external = _extract_rows(sr)
             result.columns = cols
             result.rows = rows
             result.row_count = len(rows)
             result.truncated = truncated
             if external:
-                result.note = (
-                    "Result is large and was returned via EXTERNAL_LINKS "
-                    "(presigned URLs); inline rows are unavailable. Ask Genie to "
-                    "aggregate/limit the result to see rows here."
+                ext = download_external_result_sync(
+                    sr, self._chunk_links(getattr(sr, "statement_id", None))
                 )
+                stored = self._external_fields(ext)
+                result.rows = ext.head
+                result.row_count = ext.total_rows
+                result.result_file = stored["result_file"]
+                result.note = stored["note"]
+            else:
+                stored = store_rows(cols, rows, _column_types(sr))
+            result.handle = stored["handle"]
+            result.summary = stored.get("summary")
         except Exception as exc:  # noqa: BLE001
             logger.warning("Genie row fetch failed: %s", self._scrub(str(exc)))
             result.note = self._safe_error("Could not fetch query rows", exc)
 
+    def _chunk_links(self, statement_id: Optional[str]):
+        """Fetch fresh presigned links for one chunk of ``statement_id``."""
+
+        def fetch(chunk_index: int) -> list:
+            if not statement_id:
+                return []
+            data = self._client().statement_execution.get_statement_result_chunk_n(
+                statement_id, chunk_index
+            )
+            return list(getattr(data, "external_links", None) or [])
+
+        return fetch
+
+    def _external_fields(self, ext: ExternalResult) -> dict:
+        stored = store_file(ext.path)
+        stored["note"] = (
+            f"Large result ({ext.total_rows} rows, {ext.chunks} chunk(s)) was "
+            f"downloaded server-side; it is stored under handle {stored['handle']} "
+            "— use result_rows / result_filter / result_aggregate to read it."
+        )
+        return stored
 
     # -- SQL execution (for HITL approve/edit of generated SQL) ------------
     def get_warehouse_id(self, space_id: str) -> Optional[str]:
@@ -270,61 +396,181 @@ class GenieClient:
             logger.warning("Could not resolve warehouse for %s: %s", space_id, self._scrub(str(exc)))
             return None
 
-    def run_sql(self, space_id: str, sql: str, max_rows: Optional[int] = None) -> dict:
+    def run_sql(
+        self,
+        space_id: str,
+        sql: str,
+        max_rows: Optional[int] = None,
+        disposition: str = "INLINE",
+        refresh: bool = False,
+        cache_ttl: Optional[float] = None,
+    ) -> dict:
         """Execute raw SQL on the space's warehouse and return columns/rows.
 
-        Used to run human-approved or human-edited SQL. Returns a dict with
-        ``columns``/``rows``/``row_count``/``truncated`` or ``error``.
+        Used to run human-approved or human-edited SQL. The full result is
+        stored under a handle (``results.py``); returns its view (``handle``,
+        ``row_count``, ``columns`` and ``rows`` or ``summary``), or ``error``.
+        ``max_rows`` caps the rows kept (default: all). With
+        ``disposition="EXTERNAL_LINKS"`` (results over the ~25 MB inline limit)
+        the result is downloaded to a Parquet file first (``result_file``); an
+        INLINE statement that fails for size is re-run that way.
+
+        Read-only results are cached for the space's TTL (``result_cache.py``;
+        ``cache_ttl`` overrides it): a repeat returns the cached result without
+        touching the warehouse unless ``refresh`` is set.
         """
-        s = get_settings()
-        cap = max_rows or s.GENIE_MAX_ROWS
         warehouse_id = self.get_warehouse_id(space_id)
         if not warehouse_id:
             return {"error": "No SQL warehouse available (set GENIE_WAREHOUSE_ID)."}
+        key, ttl = result_cache.plan(warehouse_id, space_id, sql, cache_ttl)
+        cached = None if refresh else result_cache.lookup(key)
+        if cached is not None:
+            return cached
+        out = self._execute(warehouse_id, sql, max_rows, disposition)
+        if _too_large_for_inline(out, disposition):
+            out = self._execute(warehouse_id, sql, max_rows, "EXTERNAL_LINKS")
+        return result_cache.remember(out, key, ttl, refresh)
+
+    def _execute(self, warehouse_id: str, sql: str, max_rows: Optional[int], disposition: str) -> dict:
+        s = get_settings()
         try:
             w = self._client()
             resp = w.statement_execution.execute_statement(
-                warehouse_id=warehouse_id, statement=sql, wait_timeout="30s"
+                warehouse_id=warehouse_id,
+                statement=sql,
+                wait_timeout="30s",
+                **_disposition_args(disposition),
             )
             statement_id = getattr(resp, "statement_id", None)
             state = _statement_state(resp)
             # Poll if still running past the inline wait window.
-            import time
-
-            waited = 0
-            while state in ("PENDING", "RUNNING") and waited < s.GENIE_TIMEOUT_SECONDS:
-                time.sleep(2)
-                waited += 2
+            deadline = time.monotonic() + s.GENIE_TIMEOUT_SECONDS
+            delays = _poll_delays(s.GENIE_POLL_INITIAL_SECONDS, s.GENIE_POLL_MAX_SECONDS)
+            while state in _STATEMENT_RUNNING and time.monotonic() < deadline:
+                time.sleep(min(next(delays), max(deadline - time.monotonic(), 0)))
                 resp = w.statement_execution.get_statement(statement_id)
                 state = _statement_state(resp)
-            if state != "SUCCEEDED":
-                err = getattr(getattr(resp, "status", None), "error", None)
-                detail = getattr(err, "message", None) or err
-                return {
-                    "error": f"SQL execution {state or 'failed'}: "
-                    f"{self._scrub(str(detail)) if detail else 'no detail'}"
-                }
-            cols, rows, truncated, _ = _extract_rows(resp, cap)
-            return {
-                "columns": cols,
-                "rows": rows,
-                "row_count": len(rows),
-                "truncated": truncated,
-            }
+            if state == "SUCCEEDED" and _has_external_links(resp):
+                ext = download_external_result_sync(resp, self._chunk_links(statement_id))
+                return self._external_fields(ext)
+            return self._statement_result(resp, state, max_rows)
         except Exception as exc:  # noqa: BLE001
             logger.warning("run_sql failed: %s", self._scrub(str(exc)))
             return {"error": self._safe_error("SQL execution failed", exc)}
 
+    async def arun_sql(
+        self,
+        space_id: str,
+        sql: str,
+        max_rows: Optional[int] = None,
+        disposition: str = "INLINE",
+        refresh: bool = False,
+        cache_ttl: Optional[float] = None,
+    ) -> dict:
+        """Async ``run_sql``: submits without an inline wait, then polls with backoff."""
+        warehouse_id = await asyncio.to_thread(self.get_warehouse_id, space_id)
+        if not warehouse_id:
+            return {"error": "No SQL warehouse available (set GENIE_WAREHOUSE_ID)."}
+        key, ttl = result_cache.plan(warehouse_id, space_id, sql, cache_ttl)
+        # both touch the result store and the cache lock (and may stat a file)
+        cached = None if refresh else await asyncio.to_thread(result_cache.lookup, key)
+        if cached is not None:
+            return cached
+        out = await self._aexecute(warehouse_id, sql, max_rows, disposition)
+        if _too_large_for_inline(out, disposition):
+            out = await self._aexecute(warehouse_id, sql, max_rows, "EXTERNAL_LINKS")
+        return await asyncio.to_thread(result_cache.remember, out, key, ttl, refresh)
+
+    async def _aexecute(self, warehouse_id: str, sql: str, max_rows: Optional[int], disposition: str) -> dict:
+        s = get_settings()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + s.GENIE_TIMEOUT_SECONDS
+        try:
+            w = await asyncio.to_thread(self._client)
+            resp = await asyncio.to_thread(
+                partial(
+                    w.statement_execution.execute_statement,
+                    warehouse_id=warehouse_id,
+                    statement=sql,
+                    wait_timeout="0s",
+                    **_disposition_args(disposition),
+                )
+            )
+            statement_id = getattr(resp, "statement_id", None)
+            state = _statement_state(resp)
+            delays = _poll_delays(s.GENIE_POLL_INITIAL_SECONDS, s.GENIE_POLL_MAX_SECONDS)
+            while state in _STATEMENT_RUNNING:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(next(delays), remaining))
+                resp = await asyncio.to_thread(w.statement_execution.get_statement, statement_id)
+                state = _statement_state(resp)
+            if state == "SUCCEEDED" and _has_external_links(resp):
+                fetch = self._chunk_links(statement_id)
+
+                async def fetch_links(chunk_index: int) -> list:
+                    return await asyncio.to_thread(fetch, chunk_index)
+
+                ext = await download_external_result(resp, fetch_links)
+                return await asyncio.to_thread(self._external_fields, ext)
+            return await asyncio.to_thread(self._statement_result, resp, state, max_rows)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("run_sql failed: %s", self._scrub(str(exc)))
+            return {"error": self._safe_error("SQL execution failed", exc)}
+
+    def _statement_result(self, resp: Any, state: str, cap: Optional[int] = None) -> dict:
+        if state != "SUCCEEDED":
+            err = getattr(getattr(resp, "status", None), "error", None)
+            detail = getattr(err, "message", None) or err
+            return {
+                "error": f"SQL execution {state or 'failed'}: "
+                f"{self._scrub(str(detail)) if detail else 'no detail'}"
+            }
+        cols, rows, truncated, _ = _extract_rows(resp, cap)
+        out = store_rows(cols, rows, _column_types(resp))
+        if truncated:
+            out["truncated"] = True
+        return out
+
+
+def _disposition_args(disposition: str) -> dict:
+    """execute_statement kwargs: EXTERNAL_LINKS results come back as Arrow chunks."""
+    if (disposition or "INLINE").upper() != "EXTERNAL_LINKS":
+        return {}
+    from databricks.sdk.service.sql import Disposition, Format
+
+    return {"disposition": Disposition.EXTERNAL_LINKS, "format": Format.ARROW_STREAM}
+
+
+def _too_large_for_inline(out: dict, disposition: str) -> bool:
+    if (disposition or "INLINE").upper() == "EXTERNAL_LINKS" or not _INLINE_TOO_LARGE.search(out.get("error") or ""):
+        return False
+    logger.info("INLINE result over the size limit; re-running with EXTERNAL_LINKS")
+    return True
+
+
+def _has_external_links(resp: Any) -> bool:
+    result_obj = getattr(resp, "result", None)
+    return bool(getattr(result_obj, "external_links", None)) and not getattr(result_obj, "data_array", None)
+
 
 def _statement_state(resp: Any) -> str:
     status = getattr(resp, "status", None)
     return _status_str(getattr(status, "state", None)) if status else ""
 
 
+def _column_types(statement_response: Any) -> list[str]:
+    """Manifest ``type_name`` per column ("" where absent)."""
+    schema = getattr(getattr(statement_response, "manifest", None), "schema", None)
+    return [_status_str(getattr(c, "type_name", None)) for c in (getattr(schema, "columns", None) or [])]
+
+
 def _extract_rows(
-    statement_response: Any, max_rows: int
+    statement_response: Any, max_rows: Optional[int] = None
 ) -> tuple[list[str], list[list[Any]], bool, bool]:
-    """Return (columns, rows, truncated, used_external_links)."""
+    """Return (columns, rows, truncated, used_external_links); all rows unless
+    ``max_rows`` is given."""
     # Columns from manifest.schema.columns[].name
     columns: list[str] = []
     manifest = getattr(statement_response, "manifest", None)
@@ -339,7 +585,7 @@ def _extract_rows(
     external = bool(getattr(result_obj, "external_links", None)) if result_obj else False
 
     rows_src = data_array or []
-    truncated = len(rows_src) > max_rows
+    truncated = max_rows is not None and len(rows_src) > max_rows
     rows = [list(r) for r in rows_src[:max_rows]]
     # If we have no inline rows but external links exist, flag it.
     used_external = external and not rows
@@ -0,0 +1,308 @@
+"""Download EXTERNAL_LINKS statement results into a local Parquet file.
+
+Large Genie / Statement Execution results are not returned inline: the
+response carries presigned URLs (``result.external_links``), one per result
+chunk, and ``manifest.total_chunk_count`` says how many chunks there are. Only
+the first chunk's link is usually included; the others come from
+``get_statement_result_chunk_n(statement_id, n)``.
+
+``download_external_result`` fetches the chunks concurrently with ``httpx``
+(``GENIE_DOWNLOAD_CONCURRENCY`` in flight), decodes each one into Arrow record
+batches (``ARROW_STREAM``, ``JSON_ARRAY`` or ``CSV``) and appends them in chunk
+order to a Parquet file under ``GENIE_RESULTS_DIR``. At most ``concurrency``
+chunks are held in memory at a time, however large the result. Decoding
+(and LZ4 decompression), the Parquet writes and the folder sweep run in worker
+threads, so a large download does not stall the event loop.
+
+Every chunk is checked: the body length must match the link's ``byte_count``,
+the decoded rows its ``row_count``, and the file's total the manifest's
+``total_row_count``. Transport errors, 429/5xx responses and failed checks are
+retried with backoff (``GENIE_DOWNLOAD_RETRIES``). A 401/403/404/410 response or
+an expired link asks the API for a fresh link before the retry. The presigned
+URLs carry their own auth: only the link's ``http_headers`` are sent, never the
+workspace token.
+
+Before each download ``sweep_results_dir`` deletes result files not read for
+``GENIE_RESULTS_RETENTION_SECONDS`` (reading a handle touches its file), then
+the least recently read ones while the folder is over ``GENIE_RESULTS_DISK_MB``.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# chunk_index -> fresh external links for that chunk
+LinkFetcher = Callable[[int], Awaitable[list[Any]]]
+
+_REFRESH_STATUSES = {401, 403, 404, 410}  # presigned URL expired or revoked
+_EXPIRY_MARGIN = timedelta(seconds=10)
+
+
+class ExternalResultError(RuntimeError):
+    """A result chunk could not be downloaded or failed its integrity checks."""
+
+
+@dataclass
+class ExternalResult:
+    """A downloaded result: where it is and the first rows for the LLM."""
+
+    path: str
+    columns: list[str]
+    total_rows: int
+    chunks: int
+    bytes_downloaded: int
+    head: list[list[Any]] = field(default_factory=list)
+
+
+def _value(obj: Any) -> str:
+    return str(getattr(obj, "value", None) or obj or "")
+
+
+def _expired(link: Any) -> bool:
+    raw = getattr(link, "expiration", None)
+    if not raw:
+        return False
+    try:
+        expires = datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    return expires - _EXPIRY_MARGIN <= datetime.now(timezone.utc)
+
+
+def _decode(body: bytes, fmt: str, columns: list[str], compression: str) -> pa.Table:
+    """One chunk's bytes -> Arrow table."""
+    if compression == "LZ4_FRAME":
+        body = pa.CompressedInputStream(pa.BufferReader(body), "lz4").read()
+    if fmt == "ARROW_STREAM":
+        return pa.ipc.open_stream(body).read_all()
+    if fmt == "CSV":
+        return pa_csv.read_csv(io.BytesIO(body))
+    # JSON_ARRAY: rows of strings (nulls as null), as with inline results
+    rows = json.loads(body)
+    return pa.table(
+        {name: pa.array([r[i] for r in rows], type=pa.string()) for i, name in enumerate(columns)}
+    )
+
+
+def _check(condition: bool, message: str) -> None:
+    if not condition:
+        raise ExternalResultError(message)
+
+
+async def _fetch_chunk(
+    http: httpx.AsyncClient,
+    index: int,
+    links: dict[int, Any],
+    fetch_links: LinkFetcher,
+    decode: Callable[[bytes], pa.Table],
+    retries: int,
+) -> tuple[pa.Table, int]:
+    """Download, decode and verify chunk ``index``; return (table, body bytes)."""
+    last_error: Optional[BaseException] = None
+    for attempt in range(retries + 1):
+        if attempt:
+            await asyncio.sleep(min(0.25 * 2 ** (attempt - 1), 4.0) * random.uniform(0.8, 1.2))
+        try:
+            link = links.get(index)
+            if link is None or _expired(link):
+                for fresh in await fetch_links(index):
+                    links[getattr(fresh, "chunk_index", index)] = fresh
+                link = links.get(index)
+                _check(link is not None, f"no external link for chunk {index}")
+            resp = await http.get(link.external_link, headers=dict(getattr(link, "http_headers", None) or {}))
+            if resp.status_code in _REFRESH_STATUSES:
+                links.pop(index, None)
+                raise ExternalResultError(f"chunk {index}: HTTP {resp.status_code}, refreshing link")
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise ExternalResultError(f"chunk {index}: HTTP {resp.status_code}")
+            resp.raise_for_status()
+            body = resp.content
+            expected_bytes = getattr(link, "byte_count", None)
+            _check(
+                not expected_bytes or len(body) == expected_bytes,
+                f"chunk {index}: got {len(body)} bytes, expected {expected_bytes}",
+            )
+            try:
+                table = await asyncio.to_thread(decode, body)
+            except (pa.ArrowException, ValueError) as exc:
+                raise ExternalResultError(f"chunk {index}: undecodable ({exc})") from exc
+            expected_rows = getattr(link, "row_count", None)
+            _check(
+                expected_rows is None or table.num_rows == expected_rows,
+                f"chunk {index}: got {table.num_rows} rows, expected {expected_rows}",
+            )
+            return table, len(body)
+        except (httpx.TransportError, ExternalResultError) as exc:
+            last_error = exc
+            logger.info("Result chunk %d attempt %d failed: %s", index, attempt + 1, exc)
+    raise ExternalResultError(f"chunk {index} failed after {retries + 1} attempt(s): {last_error}")
+
+
+def sweep_results_dir(
+    dest_dir: Optional[str] = None,
+    max_age_seconds: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+    now: Optional[float] = None,
+) -> int:
+    """Delete stale result files in ``dest_dir``; returns how many went.
+
+    A file's mtime is its last use. ``.part`` files are downloads in flight and
+    only go once older than ``max_age_seconds`` (left by a crashed worker).
+    """
+    s = get_settings()
+    folder = Path(dest_dir or s.GENIE_RESULTS_DIR)
+    max_age_seconds = s.GENIE_RESULTS_RETENTION_SECONDS if max_age_seconds is None else max_age_seconds
+    max_bytes = int(s.GENIE_RESULTS_DISK_MB * 1024 * 1024) if max_bytes is None else max_bytes
+    now = time.time() if now is None else now
+    files = []
+    for path in list(folder.glob("*.parquet")) + list(folder.glob("*.parquet.part")):
+        try:
+            st = path.stat()
+        except FileNotFoundError:  # swept by another worker
+            continue
+        files.append((st.st_mtime, st.st_size, path))
+    files.sort()
+    removed, total = 0, sum(size for _, size, path in files if path.suffix == ".parquet")
+    for mtime, size, path in files:
+        stale = max_age_seconds > 0 and now - mtime > max_age_seconds
+        over = max_bytes > 0 and total > max_bytes and path.suffix == ".parquet"
+        if not (stale or over):
+            continue
+        path.unlink(missing_ok=True)
+        removed += 1
+        if path.suffix == ".parquet":
+            total -= size
+    if removed:
+        logger.info("Removed %d result file(s) from %s", removed, folder)
+    return removed
+
+
+async def download_external_result(
+    statement_response: Any,
+    fetch_links: LinkFetcher,
+    dest_dir: Optional[str] = None,
+    preview_rows: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    retries: Optional[int] = None,
+) -> ExternalResult:
+    """Download every chunk of an EXTERNAL_LINKS result into one Parquet file."""
+    s = get_settings()
+    dest_dir = dest_dir or s.GENIE_RESULTS_DIR
+    preview_rows = s.GENIE_MAX_ROWS if preview_rows is None else preview_rows
+    concurrency = max(1, concurrency or s.GENIE_DOWNLOAD_CONCURRENCY)
+    retries = s.GENIE_DOWNLOAD_RETRIES if retries is None else retries
+
+    manifest = getattr(statement_response, "manifest", None)
+    schema = getattr(manifest, "schema", None)
+    columns = [getattr(c, "name", "") or "" for c in (getattr(schema, "columns", None) or [])]
+    fmt = _value(getattr(manifest, "format", None)) or "JSON_ARRAY"
+    compression = _value(getattr(manifest, "result_compression", None))
+    first = getattr(getattr(statement_response, "result", None), "external_links", None) or []
+    links = {getattr(link, "chunk_index", i): link for i, link in enumerate(first)}
+    total_chunks = getattr(manifest, "total_chunk_count", None) or len(links)
+    expected_rows = getattr(manifest, "total_row_count", None)
+
+    statement_id = getattr(statement_response, "statement_id", None) or os.urandom(8).hex()
+    path = Path(dest_dir) / f"{statement_id}.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        await asyncio.to_thread(sweep_results_dir, dest_dir)
+    except OSError as exc:
+        logger.warning("Result folder sweep failed: %s", exc)
+    tmp = path.with_suffix(".parquet.part")
+
+    def decode(body: bytes) -> pa.Table:
+        return _decode(body, fmt, columns, compression)
+
+    writer: Optional[pq.ParquetWriter] = None
+    write_lock = threading.Lock()  # a cancelled download may still be writing in its thread
+    total_rows = total_bytes = 0
+    head: list[list[Any]] = []
+    tasks: dict[int, asyncio.Task] = {}
+
+    def append(table: pa.Table) -> None:
+        nonlocal writer
+        with write_lock:
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            elif table.schema != writer.schema:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+        if len(head) < preview_rows:
+            head.extend(list(r.values()) for r in table.slice(0, preview_rows - len(head)).to_pylist())
+
+    def finish() -> None:
+        nonlocal writer
+        with write_lock:
+            if writer is None:  # zero chunks: still leave a valid, empty file
+                writer = pq.ParquetWriter(tmp, pa.schema([(c, pa.string()) for c in columns]))
+            writer.close()
+            writer = None
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0), follow_redirects=True) as http:
+            def schedule(i: int) -> None:
+                tasks[i] = asyncio.create_task(_fetch_chunk(http, i, links, fetch_links, decode, retries))
+
+            for i in range(min(concurrency, total_chunks)):
+                schedule(i)
+            # write in chunk order; a new chunk starts only when one is written,
+            # so at most ``concurrency`` chunks are in memory
+            for i in range(total_chunks):
+                table, nbytes = await tasks.pop(i)
+                if i + concurrency < total_chunks:
+                    schedule(i + concurrency)
+                await asyncio.to_thread(append, table)
+                total_rows += table.num_rows
+                total_bytes += nbytes
+        await asyncio.to_thread(finish)
+        _check(
+            expected_rows is None or total_rows == expected_rows,
+            f"downloaded {total_rows} rows, manifest says {expected_rows}",
+        )
+        os.replace(tmp, path)
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        with write_lock:
+            if writer is not None:
+                writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    return ExternalResult(
+        path=str(path),
+        columns=columns or list(pq.read_schema(path).names),
+        total_rows=total_rows,
+        chunks=total_chunks,
+        bytes_downloaded=total_bytes,
+        head=head,
+    )
+
+
+def download_external_result_sync(statement_response: Any, fetch_links_sync: Callable[[int], list[Any]], **kwargs: Any) -> ExternalResult:
+    """``download_external_result`` for synchronous callers (no running loop)."""
+
+    async def fetch_links(index: int) -> list[Any]:
+        return await asyncio.to_thread(fetch_links_sync, index)
+
+    return asyncio.run(download_external_result(statement_response, fetch_links, **kwargs))
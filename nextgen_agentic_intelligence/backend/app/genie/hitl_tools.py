@@ -3,7 +3,8 @@
 Workflow the data-agent follows for an ad-hoc data question:
 
   1. run_saved_sql(question)   -> if a previously approved SQL exists for this
-                                  question, run it directly (NO human approval).
+                                  question (or a close paraphrase of it), run it
+                                  directly (NO human approval).
   2. genie_generate_sql(question) -> ask Genie to produce candidate SQL.
   3. execute_sql(sql, question)   -> run it. This tool is configured with
                                      `interrupt_on` so the graph PAUSES for human
@@ -12,9 +13,19 @@ Workflow the data-agent follows for an ad-hoc data question:
                                      so step 1 will hit it next time.
 
 Only `execute_sql` is interrupted; the other two run without approval.
+
+Warehouse results are cached per space (``result_cache.py``), so a repeated
+saved or approved query answers without re-running; ``refresh=True`` forces a
+fresh run. Results too large to return inline (large provider / TIN pulls) are
+fetched with EXTERNAL_LINKS by the client and come back as a handle + summary.
+
+Each tool has an async form (``GenieClient.aask`` / ``arun_sql``) used when the
+graph runs on the server's event loop, so a long Genie or warehouse wait does
+not hold a worker thread.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 
 from langchain_core.tools import StructuredTool
@@ -22,7 +33,7 @@ from pydantic import BaseModel, Field
 
 from .client import get_genie_client
 from .registry import GenieSpace
-from .saved_queries import get_saved, put_saved
+from .saved_queries import SavedMatch, match_saved, put_saved
 
 # interrupt_on config for the data-agent: only execute_sql needs approval.
 EXECUTE_INTERRUPT = {"execute_sql": {"allowed_decisions": ["approve", "edit", "reject"]}}
@@ -32,29 +43,42 @@ class _QuestionInput(BaseModel):
     question: str = Field(description="The user's natural-language data question.")
 
 
+def _refresh_field():
+    return Field(
+        default=False,
+        description="Re-run on the warehouse even if a recent cached result exists "
+        "(only when the user asks for fresh / latest data).",
+    )
+
+
+class _SavedInput(_QuestionInput):
+    refresh: bool = _refresh_field()
+
+
 class _ExecuteInput(BaseModel):
     sql: str = Field(description="The exact SQL to execute (from genie_generate_sql).")
     question: str = Field(
         default="", description="The originating question, so the query can be saved for reuse."
     )
+    refresh: bool = _refresh_field()
 
 
 def build_data_query_tools(space: GenieSpace) -> tuple[list[StructuredTool], dict]:
     """Return (tools, interrupt_on) for a generic data-agent over ``space``."""
     client = get_genie_client()
 
-    def _run_saved(question: str) -> str:
-        sql = get_saved(space.space_id, question)
-        if not sql:
-            return json.dumps(
-                {"saved": False, "note": "No saved query — use genie_generate_sql then execute_sql."}
-            )
-        res = client.run_sql(space.space_id, sql)
-        res.update({"saved": True, "sql": sql, "question": question})
+    def _no_saved() -> str:
+        return json.dumps(
+            {"saved": False, "note": "No saved query — use genie_generate_sql then execute_sql."}
+        )
+
+    def _saved_result(res: dict, match: SavedMatch, question: str) -> str:
+        res.update({"saved": True, "sql": match.sql, "question": question})
+        if not match.exact:
+            res["matched_question"] = match.question
         return json.dumps(res, default=str, ensure_ascii=False)
 
-    def _generate(question: str) -> str:
-        r = client.ask(space.space_id, question, space_name=space.name)
+    def _generated(r, question: str) -> str:
         return json.dumps(
             {
                 "sql": r.sql,
@@ -67,28 +91,63 @@ def build_data_query_tools(space: GenieSpace) -> tuple[list[StructuredTool], dic
             ensure_ascii=False,
         )
 
-    def _execute(sql: str, question: str = "") -> str:
-        res = client.run_sql(space.space_id, sql)
+    def _executed(res: dict, sql: str, question: str) -> dict:
         if not res.get("error"):
             put_saved(space.space_id, question, sql)
             res["saved_as_tool"] = True
         res.update({"sql": sql, "question": question})
+        return res
+
+    ttl = space.cache_ttl_seconds
+
+    def _run_saved(question: str, refresh: bool = False) -> str:
+        match = match_saved(space.space_id, question)
+        if not match:
+            return _no_saved()
+        res = client.run_sql(space.space_id, match.sql, refresh=refresh, cache_ttl=ttl)
+        return _saved_result(res, match, question)
+
+    async def _arun_saved(question: str, refresh: bool = False) -> str:
+        match = await asyncio.to_thread(match_saved, space.space_id, question)
+        if not match:
+            return _no_saved()
+        res = await client.arun_sql(space.space_id, match.sql, refresh=refresh, cache_ttl=ttl)
+        return _saved_result(res, match, question)
+
+    def _generate(question: str) -> str:
+        return _generated(client.ask(space.space_id, question, space_name=space.name), question)
+
+    async def _agenerate(question: str) -> str:
+        r = await client.aask(space.space_id, question, space_name=space.name)
+        return _generated(r, question)
+
+    def _execute(sql: str, question: str = "", refresh: bool = False) -> str:
+        res = client.run_sql(space.space_id, sql, refresh=refresh, cache_ttl=ttl)
+        res = _executed(res, sql, question)
+        return json.dumps(res, default=str, ensure_ascii=False)
+
+    async def _aexecute(sql: str, question: str = "", refresh: bool = False) -> str:
+        res = await client.arun_sql(space.space_id, sql, refresh=refresh, cache_ttl=ttl)
+        res = await asyncio.to_thread(_executed, res, sql, question)
         return json.dumps(res, default=str, ensure_ascii=False)
 
     tools = [
         StructuredTool.from_function(
             func=_run_saved,
+            coroutine=_arun_saved,
             name="run_saved_sql",
             description=(
                 f"Check for and run a previously APPROVED SQL query for the "
-                f"'{space.name}' data, matching the question. Returns rows if a "
-                f"saved query exists (no approval needed), else a note to generate. "
+                f"'{space.name}' data, matching the question or a close rewording of "
+                f"it. Returns rows if a saved query exists (no approval needed; "
+                f"matched_question shows what it was approved for), else a note to generate. "
                 f"ALWAYS call this FIRST for a data question."
             ),
-            args_schema=_QuestionInput,
+            args_schema=_SavedInput,
         ),
         StructuredTool.from_function(
             func=_generate,
+            coroutine=_agenerate,
             name="genie_generate_sql",
             description=(
                 f"Ask Databricks Genie to generate candidate SQL for the "
@@ -100,6 +159,7 @@ def build_data_query_tools(space: GenieSpace) -> tuple[list[StructuredTool], dic
         ),
         StructuredTool.from_function(
             func=_execute,
+            coroutine=_aexecute,
             name="execute_sql",
             description=(
                 f"Execute SQL against the '{space.name}' data warehouse and return "
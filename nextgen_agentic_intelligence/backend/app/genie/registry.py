@@ -6,13 +6,15 @@
       {"name": "drg_shift", "space_id": "01ef...", "agent": "drg",
        "description": "DRG severity tier mix and coding shift by FY, US + statewise."},
       {"name": "taxi", "space_id": "01ef...", "agent": "data",
-       "description": "NYC taxi trips dataset."}
+       "description": "NYC taxi trips dataset.", "cache_ttl_seconds": 3600}
     ]
 
 Each entry becomes a tool ``genie_<name>`` routed to the named subagent (default
 ``drg``). Uniqueness is enforced per ``(agent, name)`` so the same short name can
 be reused across different agents. Malformed config logs a warning and is skipped
-(the agents then fall back to the Stage-1 mock tools).
+(the agents then fall back to the Stage-1 mock tools). The optional
+``cache_ttl_seconds`` overrides ``SQL_CACHE_TTL_SECONDS`` for the space's
+warehouse results (0 disables caching; see ``result_cache.py``).
 """
 from __future__ import annotations
 
@@ -20,6 +22,7 @@ import json
 import logging
 import re
 from dataclasses import dataclass
+from typing import Optional
 
 from ..config import get_settings
 
@@ -48,6 +51,7 @@ class GenieSpace:
     space_id: str
     description: str
     agent: str = "drg"
+    cache_ttl_seconds: Optional[float] = None
 
     @property
     def tool_name(self) -> str:
@@ -78,6 +82,17 @@ def load_genie_spaces() -> list[GenieSpace]:
         space_id = str(item.get("space_id", "")).strip()
         description = _clean_desc(str(item.get("description", "")))
         agent = str(item.get("agent", "drg")).strip().lower() or "drg"
+        cache_ttl = item.get("cache_ttl_seconds")
+        if cache_ttl is not None:
+            try:
+                cache_ttl = max(0.0, float(cache_ttl))
+            except (TypeError, ValueError):
+                logger.warning(
+                    "GENIE_SPACES[%d] cache_ttl_seconds %r is not a number; using the default.",
+                    i,
+                    cache_ttl,
+                )
+                cache_ttl = None
 
         if not name or not space_id:
             logger.warning("GENIE_SPACES[%d] missing name/space_id; skipping.", i)
@@ -113,6 +128,7 @@ def load_genie_spaces() -> list[GenieSpace]:
                 space_id=space_id,
                 description=description or f"Genie space '{name}'.",
                 agent=agent,
+                cache_ttl_seconds=cache_ttl,
             )
         )
     return spaces
@@ -0,0 +1,185 @@
+"""TTL + LRU cache of warehouse query results.
+
+``run_saved_sql`` exists so repeat questions skip the human, but each one still
+ran its SQL on the warehouse. ``GenieClient.run_sql`` / ``arun_sql`` now look
+here first. Entries are keyed by (warehouse, space, SHA-256 of the SQL with
+whitespace collapsed) and hold the stored result: a DataFrame, or for
+downloaded results their Parquet file (``results.ResultFile``).
+
+* TTL: ``SQL_CACHE_TTL_SECONDS`` by default; a space in ``GENIE_SPACES`` can set
+  its own ``cache_ttl_seconds`` (0 turns caching off for that space).
+* Size: entries are evicted least recently used first once their DataFrames
+  add up to more than ``SQL_CACHE_MAX_MB`` (a file costs only its bookkeeping);
+  a result bigger than that is never cached.
+* Only read-only statements (``SELECT`` / ``WITH`` / ``SHOW`` / ...) are cached.
+* ``refresh=True`` on the tools skips the lookup and re-caches the fresh result.
+
+Each tool result carries ``cache`` ("hit" with the entry's age, "miss" or
+"refresh"). The trace records it on the tool step, and ``/api/metrics`` serves
+the hit / miss / eviction counters (``SqlResultCache.stats``).
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional
+
+from ..config import get_settings
+from .registry import load_genie_spaces
+from .results import ResultFile, StoredResult, get_result_store, nbytes, store, view
+
+_READ_ONLY = re.compile(r"^\s*(\(\s*)*(select|with|show|describe|desc|explain|values|table)\b", re.I)
+
+
+def cache_key(warehouse_id: str, space_id: str, sql: str) -> tuple[str, str, str]:
+    text = re.sub(r"\s+", " ", sql or "").strip().rstrip(";").strip()
+    return (warehouse_id or "", space_id or "", hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+
+def cacheable(sql: str) -> bool:
+    """Read-only statements only: re-running an INSERT must hit the warehouse."""
+    return bool(_READ_ONLY.match(sql or ""))
+
+
+@dataclass
+class CachedResult:
+    frame: StoredResult
+    nbytes: int
+    stored_at: float
+    expires_at: float
+    result_file: Optional[str] = None
+    handle: Optional[str] = None  # result handle last served for this entry
+
+
+class SqlResultCache:
+    """Thread-safe result cache with a per-entry TTL and a byte budget."""
+
+    def __init__(self, max_bytes: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: OrderedDict[tuple, CachedResult] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "refreshes": 0, "evictions": 0, "expired": 0}
+
+    def _drop(self, key: tuple) -> None:
+        self._bytes -= self._entries.pop(key).nbytes
+
+    def get(self, key: tuple) -> Optional[CachedResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= self._clock():
+                self._drop(key)
+                self._counts["expired"] += 1
+                entry = None
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return entry
+
+    def put(self, key: tuple, frame: StoredResult, ttl_seconds: float, result_file: Optional[str] = None,
+            handle: Optional[str] = None, refresh: bool = False) -> Optional[CachedResult]:
+        size = nbytes(frame)
+        with self._lock:
+            if refresh:
+                self._counts["refreshes"] += 1
+            if key in self._entries:
+                self._drop(key)
+            if ttl_seconds <= 0 or size > self.max_bytes:
+                return None
+            now = self._clock()
+            entry = CachedResult(frame, size, now, now + ttl_seconds, result_file, handle)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._counts["evictions"] += 1
+            return entry
+
+    def discard(self, key: tuple) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def age(self, entry: CachedResult) -> float:
+        return self._clock() - entry.stored_at
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                **self._counts,
+                "hit_rate": round(self._counts["hits"] / lookups, 4) if lookups else None,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+@lru_cache
+def get_sql_cache() -> SqlResultCache:
+    return SqlResultCache(int(get_settings().SQL_CACHE_MAX_MB * 1024 * 1024))
+
+
+def ttl_for(space_id: str, override: Optional[float] = None) -> float:
+    """Cache TTL (seconds) for ``space_id``: the space's own, else the default."""
+    if override is not None:
+        return override
+    for space in load_genie_spaces():
+        if space.space_id == space_id and space.cache_ttl_seconds is not None:
+            return space.cache_ttl_seconds
+    return get_settings().SQL_CACHE_TTL_SECONDS
+
+
+def plan(warehouse_id: str, space_id: str, sql: str,
+         ttl_override: Optional[float] = None) -> tuple[Optional[tuple], float]:
+    """(cache key, TTL) for a statement; the key is None when it is not cached."""
+    ttl = ttl_for(space_id, ttl_override)
+    if ttl <= 0 or not cacheable(sql):
+        return None, ttl
+    return cache_key(warehouse_id, space_id, sql), ttl
+
+
+def lookup(key: Optional[tuple]) -> Optional[dict]:
+    """The cached result's view (as ``run_sql`` returns it), or None on a miss."""
+    if key is None:
+        return None
+    cache = get_sql_cache()
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if isinstance(entry.frame, ResultFile) and not entry.frame.touch():
+        cache.discard(key)  # its file was swept from GENIE_RESULTS_DIR
+        return None
+    if entry.handle and get_result_store().get(entry.handle) is entry.frame:
+        out = view(entry.handle, entry.frame)
+    else:  # the handle expired; serve the same frame under a new one
+        out = store(entry.frame)
+        entry.handle = out["handle"]
+    if entry.result_file:
+        out["result_file"] = entry.result_file
+    out["cache"] = {"status": "hit", "age_seconds": round(cache.age(entry), 1)}
+    return out
+
+
+def remember(out: dict, key: Optional[tuple], ttl: float, refresh: bool = False) -> dict:
+    """Cache a fresh ``run_sql`` result (complete, successful ones only)."""
+    if key is None:
+        return out
+    frame = get_result_store().get(out.get("handle") or "")
+    if frame is not None and not out.get("error") and not out.get("truncated"):
+        get_sql_cache().put(key, frame, ttl, out.get("result_file"), out["handle"], refresh=refresh)
+    out["cache"] = {"status": "refresh" if refresh else "miss"}
+    return out
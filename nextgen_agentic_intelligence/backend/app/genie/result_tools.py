@@ -0,0 +1,335 @@
+"""Tools that read a stored query result by handle (see ``results.py``).
+
+Genie / SQL tools return a ``handle`` plus a summary instead of every row. These
+tools let the agent get at the full result without it ever entering the
+context wholesale:
+
+  result_rows(handle, offset, limit, columns, sort_by)  -> one page of rows
+  result_filter(handle, filters)                        -> matching rows, new handle
+  result_aggregate(handle, group_by, metrics)           -> grouped metrics, new handle
+
+A handle holds a DataFrame (worked on with pandas) or, for downloaded results,
+a ``ResultFile`` (worked on with DuckDB over the Parquet file, so the rows are
+never all in memory; a filter writes its matches to a new file).
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+
+from ..config import get_settings
+from .results import (
+    ResultFile,
+    StoredResult,
+    get_result_store,
+    new_handle,
+    quote_ident,
+    rows_of,
+    sql_literal,
+    store,
+    view,
+)
+
+_OPS = ("==", "!=", ">", ">=", "<", "<=", "contains", "in")
+_AGGS = ("count", "sum", "mean", "median", "min", "max", "nunique")
+
+
+class ResultToolError(ValueError):
+    """Bad handle / column / filter / metric; reported back to the model."""
+
+
+class _RowsInput(BaseModel):
+    handle: str = Field(description="Result handle, e.g. 'r_3f9a1c2b7d'.")
+    offset: int = Field(default=0, description="First row to return (0-based).")
+    limit: int = Field(default=20, description="Rows to return (capped server-side).")
+    columns: list[str] = Field(default_factory=list, description="Columns to include (default: all).")
+    sort_by: str = Field(default="", description="Optional column to sort by before paging.")
+    descending: bool = Field(default=False, description="Sort descending.")
+
+
+class _Filter(BaseModel):
+    column: str
+    op: str = Field(description="One of ==, !=, >, >=, <, <=, contains, in.")
+    value: Any = Field(description="Value to compare with (a list for 'in').")
+
+
+class _FilterInput(BaseModel):
+    handle: str = Field(description="Result handle to filter.")
+    filters: list[_Filter] = Field(description="Conditions, all of which must hold.")
+
+
+class _AggregateInput(BaseModel):
+    handle: str = Field(description="Result handle to aggregate.")
+    group_by: list[str] = Field(default_factory=list, description="Columns to group by (empty: whole result).")
+    metrics: list[str] = Field(
+        default_factory=lambda: ["count"],
+        description="Metrics as 'agg:column' with agg one of count, sum, mean, median, min, max, "
+        "nunique; plain 'count' counts rows. E.g. ['count', 'sum:cases', 'mean:los'].",
+    )
+    sort_by: str = Field(default="", description="Output column to sort by (default: first metric).")
+    descending: bool = Field(default=True, description="Sort descending.")
+    limit: int = Field(default=20, description="Groups to return (capped server-side).")
+
+
+def _frame(handle: str) -> StoredResult:
+    data = get_result_store().get(handle)
+    if data is None:
+        raise ResultToolError(
+            f"Unknown or expired result handle '{handle}'. Re-run the query to get a new one."
+        )
+    return data
+
+
+def _column(columns, name: str) -> str:
+    if name in columns:
+        return name
+    lowered = {str(c).lower(): c for c in columns}
+    if name.lower() in lowered:
+        return lowered[name.lower()]
+    raise ResultToolError(f"Unknown column '{name}'. Columns: {', '.join(map(str, columns))}")
+
+
+def _cap(limit: int) -> int:
+    return max(1, min(int(limit), get_settings().GENIE_MAX_ROWS))
+
+
+def _comparable(series: pd.Series, value: Any) -> tuple[pd.Series, Any]:
+    """Compare numerically when both sides are numbers, else as text."""
+    if pd.api.types.is_numeric_dtype(series):
+        try:
+            return series, float(value)
+        except (TypeError, ValueError):
+            pass
+    return series.astype(str), str(value)
+
+
+def _op(flt: _Filter) -> str:
+    op = flt.op.strip().lower()
+    if op not in _OPS:
+        raise ResultToolError(f"Unknown op '{flt.op}'. Use one of {', '.join(_OPS)}.")
+    return op
+
+
+def _mask(df: pd.DataFrame, flt: _Filter) -> pd.Series:
+    col = _column(df.columns, flt.column)
+    op = _op(flt)
+    if op == "contains":
+        return df[col].astype(str).str.contains(str(flt.value), case=False, regex=False)
+    if op == "in":
+        values = flt.value if isinstance(flt.value, list) else [flt.value]
+        return df[col].astype(str).isin([str(v) for v in values])
+    series, value = _comparable(df[col], flt.value)
+    return {
+        "==": series == value,
+        "!=": series != value,
+        ">": series > value,
+        ">=": series >= value,
+        "<": series < value,
+        "<=": series <= value,
+    }[op]
+
+
+def _condition(data: ResultFile, flt: _Filter) -> str:
+    """``_mask`` as a DuckDB condition over a result file."""
+    c = quote_ident(_column(data.columns, flt.column))
+    op = _op(flt)
+    if op == "contains":
+        return f"contains(lower({c}::VARCHAR), {sql_literal(str(flt.value).lower())})"
+    if op == "in":
+        values = flt.value if isinstance(flt.value, list) else [flt.value]
+        return f"{c}::VARCHAR IN ({', '.join(sql_literal(str(v)) for v in values)})" if values else "false"
+    value: Any = str(flt.value)
+    if data.is_numeric(_column(data.columns, flt.column)):
+        try:
+            value = float(flt.value)
+        except (TypeError, ValueError):
+            pass
+    if isinstance(value, str):
+        c = f"{c}::VARCHAR"
+    sql_op = {"==": "=", "!=": "IS DISTINCT FROM"}.get(op, op)
+    return f"{c} {sql_op} {sql_literal(value)}"
+
+
+def _file_rows(data: ResultFile, offset: int, limit: int, columns: list[str], sort_by: str,
+               descending: bool) -> pd.DataFrame:
+    select = ", ".join(quote_ident(_column(data.columns, c)) for c in columns) if columns else "* EXCLUDE (file_row_number)"
+    order = "file_row_number"
+    if sort_by:
+        order = f"{quote_ident(_column(data.columns, sort_by))} {'DESC' if descending else 'ASC'} NULLS LAST, {order}"
+    return data.query(f"SELECT {select} FROM {{src}} ORDER BY {order} LIMIT {int(limit)} OFFSET {int(offset)}")
+
+
+def result_rows(handle: str, offset: int = 0, limit: int = 20, columns: list[str] = (),
+                sort_by: str = "", descending: bool = False) -> dict:
+    data = _frame(handle)
+    offset = max(0, int(offset))
+    if isinstance(data, ResultFile):
+        total = data.row_count
+        page = _file_rows(data, offset, _cap(limit), list(columns), sort_by, descending)
+    else:
+        df = data
+        if sort_by:
+            df = df.sort_values(_column(df.columns, sort_by), ascending=not descending, kind="stable")
+        if columns:
+            df = df[[_column(df.columns, c) for c in columns]]
+        total = len(df)
+        page = df.iloc[offset: offset + _cap(limit)]
+    end = offset + len(page)
+    return {
+        "handle": handle,
+        "row_count": total,
+        "offset": offset,
+        "columns": [str(c) for c in page.columns],
+        "rows": rows_of(page),
+        "next_offset": end if end < total else None,
+    }
+
+
+def _filter_file(data: ResultFile, filters: list[_Filter]) -> dict:
+    """Write the matching rows (in file order) to ``<handle>.parquet`` beside the file."""
+    where = " AND ".join(_condition(data, flt) for flt in filters) or "true"
+    handle = new_handle()
+    dest = str(Path(data.path).with_name(f"{handle}.parquet"))
+    data.query(
+        f"COPY (SELECT * EXCLUDE (file_row_number) FROM {{src}} WHERE {where} ORDER BY file_row_number) "
+        f"TO {sql_literal(dest)} (FORMAT parquet)"
+    )
+    matched = ResultFile.open(dest)
+    return view(get_result_store().put(matched, handle), matched)
+
+
+def result_filter(handle: str, filters: list) -> dict:
+    data = _frame(handle)
+    filters = [flt if isinstance(flt, _Filter) else _Filter(**flt) for flt in filters]
+    if isinstance(data, ResultFile):
+        out = _filter_file(data, filters)
+    else:
+        mask = pd.Series(True, index=data.index)
+        for flt in filters:
+            mask &= _mask(data, flt)
+        out = store(data[mask].reset_index(drop=True))
+    out["parent"] = handle
+    return out
+
+
+def _metric(columns, spec: str) -> tuple[str, str, str]:
+    """'sum:cases' -> (output name, column, agg)."""
+    agg, _, col = spec.strip().partition(":")
+    agg = agg.lower()
+    if agg not in _AGGS:
+        raise ResultToolError(f"Unknown metric '{spec}'. Use agg:column with agg in {', '.join(_AGGS)}.")
+    if not col:
+        if agg != "count":
+            raise ResultToolError(f"Metric '{spec}' needs a column, e.g. '{agg}:cases'.")
+        return "count", "", "count"
+    col = _column(columns, col)
+    return f"{agg}_{col}", col, agg
+
+
+def _aggregate_frame(df: pd.DataFrame, keys: list[str], specs: list[tuple[str, str, str]]) -> pd.DataFrame:
+    data = df.copy()
+    for _, col, agg in specs:
+        if col and agg not in ("count", "nunique") and not pd.api.types.is_numeric_dtype(data[col]):
+            data[col] = pd.to_numeric(data[col], errors="coerce")
+    named = {
+        name: (col or (keys[0] if keys else df.columns[0]), "size" if agg == "count" and not col else agg)
+        for name, col, agg in specs
+    }
+    if keys:
+        return data.groupby(keys, dropna=False).agg(**named).reset_index()
+    return pd.DataFrame([{name: data[col].agg(agg) if agg != "size" else len(data)
+                          for name, (col, agg) in named.items()}])
+
+
+def _aggregate_file(data: ResultFile, keys: list[str], specs: list[tuple[str, str, str]]) -> pd.DataFrame:
+    """``_aggregate_frame`` as one DuckDB GROUP BY over the file."""
+    select = [quote_ident(k) for k in keys]
+    for name, col, agg in specs:
+        c = quote_ident(col) if col else ""
+        if agg == "count":
+            expr = f"count({c})" if col else "count(*)"
+        elif agg == "nunique":
+            expr = f"count(DISTINCT {c})"
+        else:  # like pd.to_numeric(errors="coerce") for text columns
+            value = c if data.is_numeric(col) else f"TRY_CAST({c} AS DOUBLE)"
+            expr = f"{'avg' if agg == 'mean' else agg}({value})"
+        select.append(f"{expr} AS {quote_ident(name)}")
+    group = f" GROUP BY {', '.join(quote_ident(k) for k in keys)}" if keys else ""
+    return data.query(f"SELECT {', '.join(select)} FROM {{src}}{group}")
+
+
+def result_aggregate(handle: str, group_by: list[str] = (), metrics: list[str] = ("count",),
+                     sort_by: str = "", descending: bool = True, limit: int = 20) -> dict:
+    data = _frame(handle)
+    keys = [_column(data.columns, c) for c in group_by]
+    specs = [_metric(data.columns, m) for m in (metrics or ["count"])]
+    if isinstance(data, ResultFile):
+        out = _aggregate_file(data, keys, specs)
+    else:
+        out = _aggregate_frame(data, keys, specs)
+    order = _column(out.columns, sort_by) if sort_by else specs[0][0]
+    out = out.sort_values(order, ascending=not descending, kind="stable").reset_index(drop=True)
+    handle_out = get_result_store().put(out)
+    page = out.head(_cap(limit))
+    return {
+        "handle": handle_out,
+        "parent": handle,
+        "group_count": len(out),
+        "columns": [str(c) for c in out.columns],
+        "rows": rows_of(page),
+        "truncated": len(out) > len(page),
+    }
+
+
+def _json_tool(fn):
+    def run(**kwargs) -> str:
+        try:
+            return json.dumps(fn(**kwargs), default=str, ensure_ascii=False)
+        except ResultToolError as exc:
+            return json.dumps({"error": str(exc)})
+
+    return run
+
+
+def build_result_tools() -> list[StructuredTool]:
+    """The three handle-based result tools, shared by the Genie-backed agents."""
+    return [
+        StructuredTool.from_function(
+            func=_json_tool(result_rows),
+            name="result_rows",
+            description=(
+                "Read rows of a stored query result by its handle: a page of up to "
+                "50 rows from `offset`, optionally only some columns and sorted. Use "
+                "when the summary of a result is not enough; prefer result_aggregate "
+                "or result_filter over paging through everything."
+            ),
+            args_schema=_RowsInput,
+        ),
+        StructuredTool.from_function(
+            func=_json_tool(result_filter),
+            name="result_filter",
+            description=(
+                "Filter a stored query result by its handle, e.g. "
+                "[{'column': 'state', 'op': '==', 'value': 'TX'}, {'column': 'cases', "
+                "'op': '>', 'value': 100}]. Returns the matching row count with rows "
+                "or a summary, under a NEW handle you can page or aggregate."
+            ),
+            args_schema=_FilterInput,
+        ),
+        StructuredTool.from_function(
+            func=_json_tool(result_aggregate),
+            name="result_aggregate",
+            description=(
+                "Group and aggregate a stored query result by its handle, e.g. "
+                "group_by=['fiscal_year'], metrics=['count', 'sum:cases']. Computed "
+                "server-side over ALL rows; returns the top groups (sorted) and a "
+                "new handle for the full grouped table."
+            ),
+            args_schema=_AggregateInput,
+        ),
+    ]
@@ -0,0 +1,408 @@
+"""Server-side query results, addressed by handle.
+
+Putting result rows into the LLM context costs tokens for every row and caps
+what the model can see at ``GENIE_MAX_ROWS``. Instead every Genie / SQL result
+is stored here under a short handle (``r_3f9a1c2b7d``): inline results as a
+pandas DataFrame, downloaded (EXTERNAL_LINKS) ones as their Parquet file
+(``ResultFile``), which is never loaded whole -- its summary, pages, filters
+and aggregates are DuckDB queries over the file. The model gets:
+
+* small results (up to ``GENIE_INLINE_ROWS`` rows): the rows themselves;
+* larger ones: a compact summary (per-column null count and either numeric
+  stats with a histogram or the distinct count and top-k values) plus a
+  columnar sample of the first few rows.
+
+The result tools (``result_tools.py``) then page, filter and aggregate the
+full result by handle. Filtered and aggregated results get handles of their
+own, so they can be refined further. Handles are kept for
+``GENIE_RESULT_TTL_SECONDS`` after last use, while their DataFrames add up to
+at most ``GENIE_RESULT_MAX_MB`` (least recently used dropped first; a file
+handle costs only its bookkeeping). A file-backed handle names its file
+(``<handle>.parquet`` in ``GENIE_RESULTS_DIR``), so any worker sharing that
+directory can read it; DataFrame handles live in the worker that made them.
+Reading a file handle touches the file; ``external_results.sweep_results_dir``
+deletes files left unread (the handle then reports itself expired).
+"""
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from ..config import get_settings
+
+_TOP_K = 5
+_HISTOGRAM_BINS = 8
+_SAMPLE_ROWS = 5
+# Statement API ``type_name``s whose (string-encoded) values become numbers
+_NUMERIC_TYPES = {"BYTE", "SHORT", "INT", "LONG", "FLOAT", "DOUBLE", "DECIMAL"}
+_LEADING_ZERO = r"^-?0\d"
+# DuckDB column types summarized as numbers
+_DUCKDB_NUMERIC = re.compile(r"^(U?(TINYINT|SMALLINT|INTEGER|BIGINT|HUGEINT)|FLOAT|DOUBLE|DECIMAL\b.*)$")
+# what a file-backed handle counts against GENIE_RESULT_MAX_MB (path + summary)
+_FILE_HANDLE_BYTES = 16 * 1024
+
+
+def _py(value: Any) -> Any:
+    """NumPy / pandas scalars -> plain JSON-friendly Python values."""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return None if math.isnan(value) else float(f"{value:.6g}")
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def frame_from_rows(
+    columns: list[str], rows: list[list[Any]], types: Optional[list[str]] = None
+) -> pd.DataFrame:
+    """DataFrame from inline ``data_array`` rows (every value a string).
+
+    Columns whose manifest ``type_name`` is numeric become numbers. Without
+    types, a column converts when every value parses and none has a leading
+    zero, so codes like DRG "064" or TINs stay text.
+    """
+    df = pd.DataFrame(rows, columns=columns or None)
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            continue
+        type_name = (types[i] if types and i < len(types) else "") or ""
+        if type_name:
+            if type_name.upper() in _NUMERIC_TYPES:
+                df[col] = pd.to_numeric(series, errors="coerce")
+            continue
+        parsed = pd.to_numeric(series, errors="coerce")
+        present = series.notna().sum()
+        if present and parsed.notna().sum() == present and not series.astype(str).str.match(_LEADING_ZERO).any():
+            df[col] = parsed
+    return df
+
+
+def _numeric(series: pd.Series) -> Optional[pd.Series]:
+    """The column if it holds numbers (types were settled in ``frame_from_rows``)."""
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return None
+    return series
+
+
+def summarize(df: pd.DataFrame, top_k: int = _TOP_K, bins: int = _HISTOGRAM_BINS, sample_rows: int = _SAMPLE_ROWS) -> dict:
+    """Per-column stats, top-k values, numeric histograms and a columnar sample."""
+    columns: dict[str, dict] = {}
+    for col in df.columns:
+        series = df[col]
+        stats: dict[str, Any] = {"nulls": int(series.isna().sum())}
+        numbers = _numeric(series)
+        values = numbers.dropna().to_numpy(dtype=float) if numbers is not None else None
+        if values is not None and len(values):
+            counts, edges = np.histogram(values, bins=min(bins, max(1, len(np.unique(values)))))
+            q25, q50, q75 = np.percentile(values, [25, 50, 75])
+            stats.update(
+                type="number",
+                min=_py(values.min()),
+                max=_py(values.max()),
+                mean=_py(values.mean()),
+                p25=_py(q25),
+                median=_py(q50),
+                p75=_py(q75),
+                sum=_py(values.sum()),
+                histogram={"edges": [float(f"{e:.4g}") for e in edges], "counts": counts.tolist()},
+            )
+        else:
+            top = series.dropna().astype(str).value_counts().head(top_k)
+            stats.update(type="text", distinct=int(series.nunique(dropna=True)))
+            if len(top) and top.iloc[0] > 1:  # all-distinct columns (ids, names) have no top values
+                stats["top"] = [[value, int(count)] for value, count in top.items()]
+        columns[str(col)] = stats
+    sample = {str(col): [_py(v) for v in df[col].head(sample_rows).tolist()] for col in df.columns}
+    return {"columns": columns, "sample": sample}
+
+
+def rows_of(df: pd.DataFrame) -> list[list[Any]]:
+    return [[_py(v) for v in row] for row in df.itertuples(index=False, name=None)]
+
+
+def quote_ident(name: str) -> str:
+    """A column name as a DuckDB identifier."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def sql_literal(value: Any) -> str:
+    """A Python value as a DuckDB literal (numbers as DOUBLE, the rest as text)."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return repr(float(value))
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+@dataclass
+class ResultFile:
+    """A result kept as its Parquet file and read with DuckDB, never loaded whole."""
+
+    path: str
+    row_count: int
+    columns: list[str]
+    summary: Optional[dict] = None  # computed on the first view, then reused
+    _types: Optional[dict[str, str]] = field(default=None, repr=False)
+
+    @classmethod
+    def open(cls, path: str) -> "ResultFile":
+        meta = pq.read_metadata(path)
+        return cls(str(path), meta.num_rows, list(meta.schema.to_arrow_schema().names))
+
+    @property
+    def source(self) -> str:
+        """The file as a DuckDB table; ``file_row_number`` keeps the file's row order."""
+        return f"read_parquet({sql_literal(self.path)}, file_row_number = true)"
+
+    def query(self, sql: str) -> pd.DataFrame:
+        """Run ``sql`` (``{src}`` stands for the file) on a throwaway DuckDB."""
+        with duckdb.connect() as con:
+            return con.execute(sql.replace("{src}", self.source)).df()
+
+    def execute(self, sql: str) -> Optional[tuple]:
+        with duckdb.connect() as con:
+            return con.execute(sql.replace("{src}", self.source)).fetchone()
+
+    def types(self) -> dict[str, str]:
+        if self._types is None:
+            with duckdb.connect() as con:
+                described = con.execute(f"DESCRIBE SELECT * FROM read_parquet({sql_literal(self.path)})").fetchall()
+            self._types = {row[0]: row[1] for row in described}
+        return self._types
+
+    def is_numeric(self, column: str) -> bool:
+        return bool(_DUCKDB_NUMERIC.match(self.types().get(column, "")))
+
+    def touch(self) -> bool:
+        """Mark the file used now (the results-folder sweep keeps it); False if it is gone."""
+        try:
+            os.utime(self.path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def head(self, n: int) -> pd.DataFrame:
+        """The first ``n`` rows, read from the first row group(s) only."""
+        batches = pq.ParquetFile(self.path).iter_batches(batch_size=max(1, n))
+        batch = next(batches, None)
+        return batch.to_pandas() if batch is not None else pd.DataFrame(columns=self.columns)
+
+
+# What a handle holds
+StoredResult = Union[pd.DataFrame, ResultFile]
+
+
+def nbytes(data: StoredResult) -> int:
+    """Memory a stored result takes: a DataFrame's size, a file's bookkeeping."""
+    if isinstance(data, ResultFile):
+        return _FILE_HANDLE_BYTES
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+def summarize_file(rf: ResultFile, top_k: int = _TOP_K, bins: int = _HISTOGRAM_BINS,
+                   sample_rows: int = _SAMPLE_ROWS) -> dict:
+    """``summarize`` for a Parquet result: the same stats, from DuckDB scans."""
+    stats_sql, numeric = [], []
+    for col in rf.columns:
+        c = quote_ident(col)
+        stats_sql.append(f"count(*) - count({c})")
+        if rf.is_numeric(col):
+            numeric.append(col)
+            stats_sql += [f"min({c})::DOUBLE", f"max({c})::DOUBLE", f"avg({c})::DOUBLE",
+                          f"quantile_cont({c}::DOUBLE, [0.25, 0.5, 0.75])", f"sum({c})::DOUBLE"]
+        stats_sql.append(f"count(DISTINCT {c})")
+    values = iter(rf.execute(f"SELECT {', '.join(stats_sql)} FROM {{src}}"))
+
+    columns: dict[str, dict] = {}
+    for col in rf.columns:
+        c = quote_ident(col)
+        stats: dict[str, Any] = {"nulls": int(next(values))}
+        if col in numeric:
+            lo, hi, mean, quartiles, total = (next(values) for _ in range(5))
+            distinct = next(values)
+            if lo is None:  # no values: summarized as text, like an empty pandas column
+                stats.update(type="text", distinct=0)
+                columns[str(col)] = stats
+                continue
+            n = min(bins, max(1, distinct))
+            edges = np.linspace(lo - 0.5, hi + 0.5, n + 1) if lo == hi else np.linspace(lo, hi, n + 1)
+            width = (edges[-1] - edges[0]) / n
+            counts = [0] * n
+            buckets = rf.query(
+                f"SELECT least(floor(({c}::DOUBLE - {sql_literal(edges[0])}) / {sql_literal(width)}), {n - 1})::INT AS b, "
+                f"count(*) AS n FROM {{src}} WHERE {c} IS NOT NULL GROUP BY b"
+            )
+            for b, k in buckets.itertuples(index=False, name=None):
+                counts[int(b)] = int(k)
+            stats.update(
+                type="number",
+                min=_py(lo),
+                max=_py(hi),
+                mean=_py(mean),
+                p25=_py(quartiles[0]),
+                median=_py(quartiles[1]),
+                p75=_py(quartiles[2]),
+                sum=_py(total),
+                histogram={"edges": [float(f"{e:.4g}") for e in edges], "counts": counts},
+            )
+        else:
+            distinct = int(next(values))
+            stats.update(type="text", distinct=distinct)
+            if distinct < rf.row_count - stats["nulls"]:  # some value repeats: top values
+                top = rf.query(
+                    f"SELECT {c}::VARCHAR AS v, count(*) AS n FROM {{src}} WHERE {c} IS NOT NULL "
+                    f"GROUP BY v ORDER BY n DESC, min(file_row_number) LIMIT {int(top_k)}"
+                )
+                stats["top"] = [[value, int(count)] for value, count in top.itertuples(index=False, name=None)]
+        columns[str(col)] = stats
+    head = rf.head(sample_rows)
+    sample = {str(col): [_py(v) for v in head[col].head(sample_rows).tolist()] for col in head.columns}
+    return {"columns": columns, "sample": sample}
+
+
+class ResultStore:
+    """Handle -> DataFrame / ``ResultFile`` store: LRU within a byte budget, plus an idle TTL.
+
+    The newest result is always kept, even alone over budget; a file-backed
+    handle not held here (made by another worker) is found by its file name.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, results_dir: str = "",
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.results_dir = results_dir
+        self._clock = clock
+        self._items: OrderedDict[str, tuple[float, StoredResult, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, handle: str) -> None:
+        self._bytes -= self._items.pop(handle)[2]
+
+    def _expire(self, now: float) -> None:
+        if self.ttl_seconds > 0:
+            cutoff = now - self.ttl_seconds
+            while self._items and next(iter(self._items.values()))[0] < cutoff:
+                self._drop(next(iter(self._items)))
+        while self.max_bytes > 0 and self._bytes > self.max_bytes and len(self._items) > 1:
+            self._drop(next(iter(self._items)))
+
+    def put(self, data: StoredResult, handle: Optional[str] = None) -> str:
+        handle = handle or new_handle()
+        size = nbytes(data)
+        with self._lock:
+            if handle in self._items:
+                self._drop(handle)
+            self._items[handle] = (self._clock(), data, size)
+            self._bytes += size
+            self._expire(self._clock())
+        return handle
+
+    def get(self, handle: str) -> Optional[StoredResult]:
+        handle = (handle or "").strip()
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            item = self._items.get(handle)
+            if item is not None:
+                if isinstance(item[1], ResultFile) and not item[1].touch():
+                    self._drop(handle)  # swept from the results folder
+                    return None
+                self._items[handle] = (now, item[1], item[2])
+                self._items.move_to_end(handle)
+                return item[1]
+        path = Path(self.results_dir) / f"{handle}.parquet" if self.results_dir and _HANDLE.match(handle) else None
+        if path is None or not path.is_file():
+            return None
+        data = ResultFile.open(str(path))
+        data.touch()
+        self.put(data, handle)
+        return data
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(self._clock())
+            return len(self._items)
+
+
+_HANDLE = re.compile(r"^r_[0-9a-f]{10}$")
+
+
+def new_handle() -> str:
+    return "r_" + os.urandom(5).hex()
+
+
+@lru_cache
+def get_result_store() -> ResultStore:
+    s = get_settings()
+    return ResultStore(int(s.GENIE_RESULT_MAX_MB * 1024 * 1024), s.GENIE_RESULT_TTL_SECONDS, s.GENIE_RESULTS_DIR)
+
+
+def view(handle: str, data: StoredResult) -> dict:
+    """What the LLM sees of a stored result: its rows if small, else a summary."""
+    is_file = isinstance(data, ResultFile)
+    row_count = data.row_count if is_file else len(data)
+    out: dict[str, Any] = {
+        "handle": handle,
+        "row_count": row_count,
+        "columns": [str(c) for c in data.columns],
+    }
+    inline = get_settings().GENIE_INLINE_ROWS
+    if row_count <= inline:
+        out["rows"] = rows_of(data.head(inline) if is_file else data)
+    else:
+        if is_file:
+            if data.summary is None:
+                data.summary = summarize_file(data)
+            out["summary"] = data.summary
+        else:
+            out["summary"] = summarize(data)
+        out["note"] = (
+            f"{row_count} rows stored server-side under handle {handle}; use "
+            "result_rows / result_filter / result_aggregate to read them."
+        )
+    return out
+
+
+def store(data: StoredResult) -> dict:
+    """Keep ``data`` under a new handle and return its LLM view."""
+    return view(get_result_store().put(data), data)
+
+
+def store_rows(columns: list[str], rows: list[list[Any]], types: Optional[list[str]] = None) -> dict:
+    return store(frame_from_rows(columns, rows, types))
+
+
+def store_file(path: str) -> dict:
+    """Keep a downloaded (Parquet) result under a new handle, as the file itself.
+
+    The file is renamed ``<handle>.parquet`` in its folder, which is how other
+    workers find it.
+    """
+    handle = new_handle()
+    dest = Path(path).with_name(f"{handle}.parquet")
+    os.replace(path, dest)
+    data = ResultFile.open(str(dest))
+    view_ = view(get_result_store().put(data, handle), data)
+    view_["result_file"] = data.path
+    return view_
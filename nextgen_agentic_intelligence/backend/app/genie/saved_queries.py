@@ -5,22 +5,77 @@ saved here keyed by (space_id, normalized question). The next time the same
 question is asked, ``run_saved_sql`` finds it and runs it directly — no human
 approval needed. This is the "added automatically as a tool" behavior.
 
-Stored as a simple JSON file (thread-safe via a lock). Swap for a DB later.
+Storage is a SQLite file (``SAVED_QUERIES_PATH``) in WAL mode, so every uvicorn
+worker can read and write it. A lookup reads only the rows it needs:
+
+* an exact match on the normalized question (unique index), else
+* a paraphrase: the question is reduced to a set of content tokens
+  (lower-cased, light stemming, stopwords dropped, a few synonyms folded, e.g.
+  "most" / "highest" -> "top") and a saved query matches only if its token set
+  is the same (indexed). Reused SQL runs without approval, so any content word
+  that differs -- a year, state, payer, aggregation, setting -- means a
+  different question: "DRG 291 in 2023" never reuses the SQL for 2024, "in
+  Florida" the SQL for "in Texas", nor "for medicaid" the SQL for "medicare".
+
+So "top 10 DRGs by volume" and "which 10 DRGs have the most volume" share one
+approved query. Each hit bumps the query's ``use_count`` / ``last_used``.
+
+An existing ``saved_queries.json`` next to the database (the old format) is
+imported the first time the database is created.
 """
 from __future__ import annotations
 
 import json
 import re
+import sqlite3
 import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
 from ..config import get_settings
 
-_lock = threading.Lock()
-
+_DDL = """
+CREATE TABLE IF NOT EXISTS saved_queries (
+    id INTEGER PRIMARY KEY,
+    space_id TEXT NOT NULL,
+    question TEXT NOT NULL,
+    norm TEXT NOT NULL,
+    tokens TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_used REAL,
+    use_count INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (space_id, norm)
+);
+CREATE INDEX IF NOT EXISTS saved_queries_tokens ON saved_queries (space_id, tokens);
+DROP TABLE IF EXISTS saved_query_tokens;
+"""
 
-def _path() -> Path:
-    return Path(get_settings().SAVED_QUERIES_PATH)
+_STOPWORDS = frozenset(
+    "a an the of for in on at by to from with and or is are was were be been do does did "
+    "what which who whom whose how show me give list get tell find please can could would "
+    "i we you my our your it its this that these those have has had there their them per "
+    "all any each as than then vs versus".split()
+)
+# words that ask for the same thing in these questions
+_SYNONYMS = {
+    "most": "top", "highest": "top", "largest": "top", "biggest": "top", "greatest": "top",
+    "least": "bottom", "lowest": "bottom", "smallest": "bottom", "fewest": "bottom",
+    "count": "number", "counts": "number", "many": "number",
+    "volume": "volume", "volumes": "volume", "utilization": "volume",
+    "year": "year", "yearly": "year", "annual": "year", "fy": "year",
+    "state": "state", "statewise": "state", "states": "state",
+    "provider": "provider", "providers": "provider", "hospital": "provider", "hospitals": "provider",
+    "average": "avg", "averages": "avg", "mean": "avg", "total": "sum", "totals": "sum",
+    "maximum": "max", "minimum": "min", "ascending": "asc", "descending": "desc",
+    "month": "monthly", "months": "monthly", "week": "weekly", "weeks": "weekly",
+    "day": "daily", "days": "daily", "quarter": "quarterly", "quarters": "quarterly",
+}
+_TOKEN = re.compile(r"[a-z0-9]+")
 
 
 def normalize(question: str) -> str:
@@ -31,43 +86,171 @@ def normalize(question: str) -> str:
     return q
 
 
-def _key(space_id: str, question: str) -> str:
-    return f"{space_id}::{normalize(question)}"
+def _stem(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[: -len(suffix)]
+    return word
+
+
+def tokens(question: str) -> frozenset[str]:
+    """Content tokens of a question, as used for paraphrase matching."""
+    out = set()
+    for word in _TOKEN.findall((question or "").lower()):
+        if word in _STOPWORDS:
+            continue
+        if word in _SYNONYMS:
+            out.add(_SYNONYMS[word])
+        elif word.isdigit():
+            out.add(str(int(word)))  # "064" and "64" name the same code
+        else:
+            out.add(_stem(word))
+    return frozenset(out)
+
+
+def _token_key(toks: frozenset[str]) -> str:
+    return json.dumps(sorted(toks))
+
+
+@dataclass
+class SavedMatch:
+    """A saved query that answers a question."""
+
+    id: int
+    sql: str
+    question: str  # the question it was approved for
+    exact: bool  # same normalized question, not a rewording
+
+
+class SavedQueryStore:
+    """SQLite-backed saved queries; one connection per thread."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    conn.executescript(_DDL)
+                    self._import_legacy(conn)
+                    self._ready = True
+        return conn
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> None:
+        legacy = self.path.with_suffix(".json")
+        if legacy == self.path or not legacy.exists():
+            return
+        if conn.execute("SELECT 1 FROM saved_queries LIMIT 1").fetchone():
+            return
+        try:
+            entries = json.loads(legacy.read_text(encoding="utf-8")).values()
+        except (json.JSONDecodeError, OSError, AttributeError):
+            return
+        for e in entries:
+            if isinstance(e, dict) and e.get("question") and e.get("sql"):
+                self._put(conn, e.get("space_id", ""), e["question"], e["sql"])
+
+    def _put(self, conn: sqlite3.Connection, space_id: str, question: str, sql: str) -> None:
+        now = time.time()
+        toks = tokens(question)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                """
+                INSERT INTO saved_queries (space_id, question, norm, tokens, sql, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (space_id, norm) DO UPDATE SET
+                    question = excluded.question, tokens = excluded.tokens,
+                    sql = excluded.sql, updated_at = excluded.updated_at
+                """,
+                (space_id, question, normalize(question), _token_key(toks), sql, now, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def put(self, space_id: str, question: str, sql: str) -> None:
+        """Save (or replace) the approved SQL for a question."""
+        if question and sql:
+            self._put(self._conn(), space_id, question, sql)
+
+    def match(self, space_id: str, question: str) -> Optional[SavedMatch]:
+        """Saved query for ``question`` (or a rewording of it) in ``space_id``, or None."""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT id, sql, question FROM saved_queries WHERE space_id = ? AND norm = ?",
+            (space_id, normalize(question)),
+        ).fetchone()
+        if row:
+            return SavedMatch(row["id"], row["sql"], row["question"], True)
+        toks = tokens(question)
+        if not toks:
+            return None
+        row = conn.execute(
+            "SELECT id, sql, question FROM saved_queries WHERE space_id = ? AND tokens = ? "
+            "ORDER BY updated_at DESC LIMIT 1",
+            (space_id, _token_key(toks)),
+        ).fetchone()
+        return SavedMatch(row["id"], row["sql"], row["question"], False) if row else None
+
+    def record_use(self, query_id: int) -> None:
+        self._conn().execute(
+            "UPDATE saved_queries SET use_count = use_count + 1, last_used = ? WHERE id = ?",
+            (time.time(), query_id),
+        )
+
+    def list(self) -> list[dict]:
+        rows = self._conn().execute(
+            "SELECT space_id, question, sql, use_count, last_used, created_at, updated_at "
+            "FROM saved_queries ORDER BY use_count DESC, updated_at DESC"
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+@lru_cache
+def _store_for(path: str) -> SavedQueryStore:
+    return SavedQueryStore(path)
+
+
+def get_store() -> SavedQueryStore:
+    return _store_for(get_settings().SAVED_QUERIES_PATH)
 
 
-def _load() -> dict:
-    p = _path()
-    if not p.exists():
-        return {}
-    try:
-        return json.loads(p.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
-        return {}
+def match_saved(space_id: str, question: str) -> Optional[SavedMatch]:
+    """Saved query answering this question (exact or paraphrase); counts the use."""
+    store = get_store()
+    found = store.match(space_id, question)
+    if found:
+        store.record_use(found.id)
+    return found
 
 
 def get_saved(space_id: str, question: str) -> str | None:
     """Return the approved SQL for this question in this space, or None."""
-    with _lock:
-        entry = _load().get(_key(space_id, question))
-    return entry.get("sql") if entry else None
+    found = match_saved(space_id, question)
+    return found.sql if found else None
 
 
 def put_saved(space_id: str, question: str, sql: str) -> None:
     """Persist an approved (question -> SQL) mapping."""
-    if not question or not sql:
-        return
-    with _lock:
-        data = _load()
-        data[_key(space_id, question)] = {
-            "space_id": space_id,
-            "question": question,
-            "sql": sql,
-        }
-        p = _path()
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    get_store().put(space_id, question, sql)
 
 
 def list_saved() -> list[dict]:
-    with _lock:
-        return list(_load().values())
+    return get_store().list()
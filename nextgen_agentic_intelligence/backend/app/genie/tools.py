@@ -4,6 +4,11 @@ Each space ``foo`` becomes a tool ``genie_foo(question: str)`` whose description
 includes the space's purpose so the supervisor/DRG agent knows when to call it.
 The tool calls Genie, then returns a compact JSON payload (SQL + columns + rows)
 that the LLM can reason over.
+
+The tools are async-capable: on the server's event loop they await
+``GenieClient.aask``, so when the model issues several Genie calls in one turn
+(parallel tool calls) the tool node runs them concurrently and the turn takes
+about as long as the slowest question instead of the sum of all of them.
 """
 from __future__ import annotations
 
@@ -29,7 +34,11 @@ def _make_tool(space: GenieSpace) -> StructuredTool:
 
     def _run(question: str) -> str:
         result = client.ask(space.space_id, question, space_name=space.name)
-        # GenieResult.to_json already caps rows to GENIE_MAX_ROWS.
+        # Large results go out as a handle + summary (see results.py).
+        return result.to_json()
+
+    async def _arun(question: str) -> str:
+        result = await client.aask(space.space_id, question, space_name=space.name)
         return result.to_json()
 
     # space.description is config-provided; render it as clearly-labeled data
@@ -42,6 +51,7 @@ def _make_tool(space: GenieSpace) -> StructuredTool:
     )
     return StructuredTool.from_function(
         func=_run,
+        coroutine=_arun,
         name=space.tool_name,
         description=description,
         args_schema=GenieQueryInput,
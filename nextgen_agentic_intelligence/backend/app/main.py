@@ -4,6 +4,15 @@ Endpoints:
   GET  /api/health  -> readiness probe
   POST /api/chat    -> SSE stream of the agent's reply (may end in an `interrupt`)
   POST /api/resume  -> resume a paused (human-in-the-loop) run with a decision
+  GET  /api/metrics -> per-tool / per-model latency histograms and error counts,
+                       warehouse result / web-search cache hits / misses,
+                       fast-router counts
+  GET  /api/trace/{thread_id} -> the thread's last turn as OpenTelemetry spans
+
+Fast routing: a thread's first question that the local router (`router.py`) is
+confident about skips the supervisor's routing LLM call; `_fast_route` writes
+the `task` call to the chosen subagent into the graph state and the run starts
+at the tools node.
 
 Human-in-the-loop: when the data-agent calls `execute_sql`, deepagents'
 `interrupt_on` middleware pauses the graph. After streaming, we inspect the graph
@@ -13,33 +22,78 @@ resumes the graph with `Command(resume={"decisions":[...]})`.
 """
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import uuid
+from contextlib import asynccontextmanager, suppress
 from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
 from langgraph.types import Command
 from pydantic import BaseModel
 from sse_starlette.sse import EventSourceResponse
 
-from .agent import get_agent
+from . import checkpoint
+from .agent import get_agent, subagent_names
 from .config import get_settings
+from .genie.result_cache import get_sql_cache
+from .router import get_router
+from .tools.search_cache import get_search_cache
 from .trace import (
+    METRICS,
+    BoundedStore,
     TraceCollector,
     add_step,
+    drop_trace,
+    end_step,
+    export_spans,
     get_trace,
     reset_trace,
     steps_to_mermaid,
 )
 
 settings = get_settings()
+log = logging.getLogger(__name__)
 
 # Remember each thread's current question so the flow diagram can label it across
-# the chat turn and its human-in-the-loop resume.
-_QUESTIONS: dict[str, str] = {}
+# the chat turn and its human-in-the-loop resume. Bounded like the traces, and
+# per worker like them: the checkpointer keeps a copy (checkpoint.question) for
+# a resume that lands on another worker.
+_QUESTIONS = BoundedStore(settings.TRACE_MAX_THREADS, settings.TRACE_TTL_SECONDS)
+
+def _forget_threads(thread_ids: list[str]) -> None:
+    """Drop per-thread process state once the checkpointer pruned the thread."""
+    for tid in thread_ids:
+        _QUESTIONS.pop(tid)
+        drop_trace(tid)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # The async checkpointer must be created on the server's event loop; build
+    # the agent afterwards so it is compiled against it.
+    await checkpoint.open_checkpointer(settings)
+    get_agent.cache_clear()
+    pruner = None
+    if settings.CHECKPOINT_TTL_SECONDS > 0:
+        pruner = asyncio.create_task(
+            checkpoint.prune_forever(settings.CHECKPOINT_PRUNE_INTERVAL_SECONDS, _forget_threads)
+        )
+    try:
+        yield
+    finally:
+        if pruner is not None:
+            pruner.cancel()
+            with suppress(asyncio.CancelledError):
+                await pruner
+        await checkpoint.close_checkpointer()
+        get_agent.cache_clear()
 
-app = FastAPI(title="DRG Deep-Agent API", version="0.2.0")
+
+app = FastAPI(title="DRG Deep-Agent API", version="0.2.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -66,6 +120,30 @@ async def health() -> dict:
     return {"status": "ok", "model": settings.MODEL}
 
 
+@app.get("/api/metrics")
+async def metrics() -> dict:
+    """Latency histograms (ms) and error counts per step kind and name, plus
+    the warehouse result / web-search cache hit / miss and the fast router's
+    counters."""
+    return {
+        "latency": METRICS.snapshot(),
+        "traced_threads": len(_QUESTIONS),
+        "checkpoint_threads": await checkpoint.tracked_threads(),
+        "sql_cache": get_sql_cache().stats(),
+        "router": get_router().stats(),
+        "search_cache": get_search_cache().stats(),
+    }
+
+
+@app.get("/api/trace/{thread_id}")
+async def trace_spans(thread_id: str) -> dict:
+    """The thread's current turn as an OTLP/JSON trace export."""
+    spans = export_spans(thread_id, _QUESTIONS.get(thread_id, ""))
+    if spans is None:
+        raise HTTPException(status_code=404, detail="No trace for this thread.")
+    return spans
+
+
 # --------------------------------------------------------------------------
 # Streaming helpers
 # --------------------------------------------------------------------------
@@ -151,7 +229,8 @@ async def _drive(agent, graph_input, config, thread_id: str, question: str):
         state = await agent.aget_state(config, subgraphs=True)
         payload = _hitl_payload(_collect_interrupts(state))
         if payload:
-            # Record a pending approval node for the flow diagram.
+            # Record a pending approval node for the flow diagram; its span
+            # runs until the human decides (see _resume_stream).
             add_step(
                 thread_id,
                 {"kind": "approval", "name": "approval", "decision": "pending", "sql": payload.get("sql")},
@@ -171,17 +250,72 @@ async def _drive(agent, graph_input, config, thread_id: str, question: str):
 # --------------------------------------------------------------------------
 # Endpoints
 # --------------------------------------------------------------------------
+async def _fast_route(agent, config, thread_id: str, message: str) -> bool:
+    """Hand a confident first question straight to its subagent.
+
+    Writes what the supervisor's routing turn would have produced (the question
+    and a `task` call) as the model node's update, so the next run starts at the
+    tools node. Returns False, leaving the graph untouched, when the question
+    should go through the supervisor.
+    """
+    if not settings.ROUTER_ENABLED:
+        return False
+    router = None
+    try:
+        router = get_router()
+        decision = router.route(message, subagent_names(), settings.ROUTER_CONFIDENCE, settings.ROUTER_MIN_SCORE,
+                                settings.ROUTER_MIN_MARGIN)
+        if decision is not None and (await agent.aget_state(config)).values.get("messages"):
+            decision = None  # a follow-up: only the supervisor has the conversation
+    except Exception:  # noqa: BLE001 - a broken router must not break /api/chat
+        log.exception("Fast router failed; asking the supervisor")
+        decision = None
+    if router is not None:
+        router.record(decision)
+    if decision is None:
+        return False
+    step = add_step(
+        thread_id,
+        {
+            "kind": "router",
+            "name": decision.route,
+            "label": f"Fast route → {decision.route}",
+            "summary": f"confidence {decision.confidence:.2f}, margin {decision.margin:.2f}",
+            "confidence": decision.confidence,
+            "margin": decision.margin,
+        },
+    )
+    call = {
+        "name": "task",
+        "args": {"description": message, "subagent_type": decision.route},
+        "id": f"call_route_{uuid.uuid4().hex[:12]}",
+        "type": "tool_call",
+    }
+    try:
+        await agent.aupdate_state(
+            config,
+            {"messages": [HumanMessage(content=message), AIMessage(content="", tool_calls=[call])]},
+            as_node="model",
+        )
+    except Exception as exc:  # noqa: BLE001 - fall back to the supervisor
+        end_step(step, f"{type(exc).__name__}: {exc}")
+        return False
+    end_step(step)
+    return True
+
+
 async def _chat_stream(message: str, thread_id: str):
     agent = get_agent()
     reset_trace(thread_id)  # new turn -> fresh flow
-    _QUESTIONS[thread_id] = message
+    _QUESTIONS.set(thread_id, message)
+    await checkpoint.touch(thread_id, question=message)
     config = {
         "configurable": {"thread_id": thread_id},
         "callbacks": [TraceCollector(thread_id)],
     }
-    async for ev in _drive(
-        agent, {"messages": [HumanMessage(content=message)]}, config, thread_id, message
-    ):
+    routed = await _fast_route(agent, config, thread_id, message)
+    graph_input = None if routed else {"messages": [HumanMessage(content=message)]}
+    async for ev in _drive(agent, graph_input, config, thread_id, message):
         yield ev
 
 
@@ -192,6 +326,7 @@ async def chat(req: ChatRequest):
 
 async def _resume_stream(req: ResumeRequest):
     agent = get_agent()
+    await checkpoint.touch(req.thread_id)
     config = {
         "configurable": {"thread_id": req.thread_id},
         "callbacks": [TraceCollector(req.thread_id)],
@@ -221,18 +356,27 @@ async def _resume_stream(req: ResumeRequest):
             "edited_action": {"name": action_request.get("name"), "args": args},
         }
 
-    # Record the human's decision on the pending approval node.
-    for step in reversed(get_trace(req.thread_id)):
-        if step.get("kind") == "approval":
-            step["decision"] = {"approve": "approved", "edit": "edited & run", "reject": "rejected"}.get(
-                decision, decision
-            )
-            if decision == "edit" and req.edited_sql:
-                step["sql"] = req.edited_sql
-            break
+    question = _QUESTIONS.get(req.thread_id)
+    if question is None:  # the chat turn ran on another worker
+        question = await checkpoint.question(req.thread_id)
+        _QUESTIONS.set(req.thread_id, question)
+
+    # Record the human's decision on the pending approval node (a fresh one if
+    # the chat turn, and so its trace, was on another worker).
+    step = next((s for s in reversed(get_trace(req.thread_id))
+                 if s.get("kind") == "approval" and s.get("decision") == "pending"), None)
+    if step is None:
+        step = add_step(req.thread_id, {"kind": "approval", "name": "approval",
+                                        "sql": (action_request.get("args") or {}).get("sql")})
+    step["decision"] = {"approve": "approved", "edit": "edited & run", "reject": "rejected"}.get(
+        decision, decision
+    )
+    if decision == "edit" and req.edited_sql:
+        step["sql"] = req.edited_sql
+    end_step(step)
 
     command = Command(resume={"decisions": [decision_obj]})
-    async for ev in _drive(agent, command, config, req.thread_id, _QUESTIONS.get(req.thread_id, "")):
+    async for ev in _drive(agent, command, config, req.thread_id, question):
         yield ev
 
 
@@ -120,8 +120,8 @@ Pick the right tool:
   (wage index, DSH/uncompensated care, NTAP, quality programs) + key changes.
 - `cms_search_drgs(query, fy)` — find DRGs by keyword in the title.
 - `cms_compare_drg(drg, fy1, fy2)` — what changed for a DRG between two years.
-- `cms_cc_mcc(icd10)` — whether an ICD-10 code is an **MCC, CC, or neither**
-  (current FY2026 severity lists).
+- `cms_cc_mcc(icd10, fy)` — whether an ICD-10 code is an **MCC, CC, or neither**
+  in a year's severity lists (default FY2026), plus its tier in every FY2023-FY2026.
 - `cms_icd10_updates(fy)` — counts of new/invalid ICD-10 codes and CC/MCC list
   changes for a year (FY2023-FY2026).
 - `cms_cc_mcc_changes(fy)` — the specific codes **added/deleted** from the MCC and
@@ -144,7 +144,10 @@ Follow this exact workflow for every data question:
 
 1. **Call `run_saved_sql(question)` FIRST.** If it returns rows (`saved: true`),
    a human previously approved this query — present the results directly and
-   STOP. Do not regenerate or ask for approval again.
+   STOP. Do not regenerate or ask for approval again. If it includes
+   `matched_question`, the query was approved for that wording; mention it.
+   Results may come from a recent cache (`cache.status: "hit"`, with its age);
+   pass `refresh=true` only when the user asks for fresh / latest data.
 
 2. If it reports no saved query, **call `genie_generate_sql(question)`** to get
    candidate SQL. If it returns an `error`/`note` and no `sql`, explain that and
@@ -163,6 +166,18 @@ Rules: never fabricate numbers or columns beyond what a tool returns. This is
 LIVE Databricks data — say so. Be concise and precise with figures.
 """
 
+# Appended to the prompt of every agent that has the result tools.
+RESULT_HANDLES_NOTE = """
+
+QUERY RESULTS: small results come back with their `rows`. Larger ones come back
+as a `handle` with a `summary` (per-column stats, top values, histograms, a
+sample); the full result stays on the server. Answer from the summary when it
+suffices. Otherwise use `result_aggregate` (group and sum/count/mean over ALL
+rows), `result_filter` (rows matching conditions) or `result_rows` (a page of
+rows, optionally sorted) with that handle. Do not re-run a query to see more
+rows.
+"""
+
 # ---------------------------------------------------------------------------
 # Web search agent
 # ---------------------------------------------------------------------------
@@ -0,0 +1,184 @@
+"""Fast local router in front of the supervisor deep agent.
+
+Every /api/chat turn used to start with a supervisor LLM call whose only job,
+for most questions, was to pick a subagent and call ``task``. This module is a
+small text classifier trained on labeled questions
+(``ROUTER_EXAMPLES_PATH``, JSON lines of ``{"text", "route"}``):
+
+* features: TF-IDF over words, word bigrams and character 4-grams (so typos and
+  word forms still overlap), with years, DRG codes and ICD-10 codes folded
+  into placeholders ("DRG 291" and "DRG 871" look alike);
+* a question scores each route by the mean cosine similarity of its
+  ``ROUTER_NEIGHBORS`` nearest examples of that route, and the confidence is
+  the softmax of those scores (``ROUTER_TEMPERATURE``);
+* the softmax alone overstates it (at 0.03 a 0.1 cosine gap reads as ~97%), so
+  a route also needs a top score of ``ROUTER_MIN_SCORE`` and a lead of
+  ``ROUTER_MIN_MARGIN`` over the runner-up; at the defaults every leave-one-out
+  routed question goes to the right subagent;
+* ``supervisor`` is a route too: small talk, follow-ups and questions spanning
+  several specialists are examples of it, so they are never routed directly.
+
+When the top route is a subagent that clears all three bars,
+``main._chat_stream`` writes the supervisor's routing step itself (the question
+and a ``task`` call to that subagent) and runs the graph from its tools node.
+The subagent runs as usual (approvals, traces, checkpoints) and the supervisor
+still writes the answer from its report; only the planning LLM call is
+skipped. A thread's later turns always go through the supervisor, since a
+follow-up ("and in 2024?") needs the conversation to make sense.
+
+``Router.stats`` (served by ``/api/metrics``) counts routed and deferred
+questions; ``scripts/bench_router.py`` reports cross-validated accuracy and the
+turn latency saved.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .config import get_settings
+
+SUPERVISOR = "supervisor"
+
+_WORD = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)?")
+_YEAR = re.compile(r"fy\d{2,4}|(?:19|20)\d\d")
+_DRG = re.compile(r"\d{3}")
+_ICD = re.compile(r"[a-z]\d\d(?:\.[a-z0-9]+)?")
+
+
+def _word(word: str) -> str:
+    if _DRG.fullmatch(word):
+        return "<drg>"
+    if _YEAR.fullmatch(word):
+        return "<year>"
+    if _ICD.fullmatch(word):
+        return "<icd>"
+    if word.isdigit():
+        return "<num>"
+    return word
+
+
+def features(text: str) -> Counter:
+    """Term counts of a question: words, word bigrams and character 4-grams."""
+    words = [_word(w) for w in _WORD.findall((text or "").lower())]
+    out: Counter = Counter(f"w:{w}" for w in words)
+    out.update(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+    for w in words:
+        if w[0] != "<" and len(w) > 3:
+            padded = f" {w} "
+            out.update(f"c:{padded[i:i + 4]}" for i in range(len(padded) - 3))
+    return out
+
+
+def load_examples(path: str | Path) -> list[tuple[str, str]]:
+    """(text, route) pairs from a JSON-lines file; blank lines are skipped."""
+    out = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            row = json.loads(line)
+            out.append((row["text"], row["route"]))
+    return out
+
+
+@dataclass
+class Decision:
+    """The router's pick for a question and how sure it is."""
+
+    route: str
+    confidence: float
+    scores: dict[str, float]
+    margin: float = 0.0  # top score minus the runner-up's
+
+
+class Router:
+    """Nearest-neighbour classifier over TF-IDF vectors of labeled questions."""
+
+    def __init__(self, examples: list[tuple[str, str]], neighbors: int = 5, temperature: float = 0.03) -> None:
+        self.neighbors = neighbors
+        self.temperature = temperature
+        counts = [features(text) for text, _ in examples]
+        df: Counter = Counter(f for c in counts for f in c)
+        n = len(examples)
+        self._idf = {f: math.log((1 + n) / (1 + d)) + 1 for f, d in df.items()}
+        self._labels = [route for _, route in examples]
+        self.routes = sorted(set(self._labels))
+        # feature -> [(example index, weight)], so a lookup touches only the
+        # examples sharing a feature with the question
+        self._postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+        for i, c in enumerate(counts):
+            for f, w in self._vector(c).items():
+                self._postings[f].append((i, w))
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def _vector(self, counts: Counter) -> dict[str, float]:
+        vec = {f: (1 + math.log(tf)) * self._idf[f] for f, tf in counts.items() if f in self._idf}
+        norm = math.sqrt(sum(v * v for v in vec.values()))
+        return {f: v / norm for f, v in vec.items()} if norm else {}
+
+    def classify(self, text: str, routes: Optional[Iterable[str]] = None) -> Decision:
+        """Best route for ``text`` among ``routes`` (default: all) and ``supervisor``."""
+        allowed = set(self.routes if routes is None else routes) | {SUPERVISOR}
+        sims: dict[int, float] = defaultdict(float)
+        for f, w in self._vector(features(text)).items():
+            for i, ew in self._postings.get(f, ()):
+                sims[i] += w * ew
+        nearest: dict[str, list[float]] = {r: [] for r in self.routes if r in allowed}
+        for i, s in sims.items():
+            if self._labels[i] in nearest:
+                nearest[self._labels[i]].append(s)
+        scores = {
+            r: sum(sorted(s, reverse=True)[: self.neighbors]) / self.neighbors for r, s in nearest.items()
+        }
+        if not scores:
+            return Decision(SUPERVISOR, 0.0, {})
+        top = max(scores.values())
+        weights = {r: math.exp((s - top) / self.temperature) for r, s in scores.items()}
+        total = sum(weights.values())
+        route = max(scores, key=scores.get)
+        runner_up = max((s for r, s in scores.items() if r != route), default=0.0)
+        return Decision(route, round(weights[route] / total, 4), {r: round(s, 4) for r, s in scores.items()},
+                        round(top - runner_up, 4))
+
+    def route(self, text: str, routes: Iterable[str], threshold: float, min_score: float = 0.0,
+              min_margin: float = 0.0) -> Optional[Decision]:
+        """The subagent to send ``text`` to directly, or None to ask the supervisor."""
+        decision = self.classify(text, routes)
+        confident = (decision.confidence >= threshold and decision.scores.get(decision.route, 0.0) >= min_score
+                     and decision.margin >= min_margin)
+        return decision if decision.route != SUPERVISOR and confident else None
+
+    def record(self, decision: Optional[Decision]) -> None:
+        """Count a question as routed directly (``decision``) or left to the supervisor."""
+        with self._lock:
+            if decision is None:
+                self._counts["supervisor"] += 1
+            else:
+                self._counts["routed"] += 1
+                self._counts[f"to:{decision.route}"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            asked = self._counts["routed"] + self._counts["supervisor"]
+            return {
+                "routed": self._counts["routed"],
+                "supervisor": self._counts["supervisor"],
+                "routed_rate": round(self._counts["routed"] / asked, 4) if asked else None,
+                "by_route": {k[3:]: v for k, v in sorted(self._counts.items()) if k.startswith("to:")},
+            }
+
+
+@lru_cache
+def get_router() -> Router:
+    settings = get_settings()
+    return Router(
+        load_examples(settings.ROUTER_EXAMPLES_PATH),
+        neighbors=settings.ROUTER_NEIGHBORS,
+        temperature=settings.ROUTER_TEMPERATURE,
+    )
@@ -10,8 +10,13 @@ from __future__ import annotations
 
 from typing import Optional
 
-from ..genie import build_data_query_tools, get_genie_client, load_genie_spaces
-from ..prompts import DATA_AGENT_PROMPT
+from ..genie import (
+    build_data_query_tools,
+    build_result_tools,
+    get_genie_client,
+    load_genie_spaces,
+)
+from ..prompts import DATA_AGENT_PROMPT, RESULT_HANDLES_NOTE
 
 _DESCRIPTION = (
     "Answers ad-hoc data/analytics and generic claims questions by generating SQL "
@@ -21,21 +26,34 @@ _DESCRIPTION = (
 )
 
 
+def _data_spaces() -> list:
+    if not get_genie_client().available():
+        return []
+    return [s for s in load_genie_spaces() if s.agent == "data"]
+
+
+def has_data_subagent() -> bool:
+    """True when a ``data`` space is configured, i.e. data-agent is offered."""
+    return bool(_data_spaces())
+
+
 def build_data_subagent() -> Optional[dict]:
     """Return the HITL data-agent dict, or None if no ``data`` space exists."""
-    if not get_genie_client().available():
-        return None
-    data_spaces = [s for s in load_genie_spaces() if s.agent == "data"]
+    data_spaces = _data_spaces()
     if not data_spaces:
         return None
     # Generic agent is backed by the first data space (the NYC-taxi space).
     space = data_spaces[0]
     tools, interrupt_on = build_data_query_tools(space)
-    prompt = DATA_AGENT_PROMPT + f"\n\nConnected dataset: '{space.name}' — {space.description}"
+    prompt = (
+        DATA_AGENT_PROMPT
+        + RESULT_HANDLES_NOTE
+        + f"\n\nConnected dataset: '{space.name}' — {space.description}"
+    )
     return {
         "name": "data-agent",
         "description": _DESCRIPTION,
         "system_prompt": prompt,
-        "tools": tools,
+        "tools": tools + build_result_tools(),
         "interrupt_on": interrupt_on,
     }
@@ -11,8 +11,8 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from ..genie import genie_tools_for
-from ..prompts import DRG_AGENT_PROMPT
+from ..genie import build_result_tools, genie_tools_for
+from ..prompts import DRG_AGENT_PROMPT, RESULT_HANDLES_NOTE
 from ..tools.mock_tools import (
     drg_shift_lookup,
     icd_driver_lookup,
@@ -41,7 +41,9 @@ def _live_note(tools) -> str:
         f"{listing}\n"
         "Call as many of these as the question requires (e.g. tier mix by fiscal "
         "year, ICD drivers, provider/TIN utilization) and synthesize them into one "
-        "answer. These are REAL figures from Databricks — present them as real and "
+        "answer. Issue independent questions together in ONE turn (parallel tool "
+        "calls): they run concurrently, so the answer arrives as fast as the slowest "
+        "question. These are REAL figures from Databricks — present them as real and "
         "cite Genie. Do NOT label them as mock or illustrative."
     )
 
@@ -58,8 +60,8 @@ def build_drg_subagent() -> dict:
     """Construct the DRG subagent dict, resolving live-vs-mock tools now."""
     genie_tools = genie_tools_for("drg")
     if genie_tools:
-        tools = genie_tools
-        note = _live_note(genie_tools)
+        tools = genie_tools + build_result_tools()
+        note = _live_note(genie_tools) + RESULT_HANDLES_NOTE
     else:
         tools = _MOCK_TOOLS
         note = _MOCK_NOTE
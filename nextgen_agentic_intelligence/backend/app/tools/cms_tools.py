@@ -52,8 +52,10 @@ def cms_ipps_rule(fiscal_year: str = "2026") -> str:
 
 @tool
 def cms_search_drgs(query: str, fiscal_year: str = "2026") -> str:
-    """Search MS-DRGs by keyword in the title (e.g. 'sepsis', 'transplant',
-    'aortic'). Returns matching DRGs with code, title, severity and weight.
+    """Search MS-DRGs by keywords in the title (e.g. 'sepsis', 'heart failure
+    with mcc', 'knee replacement'). Returns matching DRGs, best match first,
+    with code, title, severity, weight and a relevance score. Tolerates plurals
+    and small typos.
 
     Args:
         query: keyword(s) to find in the DRG title.
@@ -78,14 +80,17 @@ def cms_compare_drg(drg: str, fiscal_year_1: str, fiscal_year_2: str) -> str:
 
 
 @tool
-def cms_cc_mcc(icd10_code: str) -> str:
+def cms_cc_mcc(icd10_code: str, fiscal_year: str = "2026") -> str:
     """Tell whether an ICD-10-CM diagnosis code is an MCC, a CC, or neither
-    (NonCC) on the current (FY2026) CMS severity lists.
+    (NonCC) on a fiscal year's CMS severity lists. The result also gives the
+    code's tier in every FY2023-FY2026 (``by_fy``), so "was it an MCC in 2023?"
+    needs one call.
 
     Args:
         icd10_code: an ICD-10-CM code, e.g. "R65.20" or "N17.9".
+        fiscal_year: 2023, 2024, 2025, or 2026 (default 2026).
     """
-    return json.dumps(cms_store.cc_mcc_status(icd10_code), ensure_ascii=False)
+    return json.dumps(cms_store.cc_mcc_status(icd10_code, fiscal_year), ensure_ascii=False)
 
 
 @tool
@@ -0,0 +1,127 @@
+"""Persistent cache of ``web_search`` results.
+
+Every search-agent turn used to hit DuckDuckGo, even for the same policy
+lookup asked a minute earlier ("CMS two-midnight rule", "IPPS FY2026 final
+rule"), and DuckDuckGo rate-limits repeats. Results are now kept in a SQLite
+file (``SEARCH_CACHE_PATH``, WAL mode, so every uvicorn worker shares it),
+keyed by the normalized query (lower-cased, whitespace collapsed, surrounding
+punctuation and quotes dropped), for ``SEARCH_CACHE_TTL_SECONDS`` (0 turns the
+cache off). Only non-empty results are stored; expired rows are deleted on
+the next write.
+
+``SearchCache.stats`` (served by ``/api/metrics``) counts this process's hits
+and misses.
+"""
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..config import get_settings
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    norm TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    results TEXT NOT NULL,
+    engine TEXT,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS search_cache_expires ON search_cache (expires_at);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a query: trivial wording differences map to the same one."""
+    q = re.sub(r"\s+", " ", (query or "").lower()).strip()
+    return q.strip(" ?.!,;:'\"`")
+
+
+@dataclass
+class CachedSearch:
+    results: list[dict]
+    engine: Optional[str]
+    age_seconds: float
+
+
+class SearchCache:
+    """SQLite-backed search results with a TTL; one connection per thread."""
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time) -> None:
+        self.path = Path(path)
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "stores": 0}
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_DDL)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def get(self, query: str) -> Optional[CachedSearch]:
+        """Unexpired results for ``query``, or None."""
+        row = self._conn().execute(
+            "SELECT results, engine, stored_at FROM search_cache WHERE norm = ? AND expires_at > ?",
+            (normalize_query(query), self._clock()),
+        ).fetchone()
+        self._count("hits" if row else "misses")
+        if row is None:
+            return None
+        return CachedSearch(json.loads(row[0]), row[1], round(self._clock() - row[2], 1))
+
+    def put(self, query: str, results: list[dict], engine: Optional[str], ttl_seconds: float) -> None:
+        if ttl_seconds <= 0 or not results:
+            return
+        now = self._clock()
+        conn = self._conn()
+        conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "INSERT OR REPLACE INTO search_cache (norm, query, results, engine, stored_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (normalize_query(query), query, json.dumps(results, ensure_ascii=False), engine, now, now + ttl_seconds),
+        )
+        self._count("stores")
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM search_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        (entries,) = self._conn().execute(
+            "SELECT COUNT(*) FROM search_cache WHERE expires_at > ?", (self._clock(),)
+        ).fetchone()
+        return {
+            **counts,
+            "hit_rate": round(counts["hits"] / lookups, 4) if lookups else None,
+            "entries": entries,
+        }
+
+
+@lru_cache
+def _cache_for(path: str) -> SearchCache:
+    return SearchCache(path)
+
+
+def get_search_cache() -> SearchCache:
+    return _cache_for(get_settings().SEARCH_CACHE_PATH)
@@ -1,18 +1,39 @@
 """Free web search via DuckDuckGo — no API key required.
 
-Uses LangChain's community DuckDuckGo wrapper as the primary engine and the
-``ddgs`` / ``duckduckgo_search`` package as a fallback (the package was renamed
-from ``duckduckgo-search`` to ``ddgs``). DuckDuckGo aggressively rate-limits
-automated/rapid queries, so we retry with exponential backoff and degrade
-gracefully to a clear note instead of failing the agent.
+Uses LangChain's community DuckDuckGo wrapper (``langchain``) and the ``ddgs`` /
+``duckduckgo_search`` package (``ddgs``; the package was renamed from
+``duckduckgo-search`` to ``ddgs``) as engines, in the order of
+``SEARCH_ENGINES``. DuckDuckGo aggressively rate-limits automated/rapid
+queries, so we retry with backoff and degrade gracefully to a clear note
+instead of failing the agent.
+
+* Results are cached by normalized query (``search_cache.py``), so a repeated
+  policy lookup returns at once, marked ``"cache": {"status": "hit"}``.
+* The async path (what the agent uses) races the engines, each in a worker
+  thread with a ``SEARCH_ENGINE_TIMEOUT_SECONDS`` budget, and takes the first
+  non-empty result. Each engine gives the one before it a head start of
+  ``SEARCH_HEDGE_SECONDS`` (cut short if that one fails), so a healthy first
+  engine is not doubled up on. The backoff between rounds is an
+  ``asyncio.sleep``; the event loop keeps serving other sessions.
+* The sync path tries the engines one after the other, as before.
+
+A timed-out engine's thread is left to finish on its own (the HTTP clients
+have their own timeouts); its result is discarded.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import time
+from contextlib import suppress
+from typing import Callable, Optional
 
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+
+from ..config import get_settings
+from .search_cache import get_search_cache
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +42,10 @@ _RETRIES = 3
 _BACKOFF_BASE = 1.5  # seconds; grows per attempt to ride out rate limits
 
 
+class _SearchInput(BaseModel):
+    query: str = Field(description="The search query.")
+
+
 def _normalize_lc(raw: list[dict]) -> list[dict]:
     return [
         {"title": r.get("title"), "url": r.get("link"), "snippet": r.get("snippet")}
@@ -58,33 +83,19 @@ def _search_ddgs(query: str, n: int) -> list[dict]:
     raise RuntimeError("No DuckDuckGo backend available.")
 
 
-@tool
-def web_search(query: str) -> str:
-    """Search the public web with DuckDuckGo (free, no API key) and return the
-    top results as JSON (title, url, snippet). Use for current events, external
-    facts, definitions, regulations, or anything not in the internal data
-    sources.
+def _engines() -> list[tuple[str, Callable[[str, int], list[dict]]]]:
+    """(name, search function) for each configured engine, in order."""
+    known = {"langchain": _search_langchain, "ddgs": _search_ddgs}
+    names = [n.strip() for n in get_settings().SEARCH_ENGINES.split(",") if n.strip()]
+    engines = [(n, known[n]) for n in names if n in known]
+    return engines or list(known.items())
+
+
+def _found(query: str, results: list[dict], engine: Optional[str], cache: dict) -> str:
+    return json.dumps({"query": query, "results": results, "engine": engine, "cache": cache}, ensure_ascii=False)
 
-    Args:
-        query: The search query.
-    """
-    last_err: str | None = None
-    for attempt in range(_RETRIES):
-        for engine in (_search_langchain, _search_ddgs):
-            try:
-                results = engine(query, _MAX_RESULTS)
-                if results:
-                    return json.dumps(
-                        {"query": query, "results": results}, ensure_ascii=False
-                    )
-                last_err = "no results"
-            except Exception as exc:  # noqa: BLE001
-                last_err = f"{type(exc).__name__}: {exc}"
-                logger.debug("web_search engine %s failed: %s", engine.__name__, last_err)
-        # Rate-limited or empty: wait and retry (skip the wait after the last try).
-        if attempt < _RETRIES - 1:
-            time.sleep(_BACKOFF_BASE * (attempt + 1))
 
+def _exhausted(query: str, last_err: Optional[str]) -> str:
     logger.warning("web_search exhausted retries for %r: %s", query, last_err)
     return json.dumps(
         {
@@ -96,3 +107,103 @@ def web_search(query: str) -> str:
             ),
         }
     )
+
+
+def _cached(query: str) -> Optional[str]:
+    hit = get_search_cache().get(query) if get_settings().SEARCH_CACHE_TTL_SECONDS > 0 else None
+    if hit is None:
+        return None
+    return _found(query, hit.results, hit.engine, {"status": "hit", "age_seconds": hit.age_seconds})
+
+
+def _remember(query: str, results: list[dict], engine: str) -> str:
+    get_search_cache().put(query, results, engine, get_settings().SEARCH_CACHE_TTL_SECONDS)
+    return _found(query, results, engine, {"status": "miss"})
+
+
+def _web_search(query: str) -> str:
+    cached = _cached(query)
+    if cached is not None:
+        return cached
+    last_err: str | None = None
+    for attempt in range(_RETRIES):
+        for name, engine in _engines():
+            try:
+                results = engine(query, _MAX_RESULTS)
+                if results:
+                    return _remember(query, results, name)
+                last_err = "no results"
+            except Exception as exc:  # noqa: BLE001
+                last_err = f"{type(exc).__name__}: {exc}"
+                logger.debug("web_search engine %s failed: %s", name, last_err)
+        # Rate-limited or empty: wait and retry (skip the wait after the last try).
+        if attempt < _RETRIES - 1:
+            time.sleep(_BACKOFF_BASE * (attempt + 1))
+    return _exhausted(query, last_err)
+
+
+async def _race(query: str) -> tuple[Optional[str], list[dict], Optional[str]]:
+    """Run the engines concurrently: (winning engine, its results, last error)."""
+    settings = get_settings()
+    engines = _engines()
+    failed = [asyncio.Event() for _ in engines]
+
+    async def one(i: int, name: str, engine) -> tuple[str, list[dict], Optional[str]]:
+        if i and settings.SEARCH_HEDGE_SECONDS > 0:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(failed[i - 1].wait(), settings.SEARCH_HEDGE_SECONDS)
+        try:
+            results = await asyncio.wait_for(
+                asyncio.to_thread(engine, query, _MAX_RESULTS), settings.SEARCH_ENGINE_TIMEOUT_SECONDS
+            )
+            err = None if results else "no results"
+        except asyncio.TimeoutError:
+            results, err = [], f"timed out after {settings.SEARCH_ENGINE_TIMEOUT_SECONDS}s"
+        except Exception as exc:  # noqa: BLE001
+            results, err = [], f"{type(exc).__name__}: {exc}"
+        if err:
+            logger.debug("web_search engine %s failed: %s", name, err)
+            failed[i].set()
+        return name, results, err
+
+    tasks = [asyncio.create_task(one(i, name, engine)) for i, (name, engine) in enumerate(engines)]
+    last_err = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            name, results, err = await next_done
+            if results:
+                return name, results, None
+            last_err = err
+    finally:
+        for task in tasks:
+            task.cancel()
+    return None, [], last_err
+
+
+async def _aweb_search(query: str) -> str:
+    cached = await asyncio.to_thread(_cached, query)
+    if cached is not None:
+        return cached
+    last_err: str | None = None
+    for attempt in range(_RETRIES):
+        name, results, last_err = await _race(query)
+        if results:
+            return await asyncio.to_thread(_remember, query, results, name)
+        if attempt < _RETRIES - 1:
+            await asyncio.sleep(_BACKOFF_BASE * (attempt + 1))
+    return _exhausted(query, last_err)
+
+
+web_search = StructuredTool.from_function(
+    func=_web_search,
+    coroutine=_aweb_search,
+    name="web_search",
+    args_schema=_SearchInput,
+    description=(
+        "Search the public web with DuckDuckGo (free, no API key) and return the "
+        "top results as JSON (title, url, snippet). Use for current events, external "
+        "facts, definitions, regulations, or anything not in the internal data "
+        "sources. Repeated queries are answered from a cache (`cache.status` "
+        "\"hit\", with its age)."
+    ),
+)
@@ -5,16 +5,32 @@ graph runs (callbacks propagate into subagents, so we capture the inner steps:
 route -> generate SQL -> approval -> execute). Steps accumulate per thread across
 a chat turn AND its human-in-the-loop resume, then we render them as a Mermaid
 flowchart the frontend can draw.
+
+Every step is a timed span: ``start_ns`` / ``end_ns`` (unix epoch ns),
+``duration_ms``, ``status`` ("running", "ok", "error"), ``span_id`` and the
+``parent_span_id`` of the step it ran under (an LLM call inside a subagent
+points at the route that started the subagent). Model calls are recorded as
+``llm`` steps; they feed the timings and metrics but are folded into the
+supervisor node of the diagram rather than drawn one by one.
+
+Traces live in a ``BoundedStore`` (LRU + idle TTL, ``TRACE_MAX_THREADS`` /
+``TRACE_TTL_SECONDS``) so a long-running server does not accumulate one per
+thread forever. Finished steps also feed ``METRICS``, the per-tool latency
+histograms and error counts served by ``/api/metrics``, and ``export_spans``
+renders a thread's turn as OpenTelemetry (OTLP/JSON) spans.
 """
 from __future__ import annotations
 
 import json
-from typing import Any, Optional
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
 
 from langchain_core.callbacks import BaseCallbackHandler
 
-# thread_id -> ordered list of step dicts for the current turn.
-_TRACES: dict[str, list[dict]] = {}
+from .config import get_settings
 
 # deepagents built-in housekeeping tools — not meaningful in the user-facing flow.
 _SKIP = {"ls", "read_file", "write_file", "edit_file", "glob", "grep", "write_todos"}
@@ -25,6 +41,9 @@ _FRIENDLY = {
     "genie_generate_sql": "Genie generates SQL",
     "execute_sql": "Execute SQL",
     "web_search": "Web search",
+    "result_rows": "Read result rows",
+    "result_filter": "Filter result",
+    "result_aggregate": "Aggregate result",
     "drg_shift_lookup": "DRG shift lookup",
     "icd_driver_lookup": "ICD driver lookup",
     "provider_utilization_lookup": "Provider utilization",
@@ -33,24 +52,220 @@ _FRIENDLY = {
     "callcenter_lookup": "Call-center lookup",
 }
 
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf.
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+
+
+def _new_id(nbytes: int = 8) -> str:
+    return os.urandom(nbytes).hex()
+
+
+# --------------------------------------------------------------------------
+# Bounded store
+# --------------------------------------------------------------------------
+class BoundedStore:
+    """Thread-safe mapping with LRU eviction and an idle TTL.
+
+    Holds at most ``max_items`` keys (the least recently used goes first) and
+    drops keys not read or written for ``ttl_seconds`` (0 disables either).
+    """
+
+    def __init__(
+        self,
+        max_items: int = 1000,
+        ttl_seconds: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._items: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        if self.ttl_seconds > 0:
+            cutoff = now - self.ttl_seconds
+            while self._items:
+                key, (seen, _) = next(iter(self._items.items()))
+                if seen >= cutoff:
+                    break
+                del self._items[key]
+        if self.max_items > 0:
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            if key not in self._items:
+                return default
+            value = self._items[key][1]
+            self._items[key] = (now, value)
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            now = self._clock()
+            self._items[key] = (now, value)
+            self._items.move_to_end(key)
+            self._expire(now)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._items.pop(key, None)
+            return default if item is None else item[1]
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            self._expire(self._clock())
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(self._clock())
+            return len(self._items)
+
+
+# --------------------------------------------------------------------------
+# Latency metrics
+# --------------------------------------------------------------------------
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with an error count."""
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, duration_ms: float, error: bool = False) -> None:
+        i = 0
+        while i < len(LATENCY_BUCKETS_MS) and duration_ms > LATENCY_BUCKETS_MS[i]:
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.errors += int(error)
+        self.sum_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding rank ``q``."""
+        if not self.count:
+            return 0.0
+        rank, seen, lower = q * self.count, 0, 0.0
+        for i, n in enumerate(self.buckets):
+            upper = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+            if n and seen + n >= rank:
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max_ms)
+            seen += n
+            lower = upper
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        cumulative, total = {}, 0
+        for i, n in enumerate(self.buckets):
+            total += n
+            cumulative[str(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else "+Inf"] = total
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else 0.0,
+            "mean_ms": round(self.sum_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50), 1),
+            "p95_ms": round(self.quantile(0.95), 1),
+            "max_ms": round(self.max_ms, 1),
+            "buckets_ms": cumulative,  # cumulative counts, Prometheus "le" style
+        }
+
+
+class MetricsRegistry:
+    """Latency histograms keyed by step kind and name, for ``/api/metrics``."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, kind: str, name: str, duration_ms: float, error: bool = False) -> None:
+        with self._lock:
+            hist = self._histograms.get((kind, name))
+            if hist is None:
+                hist = self._histograms[(kind, name)] = LatencyHistogram()
+            hist.observe(duration_ms, error)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            out: dict[str, dict] = {}
+            for (kind, name), hist in sorted(self._histograms.items()):
+                out.setdefault(kind, {})[name] = hist.to_dict()
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+METRICS = MetricsRegistry()
+
 
 # --------------------------------------------------------------------------
 # Per-thread trace store
 # --------------------------------------------------------------------------
+# thread_id -> {"trace_id", "span_id", "start_ns", "steps"} for the current turn.
+_TRACES = BoundedStore(get_settings().TRACE_MAX_THREADS, get_settings().TRACE_TTL_SECONDS)
+
+
+def _turn(thread_id: str) -> dict:
+    turn = _TRACES.get(thread_id)
+    if turn is None:
+        turn = {"trace_id": _new_id(16), "span_id": _new_id(), "start_ns": time.time_ns(), "steps": []}
+        _TRACES.set(thread_id, turn)
+    return turn
+
+
 def reset_trace(thread_id: str) -> None:
-    _TRACES[thread_id] = []
+    _TRACES.pop(thread_id)
+    _turn(thread_id)
+
+
+def drop_trace(thread_id: str) -> None:
+    _TRACES.pop(thread_id)
 
 
 def get_trace(thread_id: str) -> list[dict]:
-    return _TRACES.get(thread_id, [])
+    turn = _TRACES.get(thread_id)
+    return turn["steps"] if turn is not None else []
 
 
-def add_step(thread_id: str, step: dict) -> None:
-    _TRACES.setdefault(thread_id, []).append(step)
+def add_step(thread_id: str, step: dict) -> dict:
+    """Append ``step`` as a running span (start time and ids filled in)."""
+    step.setdefault("span_id", _new_id())
+    step.setdefault("parent_span_id", None)
+    step.setdefault("start_ns", time.time_ns())
+    step.setdefault("end_ns", None)
+    step.setdefault("duration_ms", None)
+    step.setdefault("status", "running")
+    _turn(thread_id)["steps"].append(step)
+    return step
+
+
+def end_step(step: dict, error: Optional[str] = None) -> dict:
+    """Close a step's span and record its latency in ``METRICS``."""
+    if step.get("end_ns") is not None:
+        return step
+    step["end_ns"] = time.time_ns()
+    step["duration_ms"] = round((step["end_ns"] - step["start_ns"]) / 1e6, 1)
+    step["status"] = "error" if error else "ok"
+    if error:
+        step["error"] = error[:200]
+    METRICS.observe(step.get("kind", "tool"), step.get("name", "step"), step["duration_ms"], bool(error))
+    return step
 
 
 def last_step_of(thread_id: str, name: str) -> Optional[dict]:
-    for step in reversed(_TRACES.get(thread_id, [])):
+    for step in reversed(get_trace(thread_id)):
         if step.get("name") == name:
             return step
     return None
@@ -76,13 +291,21 @@ def _tool_content(output: Any) -> Any:
     return _parse_json(content)
 
 
+def _cache_note(data: dict) -> str:
+    cache = data.get("cache")
+    if not isinstance(cache, dict) or cache.get("status") != "hit":
+        return ""
+    return f" · cached ({cache.get('age_seconds', 0):.0f}s old)"
+
+
 def _summarize(name: str, output: Any) -> str:
     data = _tool_content(output)
     if not isinstance(data, dict):
         text = str(data)
         return text[:80]
+    cached = _cache_note(data)
     if name == "run_saved_sql":
-        return "saved query found → ran directly" if data.get("saved") else "no saved query"
+        return ("saved query found → ran directly" + cached) if data.get("saved") else "no saved query"
     if name == "genie_generate_sql":
         sql = data.get("sql")
         return f"SQL: {sql[:70]}" if sql else (data.get("note") or "no SQL produced")
@@ -91,7 +314,7 @@ def _summarize(name: str, output: Any) -> str:
             return f"error: {str(data['error'])[:60]}"
         rc = data.get("row_count")
         saved = " · saved as tool" if data.get("saved_as_tool") else ""
-        return f"{rc} row(s) returned{saved}"
+        return f"{rc} row(s) returned{saved}{cached}"
     if name == "web_search":
         n = len(data.get("results", []) or [])
         return f"{n} web result(s)"
@@ -108,12 +331,64 @@ def _route_target(args: Any) -> str:
     return "specialist"
 
 
+def _model_name(serialized: Optional[dict], metadata: Optional[dict]) -> str:
+    metadata = metadata or {}
+    kwargs = (serialized or {}).get("kwargs") or {}
+    return str(
+        metadata.get("ls_model_name")
+        or kwargs.get("model_name")
+        or kwargs.get("model")
+        or (serialized or {}).get("name")
+        or "llm"
+    )
+
+
+def _token_usage(response: Any) -> Optional[int]:
+    for generations in getattr(response, "generations", None) or []:
+        for gen in generations:
+            usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if usage and usage.get("total_tokens"):
+                return int(usage["total_tokens"])
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    return usage.get("total_tokens")
+
+
 class TraceCollector(BaseCallbackHandler):
-    """Records tool/agent steps into the per-thread trace store."""
+    """Records tool/agent steps and model calls into the per-thread trace store."""
+
+    # Called on the event loop rather than a worker thread, so start/end
+    # timestamps are taken when the run actually starts and ends.
+    run_inline = True
 
     def __init__(self, thread_id: str) -> None:
         self.thread_id = thread_id
         self._runs: dict[str, dict] = {}
+        self._parents: dict[str, str] = {}
+
+    def _open(self, step: dict, run_id: Any, parent_run_id: Any) -> None:
+        run = str(run_id)
+        if parent_run_id is not None:
+            self._parents[run] = str(parent_run_id)
+        # nearest recorded ancestor (chains in between are not steps)
+        parent = self._parents.get(run)
+        while parent is not None and parent not in self._runs:
+            parent = self._parents.get(parent)
+        if parent is not None:
+            step["parent_span_id"] = self._runs[parent]["span_id"]
+        self._runs[run] = step
+        add_step(self.thread_id, step)
+
+    def _close(self, run_id: Any, error: Optional[BaseException] = None) -> Optional[dict]:
+        step = self._runs.get(str(run_id))
+        if step is not None:
+            end_step(step, f"{type(error).__name__}: {error}" if error is not None else None)
+        return step
+
+    def on_chain_start(
+        self, serialized: Optional[dict], inputs: Any, *, run_id: Any = None, parent_run_id: Any = None, **kwargs: Any
+    ) -> None:
+        if parent_run_id is not None:
+            self._parents[str(run_id)] = str(parent_run_id)
 
     def on_tool_start(
         self,
@@ -128,6 +403,8 @@ class TraceCollector(BaseCallbackHandler):
     ) -> None:
         name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
         if name in _SKIP:
+            if parent_run_id is not None:
+                self._parents[str(run_id)] = str(parent_run_id)
             return
         args = inputs if inputs is not None else _parse_json(input_str)
         if name == "task":
@@ -147,13 +424,109 @@ class TraceCollector(BaseCallbackHandler):
             # Surface the generated SQL immediately so it shows even before end.
             if isinstance(args, dict) and args.get("sql"):
                 step["sql"] = str(args["sql"])
-        self._runs[str(run_id)] = step
-        add_step(self.thread_id, step)
+        self._open(step, run_id, parent_run_id)
 
     def on_tool_end(self, output: Any, *, run_id: Any = None, **kwargs: Any) -> None:
         step = self._runs.get(str(run_id))
         if step is not None:
             step["summary"] = _summarize(step.get("name", ""), output)
+            data = _tool_content(output)
+            if isinstance(data, dict) and isinstance(data.get("cache"), dict):
+                step["cache"] = data["cache"].get("status")
+            failed = isinstance(data, dict) and data.get("error")
+            end_step(step, str(data["error"]) if failed else None)
+
+    def on_tool_error(self, error: BaseException, *, run_id: Any = None, **kwargs: Any) -> None:
+        step = self._close(run_id, error)
+        if step is not None:
+            step["summary"] = f"error: {str(error)[:60]}"
+
+    def on_chat_model_start(
+        self,
+        serialized: Optional[dict],
+        messages: Any,
+        *,
+        run_id: Any = None,
+        parent_run_id: Any = None,
+        metadata: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> None:
+        model = _model_name(serialized, metadata)
+        step = {"kind": "llm", "name": model, "label": f"LLM call ({model})", "summary": None}
+        self._open(step, run_id, parent_run_id)
+
+    def on_llm_end(self, response: Any, *, run_id: Any = None, **kwargs: Any) -> None:
+        step = self._close(run_id)
+        if step is not None:
+            tokens = _token_usage(response)
+            if tokens:
+                step["tokens"] = tokens
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any = None, **kwargs: Any) -> None:
+        self._close(run_id, error)
+
+
+# --------------------------------------------------------------------------
+# OpenTelemetry export
+# --------------------------------------------------------------------------
+def _attr(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def export_spans(thread_id: str, question: str = "") -> Optional[dict]:
+    """The thread's current turn as an OTLP/JSON ``ExportTraceServiceRequest``.
+
+    One root span for the turn, one child span per step (nested by
+    ``parent_span_id``). Running steps end "now". Returns None for an unknown
+    thread.
+    """
+    turn = _TRACES.get(thread_id)
+    if turn is None:
+        return None
+    now = time.time_ns()
+    trace_id = turn["trace_id"]
+    spans = []
+    end = turn["start_ns"]
+    for step in turn["steps"]:
+        step_end = step.get("end_ns") or now
+        end = max(end, step_end)
+        attributes = [_attr("step.kind", step.get("kind", "tool")), _attr("step.label", step.get("label", ""))]
+        for key in ("summary", "decision", "sql", "tokens", "cache", "error"):
+            if step.get(key):
+                attributes.append(_attr(f"step.{key}", step[key]))
+        spans.append({
+            "traceId": trace_id,
+            "spanId": step["span_id"],
+            "parentSpanId": step.get("parent_span_id") or turn["span_id"],
+            "name": f"{step.get('kind', 'tool')} {step.get('name', 'step')}",
+            "kind": 3 if step.get("kind") == "llm" else 1,  # CLIENT for model calls, else INTERNAL
+            "startTimeUnixNano": str(step["start_ns"]),
+            "endTimeUnixNano": str(step_end),
+            "attributes": attributes,
+            "status": {"code": 2 if step.get("status") == "error" else 1},
+        })
+    root = {
+        "traceId": trace_id,
+        "spanId": turn["span_id"],
+        "name": "chat turn",
+        "kind": 2,  # SERVER
+        "startTimeUnixNano": str(turn["start_ns"]),
+        "endTimeUnixNano": str(end),
+        "attributes": [_attr("thread.id", thread_id), _attr("chat.question", question)],
+        "status": {"code": 1},
+    }
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attr("service.name", "drg-deep-agent")]},
+            "scopeSpans": [{"scope": {"name": "app.trace"}, "spans": [root, *spans]}],
+        }]
+    }
 
 
 # --------------------------------------------------------------------------
@@ -165,26 +538,40 @@ def _esc(text: str) -> str:
     return text[:90]
 
 
-def steps_to_mermaid(thread_id: str, question: str, answer: str = "") -> str:
+def _fmt_ms(ms: Optional[float]) -> str:
+    if ms is None:
+        return ""
+    return f"{ms:.0f} ms" if ms < 1000 else f"{ms / 1000:.1f} s"
+
+
+def steps_to_mermaid(thread_id: str, question: str, answer: str = "", durations: bool = True) -> str:
     steps = get_trace(thread_id)
+    llm = [s for s in steps if s.get("kind") == "llm"]
+    supervisor = "routes the question"
+    if durations and llm:
+        llm_ms = sum(s.get("duration_ms") or 0 for s in llm)
+        supervisor += f"<br/>⏱ {len(llm)} LLM call(s) · {_fmt_ms(llm_ms)}"
     lines = ["flowchart TD"]
     lines.append(f'  U["🧑 User<br/>{_esc(question)}"]')
-    lines.append('  S["🧭 Supervisor<br/>routes the question"]')
+    lines.append(f'  S["🧭 Supervisor<br/>{supervisor}"]')
     lines.append("  U --> S")
     prev = "S"
     for i, step in enumerate(steps):
-        nid = f"N{i}"
         kind = step.get("kind")
+        if kind == "llm":
+            continue
+        nid = f"N{i}"
         label = _esc(step.get("label", step.get("name", "step")))
         summary = _esc(step.get("summary") or "")
         sql = step.get("sql")
+        took = f"<br/>⏱ {_fmt_ms(step['duration_ms'])}" if durations and step.get("duration_ms") is not None else ""
         if kind == "route":
-            lines.append(f'  {nid}{{"{label}"}}')
+            lines.append(f'  {nid}{{"{label}{took}"}}')
         elif kind == "approval":
             decision = step.get("decision", "pending")
             sql_txt = _esc(sql or "")
             lines.append(
-                f'  {nid}{{"🙋 Human approval<br/>{decision}<br/>{sql_txt}"}}'
+                f'  {nid}{{"🙋 Human approval<br/>{decision}<br/>{sql_txt}{took}"}}'
             )
         else:
             body = label
@@ -192,7 +579,7 @@ def steps_to_mermaid(thread_id: str, question: str, answer: str = "") -> str:
                 body += f"<br/>{_esc(sql)}"
             if summary:
                 body += f"<br/>{summary}"
-            lines.append(f'  {nid}["{body}"]')
+            lines.append(f'  {nid}["{body}{took}"]')
         lines.append(f"  {prev} --> {nid}")
         prev = nid
     ans = _esc(answer) if answer else "final answer"
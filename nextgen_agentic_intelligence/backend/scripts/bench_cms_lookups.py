@@ -0,0 +1,95 @@
+"""Time the cms_store query functions over the ingested CMS data.
+
+Builds the indexes once (reported as "index build"), then runs each query
+``--repeat`` times and prints the mean and p95 per call in microseconds. With
+``--baseline`` it also times the previous linear-scan implementations
+(substring title scan, full changes-list filter) for comparison.
+
+Usage (from the backend/ dir):
+
+    python scripts/bench_cms_lookups.py
+    python scripts/bench_cms_lookups.py --repeat 2000 --baseline
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import cms_store  # noqa: E402
+
+_SEARCHES = ["heart failure", "sepsis without mv", "knee replacements", "pnuemonia", "kidney transplant"]
+
+
+def _time(fn, repeat: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1e6)
+    samples.sort()
+    return statistics.fmean(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def _baseline_search(query: str, fy: str = cms_store.LATEST_FY) -> list:
+    q = query.lower()
+    return [r for r in cms_store._catalog().get(fy, []) if q in r["title"].lower()]
+
+
+def _baseline_changes(fy: str, change_type: str) -> list:
+    return [c for c in cms_store._changes() if c.get("fy") == fy and c.get("change_type") == change_type]
+
+
+def _baseline_history(drg: str) -> list:
+    return [c for c in cms_store._changes() if c.get("drg") == drg]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=1000, help="calls per query")
+    ap.add_argument("--baseline", action="store_true", help="also time the old linear scans")
+    args = ap.parse_args()
+    if not cms_store.available():
+        print("CMS datasets not ingested (run scripts/ingest_cms.py)")
+        return 1
+
+    t = time.perf_counter()
+    cms_store._catalog()
+    cms_store._changes()
+    print(f"bundle load (catalog + changes): {(time.perf_counter() - t) * 1e3:.1f} ms")
+    t = time.perf_counter()
+    cms_store._drg_index()
+    cms_store._changes_index()
+    print(f"index build: {(time.perf_counter() - t) * 1e3:.1f} ms\n")
+
+    cases = [(f"search_drgs({q!r})", lambda q=q: cms_store.search_drgs(q)) for q in _SEARCHES]
+    cases += [
+        ("get_drg('291')", lambda: cms_store.get_drg("291")),
+        ("get_drg('077') (deleted)", lambda: cms_store.get_drg("077")),
+        ("get_changes('2026', 'added')", lambda: cms_store.get_changes("2026", "added")),
+        ("get_changes('2024')", lambda: cms_store.get_changes("2024")),
+        ("drg_change_history('077')", lambda: cms_store.drg_change_history("077")),
+        ("cc_mcc_status('N17.9', '2023')", lambda: cms_store.cc_mcc_status("N17.9", "2023")),
+        ("cc_mcc_status('Z00.00') (NonCC)", lambda: cms_store.cc_mcc_status("Z00.00")),
+        ("get_cc_mcc_changes('2026')", lambda: cms_store.get_cc_mcc_changes("2026")),
+    ]
+    if args.baseline:
+        cases += [(f"[old] title scan {q!r}", lambda q=q: _baseline_search(q)) for q in _SEARCHES[:2]]
+        cases += [
+            ("[old] changes filter 2026/added", lambda: _baseline_changes("2026", "added")),
+            ("[old] history scan '077'", lambda: _baseline_history("077")),
+        ]
+
+    print(f"{'query':<36} {'mean us':>9} {'p95 us':>9}")
+    for name, fn in cases:
+        mean, p95 = _time(fn, args.repeat)
+        print(f"{name:<36} {mean:>9.1f} {p95:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
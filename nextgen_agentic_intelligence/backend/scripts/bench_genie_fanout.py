@@ -0,0 +1,159 @@
+"""Measure wall time of multi-space Genie questions: sync vs async tools.
+
+Runs the DRG agent's ``genie_<name>`` tools against a simulated Databricks
+workspace (no credentials or network needed) in which every Genie question
+takes ``--latency`` seconds to complete. Each "user" asks one question of each
+of ``--spaces`` spaces, and ``--users`` users do so at the same time. Three
+ways of running the calls are timed:
+
+  sequential   one tool call per model turn (blocking ``ask``)
+  parallel     one turn with all calls, sync tools (thread pool, as before)
+  async        one turn with all calls, async tools (``aask``)
+
+The calls go through LangGraph's ``ToolNode`` in a one-node graph, as in the
+agent graph. The sync tools hold a worker thread while Genie works, so with many users they
+queue for the default thread pool; the async tools only borrow a thread per
+HTTP call.
+
+Usage (from the backend/ dir):
+
+    python scripts/bench_genie_fanout.py
+    python scripts/bench_genie_fanout.py --spaces 3 --users 20 --latency 2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from langchain_core.messages import AIMessage  # noqa: E402
+from langgraph.graph import END, START, MessagesState, StateGraph  # noqa: E402
+from langgraph.prebuilt import ToolNode  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.genie import tools as genie_tools  # noqa: E402
+from app.genie.registry import GenieSpace  # noqa: E402
+
+_HTTP_SECONDS = 0.02  # simulated round trip of one REST call
+
+
+class _SimulatedGenie:
+    """Genie API stand-in: each message completes ``latency`` s after it starts."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self._started: dict[str, float] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _message(self, conversation_id: str, message_id: str, status: str):
+        query = SimpleNamespace(query="SELECT fy, tier, cases FROM drg_shift", description="tier mix")
+        return SimpleNamespace(
+            conversation_id=conversation_id,
+            message_id=message_id,
+            status=SimpleNamespace(value=status),
+            attachments=[SimpleNamespace(attachment_id="a1", query=query, text=None)],
+            error=None,
+        )
+
+    # async path: start, then poll
+    def start_conversation(self, space_id, content):
+        time.sleep(_HTTP_SECONDS)
+        with self._lock:
+            message_id = f"m{next(self._ids)}"
+            self._started[message_id] = time.monotonic()
+        return SimpleNamespace(conversation_id="c-" + message_id, message_id=message_id)
+
+    def get_message(self, space_id, conversation_id, message_id):
+        time.sleep(_HTTP_SECONDS)
+        done = time.monotonic() - self._started[message_id] >= self.latency
+        return self._message(conversation_id, message_id, "COMPLETED" if done else "EXECUTING_QUERY")
+
+    # sync path: the SDK's *_and_wait blocks the calling thread throughout
+    def start_conversation_and_wait(self, space_id, content, timeout=None):
+        time.sleep(_HTTP_SECONDS + self.latency)
+        return self._message("c", "m", "COMPLETED")
+
+    def get_message_attachment_query_result(self, *args):
+        time.sleep(_HTTP_SECONDS)
+        return SimpleNamespace(
+            statement_response=SimpleNamespace(
+                manifest=SimpleNamespace(schema=SimpleNamespace(columns=[SimpleNamespace(name="cases")])),
+                result=SimpleNamespace(data_array=[["1200"]], external_links=None),
+            )
+        )
+
+
+def _build_tools(n_spaces: int, latency: float, sync_only: bool):
+    client = genie_tools.get_genie_client()
+    client._w = SimpleNamespace(genie=_SimulatedGenie(latency))
+    spaces = [GenieSpace(f"space_{i}", f"0{i}", "DRG analytics", "drg") for i in range(n_spaces)]
+    tools = [genie_tools._make_tool(s) for s in spaces]
+    if sync_only:
+        for t in tools:
+            t.coroutine = None  # how the tools were built before aask existed
+    return tools
+
+
+def _turn(tools) -> AIMessage:
+    calls = [
+        {"name": t.name, "args": {"question": f"tier mix for DRG 291, {t.name}"}, "id": f"call_{i}", "type": "tool_call"}
+        for i, t in enumerate(tools)
+    ]
+    return AIMessage(content="", tool_calls=calls)
+
+
+def _tool_graph(tools):
+    graph = StateGraph(MessagesState)
+    graph.add_node("tools", ToolNode(tools))
+    graph.add_edge(START, "tools")
+    graph.add_edge("tools", END)
+    return graph.compile()
+
+
+async def _user(graph, tools, mode: str) -> None:
+    turns = [[t] for t in tools] if mode == "sequential" else [tools]
+    for called in turns:
+        await graph.ainvoke({"messages": [_turn(called)]})
+
+
+async def _measure(n_spaces: int, users: int, latency: float, mode: str) -> float:
+    tools = _build_tools(n_spaces, latency, sync_only=mode != "async")
+    graph = _tool_graph(tools)
+    started = time.perf_counter()
+    await asyncio.gather(*(_user(graph, tools, mode) for _ in range(users)))
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--spaces", type=int, default=3, help="Genie spaces asked per question")
+    ap.add_argument("--users", type=int, default=1, help="concurrent users")
+    ap.add_argument("--latency", type=float, default=2.0, help="seconds Genie takes per question")
+    args = ap.parse_args()
+
+    settings = get_settings()
+    settings.DATABRICKS_HOST, settings.DATABRICKS_TOKEN = "https://simulated", "simulated"
+
+    print(f"{args.users} user(s) x {args.spaces} Genie question(s), {args.latency:.1f}s each\n")
+    print(f"{'mode':<12} {'wall':>8}")
+    results = {}
+    for mode in ("sequential", "parallel", "async"):
+        results[mode] = asyncio.run(_measure(args.spaces, args.users, args.latency, mode))
+        print(f"{mode:<12} {results[mode]:>7.2f}s")
+    print(
+        f"\nasync vs sequential: {results['sequential'] / results['async']:.1f}x faster; "
+        f"vs parallel sync tools: {results['parallel'] / results['async']:.1f}x"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
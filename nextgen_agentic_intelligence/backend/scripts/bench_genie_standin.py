@@ -0,0 +1,176 @@
+"""Benchmark the Genie client end to end against the local API stand-in.
+
+Starts ``scripts/genie_standin.py`` (DuckDB, synthetic claims) in-process and
+points a real ``GenieClient`` / ``WorkspaceClient`` at it, so polling,
+pagination and retries run over HTTP exactly as against a workspace:
+
+  polling    ``--questions`` concurrent ``aask`` calls, Genie at
+             ``--genie-latency`` s, per ``GENIE_POLL_INITIAL_SECONDS``: p50 /
+             p95 time, overshoot past the answer being ready, and
+             ``get_message`` calls per question
+  download   ``arun_sql`` of all ``--rows`` claims with EXTERNAL_LINKS
+             (``--chunk-rows`` per chunk, ``--http-ms`` per call) per
+             ``GENIE_DOWNLOAD_CONCURRENCY``: wall time, split into the
+             download (and its MB/s) and storing the Parquet file under a
+             handle (``results.store_file``, which summarizes every row with
+             DuckDB)
+  faults     the same download with ``--chunk-error-rate`` of chunks
+             answered 503, ``--throttle-rate`` of API calls 429 and links
+             valid for ``--link-ttl`` s: wall time and the faults recovered from
+
+Usage (from the backend/ dir):
+
+    python scripts/bench_genie_standin.py
+    python scripts/bench_genie_standin.py --rows 2000000 --chunk-rows 250000 --http-ms 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import genie_standin  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.genie import client as genie_client  # noqa: E402
+from app.genie.client import GenieClient  # noqa: E402
+
+_SPACE = "01standin"
+_QUESTION = "How did the DRG 291 tier mix shift from 2023 to 2025 in Ohio?"
+
+
+def _point_at(standin: genie_standin.StandIn, **overrides) -> GenieClient:
+    """Settings for ``standin``; a fresh client, so its WorkspaceClient uses them."""
+    settings = get_settings()
+    values = {"DATABRICKS_HOST": standin.url, "DATABRICKS_TOKEN": standin.options.token,
+              "GENIE_WAREHOUSE_ID": "", "SQL_CACHE_TTL_SECONDS": 0, **overrides}
+    for k, v in values.items():
+        setattr(settings, k, v)
+    return GenieClient()
+
+
+async def _timed_asks(client: GenieClient, n: int) -> list[tuple[float, str]]:
+    async def one(i: int) -> tuple[float, str]:
+        started = time.perf_counter()
+        result = await client.aask(_SPACE, f"{_QUESTION} ({i})")
+        return time.perf_counter() - started, result.status
+
+    return await asyncio.gather(*(one(i) for i in range(n)))
+
+
+def bench_polling(args, initials: list[float]) -> None:
+    print(f"polling: {args.questions} concurrent questions, Genie {args.genie_latency}s (+-20%), "
+          f"poll max {get_settings().GENIE_POLL_MAX_SECONDS}s")
+    print(f"{'initial':>8} {'p50':>7} {'p95':>7} {'overshoot':>10} {'polls/q':>8}")
+    for initial in initials:
+        opts = genie_standin.StandInOptions(rows=args.rows // 10, genie_latency=args.genie_latency,
+                                            http_ms=args.http_ms, seed=args.seed)
+        with genie_standin.running(opts) as standin:
+            client = _point_at(standin, GENIE_POLL_INITIAL_SECONDS=initial)
+            asyncio.run(client.aask(_SPACE, _QUESTION))  # warm the SDK client
+            polls_before = standin.counts["api:get_message"]
+            timed = asyncio.run(_timed_asks(client, args.questions))
+            polls = (standin.counts["api:get_message"] - polls_before) / args.questions
+        seconds = sorted(t for t, _ in timed)
+        bad = [s for _, s in timed if s != "COMPLETED"]
+        p95 = seconds[int(0.95 * (len(seconds) - 1))]
+        overshoot = statistics.fmean(seconds) - args.genie_latency
+        print(f"{initial:>7.2f}s {statistics.median(seconds):>6.2f}s {p95:>6.2f}s {overshoot:>9.2f}s {polls:>8.1f}"
+              + (f"  ({len(bad)} not completed)" if bad else ""))
+
+
+def _download(standin: genie_standin.StandIn, concurrency: int, results_dir: str) -> tuple[float, float, dict]:
+    """(wall seconds, of which storing the file, arun_sql's result)."""
+    client = _point_at(standin, GENIE_DOWNLOAD_CONCURRENCY=concurrency, GENIE_RESULTS_DIR=results_dir)
+    store_file, stored = genie_client.store_file, []
+
+    def timed_store_file(path: str) -> dict:
+        started = time.perf_counter()
+        try:
+            return store_file(path)
+        finally:
+            stored.append(time.perf_counter() - started)
+
+    genie_client.store_file = timed_store_file
+    try:
+        started = time.perf_counter()
+        out = asyncio.run(client.arun_sql(_SPACE, "SELECT * FROM claims", disposition="EXTERNAL_LINKS", refresh=True))
+        return time.perf_counter() - started, sum(stored), out
+    finally:
+        genie_client.store_file = store_file
+
+
+def bench_download(args, concurrencies: list[int], results_dir: str) -> None:
+    opts = genie_standin.StandInOptions(rows=args.rows, chunk_rows=args.chunk_rows, http_ms=args.http_ms,
+                                        sql_latency=0.1, seed=args.seed)
+    with genie_standin.running(opts) as standin:
+        chunks = -(-args.rows // args.chunk_rows)
+        print(f"\ndownload: {args.rows} claims, EXTERNAL_LINKS ARROW_STREAM, {chunks} chunks, "
+              f"{args.http_ms:.0f} ms per call")
+        print(f"{'concurrency':>11} {'wall':>7} {'download':>9} {'store':>7} {'MB':>7} {'MB/s':>7}")
+        _download(standin, 1, results_dir)  # warm-up: SDK client built, DuckDB caches filled
+        for concurrency in concurrencies:
+            before = standin.counts["bytes_served"]
+            wall, store, out = _download(standin, concurrency, results_dir)
+            if out.get("error") or out.get("row_count") != args.rows:
+                print(f"{concurrency:>11}  failed: {out.get('error') or out.get('row_count')}")
+                continue
+            mb = (standin.counts["bytes_served"] - before) / 2**20
+            print(f"{concurrency:>11} {wall:>6.2f}s {wall - store:>8.2f}s {store:>6.2f}s {mb:>7.1f} "
+                  f"{mb / (wall - store):>7.1f}")
+
+
+def bench_faults(args, results_dir: str) -> None:
+    opts = genie_standin.StandInOptions(rows=args.rows, chunk_rows=args.chunk_rows, http_ms=args.http_ms,
+                                        sql_latency=0.1, seed=args.seed, link_ttl=args.link_ttl,
+                                        chunk_error_rate=args.chunk_error_rate, throttle_rate=args.throttle_rate)
+    with genie_standin.running(opts) as standin:
+        print(f"\nfaults: {args.chunk_error_rate:.0%} of chunks 503, {args.throttle_rate:.0%} of API calls 429, "
+              f"links valid {args.link_ttl:.0f}s")
+        wall, _, out = _download(standin, get_settings().GENIE_DOWNLOAD_CONCURRENCY, results_dir)
+        ok = not out.get("error") and out.get("row_count") == args.rows
+        faults = ", ".join(f"{k} {v}" for k, v in standin.stats()["faults"].items()) or "none"
+        print(f"{'complete' if ok else 'FAILED: ' + str(out.get('error'))} in {wall:.2f}s; injected: {faults}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--questions", type=int, default=20, help="concurrent Genie questions")
+    ap.add_argument("--genie-latency", type=float, default=2.0, help="seconds Genie takes per question")
+    ap.add_argument("--poll-initial", default="0.1,0.25,1.0", help="GENIE_POLL_INITIAL_SECONDS values")
+    ap.add_argument("--rows", type=int, default=1_000_000, help="claims in the download")
+    ap.add_argument("--chunk-rows", type=int, default=100_000, help="rows per EXTERNAL_LINKS chunk")
+    ap.add_argument("--concurrency", default="1,4,8", help="GENIE_DOWNLOAD_CONCURRENCY values")
+    ap.add_argument("--http-ms", type=float, default=20, help="latency of every API call and download")
+    ap.add_argument("--chunk-error-rate", type=float, default=0.2)
+    ap.add_argument("--throttle-rate", type=float, default=0.1)
+    ap.add_argument("--link-ttl", type=float, default=11.0, help="seconds a link is valid (the client refreshes "
+                                                                    "links within 10 s of expiry)")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    settings = get_settings()
+    saved = {k: getattr(settings, k) for k in (
+        "DATABRICKS_HOST", "DATABRICKS_TOKEN", "GENIE_WAREHOUSE_ID", "SQL_CACHE_TTL_SECONDS",
+        "GENIE_POLL_INITIAL_SECONDS", "GENIE_DOWNLOAD_CONCURRENCY", "GENIE_RESULTS_DIR",
+    )}
+    try:
+        with tempfile.TemporaryDirectory() as results_dir:
+            bench_polling(args, [float(v) for v in args.poll_initial.split(",")])
+            bench_download(args, [int(v) for v in args.concurrency.split(",")], results_dir)
+            bench_faults(args, results_dir)
+    finally:
+        for k, v in saved.items():
+            setattr(settings, k, v)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+"""Measure the fast router's accuracy and the turn latency it saves.
+
+Accuracy is leave-one-out over the labeled examples (``ROUTER_EXAMPLES_PATH``):
+each question is classified by a router trained on all the others. Per
+``ROUTER_MIN_MARGIN`` (at the configured confidence and minimum score) it
+reports coverage (the share of subagent questions routed directly), accuracy
+of those routed, and how many supervisor questions (small talk, follow-ups,
+multi-specialist) would have been routed by mistake.
+
+Latency runs the chat load test (``scripts/load_test_chat.py``: real app,
+scripted model, simulated workspace) twice, router off and on, and prints the
+p50 time to first token and full turn of each phase, and the difference.
+``--first-token-ms`` is the model latency per call, i.e. what one skipped
+supervisor call is worth.
+
+Usage (from the backend/ dir):
+
+    python scripts/bench_router.py
+    python scripts/bench_router.py --first-token-ms 1500 --sessions 40 --skip-latency
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import load_test_chat as lt  # noqa: E402
+
+from app.config import get_settings  # noqa: E402
+from app.router import SUPERVISOR, Decision, Router, load_examples  # noqa: E402
+
+_MARGINS = (0.0, 0.05, 0.1, 0.15, 0.2)
+
+
+def leave_one_out(examples: list[tuple[str, str]], neighbors: int, temperature: float) -> list[tuple[str, Decision]]:
+    """(true route, decision) for each example, classified without itself."""
+    out = []
+    for i, (text, route) in enumerate(examples):
+        router = Router(examples[:i] + examples[i + 1:], neighbors, temperature)
+        out.append((route, router.classify(text)))
+    return out
+
+
+def accuracy_table(results: list[tuple[str, Decision]], confidence: float, min_score: float,
+                   margins=_MARGINS) -> list[dict]:
+    """Coverage / accuracy / supervisor leaks per minimum margin."""
+    specialist = [(r, d) for r, d in results if r != SUPERVISOR]
+    rows = []
+    for margin in margins:
+        def routed(d: Decision) -> bool:
+            return (d.route != SUPERVISOR and d.confidence >= confidence
+                    and d.scores.get(d.route, 0.0) >= min_score and d.margin >= margin)
+
+        hits = [(r, d) for r, d in results if routed(d)]
+        correct = sum(r == d.route for r, d in hits)
+        rows.append({
+            "margin": margin,
+            "coverage": sum(routed(d) for _, d in specialist) / len(specialist),
+            "accuracy": correct / len(hits) if hits else None,
+            "supervisor_leaks": sum(routed(d) for r, d in results if r == SUPERVISOR),
+        })
+    return rows
+
+
+def _classify_us(router: Router, texts: list[str], repeat: int = 20) -> tuple[float, float]:
+    samples = []
+    for _ in range(repeat):
+        for text in texts:
+            t = time.perf_counter()
+            router.classify(text)
+            samples.append((time.perf_counter() - t) * 1e6)
+    samples.sort()
+    return statistics.fmean(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def main() -> int:
+    settings = get_settings()
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--examples", default=settings.ROUTER_EXAMPLES_PATH, help="labeled examples (JSON lines)")
+    ap.add_argument("--neighbors", type=int, default=settings.ROUTER_NEIGHBORS)
+    ap.add_argument("--temperature", type=float, default=settings.ROUTER_TEMPERATURE)
+    ap.add_argument("--sessions", type=int, default=30, help="load-test sessions per run")
+    ap.add_argument("--concurrency", type=int, default=5)
+    ap.add_argument("--first-token-ms", type=float, default=800, help="model latency per call")
+    ap.add_argument("--skip-latency", action="store_true", help="accuracy only")
+    args = ap.parse_args()
+
+    examples = load_examples(args.examples)
+    t = time.perf_counter()
+    router = Router(examples, args.neighbors, args.temperature)
+    print(f"{len(examples)} examples, {len(router.routes)} routes; "
+          f"fit {(time.perf_counter() - t) * 1e3:.1f} ms")
+    mean, p95 = _classify_us(router, [text for text, _ in examples])
+    print(f"classify: mean {mean:.0f} us, p95 {p95:.0f} us\n")
+
+    results = leave_one_out(examples, args.neighbors, args.temperature)
+    top1 = sum(r == d.route for r, d in results) / len(results)
+    print(f"leave-one-out top-1 accuracy (all routes): {top1:.1%}")
+    print(f"confidence >= {settings.ROUTER_CONFIDENCE}, top score >= {settings.ROUTER_MIN_SCORE}:")
+    print(f"{'margin':>9} {'coverage':>9} {'accuracy':>9} {'sup. leaks':>11}")
+    for row in accuracy_table(results, settings.ROUTER_CONFIDENCE, settings.ROUTER_MIN_SCORE):
+        acc = f"{row['accuracy']:.1%}" if row["accuracy"] is not None else "-"
+        mark = "  <- ROUTER_MIN_MARGIN" if row["margin"] == settings.ROUTER_MIN_MARGIN else ""
+        print(f"{row['margin']:>9} {row['coverage']:>9.1%} {acc:>9} {row['supervisor_leaks']:>11}{mark}")
+
+    if args.skip_latency:
+        return 0
+    print(f"\nturn latency, model {args.first_token_ms:.0f} ms per call "
+          f"({args.sessions} sessions, {args.concurrency} concurrent, checkpointer memory):")
+    p50 = {}
+    for enabled in (False, True):
+        opts = lt.Options(sessions=args.sessions, concurrency=args.concurrency, first_token_ms=args.first_token_ms,
+                          checkpointer="memory", router=enabled)
+        report = lt.run_load(opts)
+        if report["error_rate"]:
+            print(f"  errors with router {'on' if enabled else 'off'}: {report['phases']}")
+            return 1
+        p50[enabled] = {k: (p["ttft_s"]["p50"], p["turn_s"]["p50"]) for k, p in report["phases"].items()}
+    print(f"{'phase':<10} {'TTFT off':>9} {'on':>6} {'saved':>6}   {'turn off':>9} {'on':>6} {'saved':>6}")
+    for phase in ("chat", "hitl_chat"):
+        (t0, u0), (t1, u1) = p50[False][phase], p50[True][phase]
+        print(f"{phase:<10} {t0:>9.2f} {t1:>6.2f} {t0 - t1:>6.2f}   {u0:>9.2f} {u1:>6.2f} {u0 - u1:>6.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,691 @@
+"""Local stand-in for the Databricks Genie and Statement Execution APIs.
+
+Serves the REST endpoints ``GenieClient`` uses over a DuckDB database of
+synthetic claims, so the real ``WorkspaceClient`` (and everything in
+``app/genie``) runs against it with no workspace:
+
+  GET  /api/2.0/genie/spaces/{space_id}                    (its warehouse_id)
+  POST /api/2.0/genie/spaces/{space_id}/start-conversation
+  POST .../spaces/{space_id}/conversations/{cid}/messages
+  GET  .../conversations/{cid}/messages/{mid}
+  GET  .../messages/{mid}/attachments/{aid}/query-result
+  POST /api/2.0/sql/statements
+  GET  /api/2.0/sql/statements/{id}
+  GET  /api/2.0/sql/statements/{id}/result/chunks/{n}
+  POST /api/2.0/sql/statements/{id}/cancel
+  GET  /files/{token}                                      ("presigned" chunks)
+
+Data: ``claims`` (``--rows`` rows: fy, state, provider_id, drg, tier, los,
+paid_amount, admit_date; the MCC share creeps up each FY), a ``drg_shift``
+view (cases per fy/state/drg/tier) and ``trips`` (taxi trips, for a data-agent
+space). Values are hashes of the row number and ``--seed``, so the same flags
+give the same data.
+
+Genie turns a question into SQL by keyword: DRG codes, state names or codes
+and years become filters; "provider" gives top providers, "state" a per-state
+breakdown, "claims"/"list"/"rows" row-level claims, "trip"/"fare" the trips
+table, anything else the tier mix per FY. ``SQL: <query>`` runs the query as
+given. A message is ASKING_AI, then EXECUTING_QUERY, and COMPLETED
+``--genie-latency`` s (+-20%) after it started; its query result is inline and
+capped at ``--genie-row-limit`` rows (``manifest.truncated``), like Genie's.
+
+Statements are PENDING, then RUNNING, and finish ``--sql-latency`` s (+-20%)
+plus the DuckDB run time after they start. ``wait_timeout`` (0 or 5-50 s) is
+honored, including ``on_wait_timeout=CANCEL``. INLINE results are JSON_ARRAY
+strings in one chunk and fail over ``--inline-limit-mb`` (the real limit is
+25 MiB). EXTERNAL_LINKS results (ARROW_STREAM, JSON_ARRAY or CSV) come in
+``--chunk-rows`` chunks: the first link with the response, the rest from
+``result/chunks/{n}``. A link is valid for ``--link-ttl`` s, needs its
+``http_headers`` and must not carry the workspace token (403 / 400 otherwise,
+as with cloud storage).
+
+Latency and faults: every API call and chunk download takes ``--http-ms``;
+``--throttle-rate`` of API calls get 429 (``Retry-After: 0``); ``--fail-rate``
+of messages and statements end FAILED; ``--chunk-error-rate`` of chunk
+downloads get 503. Faults are drawn from the seeded RNG. ``GET /standin/stats``
+counts the calls per endpoint and the faults injected.
+
+Any space ID exists and runs on ``--warehouse-id``; statements accept any
+warehouse ID. The token must be ``--token``.
+
+Usage (from the backend/ dir):
+
+    python scripts/genie_standin.py --port 8765 --rows 1000000
+
+then point the app at it (``.env`` or environment):
+
+    DATABRICKS_HOST=http://127.0.0.1:8765
+    DATABRICKS_TOKEN=standin
+    GENIE_SPACES=[{"name":"drg_shift","space_id":"01standin","agent":"drg","description":"DRG tier mix by FY and state"}]
+
+Tests and benchmarks start it in-process: ``with running(StandInOptions()) as
+standin:`` serves on a free port at ``standin.url``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+import duckdb
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import uvicorn
+from fastapi import APIRouter, Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+_STATES = {
+    "OH": "ohio", "TX": "texas", "CA": "california", "NY": "new york", "FL": "florida",
+    "PA": "pennsylvania", "IL": "illinois", "GA": "georgia", "MI": "michigan", "NC": "north carolina",
+}
+_DRGS = ["064", "065", "066", "190", "191", "192", "291", "292", "293", "689", "690", "870", "871", "872"]
+_BOROUGHS = ["Bronx", "Brooklyn", "Manhattan", "Queens", "Staten Island"]
+_ARROW_TYPES = [  # (predicate, type_name, type_text) for the manifest
+    (pa.types.is_boolean, "BOOLEAN", "BOOLEAN"),
+    (pa.types.is_int8, "BYTE", "TINYINT"),
+    (pa.types.is_int16, "SHORT", "SMALLINT"),
+    (pa.types.is_int32, "INT", "INT"),
+    (pa.types.is_integer, "LONG", "BIGINT"),
+    (pa.types.is_float32, "FLOAT", "FLOAT"),
+    (pa.types.is_floating, "DOUBLE", "DOUBLE"),
+    (pa.types.is_decimal, "DECIMAL", "DECIMAL"),
+    (pa.types.is_date, "DATE", "DATE"),
+    (pa.types.is_timestamp, "TIMESTAMP", "TIMESTAMP"),
+]
+
+
+@dataclass
+class StandInOptions:
+    rows: int = 200_000
+    trips: int = 50_000
+    seed: int = 7
+    genie_latency: float = 1.0
+    sql_latency: float = 0.2
+    http_ms: float = 0.0
+    chunk_rows: int = 50_000
+    link_ttl: float = 900.0
+    genie_row_limit: int = 5000
+    inline_limit_mb: float = 25.0
+    fail_rate: float = 0.0
+    throttle_rate: float = 0.0
+    chunk_error_rate: float = 0.0
+    token: str = "standin"
+    warehouse_id: str = "standin-warehouse"
+
+
+class _ApiError(Exception):
+    """Answered as the Databricks REST error body ``{error_code, message}``."""
+
+    def __init__(self, status: int, error_code: str, message: str, headers: Optional[dict] = None) -> None:
+        super().__init__(message)
+        self.status, self.error_code, self.message, self.headers = status, error_code, message, headers
+
+
+# --------------------------------------------------------------------------
+# Data
+# --------------------------------------------------------------------------
+def _list(values) -> str:
+    return "[" + ", ".join(f"'{v}'" for v in values) + "]"
+
+
+def seed_database(rows: int, trips: int, seed: int) -> duckdb.DuckDBPyConnection:
+    """In-memory DuckDB with the synthetic ``claims``, ``drg_shift`` and ``trips``."""
+    db = duckdb.connect()
+    u = lambda k: f"((hash(i, {seed}, {k}) % 1000000) / 1e6)"  # noqa: E731 - uniform [0, 1) per row
+    db.execute(f"""
+        CREATE TABLE claims AS
+        WITH r AS (
+            SELECT i, {u(1)} AS u1, {u(2)} AS u2, {u(3)} AS u3, {u(4)} AS u4,
+                   {u(5)} AS u5, {u(6)} AS u6, floor({u(7)} ^ 2 * 2000)::INTEGER AS provider
+            FROM range({rows}) t(i)
+        ), c AS (
+            SELECT *, (2021 + floor(u1 * 5))::INTEGER AS fy FROM r
+        )
+        SELECT i + 1 AS claim_id,
+               fy,
+               {_list(_STATES)}[1 + provider % {len(_STATES)}] AS state,
+               'P' || lpad(provider::VARCHAR, 5, '0') AS provider_id,
+               {_list(_DRGS)}[1 + floor(u2 * {len(_DRGS)})::INTEGER] AS drg,
+               CASE WHEN u3 < 0.22 + 0.03 * (fy - 2021) THEN 'MCC' WHEN u3 < 0.55 THEN 'CC' ELSE 'NONE' END AS tier,
+               (1 + floor(u4 * u4 * 14) + CASE WHEN u3 < 0.22 THEN 2 ELSE 0 END)::INTEGER AS los,
+               round(4000 + u5 * 20000 + CASE WHEN u3 < 0.22 THEN 9000 ELSE 0 END, 2)::DECIMAL(12, 2) AS paid_amount,
+               make_date(fy - 1, 10, 1) + floor(u6 * 365)::INTEGER AS admit_date
+        FROM c
+    """)
+    db.execute("""
+        CREATE VIEW drg_shift AS
+        SELECT fy, state, drg, tier, count(*) AS cases, sum(paid_amount) AS paid_amount
+        FROM claims GROUP BY ALL
+    """)
+    db.execute(f"""
+        CREATE TABLE trips AS
+        SELECT i + 1 AS trip_id,
+               {_list(_BOROUGHS)}[1 + floor({u(11)} * {len(_BOROUGHS)})::INTEGER] AS borough,
+               round(0.3 + {u(12)} ^ 2 * 20, 2) AS distance,
+               round(3 + {u(13)} ^ 2 * 120, 2)::DECIMAL(8, 2) AS fare,
+               TIMESTAMP '2024-01-01' + to_seconds(floor({u(14)} * 365 * 86400)::BIGINT) AS pickup_at
+        FROM range({trips}) t(i)
+    """)
+    return db
+
+
+def genie_sql(question: str) -> tuple[str, str]:
+    """(SQL, description) the stand-in's Genie answers ``question`` with."""
+    text = question.strip()
+    if text.lower().startswith("sql:"):
+        return text[4:].strip(), "Query as given."
+    low = text.lower()
+    if re.search(r"\b(trips?|fares?|borough)\b", low):
+        return (
+            "SELECT borough, count(*) AS trips, round(avg(distance), 2) AS avg_distance, "
+            "round(avg(fare), 2) AS avg_fare FROM trips GROUP BY 1 ORDER BY 1",
+            "Trips, average distance and fare per pickup borough.",
+        )
+    where, said = [], []
+    drgs = [d for d in re.findall(r"\b\d{3}\b", low) if d in _DRGS]
+    if drgs:
+        where.append(f"drg IN ({', '.join(repr(d) for d in drgs)})")
+        said.append("DRG " + ", ".join(drgs))
+    states = [code for code, name in _STATES.items() if re.search(rf"\b{name}\b", low) or re.search(rf"\b{code}\b", text)]
+    if states:
+        where.append(f"state IN ({', '.join(repr(s) for s in states)})")
+        said.append(", ".join(states))
+    years = sorted({int(y) for y in re.findall(r"\b(?:fy\s?)?(20\d\d)\b", low)})
+    if years:
+        where.append(f"fy BETWEEN {years[0]} AND {years[-1]}")
+        said.append(f"FY{years[0]}" + (f"-FY{years[-1]}" if len(years) > 1 else ""))
+    filters = f" WHERE {' AND '.join(where)}" if where else ""
+    scope = f" ({'; '.join(said)})" if said else ""
+    if re.search(r"\b(providers?|tins?)\b", low):
+        top = re.search(r"\btop\s+(\d+)", low)
+        limit = int(top.group(1)) if top else 10
+        return (
+            "SELECT provider_id, state, count(*) AS cases, "
+            "round(avg(CASE WHEN tier = 'MCC' THEN 1.0 ELSE 0.0 END), 4) AS mcc_share, "
+            f"sum(paid_amount) AS paid_amount FROM claims{filters} GROUP BY 1, 2 ORDER BY cases DESC LIMIT {limit}",
+            f"Top {limit} providers by case volume{scope}.",
+        )
+    if re.search(r"\b(claims|list|rows|detail)\b", low):
+        return f"SELECT * FROM claims{filters} ORDER BY claim_id", f"Claim-level rows{scope}."
+    if re.search(r"\b(states?|statewise)\b", low):
+        return (
+            "SELECT state, fy, count(*) AS cases, "
+            "round(avg(CASE WHEN tier = 'MCC' THEN 1.0 ELSE 0.0 END), 4) AS mcc_share "
+            f"FROM claims{filters} GROUP BY 1, 2 ORDER BY 1, 2",
+            f"Cases and MCC share per state and FY{scope}.",
+        )
+    return (
+        "SELECT fy, tier, sum(cases) AS cases, "
+        "round(sum(cases) / sum(sum(cases)) OVER (PARTITION BY fy), 4) AS share "
+        f"FROM drg_shift{filters} GROUP BY 1, 2 ORDER BY 1, 2",
+        f"Severity tier mix per FY{scope}.",
+    )
+
+
+def _column(i: int, f: pa.Field) -> dict:
+    type_name, type_text = next(((n, t) for test, n, t in _ARROW_TYPES if test(f.type)), ("STRING", "STRING"))
+    if type_name == "DECIMAL":
+        type_text = f"DECIMAL({f.type.precision},{f.type.scale})"
+    return {"name": f.name, "position": i, "type_name": type_name, "type_text": type_text}
+
+
+def _string_rows(table: pa.Table) -> list[list[Optional[str]]]:
+    """Rows as the API's JSON_ARRAY: every value a string, nulls as null."""
+    columns = []
+    for col in table.columns:
+        if pa.types.is_boolean(col.type):
+            columns.append([None if v is None else str(v).lower() for v in col.to_pylist()])
+        else:
+            columns.append(col.cast(pa.string()).to_pylist())
+    return [list(r) for r in zip(*columns)]
+
+
+def _encode(table: pa.Table, fmt: str) -> bytes:
+    if fmt == "ARROW_STREAM":
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if fmt == "CSV":
+        buf = io.BytesIO()
+        pa_csv.write_csv(table, buf)
+        return buf.getvalue()
+    return json.dumps(_string_rows(table)).encode()
+
+
+def _iso(seconds_from_now: float) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now)).isoformat().replace("+00:00", "Z")
+
+
+def _wait_seconds(raw: Optional[str]) -> float:
+    match = re.fullmatch(r"(\d+)s", raw or "10s")
+    seconds = int(match.group(1)) if match else -1
+    if seconds != 0 and not 5 <= seconds <= 50:
+        raise _ApiError(400, "INVALID_PARAMETER_VALUE", f"wait_timeout must be 0s or 5s-50s, got {raw!r}")
+    return float(seconds)
+
+
+# --------------------------------------------------------------------------
+# Statements and messages
+# --------------------------------------------------------------------------
+@dataclass
+class _Statement:
+    statement_id: str
+    sql: str
+    disposition: str
+    format: str
+    row_limit: Optional[int]
+    running_at: float
+    state: str = "PENDING"
+    error: Optional[dict] = None
+    table: Optional[pa.Table] = None
+    truncated: bool = False
+    task: Optional[asyncio.Task] = None
+    bodies: dict[int, bytes] = field(default_factory=dict)
+
+    def current_state(self) -> str:
+        if self.task is not None and not self.task.done():
+            return "PENDING" if time.monotonic() < self.running_at else "RUNNING"
+        return self.state
+
+
+@dataclass
+class _Message:
+    message_id: str
+    conversation_id: str
+    space_id: str
+    content: str
+    sql: str
+    description: str
+    statement: _Statement
+    attachment_id: str
+    created_ms: int
+    asking_until: float
+
+
+class StandIn:
+    """The stand-in workspace: data, in-flight work and the FastAPI app serving it."""
+
+    def __init__(self, options: StandInOptions) -> None:
+        self.options = options
+        self.url = ""
+        self.db = seed_database(options.rows, options.trips, options.seed)
+        self.random = random.Random(options.seed)
+        self.counts: Counter = Counter()
+        self._ids = itertools.count(1)
+        self._statements: dict[str, _Statement] = {}
+        self._messages: dict[str, _Message] = {}
+        self._links: dict[str, tuple[str, int, float]] = {}  # token -> (statement, chunk, expires)
+        self.app = self._build_app()
+
+    # -- helpers ------------------------------------------------------------
+    def _id(self, prefix: str) -> str:
+        return f"{prefix}{next(self._ids):06d}{secrets.token_hex(4)}"
+
+    def _jitter(self, seconds: float) -> float:
+        return seconds * self.random.uniform(0.8, 1.2)
+
+    def _chance(self, rate: float) -> bool:
+        return rate > 0 and self.random.random() < rate
+
+    def _query(self, sql: str) -> pa.Table:
+        return self.db.cursor().execute(sql).to_arrow_table()
+
+    def stats(self) -> dict:
+        return {
+            "requests": {k[4:]: v for k, v in sorted(self.counts.items()) if k.startswith("api:")},
+            "faults": {k[6:]: v for k, v in sorted(self.counts.items()) if k.startswith("fault:")},
+            "chunks_served": self.counts["chunks_served"],
+            "bytes_served": self.counts["bytes_served"],
+            "statements": len(self._statements),
+            "messages": len(self._messages),
+        }
+
+    async def _gate(self, request: Request) -> None:
+        """Per API call: count it, add latency, check the token, maybe throttle."""
+        self.counts[f"api:{request.scope['endpoint'].__name__}"] += 1
+        if self.options.http_ms:
+            await asyncio.sleep(self.options.http_ms / 1000)
+        if request.headers.get("authorization") != f"Bearer {self.options.token}":
+            raise _ApiError(401, "UNAUTHENTICATED", "Invalid access token.")
+        if self._chance(self.options.throttle_rate):
+            self.counts["fault:throttled"] += 1
+            raise _ApiError(429, "TOO_MANY_REQUESTS", "Too many requests.", {"Retry-After": "0"})
+
+    # -- statements ---------------------------------------------------------
+    def _start_statement(
+        self, sql: str, latency: float, disposition: str = "INLINE", fmt: str = "JSON_ARRAY",
+        row_limit: Optional[int] = None,
+    ) -> _Statement:
+        latency = self._jitter(latency)
+        st = _Statement(self._id("st-"), sql, disposition, fmt, row_limit, time.monotonic() + latency / 2)
+        st.task = asyncio.create_task(self._run(st, latency, self._chance(self.options.fail_rate)))
+        self._statements[st.statement_id] = st
+        return st
+
+    async def _run(self, st: _Statement, latency: float, fail: bool) -> None:
+        try:
+            await asyncio.sleep(latency)
+            if fail:
+                self.counts["fault:failed"] += 1
+                st.state, st.error = "FAILED", {"error_code": "INTERNAL_ERROR", "message": "Injected failure (--fail-rate)."}
+                return
+            try:
+                table = await asyncio.to_thread(self._query, st.sql)
+            except duckdb.Error as exc:
+                st.state, st.error = "FAILED", {"error_code": "BAD_REQUEST", "message": str(exc)}
+                return
+            if st.row_limit is not None and table.num_rows > st.row_limit:
+                table, st.truncated = table.slice(0, st.row_limit), True
+            if st.disposition == "INLINE" and table.nbytes > self.options.inline_limit_mb * 2**20:
+                st.state, st.error = "FAILED", {
+                    "error_code": "BAD_REQUEST",
+                    "message": "Result exceeds the INLINE disposition limit; use EXTERNAL_LINKS.",
+                }
+                return
+            st.table, st.state = table, "SUCCEEDED"
+        except asyncio.CancelledError:
+            st.state = "CANCELED"
+
+    def _statement(self, statement_id: str) -> _Statement:
+        st = self._statements.get(statement_id)
+        if st is None:
+            raise _ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Statement {statement_id} does not exist.")
+        return st
+
+    def _chunk_bounds(self, st: _Statement) -> list[tuple[int, int]]:
+        rows = st.table.num_rows
+        if st.disposition == "INLINE":
+            return [(0, rows)] if rows else []
+        size = max(1, self.options.chunk_rows)
+        return [(offset, min(size, rows - offset)) for offset in range(0, rows, size)]
+
+    def _manifest(self, st: _Statement) -> dict:
+        bounds = self._chunk_bounds(st)
+        columns = [_column(i, f) for i, f in enumerate(st.table.schema)]
+        return {
+            "format": st.format,
+            "schema": {"column_count": len(columns), "columns": columns},
+            "total_chunk_count": len(bounds),
+            "total_row_count": st.table.num_rows,
+            "truncated": st.truncated,
+            "chunks": [{"chunk_index": i, "row_offset": o, "row_count": n} for i, (o, n) in enumerate(bounds)],
+        }
+
+    async def _chunk(self, st: _Statement, index: int) -> dict:
+        bounds = self._chunk_bounds(st)
+        if not 0 <= index < len(bounds):
+            raise _ApiError(400, "INVALID_PARAMETER_VALUE", f"Chunk {index} out of range ({len(bounds)} chunks).")
+        offset, count = bounds[index]
+        out = {"chunk_index": index, "row_offset": offset, "row_count": count}
+        if index + 1 < len(bounds):
+            out["next_chunk_index"] = index + 1
+            out["next_chunk_internal_link"] = f"/api/2.0/sql/statements/{st.statement_id}/result/chunks/{index + 1}"
+        if st.disposition == "INLINE":
+            out["data_array"] = await asyncio.to_thread(_string_rows, st.table.slice(offset, count))
+            return out
+        body = st.bodies.get(index)
+        if body is None:
+            body = st.bodies.setdefault(index, await asyncio.to_thread(_encode, st.table.slice(offset, count), st.format))
+        token = secrets.token_urlsafe(16)
+        self._links[token] = (st.statement_id, index, time.time() + self.options.link_ttl)
+        link = {
+            **{k: v for k, v in out.items() if k != "next_chunk_internal_link"},
+            "byte_count": len(body),
+            "external_link": f"{self.url}/files/{token}",
+            "expiration": _iso(self.options.link_ttl),
+            "http_headers": {"x-standin-signature": token[::-1]},
+        }
+        if "next_chunk_internal_link" in out:
+            link["next_chunk_internal_link"] = out["next_chunk_internal_link"]
+        return {"external_links": [link]}
+
+    async def _statement_json(self, st: _Statement) -> dict:
+        state = st.current_state()
+        out = {"statement_id": st.statement_id, "status": {"state": state}}
+        if st.error:
+            out["status"]["error"] = st.error
+        if state == "SUCCEEDED":
+            out["manifest"] = self._manifest(st)
+            if out["manifest"]["total_chunk_count"]:
+                out["result"] = await self._chunk(st, 0)
+        return out
+
+    # -- genie --------------------------------------------------------------
+    def _ask(self, space_id: str, conversation_id: str, content: str) -> _Message:
+        sql, description = genie_sql(content)
+        latency = self._jitter(self.options.genie_latency)
+        st = self._start_statement(sql, latency, row_limit=self.options.genie_row_limit)
+        msg = _Message(
+            self._id("m-"), conversation_id, space_id, content, sql, description, st, self._id("a-"),
+            int(time.time() * 1000), time.monotonic() + latency / 2,
+        )
+        self._messages[msg.message_id] = msg
+        return msg
+
+    def _message(self, space_id: str, conversation_id: str, message_id: str) -> _Message:
+        msg = self._messages.get(message_id)
+        if msg is None or msg.conversation_id != conversation_id or msg.space_id != space_id:
+            raise _ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Message {message_id} does not exist.")
+        return msg
+
+    def _message_json(self, msg: _Message) -> dict:
+        state = msg.statement.current_state()
+        if state in ("PENDING", "RUNNING"):
+            status = "ASKING_AI" if time.monotonic() < msg.asking_until else "EXECUTING_QUERY"
+        else:
+            status = {"SUCCEEDED": "COMPLETED", "CANCELED": "CANCELLED"}.get(state, "FAILED")
+        out = {
+            "id": msg.message_id,
+            "message_id": msg.message_id,
+            "conversation_id": msg.conversation_id,
+            "space_id": msg.space_id,
+            "content": msg.content,
+            "status": status,
+            "created_timestamp": msg.created_ms,
+            "last_updated_timestamp": int(time.time() * 1000),
+        }
+        if status == "COMPLETED":
+            out["attachments"] = [{
+                "attachment_id": msg.attachment_id,
+                "query": {
+                    "query": msg.sql,
+                    "description": msg.description,
+                    "title": msg.description.rstrip("."),
+                    "statement_id": msg.statement.statement_id,
+                    "query_result_metadata": {"row_count": msg.statement.table.num_rows},
+                },
+            }]
+        elif status == "FAILED":
+            detail = (msg.statement.error or {}).get("message", "Query failed.")
+            out["error"] = {"error": detail, "type": "GENERIC_SQL_EXEC_API_CALL_EXCEPTION"}
+        return out
+
+    # -- app ----------------------------------------------------------------
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Genie / Statement Execution stand-in")
+        api = APIRouter(prefix="/api/2.0", dependencies=[Depends(self._gate)])
+
+        @app.exception_handler(_ApiError)
+        async def api_error(request: Request, exc: _ApiError) -> JSONResponse:
+            return JSONResponse({"error_code": exc.error_code, "message": exc.message}, exc.status, exc.headers)
+
+        @app.get("/.well-known/databricks-config")
+        async def host_metadata() -> dict:
+            return {}
+
+        @app.get("/standin/stats")
+        async def standin_stats() -> dict:
+            return {"options": asdict(self.options), **self.stats()}
+
+        @api.get("/genie/spaces/{space_id}")
+        async def get_space(space_id: str) -> dict:
+            return {"space_id": space_id, "title": f"Stand-in space {space_id}", "warehouse_id": self.options.warehouse_id}
+
+        @api.post("/genie/spaces/{space_id}/start-conversation")
+        async def start_conversation(space_id: str, request: Request) -> dict:
+            content = (await request.json()).get("content", "")
+            conversation_id = self._id("c-")
+            msg = self._ask(space_id, conversation_id, content)
+            return {
+                "conversation_id": conversation_id,
+                "message_id": msg.message_id,
+                "message": self._message_json(msg),
+                "conversation": {"id": conversation_id, "conversation_id": conversation_id,
+                                 "space_id": space_id, "title": content[:80]},
+            }
+
+        @api.post("/genie/spaces/{space_id}/conversations/{conversation_id}/messages")
+        async def create_message(space_id: str, conversation_id: str, request: Request) -> dict:
+            content = (await request.json()).get("content", "")
+            return self._message_json(self._ask(space_id, conversation_id, content))
+
+        @api.get("/genie/spaces/{space_id}/conversations/{conversation_id}/messages/{message_id}")
+        async def get_message(space_id: str, conversation_id: str, message_id: str) -> dict:
+            return self._message_json(self._message(space_id, conversation_id, message_id))
+
+        @api.get(
+            "/genie/spaces/{space_id}/conversations/{conversation_id}/messages/{message_id}"
+            "/attachments/{attachment_id}/query-result"
+        )
+        async def get_message_attachment_query_result(
+            space_id: str, conversation_id: str, message_id: str, attachment_id: str
+        ) -> dict:
+            msg = self._message(space_id, conversation_id, message_id)
+            if attachment_id != msg.attachment_id:
+                raise _ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Attachment {attachment_id} does not exist.")
+            if msg.statement.current_state() != "SUCCEEDED":
+                raise _ApiError(400, "INVALID_STATE", "The message has no query result.")
+            return {"statement_response": await self._statement_json(msg.statement)}
+
+        @api.post("/sql/statements")
+        async def execute_statement(request: Request) -> dict:
+            body = await request.json()
+            if not body.get("statement") or not body.get("warehouse_id"):
+                raise _ApiError(400, "INVALID_PARAMETER_VALUE", "statement and warehouse_id are required.")
+            wait = _wait_seconds(body.get("wait_timeout"))
+            disposition = body.get("disposition") or "INLINE"
+            fmt = body.get("format") or "JSON_ARRAY"
+            if disposition == "INLINE" and fmt != "JSON_ARRAY":
+                raise _ApiError(400, "INVALID_PARAMETER_VALUE", f"{fmt} requires the EXTERNAL_LINKS disposition.")
+            st = self._start_statement(body["statement"], self.options.sql_latency, disposition, fmt, body.get("row_limit"))
+            if wait:
+                await asyncio.wait({st.task}, timeout=wait)
+                if not st.task.done() and body.get("on_wait_timeout") == "CANCEL":
+                    st.task.cancel()
+                    await asyncio.wait({st.task})
+            return await self._statement_json(st)
+
+        @api.get("/sql/statements/{statement_id}")
+        async def get_statement(statement_id: str) -> dict:
+            return await self._statement_json(self._statement(statement_id))
+
+        @api.get("/sql/statements/{statement_id}/result/chunks/{chunk_index}")
+        async def get_statement_result_chunk_n(statement_id: str, chunk_index: int) -> dict:
+            st = self._statement(statement_id)
+            if st.current_state() != "SUCCEEDED":
+                raise _ApiError(400, "INVALID_STATE", f"Statement is {st.current_state()}, not SUCCEEDED.")
+            return await self._chunk(st, chunk_index)
+
+        @api.post("/sql/statements/{statement_id}/cancel")
+        async def cancel_execution(statement_id: str) -> dict:
+            st = self._statement(statement_id)
+            if not st.task.done():
+                st.task.cancel()
+            return {}
+
+        @app.get("/files/{token}")
+        async def download_chunk(token: str, request: Request) -> Response:
+            self.counts["api:download_chunk"] += 1
+            if self.options.http_ms:
+                await asyncio.sleep(self.options.http_ms / 1000)
+            if "authorization" in request.headers:
+                return Response("Presigned URLs take no Authorization header.", 400)
+            found = self._links.get(token)
+            if found is None or request.headers.get("x-standin-signature") != token[::-1]:
+                return Response("Signature does not match.", 403)
+            statement_id, index, expires = found
+            if time.time() >= expires:
+                self.counts["fault:expired_link"] += 1
+                return Response("Request has expired.", 403)
+            if self._chance(self.options.chunk_error_rate):
+                self.counts["fault:chunk_503"] += 1
+                return Response("Service unavailable.", 503)
+            body = self._statements[statement_id].bodies[index]
+            self.counts["chunks_served"] += 1
+            self.counts["bytes_served"] += len(body)
+            return Response(body, media_type="application/octet-stream")
+
+        app.include_router(api)
+        return app
+
+
+# --------------------------------------------------------------------------
+# Running it
+# --------------------------------------------------------------------------
+@contextmanager
+def running(options: Optional[StandInOptions] = None, port: int = 0) -> Iterator[StandIn]:
+    """Serve a stand-in on its own thread and event loop; yields it with ``url`` set."""
+    standin = StandIn(options or StandInOptions())
+    server = uvicorn.Server(uvicorn.Config(standin.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("stand-in did not start")
+        time.sleep(0.02)
+    standin.url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+    try:
+        yield standin
+    finally:
+        server.should_exit = True
+        thread.join(timeout=30)
+
+
+def main() -> int:
+    defaults = StandInOptions()
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--rows", type=int, default=defaults.rows, help="synthetic claims")
+    ap.add_argument("--trips", type=int, default=defaults.trips, help="synthetic taxi trips")
+    ap.add_argument("--seed", type=int, default=defaults.seed)
+    ap.add_argument("--genie-latency", type=float, default=defaults.genie_latency, help="seconds per Genie message")
+    ap.add_argument("--sql-latency", type=float, default=defaults.sql_latency, help="seconds per statement, before DuckDB")
+    ap.add_argument("--http-ms", type=float, default=defaults.http_ms, help="added to every API call and download")
+    ap.add_argument("--chunk-rows", type=int, default=defaults.chunk_rows, help="rows per EXTERNAL_LINKS chunk")
+    ap.add_argument("--link-ttl", type=float, default=defaults.link_ttl, help="seconds a chunk link is valid")
+    ap.add_argument("--genie-row-limit", type=int, default=defaults.genie_row_limit)
+    ap.add_argument("--inline-limit-mb", type=float, default=defaults.inline_limit_mb)
+    ap.add_argument("--fail-rate", type=float, default=defaults.fail_rate, help="messages/statements that fail")
+    ap.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate, help="API calls answered 429")
+    ap.add_argument("--chunk-error-rate", type=float, default=defaults.chunk_error_rate, help="downloads answered 503")
+    ap.add_argument("--token", default=defaults.token)
+    ap.add_argument("--warehouse-id", default=defaults.warehouse_id)
+    args = vars(ap.parse_args())
+    port = args.pop("port")
+    options = StandInOptions(**args)
+
+    started = time.perf_counter()
+    standin = StandIn(options)
+    standin.url = f"http://127.0.0.1:{port}"
+    print(f"seeded {options.rows} claims and {options.trips} trips in {time.perf_counter() - started:.1f}s")
+    print(f"DATABRICKS_HOST=http://127.0.0.1:{port}\nDATABRICKS_TOKEN={options.token}")
+    uvicorn.run(standin.app, host="127.0.0.1", port=port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,26 +1,52 @@
-"""Ingest the official CMS IPPS Table 5 files into a structured MS-DRG catalog.
+"""Ingest the official CMS IPPS Table 5 / Tables 6 files into the CMS bundle.
 
 Table 5 (public-domain CMS data) lists every MS-DRG with its MDC, type
-(MED/SURG), title, relative weight, and mean length of stay. We parse FY2023-2026
-into `data/cms/ms_drg_catalog.json` and derive `data/cms/drg_changes.json`
-(added / deleted / retitled / weight-changed) by diffing consecutive years.
+(MED/SURG), title, relative weight, and mean length of stay. Tables 6 list the
+ICD-10 code changes and the complete CC and MCC lists. For FY2023-2026 we write
+one SQLite bundle, `data/cms/cms_bundle.sqlite`, with typed, keyed tables:
+
+  drg_catalog     (fy, drg) -> title, mdc, type, severity, weight, gmlos, amlos
+  drg_changes     DRGs added / deleted / retitled per FY (diff of consecutive years)
+  cc_mcc          code -> tier ("MCC" / "CC") for a run of FYs (first_fy..last_fy)
+  icd10_codes     code -> description (for every code on a CC/MCC list)
+  cc_mcc_changes  per-FY additions to / deletions from the MCC and CC lists
+
+plus `data/cms/icd10_updates.json` (per-year ICD-10 change counts). `cms_store`
+opens the bundle read-only and memory-mapped.
+
+Ingestion is incremental. The bundle's `sources` table records the SHA-256 of
+every raw zip it was built from; a year whose zips hash the same (or are no
+longer downloaded) is read back from the bundle instead of re-parsed. Only new
+or changed years are parsed, in a process pool, one task per (year, table set).
+Adding a fiscal year = add it to YEARS / TABLES6, download its two zips, rerun.
 
 Run once to (re)build the datasets:
     cd backend
     ./.venv/Scripts/python.exe scripts/ingest_cms.py
+    ./.venv/Scripts/python.exe scripts/ingest_cms.py --force   # re-parse every year
 """
 from __future__ import annotations
 
+import argparse
+import hashlib
+import io
 import json
+import os
 import re
+import sqlite3
+import time
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 ROOT = Path(__file__).resolve().parents[1]
 RAW = ROOT / "data" / "cms" / "raw"
 OUT = ROOT / "data" / "cms"
+BUNDLE = OUT / "cms_bundle.sqlite"
 
 # fiscal year -> (zip filename, MS-DRG grouper version, CMS rule id)
 YEARS = {
@@ -31,19 +57,23 @@ YEARS = {
 }
 
 
-def _severity(title: str) -> str:
-    t = title.upper()
-    if "WITHOUT CC/MCC" in t or "W/O CC/MCC" in t:
-        return "none"
-    if "WITH MCC" in t or "W MCC" in t:
-        return "mcc"
-    if "WITH CC/MCC" in t or "W CC/MCC" in t:
-        return "cc_or_mcc"
-    if "WITH CC" in t or "W CC" in t:
-        return "cc"
-    if "WITHOUT MCC" in t or "W/O MCC" in t:
-        return "not_mcc"
-    return "n/a"
+# severity tier from the DRG title; the first matching phrase wins
+_SEVERITY = [
+    (("WITHOUT CC/MCC", "W/O CC/MCC"), "none"),
+    (("WITH MCC", "W MCC"), "mcc"),
+    (("WITH CC/MCC", "W CC/MCC"), "cc_or_mcc"),
+    (("WITH CC", "W CC"), "cc"),
+    (("WITHOUT MCC", "W/O MCC"), "not_mcc"),
+]
+
+
+def _severity(titles: pd.Series) -> np.ndarray:
+    upper = titles.str.upper()
+    conditions = [
+        upper.str.contains("|".join(re.escape(p) for p in phrases), regex=True).to_numpy(dtype=bool)
+        for phrases, _ in _SEVERITY
+    ]
+    return np.select(conditions, [tier for _, tier in _SEVERITY], default="n/a")
 
 
 def _find_xlsx(zpath: Path) -> str:
@@ -99,35 +129,35 @@ def parse_year(fy: str) -> list[dict]:
         raise RuntimeError(f"FY{fy}: could not find header row in {sheet}")
     header = list(raw.iloc[header_row].values)
     idx = _colmap(header)
-    records = []
-    for _, row in raw.iloc[header_row + 1 :].iterrows():
-        drg_raw = str(row[idx["drg"]]).strip()
-        m = re.match(r"^0*(\d{1,3})$", drg_raw)
-        if not m:
-            continue
-        drg = f"{int(m.group(1)):03d}"
-        title = str(row[idx["title"]]).strip()
-        if not title or title.lower() == "nan":
-            continue
-
-        def num(key):
-            try:
-                return round(float(row[idx[key]]), 4)
-            except (ValueError, TypeError, KeyError):
-                return None
-
-        records.append(
-            {
-                "drg": drg,
-                "title": title,
-                "mdc": str(row[idx["mdc"]]).strip() if "mdc" in idx else "",
-                "type": str(row[idx["type"]]).strip() if "type" in idx else "",
-                "severity": _severity(title),
-                "weight": num("weight"),
-                "gmlos": num("gmlos"),
-                "amlos": num("amlos"),
-            }
-        )
+    body = raw.iloc[header_row + 1 :]
+
+    def text(key: str) -> pd.Series:
+        if key not in idx:
+            return pd.Series("", index=body.index, dtype=object)
+        return body[idx[key]].map(str).str.strip()
+
+    def number(key: str) -> pd.Series:
+        if key not in idx:
+            return pd.Series(np.nan, index=body.index)
+        return pd.to_numeric(body[idx[key]], errors="coerce").round(4)
+
+    drg = text("drg").str.extract(r"^0*(\d{1,3})$", expand=False)
+    title = text("title")
+    keep = drg.notna() & title.ne("") & title.str.lower().ne("nan")
+    df = pd.DataFrame(
+        {
+            "drg": drg[keep].astype(int).map("{:03d}".format),
+            "title": title[keep],
+            "mdc": text("mdc")[keep],
+            "type": text("type")[keep],
+            "weight": number("weight")[keep],
+            "gmlos": number("gmlos")[keep],
+            "amlos": number("amlos")[keep],
+        }
+    )
+    df.insert(4, "severity", _severity(df["title"]))
+    df = df.astype(object).where(df.notna(), None)  # NaN -> None (NULL in the bundle)
+    records = df.to_dict("records")
     print(f"FY{fy} ({version}, {rule_id}): {len(records)} MS-DRGs from '{sheet}'")
     return records
 
@@ -177,8 +207,6 @@ def _collect_txts(zpath: Path) -> dict[str, bytes]:
 
     Handles both flat layouts (FY2024) and nested sub-zips (FY2023/2025/2026).
     """
-    import io
-
     out: dict[str, bytes] = {}
 
     def walk(zf: zipfile.ZipFile) -> None:
@@ -216,94 +244,300 @@ def _table(txts: dict, phrase: str) -> list[tuple[str, str]]:
     return []
 
 
-def parse_tables6_all() -> None:
-    """Parse Tables 6A-6J for all configured years into icd10_updates.json,
-    cc_mcc_changes.json (per-year additions/deletions), and cc_mcc_list.json
-    (the latest year's complete MCC/CC lists, used by the status lookup)."""
-    icd: dict = {}
-    cc_mcc_changes: dict = {}
-    latest_complete = None
-    latest_fy = max(YEARS)
-    for fy in YEARS:
-        zpath = RAW / TABLES6.get(fy, "")
-        if not zpath.exists():
-            print(f"FY{fy} Tables 6 not downloaded; skipping.")
-            continue
-        t = _collect_txts(zpath)
-        new_dx = _table(t, "New Diagnosis Codes")
-        new_px = _table(t, "New Procedure Codes")
-        inv_dx = _table(t, "Invalid Diagnosis Codes")
-        inv_px = _table(t, "Invalid Procedure Codes")
-        rev_dx = _table(t, "Revised Diagnosis Code Titles")
-        rev_px = _table(t, "Revised Procedure Code Titles")
-        mcc_all = _table(t, "Complete MCC List")
-        mcc_add = _table(t, "Additions to the MCC List")
-        mcc_del = _table(t, "Deletions to the MCC List")
-        cc_all = _table(t, "Complete CC List")
-        cc_add = _table(t, "Additions to the CC List")
-        cc_del = _table(t, "Deletions to the CC List")
-
-        icd[fy] = {
-            "ms_drg_version": YEARS[fy][1],
-            "cms_id": YEARS[fy][2],
-            "new_diagnosis_codes": len(new_dx),
-            "new_procedure_codes": len(new_px),
-            "invalid_diagnosis_codes": len(inv_dx),
-            "invalid_procedure_codes": len(inv_px),
-            "revised_diagnosis_titles": len(rev_dx),
-            "revised_procedure_titles": len(rev_px),
-            "mcc_list_size": len(mcc_all),
-            "cc_list_size": len(cc_all),
-            "mcc_additions": len(mcc_add),
-            "mcc_deletions": len(mcc_del),
-            "cc_additions": len(cc_add),
-            "cc_deletions": len(cc_del),
-            "notable_new_diagnosis": [{"code": c, "description": d} for c, d in new_dx[:10]],
-            "source": f"{YEARS[fy][2]} Tables 6A-6J (FY{fy} IPPS Final Rule)",
-        }
-        cc_mcc_changes[fy] = {
-            "mcc_additions": [{"code": c, "description": d} for c, d in mcc_add],
-            "mcc_deletions": [{"code": c, "description": d} for c, d in mcc_del],
-            "cc_additions": [{"code": c, "description": d} for c, d in cc_add],
-            "cc_deletions": [{"code": c, "description": d} for c, d in cc_del],
-        }
-        if fy == latest_fy:
-            latest_complete = {
-                "fy": fy,
-                "mcc": {c: d for c, d in mcc_all},
-                "cc": {c: d for c, d in cc_all},
-                "mcc_additions": cc_mcc_changes[fy]["mcc_additions"],
-                "cc_additions": cc_mcc_changes[fy]["cc_additions"],
-                "cc_deletions": cc_mcc_changes[fy]["cc_deletions"],
-            }
-        print(
-            f"FY{fy} ICD-10: {len(new_dx)} new dx, {len(new_px)} new px, "
-            f"{len(inv_dx)} invalid dx; MCC {len(mcc_all)} (+{len(mcc_add)}/-{len(mcc_del)}), "
-            f"CC {len(cc_all)} (+{len(cc_add)}/-{len(cc_del)})"
-        )
+def parse_tables6(fy: str) -> dict:
+    """Parse one year's Tables 6A-6J.
 
-    (OUT / "icd10_updates.json").write_text(
-        json.dumps(icd, indent=1, ensure_ascii=False), encoding="utf-8"
-    )
-    (OUT / "cc_mcc_changes.json").write_text(
-        json.dumps(cc_mcc_changes, ensure_ascii=False), encoding="utf-8"
+    Returns {"icd10": update counts, "lists": {"mcc": {code: desc}, "cc": {...}}
+    (the complete lists), "changes": additions / deletions to each list}.
+    """
+    t = _collect_txts(RAW / TABLES6[fy])
+    new_dx = _table(t, "New Diagnosis Codes")
+    new_px = _table(t, "New Procedure Codes")
+    inv_dx = _table(t, "Invalid Diagnosis Codes")
+    inv_px = _table(t, "Invalid Procedure Codes")
+    rev_dx = _table(t, "Revised Diagnosis Code Titles")
+    rev_px = _table(t, "Revised Procedure Code Titles")
+    mcc_all = _table(t, "Complete MCC List")
+    mcc_add = _table(t, "Additions to the MCC List")
+    mcc_del = _table(t, "Deletions to the MCC List")
+    cc_all = _table(t, "Complete CC List")
+    cc_add = _table(t, "Additions to the CC List")
+    cc_del = _table(t, "Deletions to the CC List")
+
+    icd = {
+        "ms_drg_version": YEARS[fy][1],
+        "cms_id": YEARS[fy][2],
+        "new_diagnosis_codes": len(new_dx),
+        "new_procedure_codes": len(new_px),
+        "invalid_diagnosis_codes": len(inv_dx),
+        "invalid_procedure_codes": len(inv_px),
+        "revised_diagnosis_titles": len(rev_dx),
+        "revised_procedure_titles": len(rev_px),
+        "mcc_list_size": len(mcc_all),
+        "cc_list_size": len(cc_all),
+        "mcc_additions": len(mcc_add),
+        "mcc_deletions": len(mcc_del),
+        "cc_additions": len(cc_add),
+        "cc_deletions": len(cc_del),
+        "notable_new_diagnosis": [{"code": c, "description": d} for c, d in new_dx[:10]],
+        "source": f"{YEARS[fy][2]} Tables 6A-6J (FY{fy} IPPS Final Rule)",
+    }
+    changes = {
+        "mcc_additions": [{"code": c, "description": d} for c, d in mcc_add],
+        "mcc_deletions": [{"code": c, "description": d} for c, d in mcc_del],
+        "cc_additions": [{"code": c, "description": d} for c, d in cc_add],
+        "cc_deletions": [{"code": c, "description": d} for c, d in cc_del],
+    }
+    print(
+        f"FY{fy} ICD-10: {len(new_dx)} new dx, {len(new_px)} new px, "
+        f"{len(inv_dx)} invalid dx; MCC {len(mcc_all)} (+{len(mcc_add)}/-{len(mcc_del)}), "
+        f"CC {len(cc_all)} (+{len(cc_add)}/-{len(cc_del)})"
     )
-    if latest_complete:
-        (OUT / "cc_mcc_list.json").write_text(
-            json.dumps(latest_complete, ensure_ascii=False), encoding="utf-8"
-        )
+    return {"icd10": icd, "lists": {"mcc": dict(mcc_all), "cc": dict(cc_all)}, "changes": changes}
 
 
-def main() -> None:
+# cc_mcc_changes key -> (list, action) in the bundle
+LIST_CHANGES = {
+    "mcc_additions": ("mcc", "addition"),
+    "mcc_deletions": ("mcc", "deletion"),
+    "cc_additions": ("cc", "addition"),
+    "cc_deletions": ("cc", "deletion"),
+}
+
+_BUNDLE_DDL = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE drg_catalog (
+    fy TEXT NOT NULL, drg TEXT NOT NULL, title TEXT NOT NULL, mdc TEXT, type TEXT,
+    severity TEXT, weight REAL, gmlos REAL, amlos REAL,
+    PRIMARY KEY (fy, drg)
+) WITHOUT ROWID;
+CREATE TABLE drg_changes (
+    seq INTEGER PRIMARY KEY, fy TEXT NOT NULL, change_type TEXT NOT NULL, drg TEXT NOT NULL,
+    title TEXT, old_title TEXT, new_title TEXT
+);
+CREATE INDEX drg_changes_drg ON drg_changes (drg);
+CREATE INDEX drg_changes_fy ON drg_changes (fy, change_type);
+CREATE TABLE icd10_codes (code TEXT PRIMARY KEY, description TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE cc_mcc (
+    code TEXT NOT NULL, first_fy TEXT NOT NULL, last_fy TEXT NOT NULL,
+    tier TEXT NOT NULL CHECK (tier IN ('MCC', 'CC')),
+    PRIMARY KEY (code, first_fy)
+) WITHOUT ROWID;
+CREATE TABLE cc_mcc_changes (
+    seq INTEGER PRIMARY KEY, fy TEXT NOT NULL, list TEXT NOT NULL CHECK (list IN ('mcc', 'cc')),
+    action TEXT NOT NULL CHECK (action IN ('addition', 'deletion')), code TEXT NOT NULL,
+    description TEXT NOT NULL  -- as published that FY (code titles get revised)
+);
+CREATE INDEX cc_mcc_changes_fy ON cc_mcc_changes (fy, list, action);
+CREATE TABLE sources (
+    fy TEXT NOT NULL, kind TEXT NOT NULL CHECK (kind IN ('table5', 'tables6')),
+    file TEXT NOT NULL, sha256 TEXT NOT NULL,
+    PRIMARY KEY (fy, kind)
+) WITHOUT ROWID;
+"""
+
+
+def _tier_runs(cc_mcc_lists: dict) -> list[tuple[str, str, str, str]]:
+    """(code, first_fy, last_fy, tier) for each run of consecutive FYs in which
+    a code kept the same tier; a code's tier rarely changes, so this is ~1 row
+    per code instead of one per code per year."""
+    fys = sorted(cc_mcc_lists)
+    tiers: dict[str, list] = {}
+    for i, fy in enumerate(fys):
+        for tier in ("mcc", "cc"):
+            for code in cc_mcc_lists[fy][tier]:
+                tiers.setdefault(code, [None] * len(fys))[i] = tier.upper()
+    runs = []
+    for code, by_year in sorted(tiers.items()):
+        start = None
+        for i, tier in enumerate(by_year + [None]):
+            if start is not None and tier != by_year[start]:
+                runs.append((code, fys[start], fys[i - 1], by_year[start]))
+                start = None
+            if start is None and tier is not None:
+                start = i
+    return runs
+
+
+def write_bundle(catalog: dict, changes: list[dict], cc_mcc_lists: dict, cc_mcc_changes: dict,
+                 sources: Optional[dict] = None, path: Path = BUNDLE) -> None:
+    """Write every FY's catalog, changes and CC/MCC lists into one SQLite file
+    (built beside the target, then swapped in atomically)."""
+    tmp = path.with_suffix(".sqlite.part")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(_BUNDLE_DDL)
+        conn.executemany(
+            "INSERT INTO drg_catalog VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (fy, r["drg"], r["title"], r["mdc"], r["type"], r["severity"], r["weight"], r["gmlos"], r["amlos"])
+                for fy, recs in catalog.items()
+                for r in recs
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO drg_changes (fy, change_type, drg, title, old_title, new_title) VALUES (?, ?, ?, ?, ?, ?)",
+            [(c["fy"], c["change_type"], c["drg"], c.get("title"), c.get("old_title"), c.get("new_title"))
+             for c in changes],
+        )
+        descriptions: dict[str, str] = {}
+        for fy in sorted(cc_mcc_lists):  # latest year's wording wins
+            for tier in ("mcc", "cc"):
+                descriptions.update(cc_mcc_lists[fy][tier])
+        for fy in sorted(cc_mcc_changes):
+            for entries in cc_mcc_changes[fy].values():
+                for e in entries:
+                    descriptions.setdefault(e["code"], e["description"])
+        conn.executemany("INSERT INTO icd10_codes VALUES (?, ?)", sorted(descriptions.items()))
+        conn.executemany("INSERT INTO cc_mcc VALUES (?, ?, ?, ?)", _tier_runs(cc_mcc_lists))
+        conn.executemany(
+            "INSERT INTO cc_mcc_changes (fy, list, action, code, description) VALUES (?, ?, ?, ?, ?)",
+            [
+                (fy, lst, action, e["code"], e["description"])
+                for fy in sorted(cc_mcc_changes)
+                for key, (lst, action) in LIST_CHANGES.items()
+                for e in cc_mcc_changes[fy].get(key, [])
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO sources VALUES (?, ?, ?, ?)",
+            [(fy, kind, file, digest) for (fy, kind), (file, digest) in sorted((sources or {}).items())],
+        )
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("fys", json.dumps(sorted(catalog))),
+                ("cc_mcc_fys", json.dumps(sorted(cc_mcc_lists))),
+                ("rules", json.dumps({fy: YEARS[fy][2] for fy in YEARS})),
+            ],
+        )
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    print(f"Wrote {path} ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+# --- incremental pipeline -----------------------------------------------------
+_KINDS = ("table5", "tables6")
+
+
+def _zip_for(fy: str, kind: str) -> Path:
+    return RAW / (YEARS[fy][0] if kind == "table5" else TABLES6[fy])
+
+
+def _sha256(path: Path) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
+def _parse(unit: tuple[str, str]) -> tuple[str, str, object, float]:
+    """Pool worker: parse one (fy, kind) unit."""
+    fy, kind = unit
+    t = time.perf_counter()
+    out = parse_year(fy) if kind == "table5" else parse_tables6(fy)
+    return fy, kind, out, time.perf_counter() - t
+
+
+class _Bundled:
+    """Read access to what the current bundle holds, for years being reused."""
+
+    def __init__(self, path: Path, icd10: dict) -> None:
+        self.conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True) if path.exists() else None
+        self.icd10 = icd10
+        self.hashes: dict[tuple[str, str], tuple[str, str]] = {}
+        self.fys: set[str] = set()
+        self.cc_mcc_fys: set[str] = set()
+        if self.conn is None:
+            return
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.fys = set(json.loads(meta.get("fys", "[]")))
+        self.cc_mcc_fys = set(json.loads(meta.get("cc_mcc_fys", "[]")))
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sources'").fetchone():
+            for fy, kind, file, digest in self.conn.execute("SELECT fy, kind, file, sha256 FROM sources"):
+                self.hashes[(fy, kind)] = (file, digest)
+
+    def has(self, fy: str, kind: str) -> bool:
+        return fy in self.fys if kind == "table5" else fy in self.cc_mcc_fys and fy in self.icd10
+
+    def load(self, fy: str, kind: str):
+        """The unit as the parser would return it."""
+        if kind == "table5":
+            cur = self.conn.execute(
+                "SELECT drg, title, mdc, type, severity, weight, gmlos, amlos FROM drg_catalog "
+                "WHERE fy = ? ORDER BY drg", (fy,)
+            )
+            cols = [d[0] for d in cur.description]
+            return [dict(zip(cols, row)) for row in cur]
+        lists: dict[str, dict] = {"mcc": {}, "cc": {}}
+        for code, tier, desc in self.conn.execute(
+            "SELECT c.code, c.tier, d.description FROM cc_mcc c JOIN icd10_codes d USING (code) "
+            "WHERE c.first_fy <= ? AND c.last_fy >= ? ORDER BY c.code", (fy, fy)
+        ):
+            lists[tier.lower()][code] = desc
+        changes: dict[str, list] = {key: [] for key in LIST_CHANGES}
+        for lst, action, code, desc in self.conn.execute(
+            "SELECT list, action, code, description FROM cc_mcc_changes WHERE fy = ? ORDER BY seq", (fy,)
+        ):
+            changes[f"{lst}_{action}s"].append({"code": code, "description": desc})
+        return {"icd10": self.icd10[fy], "lists": lists, "changes": changes}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--force", action="store_true", help="re-parse every downloaded year, even unchanged ones, and rewrite the bundle")
+    ap.add_argument("--workers", type=int, default=0, help="parser processes (default: one per CPU)")
+    args = ap.parse_args(argv)
+    started = time.perf_counter()
     OUT.mkdir(parents=True, exist_ok=True)
-    catalog = {fy: parse_year(fy) for fy in YEARS}
-    (OUT / "ms_drg_catalog.json").write_text(
-        json.dumps(catalog, indent=1, ensure_ascii=False), encoding="utf-8"
-    )
+    icd_path = OUT / "icd10_updates.json"
+    icd10 = json.loads(icd_path.read_text(encoding="utf-8")) if icd_path.exists() else {}
+    bundled = _Bundled(BUNDLE, icd10)
+
+    # Decide, per (year, table set), whether to parse the zip or reuse the bundle.
+    todo: list[tuple[str, str]] = []
+    reuse: list[tuple[str, str]] = []
+    sources: dict[tuple[str, str], tuple[str, str]] = {}
+    for fy in YEARS:
+        for kind in _KINDS:
+            zpath = _zip_for(fy, kind)
+            if zpath.exists():
+                sources[(fy, kind)] = (zpath.name, _sha256(zpath))
+                if not args.force and bundled.has(fy, kind) and bundled.hashes.get((fy, kind)) == sources[(fy, kind)]:
+                    reuse.append((fy, kind))
+                else:
+                    todo.append((fy, kind))
+            elif bundled.has(fy, kind):
+                print(f"FY{fy} {zpath.name} not downloaded; keeping the bundled data.")
+                reuse.append((fy, kind))
+                if (fy, kind) in bundled.hashes:
+                    sources[(fy, kind)] = bundled.hashes[(fy, kind)]
+            elif kind == "table5":
+                print(f"FY{fy}: {zpath.name} is not in {RAW} and the year is not in the bundle.")
+                return 1
+            else:
+                print(f"FY{fy} Tables 6 not downloaded; skipping.")
+    if not todo and not args.force and bundled.fys == set(YEARS):
+        print(f"{BUNDLE.name} is up to date ({len(reuse)} year/table sets unchanged).")
+        return 0
+
+    units = {unit: bundled.load(*unit) for unit in reuse}
+    workers = max(1, min(len(todo), args.workers or os.cpu_count() or 1))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse, todo))
+    else:
+        parsed = [_parse(unit) for unit in todo]
+    for fy, kind, out, secs in parsed:
+        units[(fy, kind)] = out
+        print(f"  parsed FY{fy} {kind} in {secs:.2f}s")
+    if bundled.conn is not None:
+        bundled.conn.close()
+
+    catalog = {fy: units[(fy, "table5")] for fy in sorted(YEARS)}
     changes = diff_changes(catalog)
-    (OUT / "drg_changes.json").write_text(
-        json.dumps(changes, indent=1, ensure_ascii=False), encoding="utf-8"
-    )
     # Summary
     by = {}
     for c in changes:
@@ -312,10 +546,22 @@ def main() -> None:
     print("\nChange summary (added/deleted/retitled per FY):")
     for (fy, ct), n in sorted(by.items()):
         print(f"  FY{fy} {ct}: {n}")
-    print(f"\nWrote {OUT/'ms_drg_catalog.json'} and {OUT/'drg_changes.json'}")
-    print("\nICD-10 / CC-MCC (Tables 6):")
-    parse_tables6_all()
+    tables6 = {fy: units[(fy, "tables6")] for fy in sorted(YEARS) if (fy, "tables6") in units}
+    icd10.update({fy: t["icd10"] for fy, t in tables6.items()})
+    icd_path.write_text(json.dumps(icd10, indent=1, ensure_ascii=False), encoding="utf-8")
+    write_bundle(
+        catalog,
+        changes,
+        {fy: t["lists"] for fy, t in tables6.items()},
+        {fy: t["changes"] for fy, t in tables6.items()},
+        sources,
+    )
+    print(
+        f"Parsed {len(todo)} and reused {len(reuse)} year/table sets "
+        f"({workers} worker{'s' if workers != 1 else ''}) in {time.perf_counter() - started:.1f}s"
+    )
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
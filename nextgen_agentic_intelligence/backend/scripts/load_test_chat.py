@@ -0,0 +1,652 @@
+"""Load-test /api/chat and /api/resume under concurrent SSE sessions.
+
+Boots the real FastAPI app (checkpointer, supervisor graph, subagents, trace
+collector, SSE) under uvicorn on a local port, with two stand-ins so no LLM or
+workspace is needed:
+
+* a deterministic scripted chat model: the supervisor routes with ``task``, the
+  subagent calls its tool, then each writes an answer streamed token by token
+  (``--first-token-ms`` before the first chunk, ``--token-ms`` between chunks);
+* a simulated Databricks workspace: Genie questions and warehouse statements
+  finish ``--genie-latency`` / ``--sql-latency`` seconds after they start, and
+  every REST call takes ``--http-ms``. With ``--workspace standin`` the
+  Genie client uses the real ``WorkspaceClient`` against the local DuckDB-backed
+  API stand-in instead (``scripts/genie_standin.py``, same latencies), so the
+  SDK's HTTP calls, retries and result parsing are in the measurement too.
+
+Two kinds of session run against it, ``--concurrency`` at a time:
+
+  chat   one /api/chat turn answered by drg-agent through its Genie tool
+  hitl   a /api/chat turn that pauses for SQL approval (data-agent's
+         execute_sql), then /api/resume with "approve" and the warehouse run
+
+Both questions are first turns the fast router (app/router.py) sends straight
+to the subagent; ``--no-router`` makes every turn go through the supervisor.
+
+Reported: time to first token (TTFT) and full-turn latency percentiles per
+phase, errors, event-loop lag of the server's loop (a probe that should wake
+every 10 ms) and RSS growth over the run. Thresholds (``--max-*``) make the
+exit status 1 when exceeded, so CI can enforce them; ``--json`` writes the
+report.
+
+Usage (from the backend/ dir):
+
+    python scripts/load_test_chat.py
+    python scripts/load_test_chat.py --sessions 200 --concurrency 50 --hitl-ratio 0.3
+    python scripts/load_test_chat.py --concurrency 200 --max-ttft-p95 8 --max-loop-lag-ms 250
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import genie_standin  # noqa: E402
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult  # noqa: E402
+
+from app import agent as agent_module  # noqa: E402
+from app.config import get_settings  # noqa: E402
+from app.genie.client import get_genie_client  # noqa: E402
+
+_CHAT_QUESTIONS = [
+    "How did the DRG 291 tier mix shift from 2023 to 2024?",
+    "Which states had the largest MCC share increase for sepsis DRGs?",
+    "Top 10 providers by DRG 871 volume last year",
+]
+_HITL_QUESTIONS = [
+    "What is the average trip distance by pickup borough?",
+    "How many trips had a fare above 100 dollars last month?",
+]
+_ROUTES = {"chat": "drg-agent", "hitl": "data-agent"}
+_CALL_IDS = itertools.count()
+
+
+# --------------------------------------------------------------------------
+# Scripted chat model
+# --------------------------------------------------------------------------
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic stand-in for the OpenAI model.
+
+    Acts by which tools it was bound with: with ``task`` it is the supervisor
+    (route, then answer from the subagent's report); with ``execute_sql`` it is
+    data-agent; with a ``genie_*`` tool, drg-agent. A turn whose last message
+    is a tool result gets the final answer, streamed in ``answer_tokens``
+    chunks.
+    """
+
+    first_token_s: float = 0.05
+    token_s: float = 0.005
+    answer_tokens: int = 40
+    bound: tuple[str, ...] = ()
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        names = tuple(getattr(t, "name", None) or t.get("name", "") for t in tools)
+        return self.model_copy(update={"bound": names})
+
+    # -- script -------------------------------------------------------------
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        question = next(
+            (m.content for m in reversed(messages) if m.type == "human" and isinstance(m.content, str)), ""
+        )
+        if isinstance(last, ToolMessage):
+            words = [f"w{i}" for i in range(self.answer_tokens)]
+            return AIMessage(content=f"Answer to '{question[:40]}': " + " ".join(words))
+        call_id = f"call_{next(_CALL_IDS)}"
+        if "task" in self.bound:
+            route = _ROUTES["hitl"] if question in _HITL_QUESTIONS or "trip" in question else _ROUTES["chat"]
+            name, args = "task", {"description": question, "subagent_type": route}
+        elif "execute_sql" in self.bound:
+            # unique per session so the warehouse cache never short-cuts the run
+            tag = zlib.crc32(question.encode())
+            name, args = "execute_sql", {"sql": f"SELECT borough, avg(distance) FROM trips WHERE {tag} = {tag} GROUP BY 1",
+                                         "question": question}
+        else:
+            genie = next((n for n in self.bound if n.startswith("genie_")), None)
+            if genie is None:
+                return AIMessage(content="No data tool available.")
+            name, args = genie, {"question": question}
+        return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": call_id, "type": "tool_call"}])
+
+    def _chunks(self, message: AIMessage) -> Iterator[AIMessageChunk]:
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[{"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0}],
+            )
+            return
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            yield AIMessageChunk(content=word + (" " if i < len(words) - 1 else ""))
+
+    # -- BaseChatModel ------------------------------------------------------
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.first_token_s)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.first_token_s)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_s)
+        for i, chunk in enumerate(self._chunks(self._reply(messages))):
+            if i:
+                time.sleep(self.token_s)
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_s)
+        for i, chunk in enumerate(self._chunks(self._reply(messages))):
+            if i:
+                await asyncio.sleep(self.token_s)
+            gen = ChatGenerationChunk(message=chunk)
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content, chunk=gen)
+            yield gen
+
+
+# --------------------------------------------------------------------------
+# Simulated Databricks workspace
+# --------------------------------------------------------------------------
+class SimulatedWorkspace:
+    """``WorkspaceClient`` stand-in for ``.genie`` and ``.statement_execution``.
+
+    A Genie message or statement completes ``latency`` s (+-20%, seeded) after
+    it starts; every call takes ``http_s``, blocking its thread like the SDK.
+    """
+
+    def __init__(self, genie_latency: float, sql_latency: float, http_s: float, rows: int, seed: int = 7) -> None:
+        self.genie_latency, self.sql_latency, self.http_s = genie_latency, sql_latency, http_s
+        self.rows = [[f"{i:03d}", str(1000 - i), f"{(i % 7) / 10:.2f}"] for i in range(rows)]
+        self._random = random.Random(seed)
+        self._done_at: dict[str, float] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.genie = SimpleNamespace(
+            start_conversation=self._start_conversation,
+            create_message=lambda space_id, conversation_id, content: self._start_conversation(space_id, content),
+            get_message=self._get_message,
+            get_message_attachment_query_result=self._attachment_result,
+        )
+        self.statement_execution = SimpleNamespace(
+            execute_statement=self._execute_statement, get_statement=self._get_statement
+        )
+
+    def _start(self, prefix: str, latency: float) -> str:
+        time.sleep(self.http_s)
+        with self._lock:
+            op_id = f"{prefix}{next(self._ids)}"
+            self._done_at[op_id] = time.monotonic() + latency * self._random.uniform(0.8, 1.2)
+        return op_id
+
+    def _finished(self, op_id: str) -> bool:
+        time.sleep(self.http_s)
+        return time.monotonic() >= self._done_at[op_id]
+
+    def _statement_response(self, statement_id: Optional[str] = None):
+        columns = [
+            SimpleNamespace(name="drg", type_name="STRING"),
+            SimpleNamespace(name="cases", type_name="LONG"),
+            SimpleNamespace(name="mcc_share", type_name="DOUBLE"),
+        ]
+        return SimpleNamespace(
+            statement_id=statement_id,
+            status=SimpleNamespace(state="SUCCEEDED", error=None),
+            manifest=SimpleNamespace(schema=SimpleNamespace(columns=columns)),
+            result=SimpleNamespace(data_array=self.rows, external_links=None),
+        )
+
+    # -- genie --------------------------------------------------------------
+    def _start_conversation(self, space_id, content):
+        message_id = self._start("m", self.genie_latency)
+        return SimpleNamespace(conversation_id="c" + message_id, message_id=message_id)
+
+    def _get_message(self, space_id, conversation_id, message_id):
+        done = self._finished(message_id)
+        query = SimpleNamespace(query="SELECT drg, cases, mcc_share FROM drg_shift", description="tier mix")
+        return SimpleNamespace(
+            conversation_id=conversation_id,
+            message_id=message_id,
+            status=SimpleNamespace(value="COMPLETED" if done else "EXECUTING_QUERY"),
+            attachments=[SimpleNamespace(attachment_id="a1", query=query, text=None)],
+            error=None,
+        )
+
+    def _attachment_result(self, space_id, conversation_id, message_id, attachment_id):
+        time.sleep(self.http_s)
+        return SimpleNamespace(statement_response=self._statement_response())
+
+    # -- statement execution -----------------------------------------------
+    def _execute_statement(self, warehouse_id, statement, wait_timeout="0s", **kwargs):
+        statement_id = self._start("s", self.sql_latency)
+        return SimpleNamespace(statement_id=statement_id, status=SimpleNamespace(state="PENDING", error=None))
+
+    def _get_statement(self, statement_id):
+        if not self._finished(statement_id):
+            return SimpleNamespace(statement_id=statement_id, status=SimpleNamespace(state="RUNNING", error=None))
+        return self._statement_response(statement_id)
+
+
+# --------------------------------------------------------------------------
+# Measurements
+# --------------------------------------------------------------------------
+def _rss_mb() -> float:
+    """Current resident set size (Linux) or working set (Windows); peak RSS elsewhere."""
+    if sys.platform == "win32":
+        return _working_set_bytes() / 2**20
+    import resource  # POSIX only
+
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _working_set_bytes() -> int:
+    """This process's working set, from GetProcessMemoryInfo (Windows)."""
+    import ctypes
+    from ctypes import wintypes
+
+    class Counters(ctypes.Structure):  # PROCESS_MEMORY_COUNTERS
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage",
+            )
+        ]
+
+    kernel32 = ctypes.WinDLL("kernel32")
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    kernel32.K32GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(Counters), wintypes.DWORD]
+    counters = Counters(cb=ctypes.sizeof(Counters))
+    if not kernel32.K32GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        raise ctypes.WinError()
+    return counters.WorkingSetSize
+
+
+def _pct(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def _stats(values: list[float]) -> dict:
+    return {
+        "n": len(values),
+        "p50": _pct(values, 50),
+        "p95": _pct(values, 95),
+        "p99": _pct(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+class LoopLagProbe:
+    """Wakes every ``interval`` s on the server's loop and records how late it was."""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.lags: list[float] = []
+        self.peak_rss_mb = 0.0
+        self.running = True
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self.running:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - started - self.interval))
+            if len(self.lags) % 10 == 0:
+                self.peak_rss_mb = max(self.peak_rss_mb, _rss_mb())
+
+
+# --------------------------------------------------------------------------
+# Server + sessions
+# --------------------------------------------------------------------------
+@dataclass
+class Options:
+    sessions: int = 100
+    concurrency: int = 50
+    hitl_ratio: float = 0.3
+    warmup: int = 4
+    first_token_ms: float = 50
+    token_ms: float = 5
+    answer_tokens: int = 40
+    genie_latency: float = 1.0
+    sql_latency: float = 0.5
+    http_ms: float = 20
+    rows: int = 200
+    think_s: float = 0.0  # pause before the human approves
+    checkpointer: str = "sqlite"
+    timeout: float = 120.0
+    router: bool = True
+    workspace: str = "simulated"  # or "standin": real SDK against scripts/genie_standin.py
+
+
+@dataclass
+class Phase:
+    ttft: list[float] = field(default_factory=list)
+    turn: list[float] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+@contextmanager
+def _stand_ins(opts: Options, workdir: Path):
+    """Point settings, the model and the Genie client at the stand-ins (restored after)."""
+    settings = get_settings()
+    overrides = {
+        "CHECKPOINTER": opts.checkpointer,
+        "ROUTER_ENABLED": opts.router,
+        "CHECKPOINT_DB_PATH": str(workdir / "checkpoints.sqlite"),
+        "SAVED_QUERIES_PATH": str(workdir / "saved_queries.db"),
+        "GENIE_RESULTS_DIR": str(workdir / "results"),
+        "DATABRICKS_HOST": "https://simulated.workspace",
+        "DATABRICKS_TOKEN": "simulated",
+        "GENIE_WAREHOUSE_ID": "simulated-warehouse",
+        "GENIE_POLL_INITIAL_SECONDS": 0.1,
+        "GENIE_POLL_MAX_SECONDS": 0.5,
+        "GENIE_SPACES": json.dumps(
+            [
+                {"name": "drg_shift", "space_id": "01sim", "agent": "drg", "description": "DRG tier shift"},
+                {"name": "nyc_taxi", "space_id": "02sim", "agent": "data", "description": "NYC taxi trips"},
+            ]
+        ),
+    }
+    stack = ExitStack()
+    if opts.workspace == "standin":
+        standin = stack.enter_context(genie_standin.running(genie_standin.StandInOptions(
+            genie_latency=opts.genie_latency, sql_latency=opts.sql_latency, http_ms=opts.http_ms
+        )))
+        overrides.update(DATABRICKS_HOST=standin.url, DATABRICKS_TOKEN=standin.options.token)
+    saved = {k: getattr(settings, k) for k in overrides}
+    build_model = agent_module._build_model
+    client = get_genie_client()
+    workspace = client._w
+    for k, v in overrides.items():
+        setattr(settings, k, v)
+    agent_module._build_model = lambda: ScriptedChatModel(
+        first_token_s=opts.first_token_ms / 1000, token_s=opts.token_ms / 1000, answer_tokens=opts.answer_tokens
+    )
+    client._w = None if opts.workspace == "standin" else SimulatedWorkspace(
+        opts.genie_latency, opts.sql_latency, opts.http_ms / 1000, opts.rows
+    )
+    agent_module.get_agent.cache_clear()
+    try:
+        with stack:
+            yield
+    finally:
+        for k, v in saved.items():
+            setattr(settings, k, v)
+        agent_module._build_model = build_model
+        client._w = workspace
+        agent_module.get_agent.cache_clear()
+
+
+class _Server:
+    """uvicorn serving ``app.main:app`` on its own thread and event loop."""
+
+    def __init__(self, probe: LoopLagProbe) -> None:
+        from app.main import app  # after the stand-ins: main reads settings at import
+
+        self.probe = probe
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on")
+        )
+        self.thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+
+    async def _serve(self) -> None:
+        probe = asyncio.create_task(self.probe.run())
+        try:
+            await self.server.serve()
+        finally:
+            self.probe.running = False
+            await probe
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("server did not start")
+            time.sleep(0.02)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+async def _sse(client: httpx.AsyncClient, path: str, body: dict) -> tuple[Optional[float], float, list[tuple[str, str]]]:
+    """POST and read the SSE stream: (seconds to first token, seconds to end, events)."""
+    started = time.perf_counter()
+    first: Optional[float] = None
+    events: list[tuple[str, str]] = []
+    name, data = "message", []
+    async with client.stream("POST", path, json=body) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if line.startswith("event:"):
+                name = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].strip())
+            elif not line.strip() and data:
+                if name == "token" and first is None:
+                    first = time.perf_counter() - started
+                events.append((name, "\n".join(data)))
+                name, data = "message", []
+    return first, time.perf_counter() - started, events
+
+
+def _check_end(events: list[tuple[str, str]], want: str) -> Optional[str]:
+    names = [n for n, _ in events]
+    if "error" in names:
+        return json.loads(events[names.index("error")][1]).get("error", "error")
+    if want not in names:
+        return f"no {want!r} event (got {', '.join(dict.fromkeys(names)) or 'nothing'})"
+    return None
+
+
+async def _session(client: httpx.AsyncClient, n: int, hitl: bool, opts: Options, phases: dict[str, Phase]) -> None:
+    thread_id = f"load-{n}-{'hitl' if hitl else 'chat'}"
+    pool = _HITL_QUESTIONS if hitl else _CHAT_QUESTIONS
+    question = f"{pool[n % len(pool)]} (session {n})"
+    chat = phases["hitl_chat" if hitl else "chat"]
+    try:
+        ttft, total, events = await _sse(client, "/api/chat", {"message": question, "thread_id": thread_id})
+        problem = _check_end(events, "interrupt" if hitl else "trace")
+        if problem:
+            chat.errors.append(problem)
+            return
+        chat.turn.append(total)
+        if not hitl:
+            chat.ttft.append(ttft if ttft is not None else total)
+            return
+        chat.ttft.append(total)  # the approval card is the first thing the user sees
+        await asyncio.sleep(opts.think_s)
+        resume = phases["resume"]
+        ttft, total, events = await _sse(client, "/api/resume", {"thread_id": thread_id, "decision": "approve"})
+        problem = _check_end(events, "trace")
+        if problem:
+            resume.errors.append(problem)
+            return
+        resume.ttft.append(ttft if ttft is not None else total)
+        resume.turn.append(total)
+    except (httpx.HTTPError, ValueError) as exc:
+        chat.errors.append(f"{exc.__class__.__name__}: {exc}")
+
+
+async def _drive(base_url: str, opts: Options, count: int, offset: int, phases: dict[str, Phase]) -> float:
+    limits = httpx.Limits(max_connections=opts.concurrency, max_keepalive_connections=opts.concurrency)
+    gate = asyncio.Semaphore(opts.concurrency)
+    n_hitl = round(count * opts.hitl_ratio)
+    # spread the HITL sessions evenly through the run
+    kinds = [i * n_hitl // count != (i + 1) * n_hitl // count for i in range(count)]
+
+    async def one(i: int) -> None:
+        async with gate:
+            await _session(client, offset + i, kinds[i], opts, phases)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=opts.timeout, limits=limits) as client:
+        await asyncio.gather(*(one(i) for i in range(count)))
+    return time.perf_counter() - started
+
+
+def run_load(opts: Options) -> dict:
+    """Run the load test and return the report."""
+    probe = LoopLagProbe()
+    with tempfile.TemporaryDirectory() as tmp, _stand_ins(opts, Path(tmp)), _Server(probe) as base_url:
+        warm: dict[str, Phase] = {k: Phase() for k in ("chat", "hitl_chat", "resume")}
+        asyncio.run(_drive(base_url, opts, opts.warmup, 0, warm))
+        rss_start = _rss_mb()
+        probe.lags.clear()
+        phases: dict[str, Phase] = {k: Phase() for k in ("chat", "hitl_chat", "resume")}
+        wall = asyncio.run(_drive(base_url, opts, opts.sessions, opts.warmup, phases))
+        rss_end = _rss_mb()
+        lags = list(probe.lags)
+        peak = max(probe.peak_rss_mb, rss_end)
+    attempts = sum(len(p.turn) + len(p.errors) for k, p in phases.items() if k != "resume")
+    errors = sum(len(p.errors) for p in phases.values())
+    return {
+        "options": vars(opts),
+        "wall_seconds": round(wall, 2),
+        "sessions_per_second": round(opts.sessions / wall, 2) if wall else None,
+        "phases": {
+            k: {
+                "ttft_s": _stats(p.ttft),
+                "turn_s": _stats(p.turn),
+                "errors": len(p.errors),
+                "error_samples": list(dict.fromkeys(p.errors))[:3],
+            }
+            for k, p in phases.items()
+        },
+        "error_rate": round(errors / attempts, 4) if attempts else 0.0,
+        "loop_lag_ms": {k: (round(v * 1000, 1) if v is not None else None) for k, v in _stats(lags).items() if k != "n"},
+        "rss_mb": {"after_warmup": round(rss_start, 1), "end": round(rss_end, 1), "peak": round(peak, 1),
+                   "growth": round(rss_end - rss_start, 1)},
+    }
+
+
+# --------------------------------------------------------------------------
+# Thresholds + CLI
+# --------------------------------------------------------------------------
+def violations(report: dict, max_ttft_p95: Optional[float] = None, max_turn_p95: Optional[float] = None,
+               max_loop_lag_ms: Optional[float] = None, max_rss_growth_mb: Optional[float] = None,
+               max_error_rate: Optional[float] = 0.0) -> list[str]:
+    """Threshold breaches in ``report`` (None disables a check)."""
+    out = []
+    for name, phase in report["phases"].items():
+        ttft, turn = phase["ttft_s"]["p95"], phase["turn_s"]["p95"]
+        if max_ttft_p95 is not None and ttft is not None and ttft > max_ttft_p95:
+            out.append(f"{name}: TTFT p95 {ttft:.2f}s > {max_ttft_p95}s")
+        if max_turn_p95 is not None and turn is not None and turn > max_turn_p95:
+            out.append(f"{name}: turn p95 {turn:.2f}s > {max_turn_p95}s")
+    lag = report["loop_lag_ms"]["p99"]
+    if max_loop_lag_ms is not None and lag is not None and lag > max_loop_lag_ms:
+        out.append(f"event-loop lag p99 {lag:.0f} ms > {max_loop_lag_ms} ms")
+    growth = report["rss_mb"]["growth"]
+    if max_rss_growth_mb is not None and growth > max_rss_growth_mb:
+        out.append(f"RSS growth {growth:.0f} MB > {max_rss_growth_mb} MB")
+    if max_error_rate is not None and report["error_rate"] > max_error_rate:
+        out.append(f"error rate {report['error_rate']:.1%} > {max_error_rate:.1%}")
+    return out
+
+
+def _print(report: dict) -> None:
+    o = report["options"]
+    print(
+        f"{o['sessions']} sessions ({o['hitl_ratio']:.0%} HITL), {o['concurrency']} concurrent; "
+        f"Genie {o['genie_latency']}s, warehouse {o['sql_latency']}s, checkpointer {o['checkpointer']}, "
+        f"router {'on' if o['router'] else 'off'}, workspace {o['workspace']}\n"
+    )
+    print(f"{'phase':<10} {'n':>5} {'err':>4}  {'TTFT p50':>9} {'p95':>7} {'p99':>7}  {'turn p50':>9} {'p95':>7} {'p99':>7}")
+    for name, p in report["phases"].items():
+        t, u = p["ttft_s"], p["turn_s"]
+        fmt = lambda v: f"{v:.2f}" if v is not None else "-"  # noqa: E731
+        print(
+            f"{name:<10} {u['n']:>5} {p['errors']:>4}  {fmt(t['p50']):>9} {fmt(t['p95']):>7} {fmt(t['p99']):>7}  "
+            f"{fmt(u['p50']):>9} {fmt(u['p95']):>7} {fmt(u['p99']):>7}"
+        )
+        for sample in p["error_samples"]:
+            print(f"    error: {sample[:120]}")
+    lag, rss = report["loop_lag_ms"], report["rss_mb"]
+    print(
+        f"\nwall {report['wall_seconds']}s ({report['sessions_per_second']} sessions/s); "
+        f"loop lag p50 {lag['p50']} / p99 {lag['p99']} / max {lag['max']} ms; "
+        f"RSS {rss['after_warmup']} -> {rss['end']} MB (+{rss['growth']}, peak {rss['peak']})"
+    )
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    d = Options()
+    ap.add_argument("--sessions", type=int, default=d.sessions, help="sessions to run (after warm-up)")
+    ap.add_argument("--concurrency", type=int, default=d.concurrency, help="sessions in flight at once")
+    ap.add_argument("--hitl-ratio", type=float, default=d.hitl_ratio, help="share of sessions that go through approval")
+    ap.add_argument("--warmup", type=int, default=d.warmup, help="sessions run first and not measured")
+    ap.add_argument("--first-token-ms", type=float, default=d.first_token_ms, help="model delay before its first chunk")
+    ap.add_argument("--token-ms", type=float, default=d.token_ms, help="model delay between chunks")
+    ap.add_argument("--answer-tokens", type=int, default=d.answer_tokens, help="chunks per answer")
+    ap.add_argument("--genie-latency", type=float, default=d.genie_latency, help="seconds per Genie question")
+    ap.add_argument("--sql-latency", type=float, default=d.sql_latency, help="seconds per warehouse statement")
+    ap.add_argument("--http-ms", type=float, default=d.http_ms, help="simulated REST round trip")
+    ap.add_argument("--rows", type=int, default=d.rows, help="rows per simulated result")
+    ap.add_argument("--workspace", default=d.workspace, choices=["simulated", "standin"],
+                    help="in-process fake, or the real SDK against the local API stand-in")
+    ap.add_argument("--think-s", type=float, default=d.think_s, help="seconds before the human approves")
+    ap.add_argument("--checkpointer", default=d.checkpointer, choices=["sqlite", "memory"])
+    ap.add_argument("--timeout", type=float, default=d.timeout, help="per-request timeout (s)")
+    ap.add_argument("--no-router", dest="router", action="store_false", help="send every turn through the supervisor")
+    ap.add_argument("--max-ttft-p95", type=float, help="fail if any phase's TTFT p95 (s) is above this")
+    ap.add_argument("--max-turn-p95", type=float, help="fail if any phase's full-turn p95 (s) is above this")
+    ap.add_argument("--max-loop-lag-ms", type=float, help="fail if the server loop's lag p99 is above this")
+    ap.add_argument("--max-rss-growth-mb", type=float, help="fail if RSS grows more than this over the run")
+    ap.add_argument("--max-error-rate", type=float, default=0.0, help="fail above this share of failed sessions")
+    ap.add_argument("--json", help="also write the report to this file")
+    args = ap.parse_args()
+
+    opts = Options(**{k: getattr(args, k) for k in vars(d)})
+    report = run_load(opts)
+    problems = violations(report, args.max_ttft_p95, args.max_turn_p95, args.max_loop_lag_ms,
+                          args.max_rss_growth_mb, args.max_error_rate)
+    report["violations"] = problems
+    _print(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=1), encoding="utf-8")
+    for p in problems:
+        print(f"FAIL: {p}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
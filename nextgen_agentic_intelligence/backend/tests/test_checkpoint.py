@@ -0,0 +1,122 @@
+"""Tests for the durable checkpointer: persistence across workers and TTL pruning."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Annotated, TypedDict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from langgraph.graph import END, START, StateGraph  # noqa: E402
+from langgraph.graph.message import add_messages  # noqa: E402
+
+
+def _echo_graph(saver):
+    class State(TypedDict):
+        messages: Annotated[list, add_messages]
+
+    g = StateGraph(State)
+    g.add_node("echo", lambda s: {"messages": [("ai", f"echo: {s['messages'][-1].content}")]})
+    g.add_edge(START, "echo")
+    g.add_edge("echo", END)
+    return g.compile(checkpointer=saver)
+
+
+def _settings(tmp_path, **kw):
+    from app.config import Settings
+
+    return Settings(CHECKPOINTER="sqlite", CHECKPOINT_DB_PATH=str(tmp_path / "cp.sqlite"), **kw)
+
+
+def test_sqlite_history_survives_a_new_worker(tmp_path):
+    from app import checkpoint
+
+    async def turn(text: str) -> list[str]:
+        saver = await checkpoint.open_checkpointer(_settings(tmp_path))
+        try:
+            graph = _echo_graph(saver)
+            cfg = {"configurable": {"thread_id": "t1"}}
+            await graph.ainvoke({"messages": [("user", text)]}, cfg)
+            state = await graph.aget_state(cfg)
+            return [m.content for m in state.values["messages"]]
+        finally:
+            await checkpoint.close_checkpointer()
+
+    # Each turn opens its own connection, as a separate uvicorn worker would.
+    assert asyncio.run(turn("one")) == ["one", "echo: one"]
+    assert asyncio.run(turn("two")) == ["one", "echo: one", "two", "echo: two"]
+
+
+def test_prune_idle_deletes_only_expired_threads(tmp_path):
+    from app import checkpoint
+
+    async def run():
+        saver = await checkpoint.open_checkpointer(_settings(tmp_path))
+        try:
+            graph = _echo_graph(saver)
+            for tid, seen in (("old", 1_000.0), ("fresh", 9_000.0)):
+                await graph.ainvoke({"messages": [("user", "hi")]}, {"configurable": {"thread_id": tid}})
+                await checkpoint.touch(tid, now=seen)
+            pruned = await checkpoint.prune_idle(ttl_seconds=3_600, now=10_000.0)
+            old = await saver.aget_tuple({"configurable": {"thread_id": "old"}})
+            fresh = await saver.aget_tuple({"configurable": {"thread_id": "fresh"}})
+            return pruned, old, fresh, await checkpoint.tracked_threads()
+        finally:
+            await checkpoint.close_checkpointer()
+
+    pruned, old, fresh, tracked = asyncio.run(run())
+    assert pruned == ["old"]
+    assert old is None and fresh is not None
+    assert tracked == 1
+
+
+async def custom_saver(settings):
+    """Example ``CHECKPOINTER=module:factory`` target."""
+    from langgraph.checkpoint.memory import MemorySaver
+
+    saver = MemorySaver()
+    saver.built_for = settings.MODEL
+    return saver
+
+
+def test_memory_and_factory_backends():
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from app import checkpoint
+    from app.config import Settings
+
+    async def open_with(spec: str):
+        saver = await checkpoint.open_checkpointer(Settings(CHECKPOINTER=spec, MODEL="m"))
+        await checkpoint.close_checkpointer()
+        return saver
+
+    assert isinstance(asyncio.run(open_with("memory")), MemorySaver)
+    assert asyncio.run(open_with("tests.test_checkpoint:custom_saver")).built_for == "m"
+    # Before the server opens one, callers get a process-local MemorySaver.
+    assert isinstance(checkpoint.get_checkpointer(), MemorySaver)
+
+
+def test_question_is_shared_by_workers(tmp_path):
+    import aiosqlite
+
+    from app import checkpoint
+
+    async def setup_old_table():  # thread_activity as created before questions were kept
+        async with aiosqlite.connect(tmp_path / "cp.sqlite") as conn:
+            await conn.execute("CREATE TABLE thread_activity (thread_id TEXT PRIMARY KEY, last_active REAL NOT NULL)")
+            await conn.commit()
+
+    async def worker(*touches):
+        await checkpoint.open_checkpointer(_settings(tmp_path))
+        try:
+            for kw in touches:
+                await checkpoint.touch("t1", **kw)
+            return await checkpoint.question("t1"), await checkpoint.question("other")
+        finally:
+            await checkpoint.close_checkpointer()
+
+    asyncio.run(setup_old_table())
+    assert asyncio.run(worker({"question": "Top 10 DRGs by volume"})) == ("Top 10 DRGs by volume", "")
+    # the resume, on another worker, touches the thread without a question
+    assert asyncio.run(worker({})) == ("Top 10 DRGs by volume", "")
@@ -59,6 +59,27 @@ def test_cc_mcc_status():
     assert "neither" in cms_store.cc_mcc_status("Z00.00")["tier"].lower()
 
 
+def test_cc_mcc_status_by_year():
+    # E72.53 was split into E72.530 / E72.538 for FY2026 and left the CC list
+    s = cms_store.cc_mcc_status("E72.53", "FY2023")
+    assert s["fy"] == "2023" and s["tier"] == "CC"
+    assert s["by_fy"] == {"2023": "CC", "2024": "CC", "2025": "CC", "2026": "NonCC"}
+    assert "neither" in cms_store.cc_mcc_status("E72.53", "2026")["tier"].lower()
+
+
+def test_cc_mcc_lists_match_published_sizes():
+    # every FY's list, rebuilt from the bundle, has the size CMS published
+    for fy in cms_store.FYS:
+        upd = cms_store.get_icd10_updates(fy)
+        counts = {
+            tier: cms_store._query(
+                "SELECT COUNT(*) AS n FROM cc_mcc WHERE tier = ? AND first_fy <= ? AND last_fy >= ?", (tier, fy, fy)
+            )[0]["n"]
+            for tier in ("MCC", "CC")
+        }
+        assert counts == {"MCC": upd["mcc_list_size"], "CC": upd["cc_list_size"]}, fy
+
+
 def test_tool_returns_json():
     from app.tools.cms_tools import cms_drg_changes
 
@@ -81,3 +102,25 @@ def test_cc_mcc_changes_per_year():
     # FY2024 had MCC deletions in the source tables.
     ch24 = cms_store.get_cc_mcc_changes("2024")
     assert ch24["mcc_deletions"]["count"] >= 1
+
+
+def test_search_drgs_ranked_and_forgiving():
+    hits = cms_store.search_drgs("heart failure")["results"]
+    assert [h["drg"] for h in hits[:3]] == ["291", "292", "293"]
+    assert hits[0]["score"] >= hits[-1]["score"]
+    assert [h["drg"] for h in cms_store.search_drgs("heart failure with mcc")["results"]] == ["291"]
+    assert {"193", "194", "195"} <= {h["drg"] for h in cms_store.search_drgs("pnuemonia")["results"]}  # typo
+    assert "466" in {h["drg"] for h in cms_store.search_drgs("knee replacements")["results"]}  # plural
+    hips = cms_store.search_drgs("hip", limit=100)["results"]
+    assert hips and all("HIP" in h["title"].replace(",", " ").split() for h in hips)  # whole words only
+    assert cms_store.search_drgs("xyzzy")["count"] == 0
+
+
+def test_change_indexes_match_full_scan():
+    changes = cms_store._changes()
+    for fy in cms_store.FYS:
+        added = cms_store.get_changes(fy, "added")
+        assert added["changes"] == [c for c in changes if c["fy"] == fy and c["change_type"] == "added"]
+        everything = cms_store.get_changes(fy)
+        assert sum(everything["summary"].values()) == len(everything["changes"])
+    assert cms_store.drg_change_history("077") == [c for c in changes if c["drg"] == "077"]
@@ -0,0 +1,259 @@
+"""EXTERNAL_LINKS chunk download against a local HTTP stand-in for the presigned URLs."""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+ROWS_PER_CHUNK = 1000
+N_CHUNKS = 5
+
+
+def _arrow_chunk(i: int) -> bytes:
+    start = i * ROWS_PER_CHUNK
+    table = pa.table({
+        "tin": [f"TIN{n:06d}" for n in range(start, start + ROWS_PER_CHUNK)],
+        "cases": pa.array(range(start, start + ROWS_PER_CHUNK), type=pa.int64()),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class _ChunkServer:
+    """Serves /chunk/<i>; ``faults`` maps a path to responses to give first."""
+
+    def __init__(self, chunks: dict[str, bytes]) -> None:
+        self.chunks = chunks
+        self.faults: dict[str, list] = {}
+        self.hits: list[str] = []
+        self.headers: list[dict] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.hits.append(self.path)
+                server.headers.append(dict(self.headers))
+                fault = server.faults.get(self.path)
+                body = server.chunks.get(self.path)
+                if fault:
+                    kind = fault.pop(0)
+                    if kind == "truncate":
+                        body = body[: len(body) // 2]
+                    else:
+                        self.send_response(kind)
+                        self.end_headers()
+                        return
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+
+
+@pytest.fixture()
+def chunk_server():
+    chunks = {f"/chunk/{i}": _arrow_chunk(i) for i in range(N_CHUNKS)}
+    server = _ChunkServer(chunks)
+    yield server
+    server.close()
+
+
+def _link(server: _ChunkServer, i: int) -> SimpleNamespace:
+    body = server.chunks[f"/chunk/{i}"]
+    return SimpleNamespace(
+        chunk_index=i,
+        external_link=f"{server.url}/chunk/{i}",
+        byte_count=len(body),
+        row_count=ROWS_PER_CHUNK,
+        http_headers={"x-presigned": "yes"},
+        expiration=None,
+    )
+
+
+def _statement(server: _ChunkServer, statement_id: str = "st-big") -> SimpleNamespace:
+    return SimpleNamespace(
+        statement_id=statement_id,
+        status=SimpleNamespace(state=SimpleNamespace(value="SUCCEEDED"), error=None),
+        manifest=SimpleNamespace(
+            format=SimpleNamespace(value="ARROW_STREAM"),
+            schema=SimpleNamespace(columns=[SimpleNamespace(name="tin"), SimpleNamespace(name="cases")]),
+            total_chunk_count=N_CHUNKS,
+            total_row_count=N_CHUNKS * ROWS_PER_CHUNK,
+        ),
+        # like the real API, only the first chunk's link comes with the response
+        result=SimpleNamespace(data_array=None, external_links=[_link(server, 0)]),
+    )
+
+
+def test_download_retries_and_writes_parquet(chunk_server, tmp_path):
+    from app.genie.external_results import download_external_result
+
+    chunk_server.faults = {"/chunk/1": [500], "/chunk/2": ["truncate"], "/chunk/3": [403]}
+    requested = []
+
+    async def fetch_links(i):
+        requested.append(i)
+        return [_link(chunk_server, i)]
+
+    ext = asyncio.run(
+        download_external_result(
+            _statement(chunk_server), fetch_links, dest_dir=str(tmp_path), preview_rows=3, concurrency=3
+        )
+    )
+    assert ext.total_rows == N_CHUNKS * ROWS_PER_CHUNK and ext.chunks == N_CHUNKS
+    assert ext.columns == ["tin", "cases"]
+    assert ext.head == [["TIN000000", 0], ["TIN000001", 1], ["TIN000002", 2]]
+    table = pq.read_table(ext.path)
+    assert table.num_rows == ext.total_rows
+    assert table.column("cases").to_pylist() == list(range(ext.total_rows))  # chunk order kept
+    # retried 500 and the truncated body; the 403 forced a fresh link
+    assert chunk_server.hits.count("/chunk/1") == 2 and chunk_server.hits.count("/chunk/2") == 2
+    assert requested.count(3) == 2
+    assert all(h.get("x-presigned") == "yes" and "Authorization" not in h for h in chunk_server.headers)
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_download_fails_cleanly_after_retries(chunk_server, tmp_path):
+    from app.genie.external_results import ExternalResultError, download_external_result
+
+    chunk_server.faults = {"/chunk/4": ["truncate"] * 10}
+
+    async def fetch_links(i):
+        return [_link(chunk_server, i)]
+
+    with pytest.raises(ExternalResultError, match="chunk 4 failed after 2 attempt"):
+        asyncio.run(
+            download_external_result(
+                _statement(chunk_server), fetch_links, dest_dir=str(tmp_path), retries=1
+            )
+        )
+    assert not list(tmp_path.iterdir())  # no partial file left behind
+
+
+def test_json_array_chunks(tmp_path):
+    from app.genie.external_results import download_external_result
+
+    body = json.dumps([["a", "1"], ["b", None]]).encode()
+    server = _ChunkServer({"/chunk/0": body})
+    try:
+        statement = SimpleNamespace(
+            statement_id="st-json",
+            manifest=SimpleNamespace(
+                format=SimpleNamespace(value="JSON_ARRAY"),
+                schema=SimpleNamespace(columns=[SimpleNamespace(name="k"), SimpleNamespace(name="v")]),
+                total_chunk_count=1,
+                total_row_count=2,
+            ),
+            result=SimpleNamespace(
+                external_links=[SimpleNamespace(
+                    chunk_index=0, external_link=f"{server.url}/chunk/0", byte_count=len(body), row_count=2
+                )]
+            ),
+        )
+
+        async def no_links(i):
+            return []
+
+        ext = asyncio.run(download_external_result(statement, no_links, dest_dir=str(tmp_path)))
+        assert ext.head == [["a", "1"], ["b", None]]
+    finally:
+        server.close()
+
+
+def test_run_sql_external_links(chunk_server, tmp_path, monkeypatch):
+    from app import config
+    from app.genie.client import GenieClient
+
+    monkeypatch.setattr(config.get_settings(), "GENIE_RESULTS_DIR", str(tmp_path), raising=False)
+    monkeypatch.setattr(config.get_settings(), "SQL_CACHE_TTL_SECONDS", 0, raising=False)  # download both times
+    submitted = {}
+    execution = SimpleNamespace(
+        execute_statement=lambda **kw: submitted.update(kw) or _statement(chunk_server),
+        get_statement_result_chunk_n=lambda statement_id, i: SimpleNamespace(
+            external_links=[_link(chunk_server, i)]
+        ),
+    )
+    client = GenieClient()
+    monkeypatch.setattr(client, "_client", lambda: SimpleNamespace(statement_execution=execution))
+    monkeypatch.setattr(client, "get_warehouse_id", lambda space_id: "wh1")
+
+    for res in (
+        client.run_sql("s", "SELECT * FROM utilization", max_rows=5, disposition="EXTERNAL_LINKS"),
+        asyncio.run(client.arun_sql("s", "SELECT * FROM utilization", max_rows=5, disposition="EXTERNAL_LINKS")),
+    ):
+        assert "error" not in res, res
+        assert res["row_count"] == N_CHUNKS * ROWS_PER_CHUNK
+        assert res["handle"].startswith("r_") and "rows" not in res
+        assert res["summary"]["columns"]["cases"]["max"] == N_CHUNKS * ROWS_PER_CHUNK - 1
+        assert Path(res["result_file"]).exists()
+    assert submitted["disposition"].value == "EXTERNAL_LINKS"
+    assert submitted["format"].value == "ARROW_STREAM"
+
+
+def test_sweep_removes_unread_then_oldest_files(tmp_path):
+    import os
+
+    from app.genie.external_results import sweep_results_dir
+
+    now = 10_000.0
+    for name, age, size in [("old", 7200, 10), ("a", 600, 40), ("b", 300, 40), ("c", 60, 40),
+                            ("inflight.parquet", 60, 500)]:
+        path = tmp_path / (name + ".part" if name.endswith(".parquet") else f"{name}.parquet")
+        path.write_bytes(b"x" * size)
+        os.utime(path, (now - age, now - age))
+    removed = sweep_results_dir(str(tmp_path), max_age_seconds=3600, max_bytes=100, now=now)
+    assert removed == 2  # "old" unread too long, then "a" to get under 100 bytes
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["b.parquet", "c.parquet", "inflight.parquet.part"]
+
+
+def test_decode_and_writes_run_off_the_event_loop(chunk_server, tmp_path, monkeypatch):
+    from app.genie import external_results
+
+    loop_thread, threads = threading.get_ident(), {"decode": set(), "write": set()}
+    decode, write_table = external_results._decode, pq.ParquetWriter.write_table
+
+    def tracked_decode(*args):
+        threads["decode"].add(threading.get_ident())
+        return decode(*args)
+
+    def tracked_write(self, table, *args, **kwargs):
+        threads["write"].add(threading.get_ident())
+        return write_table(self, table, *args, **kwargs)
+
+    monkeypatch.setattr(external_results, "_decode", tracked_decode)
+    monkeypatch.setattr(pq.ParquetWriter, "write_table", tracked_write)
+
+    async def fetch_links(i):
+        return [_link(chunk_server, i)]
+
+    ext = asyncio.run(external_results.download_external_result(
+        _statement(chunk_server), fetch_links, dest_dir=str(tmp_path), concurrency=2
+    ))
+    assert ext.total_rows == N_CHUNKS * ROWS_PER_CHUNK
+    assert threads["decode"] and threads["write"]
+    assert loop_thread not in threads["decode"] | threads["write"]
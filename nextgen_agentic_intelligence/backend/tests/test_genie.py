@@ -4,12 +4,15 @@ These verify: registry parsing/validation (incl. per-(agent,name) dedup and
 description sanitization), the row-extraction logic, the offline fallback, live
 tool construction, and ``ask`` against fully-mocked SDK objects that mimic real
 behavior — a ``MessageStatus``-like enum (``.value``) and exception-based
-failure/timeout (``OperationFailed`` / ``TimeoutError``).
+failure/timeout (``OperationFailed`` / ``TimeoutError``), plus the async
+``aask`` / ``arun_sql`` polling and concurrent async tool calls.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import sys
+import time
 from enum import Enum
 from pathlib import Path
 from types import SimpleNamespace
@@ -21,6 +24,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 class _MessageStatus(Enum):
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
+    EXECUTING_QUERY = "EXECUTING_QUERY"
 
 
 class OperationFailed(Exception):
@@ -207,7 +211,9 @@ def test_drg_builder_uses_live_note_when_genie(monkeypatch):
         lambda: [registry.GenieSpace("drg_shift", "01", "shift", "drg")],
     )
     sub = drg_agent.build_drg_subagent()
-    assert {t.name for t in sub["tools"]} == {"genie_drg_shift"}
+    assert {t.name for t in sub["tools"]} == {
+        "genie_drg_shift", "result_rows", "result_filter", "result_aggregate"
+    }
     assert "LIVE Databricks Genie" in sub["system_prompt"]
     assert "do not label them as mock" in sub["system_prompt"].lower()
 
@@ -338,6 +344,137 @@ def test_ask_scrubs_secrets_from_errors(monkeypatch):
     assert "***" in result.error
 
 
+# --- async ask / run_sql -------------------------------------------------------
+def _fast_polling(monkeypatch, timeout=5):
+    from app import config
+
+    cfg = config.get_settings()
+    monkeypatch.setattr(cfg, "GENIE_POLL_INITIAL_SECONDS", 0.01, raising=False)
+    monkeypatch.setattr(cfg, "GENIE_POLL_MAX_SECONDS", 0.02, raising=False)
+    monkeypatch.setattr(cfg, "GENIE_TIMEOUT_SECONDS", timeout, raising=False)
+
+
+def _polled_genie(statuses, polls):
+    def get_message(space_id, conversation_id, message_id):
+        polls.append(message_id)
+        status = statuses[min(len(polls), len(statuses)) - 1]
+        return SimpleNamespace(
+            conversation_id=conversation_id, message_id=message_id, status=status,
+            attachments=[SimpleNamespace(attachment_id=None, query=SimpleNamespace(query="SELECT 1", description=None), text=None)],
+            error=SimpleNamespace(error="bad column") if status == _MessageStatus.FAILED else None,
+        )
+
+    return SimpleNamespace(
+        start_conversation=lambda space_id, content: SimpleNamespace(conversation_id="c1", message_id="m1"),
+        get_message=get_message,
+    )
+
+
+def test_aask_polls_until_completed(monkeypatch):
+    from app.genie.client import GenieClient
+
+    _fast_polling(monkeypatch)
+    polls = []
+    statuses = [_MessageStatus.EXECUTING_QUERY, _MessageStatus.EXECUTING_QUERY, _MessageStatus.COMPLETED]
+    client = GenieClient()
+    monkeypatch.setattr(client, "_client", lambda: SimpleNamespace(genie=_polled_genie(statuses, polls)))
+
+    result = asyncio.run(client.aask("s", "q", space_name="drg_shift"))
+    assert len(polls) == 3
+    assert result.error is None and result.status == "COMPLETED"
+    assert result.sql == "SELECT 1" and result.conversation_id == "c1"
+
+    polls.clear()
+    failed = [_MessageStatus.EXECUTING_QUERY, _MessageStatus.FAILED]
+    monkeypatch.setattr(client, "_client", lambda: SimpleNamespace(genie=_polled_genie(failed, polls)))
+    result = asyncio.run(client.aask("s", "q"))
+    assert result.status == "FAILED" and "bad column" in result.error
+
+
+def test_aask_times_out(monkeypatch):
+    from app.genie.client import GenieClient
+
+    _fast_polling(monkeypatch, timeout=0.1)
+    polls = []
+    client = GenieClient()
+    monkeypatch.setattr(
+        client, "_client", lambda: SimpleNamespace(genie=_polled_genie([_MessageStatus.EXECUTING_QUERY], polls))
+    )
+    result = asyncio.run(client.aask("s", "q"))
+    assert result.status == "TIMEOUT" and "did not complete" in result.error
+    assert len(polls) > 1
+
+
+def test_arun_sql_submits_without_waiting_and_polls(monkeypatch):
+    from app.genie.client import GenieClient
+
+    _fast_polling(monkeypatch)
+    submitted = {}
+
+    def statement(state):
+        return SimpleNamespace(
+            statement_id="st1",
+            status=SimpleNamespace(state=SimpleNamespace(value=state), error=None),
+            manifest=SimpleNamespace(schema=SimpleNamespace(columns=[SimpleNamespace(name="n")])),
+            result=SimpleNamespace(data_array=[["7"]], external_links=None),
+        )
+
+    states = iter(["RUNNING", "SUCCEEDED"])
+    execution = SimpleNamespace(
+        execute_statement=lambda **kw: submitted.update(kw) or statement("PENDING"),
+        get_statement=lambda statement_id: statement(next(states)),
+    )
+    client = GenieClient()
+    monkeypatch.setattr(client, "_client", lambda: SimpleNamespace(statement_execution=execution))
+    monkeypatch.setattr(client, "get_warehouse_id", lambda space_id: "wh1")
+
+    res = asyncio.run(client.arun_sql("s", "SELECT 7"))
+    assert submitted["wait_timeout"] == "0s" and submitted["warehouse_id"] == "wh1"
+    assert res["handle"].startswith("r_")
+    assert {k: res[k] for k in ("columns", "rows", "row_count")} == {
+        "columns": ["n"], "rows": [[7]], "row_count": 1
+    }
+
+
+def test_genie_tool_calls_run_concurrently(monkeypatch):
+    # Three Genie calls issued in one model turn overlap instead of queueing.
+    from langchain_core.messages import AIMessage
+    from langgraph.graph import END, START, MessagesState, StateGraph
+    from langgraph.prebuilt import ToolNode
+
+    from app.genie import registry, tools
+    from app.genie.client import GenieResult
+
+    client = tools.get_genie_client()
+
+    async def slow_aask(space_id, question, space_name=""):
+        await asyncio.sleep(0.3)
+        return GenieResult(space=space_name, space_id=space_id, question=question, sql="SELECT 1")
+
+    monkeypatch.setattr(client, "available", lambda: True)
+    monkeypatch.setattr(client, "aask", slow_aask)
+    monkeypatch.setattr(
+        tools, "load_genie_spaces",
+        lambda: [registry.GenieSpace(f"s{i}", f"0{i}", "scope", "drg") for i in range(3)],
+    )
+    drg_tools = tools.genie_tools_for("drg")
+    graph = StateGraph(MessagesState)
+    graph.add_node("tools", ToolNode(drg_tools))
+    graph.add_edge(START, "tools")
+    graph.add_edge("tools", END)
+    calls = [
+        {"name": t.name, "args": {"question": "q"}, "id": f"c{i}", "type": "tool_call"}
+        for i, t in enumerate(drg_tools)
+    ]
+
+    started = time.perf_counter()
+    out = asyncio.run(graph.compile().ainvoke({"messages": [AIMessage(content="", tool_calls=calls)]}))
+    elapsed = time.perf_counter() - started
+    assert len(out["messages"]) == 4
+    assert all("SELECT 1" in m.content for m in out["messages"][1:])
+    assert elapsed < 0.6  # sequential would be >= 0.9s
+
+
 if __name__ == "__main__":
     import subprocess
 
@@ -0,0 +1,97 @@
+"""The Genie client end to end, through the real SDK, against scripts/genie_standin.py."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import genie_standin  # noqa: E402
+
+SPACE = "01standin"
+
+
+@pytest.fixture()
+def connect(monkeypatch, tmp_path):
+    """connect(**options) -> (stand-in, GenieClient pointed at it)."""
+    from app import config
+    from app.genie.client import GenieClient
+
+    settings = config.get_settings()
+    for k, v in {"GENIE_WAREHOUSE_ID": "", "SQL_CACHE_TTL_SECONDS": 0, "GENIE_POLL_INITIAL_SECONDS": 0.05,
+                 "GENIE_POLL_MAX_SECONDS": 0.2, "GENIE_RESULTS_DIR": str(tmp_path)}.items():
+        monkeypatch.setattr(settings, k, v, raising=False)
+    stack = ExitStack()
+
+    def connect(token: str = "standin", **options):
+        base = {"rows": 20_000, "trips": 1000, "chunk_rows": 500, "genie_latency": 0.2, "sql_latency": 0.05,
+                "genie_row_limit": 500}
+        standin = stack.enter_context(genie_standin.running(genie_standin.StandInOptions(**{**base, **options})))
+        monkeypatch.setattr(settings, "DATABRICKS_HOST", standin.url, raising=False)
+        monkeypatch.setattr(settings, "DATABRICKS_TOKEN", token, raising=False)
+        return standin, GenieClient()
+
+    with stack:
+        yield connect
+
+
+def test_questions_become_sql():
+    sql, _ = genie_standin.genie_sql("How did the DRG 291 tier mix shift from 2023 to 2025 in Ohio?")
+    assert "FROM drg_shift" in sql and "drg IN ('291')" in sql
+    assert "state IN ('OH')" in sql and "fy BETWEEN 2023 AND 2025" in sql
+    assert "LIMIT 5" in genie_standin.genie_sql("top 5 providers by DRG 871 volume")[0]
+    assert genie_standin.genie_sql("SQL: SELECT 1")[0] == "SELECT 1"
+
+
+def test_aask_and_both_dispositions_through_the_sdk(connect):
+    standin, client = connect()
+    result = asyncio.run(client.aask(SPACE, "How did the DRG 291 tier mix shift from 2023 to 2024?"))
+    assert result.status == "COMPLETED" and result.error is None
+    assert result.columns == ["fy", "tier", "cases", "share"] and result.row_count == 6
+    assert result.sql.startswith("SELECT fy, tier") and result.description
+    capped = asyncio.run(client.aask(SPACE, "list claims for DRG 871"))
+    assert capped.row_count == 500  # Genie's row limit
+
+    sql = "SELECT claim_id, drg, paid_amount FROM claims WHERE drg = '871'"
+    inline = client.run_sql(SPACE, sql)
+    external = asyncio.run(client.arun_sql(SPACE, sql, disposition="EXTERNAL_LINKS"))
+    assert "error" not in inline and "error" not in external
+    assert external["row_count"] == inline["row_count"] > 1000  # several chunks
+    assert pq.read_metadata(external["result_file"]).num_rows == inline["row_count"]
+    requests = standin.stats()["requests"]
+    assert requests["get_space"] == 1  # the warehouse is looked up once
+    assert requests["get_statement_result_chunk_n"] == requests["download_chunk"] - 1 >= 1
+
+
+def test_inline_over_the_limit_falls_back_to_external_links(connect):
+    standin, client = connect(inline_limit_mb=0.05)
+    sql = "SELECT * FROM claims"
+    out = client.run_sql(SPACE, sql)
+    assert "error" not in out and out["row_count"] == 20_000 and out["result_file"]
+    aout = asyncio.run(client.arun_sql(SPACE, sql + " WHERE fy = 2024", refresh=True))
+    assert "error" not in aout and aout["result_file"]
+    assert standin.stats()["requests"]["download_chunk"] >= 2
+
+
+def test_faults_are_retried_or_reported(connect, monkeypatch):
+    from app import config
+
+    monkeypatch.setattr(config.get_settings(), "GENIE_DOWNLOAD_RETRIES", 5, raising=False)
+    standin, client = connect(chunk_error_rate=0.3, chunk_rows=5000)
+    out = asyncio.run(client.arun_sql(SPACE, "SELECT * FROM claims", disposition="EXTERNAL_LINKS"))
+    assert out.get("row_count") == 20_000, out
+    assert standin.stats()["faults"]["chunk_503"] >= 1
+
+    _, client = connect(fail_rate=1.0)
+    failed = asyncio.run(client.aask(SPACE, "tier mix for DRG 291"))
+    assert failed.status == "FAILED" and "Injected failure" in failed.error
+    assert "Injected failure" in client.run_sql(SPACE, "SELECT 1")["error"]
+
+    _, client = connect(token="wrong")
+    assert "Invalid access token" in asyncio.run(client.aask(SPACE, "tier mix")).error
@@ -0,0 +1,56 @@
+"""Small run of the chat / resume load test (scripts/load_test_chat.py).
+
+Boots the app on a local port with the scripted model and the simulated
+workspace, runs a handful of concurrent chat and HITL sessions, and checks
+every one completes, so a regression in the SSE / interrupt / resume path
+fails here before it shows up under real load.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import load_test_chat as lt  # noqa: E402
+
+
+def _rss_measurable() -> bool:
+    try:
+        lt._rss_mb()
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+@pytest.mark.skipif(not _rss_measurable(), reason="no way to read this process's RSS on this platform")
+def test_concurrent_chat_and_resume_sessions_complete():
+    opts = lt.Options(
+        sessions=6, concurrency=3, hitl_ratio=0.5, warmup=1, first_token_ms=5, token_ms=0,
+        answer_tokens=5, genie_latency=0.05, sql_latency=0.05, http_ms=0, rows=20, checkpointer="memory",
+        timeout=30,
+    )
+    report = lt.run_load(opts)
+    phases = report["phases"]
+    assert report["error_rate"] == 0, phases
+    assert phases["chat"]["turn_s"]["n"] == 3
+    assert phases["hitl_chat"]["turn_s"]["n"] == 3
+    assert phases["resume"]["turn_s"]["n"] == 3  # every paused session resumed to an answer
+    assert phases["chat"]["ttft_s"]["p50"] <= phases["chat"]["turn_s"]["p50"]
+    assert lt.violations(report, max_ttft_p95=30, max_turn_p95=30) == []
+
+
+def test_violations_flags_breaches():
+    report = {
+        "phases": {"chat": {"ttft_s": {"p95": 3.0}, "turn_s": {"p95": 9.0}}},
+        "loop_lag_ms": {"p99": 400.0},
+        "rss_mb": {"growth": 10.0},
+        "error_rate": 0.02,
+    }
+    problems = lt.violations(report, max_ttft_p95=2, max_turn_p95=10, max_loop_lag_ms=250, max_rss_growth_mb=50)
+    assert len(problems) == 3
+    assert any("TTFT" in p for p in problems) and any("lag" in p for p in problems)
+    assert any("error rate" in p for p in problems)
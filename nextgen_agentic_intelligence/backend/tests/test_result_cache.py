@@ -0,0 +1,154 @@
+"""Warehouse result cache: TTL, byte-bounded LRU, refresh, and what tools/traces see."""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _frame(n: int) -> pd.DataFrame:
+    return pd.DataFrame({"drg": [str(i) for i in range(n)], "cases": range(n)})
+
+
+def test_ttl_and_lru_byte_budget():
+    from app.genie.result_cache import SqlResultCache, cache_key
+
+    clock = _Clock()
+    one = _frame(100)
+    size = int(one.memory_usage(index=True, deep=True).sum())
+    cache = SqlResultCache(max_bytes=int(size * 2.5), clock=clock)
+    a, b, c = (cache_key("wh", "s", f"SELECT {i}") for i in "abc")
+    cache.put(a, one, ttl_seconds=60)
+    cache.put(b, _frame(100), ttl_seconds=600)
+    assert cache.get(a) is not None  # a is now most recently used
+    cache.put(c, _frame(100), ttl_seconds=600)  # over budget: b goes, not a
+    assert cache.get(b) is None and cache.get(a) is not None
+    clock.now += 61
+    assert cache.get(a) is None and cache.get(c) is not None  # a expired
+    assert cache.put(cache_key("wh", "s", "SELECT big"), _frame(1000), 600) is None  # too big to keep
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expired"]) == (3, 2, 1, 1)
+    assert stats["entries"] == 1 and stats["bytes"] <= cache.max_bytes
+
+
+def test_key_ignores_whitespace_and_only_reads_are_cached():
+    from app.genie.result_cache import cache_key, cacheable
+
+    assert cache_key("wh", "s", "SELECT 1\n  FROM t;") == cache_key("wh", "s", "SELECT 1 FROM t")
+    assert cache_key("wh", "s", "SELECT 1") != cache_key("wh2", "s", "SELECT 1")
+    assert cacheable("  WITH x AS (SELECT 1) SELECT * FROM x") and cacheable("(SELECT 1)")
+    assert not cacheable("INSERT INTO t VALUES (1)") and not cacheable("DELETE FROM t")
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    from app import config
+    from app.genie import result_cache
+    from app.genie.client import GenieClient
+
+    result_cache.get_sql_cache.cache_clear()
+    monkeypatch.setattr(config.get_settings(), "SQL_CACHE_TTL_SECONDS", 300, raising=False)
+    monkeypatch.setattr(config.get_settings(), "GENIE_SPACES", "", raising=False)
+    executed = []
+
+    def execute_statement(**kw):
+        executed.append(kw["statement"])
+        return SimpleNamespace(
+            statement_id=f"st{len(executed)}",
+            status=SimpleNamespace(state=SimpleNamespace(value="SUCCEEDED"), error=None),
+            manifest=SimpleNamespace(schema=SimpleNamespace(columns=[SimpleNamespace(name="n")])),
+            result=SimpleNamespace(data_array=[[str(len(executed))]], external_links=None),
+        )
+
+    c = GenieClient()
+    c.executed = executed
+    monkeypatch.setattr(c, "_client", lambda: SimpleNamespace(
+        statement_execution=SimpleNamespace(execute_statement=execute_statement)
+    ))
+    monkeypatch.setattr(c, "get_warehouse_id", lambda space_id: "wh1")
+    yield c
+    result_cache.get_sql_cache.cache_clear()
+
+
+def test_repeat_query_served_from_cache(client):
+    from app.genie.result_cache import get_sql_cache
+
+    first = client.run_sql("s", "SELECT n FROM t")
+    again = asyncio.run(client.arun_sql("s", "SELECT  n  FROM t"))
+    assert first["cache"] == {"status": "miss"} and again["cache"]["status"] == "hit"
+    assert again["rows"] == first["rows"] == [[1]] and again["handle"] == first["handle"]
+    fresh = client.run_sql("s", "SELECT n FROM t", refresh=True)
+    assert fresh["cache"] == {"status": "refresh"} and fresh["rows"] == [[2]]
+    assert client.run_sql("s", "SELECT n FROM t")["rows"] == [[2]]  # refresh re-cached
+    assert client.run_sql("other", "SELECT n FROM t")["cache"]["status"] == "miss"  # per space
+    assert len(client.executed) == 3
+    assert get_sql_cache().stats()["hits"] == 2
+
+
+def test_space_ttl_zero_and_writes_bypass_cache(client):
+    client.run_sql("s", "SELECT n FROM t", cache_ttl=0)
+    assert "cache" not in client.run_sql("s", "SELECT n FROM t", cache_ttl=0)
+    assert "cache" not in client.run_sql("s", "UPDATE t SET n = 1")
+    assert len(client.executed) == 3
+
+
+def test_space_ttl_from_registry(monkeypatch):
+    from app import config
+    from app.genie.result_cache import ttl_for
+
+    monkeypatch.setattr(config.get_settings(), "GENIE_SPACES", json.dumps([
+        {"name": "taxi", "space_id": "sp1", "agent": "data", "cache_ttl_seconds": 3600},
+        {"name": "live", "space_id": "sp2", "agent": "data", "cache_ttl_seconds": 0},
+    ]), raising=False)
+    monkeypatch.setattr(config.get_settings(), "SQL_CACHE_TTL_SECONDS", 300, raising=False)
+    assert (ttl_for("sp1"), ttl_for("sp2"), ttl_for("sp3")) == (3600, 0, 300)
+
+
+def test_cache_status_reaches_trace():
+    from app.trace import TraceCollector, export_spans, get_trace, reset_trace
+
+    reset_trace("t-cache")
+    collector = TraceCollector("t-cache")
+    collector.on_tool_start({"name": "run_saved_sql"}, "{}", run_id="r1", inputs={"question": "q"})
+    collector.on_tool_end(
+        SimpleNamespace(content=json.dumps({"saved": True, "row_count": 1, "cache": {"status": "hit", "age_seconds": 42.0}})),
+        run_id="r1",
+    )
+    [step] = get_trace("t-cache")
+    assert step["cache"] == "hit" and "cached (42s old)" in step["summary"]
+    attrs = {a["key"] for a in export_spans("t-cache")["resourceSpans"][0]["scopeSpans"][0]["spans"][1]["attributes"]}
+    assert "step.cache" in attrs
+
+
+def test_run_saved_sql_tool_refresh(client, monkeypatch, tmp_path):
+    from app import config
+    from app.genie import hitl_tools
+    from app.genie.registry import GenieSpace
+    from app.genie.saved_queries import put_saved
+
+    monkeypatch.setattr(config.get_settings(), "SAVED_QUERIES_PATH", str(tmp_path / "sq.db"), raising=False)
+    monkeypatch.setattr(hitl_tools, "get_genie_client", lambda: client)
+    put_saved("sp1", "Total cases", "SELECT n FROM t")
+    tools, _ = hitl_tools.build_data_query_tools(GenieSpace("taxi", "sp1", "Taxi", "data"))
+    run_saved = next(t for t in tools if t.name == "run_saved_sql")
+    statuses = [
+        json.loads(run_saved.invoke(args))["cache"]["status"]
+        for args in ({"question": "total cases"}, {"question": "total cases"},
+                     {"question": "total cases", "refresh": True})
+    ]
+    assert statuses == ["miss", "hit", "refresh"] and len(client.executed) == 2
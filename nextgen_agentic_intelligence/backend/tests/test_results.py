@@ -0,0 +1,129 @@
+"""Result handles: summaries instead of rows, and the paging / filter / aggregate tools."""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+COLUMNS = ["fiscal_year", "state", "tin", "cases"]
+TYPES = ["INT", "STRING", "STRING", "LONG"]
+
+
+def _rows(n: int = 200) -> list[list[str]]:
+    states = ["TX", "CA", "FL", "NY"]
+    return [[str(2023 + i % 2), states[i % 4], f"{i:09d}", str(i)] for i in range(n)]
+
+
+@pytest.fixture(params=["frame", "file"])
+def stored(request, monkeypatch, tmp_path):
+    """The 200 rows under a handle: as a DataFrame (inline result) or a Parquet file (downloaded)."""
+    from app import config
+    from app.genie import results
+
+    monkeypatch.setattr(config.get_settings(), "GENIE_INLINE_ROWS", 10, raising=False)
+    monkeypatch.setattr(config.get_settings(), "GENIE_RESULTS_DIR", str(tmp_path), raising=False)
+    results.get_result_store.cache_clear()
+    if request.param == "frame":
+        yield results.store_rows(COLUMNS, _rows(), TYPES)
+    else:
+        path = tmp_path / "st1.parquet"
+        results.frame_from_rows(COLUMNS, _rows(), TYPES).to_parquet(path)
+        yield results.store_file(str(path))
+    results.get_result_store.cache_clear()
+
+
+def test_small_results_inline_large_ones_summarized(stored):
+    from app.genie.results import store_rows
+
+    small = store_rows(COLUMNS, _rows(3), TYPES)
+    assert small["rows"][0] == [2023, "TX", "000000000", 0] and "summary" not in small
+
+    assert "rows" not in stored and stored["row_count"] == 200
+    cols = stored["summary"]["columns"]
+    assert cols["cases"]["type"] == "number" and cols["cases"]["max"] == 199
+    assert sum(cols["cases"]["histogram"]["counts"]) == 200
+    assert cols["tin"]["type"] == "text" and "top" not in cols["tin"]  # ids keep leading zeros, no top-k
+    assert cols["state"]["top"][0][1] == 50
+    assert len(json.dumps(stored)) < len(json.dumps(_rows())) / 4
+
+
+def test_frame_from_rows_without_types_keeps_codes_text():
+    from app.genie.results import frame_from_rows
+
+    df = frame_from_rows(["drg", "cases"], [["064", "3"], ["291", "12"]])
+    assert df["drg"].tolist() == ["064", "291"] and df["cases"].tolist() == [3, 12]
+
+
+def test_result_rows_pages_and_sorts(stored):
+    from app.genie.result_tools import result_rows
+
+    page = result_rows(stored["handle"], offset=0, limit=5, columns=["tin", "cases"], sort_by="cases", descending=True)
+    assert page["rows"][0] == ["000000199", 199] and page["next_offset"] == 5
+    last = result_rows(stored["handle"], offset=195, limit=20)
+    assert len(last["rows"]) == 5 and last["next_offset"] is None
+
+
+def test_result_filter_returns_new_handle(stored):
+    from app.genie.result_tools import result_filter, result_rows
+
+    out = result_filter(stored["handle"], [
+        {"column": "state", "op": "==", "value": "TX"},
+        {"column": "cases", "op": ">=", "value": 180},
+    ])
+    assert out["parent"] == stored["handle"] and out["handle"] != stored["handle"]
+    assert out["row_count"] == 5 and all(r[1] == "TX" and r[3] >= 180 for r in out["rows"])
+    assert result_rows(out["handle"])["row_count"] == 5
+
+
+def test_result_aggregate_over_all_rows(stored):
+    from app.genie.result_tools import result_aggregate
+
+    out = result_aggregate(stored["handle"], group_by=["fiscal_year"], metrics=["count", "sum:cases"], sort_by="sum_cases")
+    assert out["columns"] == ["fiscal_year", "count", "sum_cases"]
+    assert out["rows"] == [[2024, 100, 10000], [2023, 100, 9900]]
+    assert out["group_count"] == 2 and not out["truncated"]
+
+
+def test_tools_report_errors_as_json(stored):
+    from app.genie.result_tools import build_result_tools
+
+    tools = {t.name: t for t in build_result_tools()}
+    assert set(tools) == {"result_rows", "result_filter", "result_aggregate"}
+    missing = json.loads(tools["result_rows"].invoke({"handle": "r_0000000000"}))
+    assert "Unknown or expired" in missing["error"]
+    bad = json.loads(tools["result_aggregate"].invoke({"handle": stored["handle"], "metrics": ["p99:cases"]}))
+    assert "Unknown metric" in bad["error"]
+
+
+@pytest.mark.parametrize("stored", ["file"], indirect=True)
+def test_file_results_stay_on_disk_and_resolve_in_any_worker(stored, tmp_path):
+    from app.genie.result_tools import result_filter
+    from app.genie.results import ResultFile, ResultStore, get_result_store
+
+    assert isinstance(get_result_store().get(stored["handle"]), ResultFile)
+    assert stored["result_file"] == str(tmp_path / f"{stored['handle']}.parquet")
+    out = result_filter(stored["handle"], [{"column": "state", "op": "in", "value": ["TX", "CA"]}])
+    assert (tmp_path / f"{out['handle']}.parquet").is_file() and out["row_count"] == 100
+    other_worker = ResultStore(1 << 20, 3600, str(tmp_path))
+    assert other_worker.get(stored["handle"]).row_count == 200
+    assert other_worker.get("r_0000000000") is None and other_worker.get("../st1") is None
+    (tmp_path / f"{out['handle']}.parquet").unlink()  # swept from the results folder
+    assert get_result_store().get(out["handle"]) is None
+
+
+def test_store_is_bounded_by_bytes():
+    import pandas as pd
+
+    from app.genie.results import ResultStore, nbytes
+
+    frame = pd.DataFrame({"n": range(1000)})
+    store = ResultStore(max_bytes=int(nbytes(frame) * 2.5), ttl_seconds=3600)
+    a, b, c = (store.put(frame.copy()) for _ in range(3))
+    assert store.get(a) is None and store.get(b) is not None and store.get(c) is not None
+    assert store.bytes <= store.max_bytes
+    big = store.put(pd.DataFrame({"n": range(10_000)}))  # over budget alone: kept, the rest dropped
+    assert len(store) == 1 and store.get(big) is not None
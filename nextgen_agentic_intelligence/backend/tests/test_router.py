@@ -0,0 +1,145 @@
+"""Tests for the fast router (app/router.py) and its /api/chat shortcut."""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from app.router import SUPERVISOR, Router, features, get_router, load_examples  # noqa: E402
+
+
+def test_codes_and_years_are_folded():
+    a, b = features("DRG 291 in FY2026"), features("DRG 871 in 2024")
+    assert a == b
+    assert features("Is N17.9 a CC?")["w:<icd>"] == 1
+
+
+def test_routes_clear_questions_and_defers_small_talk():
+    router = get_router()
+    assert router.classify("How did the DRG 871 tier mix shift from 2023 to 2025 in Ohio?").route == "drg-agent"
+    assert router.classify("how many apeals were overturned last quarter").route == "appeals-agent"
+    assert router.classify("Is I50.23 an MCC in FY2024?").route == "context-agent"
+    assert router.route("thanks!", router.routes, 0.5) is None
+    # data-agent only when it is offered
+    routes = [r for r in router.routes if r != "data-agent"]
+    assert router.classify("What is the average trip distance by pickup borough?", routes).route != "data-agent"
+
+
+def test_leave_one_out_accuracy_at_the_configured_threshold():
+    import bench_router
+    from app.config import get_settings
+
+    settings = get_settings()
+    results = bench_router.leave_one_out(
+        load_examples(settings.ROUTER_EXAMPLES_PATH), settings.ROUTER_NEIGHBORS, settings.ROUTER_TEMPERATURE
+    )
+    (row,) = bench_router.accuracy_table(
+        results, settings.ROUTER_CONFIDENCE, settings.ROUTER_MIN_SCORE, [settings.ROUTER_MIN_MARGIN]
+    )
+    assert row["accuracy"] >= 0.98 and row["coverage"] >= 0.15, row
+    assert row["supervisor_leaks"] == 0
+
+
+@pytest.mark.parametrize("question, right", [
+    # near-certain softmax "confidence" (0.97 / 0.98) for the wrong subagent
+    ("search the web for the latest IPPS final rule", "search-agent"),
+    ("Which DRGs shifted most in 2024?", "drg-agent"),
+])
+def test_close_calls_go_to_the_supervisor(question, right):
+    from app.config import get_settings
+
+    settings = get_settings()
+    router = get_router()
+    decision = router.route(question, router.routes, settings.ROUTER_CONFIDENCE, settings.ROUTER_MIN_SCORE,
+                            settings.ROUTER_MIN_MARGIN)
+    assert decision is None or decision.route == right, decision
+
+
+def test_stats_count_routed_and_deferred():
+    router = Router([("appeal overturn rate", "appeals-agent"), ("hello there", SUPERVISOR)], neighbors=1)
+    router.record(router.route("appeal overturn rate this month", router.routes, 0.5))
+    router.record(router.route("hello", router.routes, 0.5))
+    stats = router.stats()
+    assert stats["routed"] == 1 and stats["supervisor"] == 1
+    assert stats["by_route"] == {"appeals-agent": 1}
+
+
+def test_first_question_skips_the_supervisor_routing_call():
+    import load_test_chat as lt
+
+    opts = lt.Options(first_token_ms=0, token_ms=0, answer_tokens=3, genie_latency=0.01, sql_latency=0.01,
+                      http_ms=0, checkpointer="memory")
+
+    async def turn(main, question: str, thread_id: str) -> list[dict]:
+        events = [ev async for ev in main._chat_stream(question, thread_id)]
+        assert events[-1]["event"] == "done"
+        return json.loads(next(ev["data"] for ev in events if ev["event"] == "trace"))["steps"]
+
+    async def run(main) -> tuple[list, list, list]:
+        from app import checkpoint
+
+        await checkpoint.open_checkpointer(main.settings)
+        main.get_agent.cache_clear()
+        try:
+            question = "How did the DRG 291 tier mix shift from 2023 to 2024?"
+            routed = await turn(main, question, "fast")
+            follow_up = await turn(main, question, "fast")  # later turns need the conversation
+            main.settings.ROUTER_ENABLED = False
+            baseline = await turn(main, question, "slow")
+            return routed, follow_up, baseline
+        finally:
+            await checkpoint.close_checkpointer()
+
+    with tempfile.TemporaryDirectory() as tmp, lt._stand_ins(opts, Path(tmp)):
+        from app import main
+
+        enabled = main.settings.ROUTER_ENABLED
+        main.settings.ROUTER_ENABLED = True
+        try:
+            routed, follow_up, baseline = asyncio.run(run(main))
+        finally:
+            main.settings.ROUTER_ENABLED = enabled
+
+    kinds = lambda steps: [s["kind"] for s in steps if s.get("parent_span_id") is None]  # noqa: E731
+    assert kinds(routed) == ["router", "route", "llm"]  # no supervisor call before the task
+    assert routed[0]["name"] == "drg-agent" and routed[0]["confidence"] >= 0.9
+    assert kinds(baseline) == ["llm", "route", "llm"]
+    assert kinds(follow_up)[0] == "llm"
+
+
+def test_a_broken_router_falls_back_to_the_supervisor(monkeypatch):
+    import load_test_chat as lt
+
+    opts = lt.Options(first_token_ms=0, token_ms=0, answer_tokens=3, genie_latency=0.01, sql_latency=0.01,
+                      http_ms=0, checkpointer="memory")
+
+    async def run(main) -> list[dict]:
+        from app import checkpoint
+
+        await checkpoint.open_checkpointer(main.settings)
+        main.get_agent.cache_clear()
+        try:
+            return [ev async for ev in main._chat_stream("How did the DRG 291 tier mix shift?", "broken")]
+        finally:
+            await checkpoint.close_checkpointer()
+
+    def missing_examples():
+        raise FileNotFoundError("router_examples.jsonl")
+
+    with tempfile.TemporaryDirectory() as tmp, lt._stand_ins(opts, Path(tmp)):
+        from app import main
+
+        monkeypatch.setattr(main.settings, "ROUTER_ENABLED", True, raising=False)
+        monkeypatch.setattr(main, "get_router", missing_examples)
+        events = asyncio.run(run(main))
+
+    assert events[-1]["event"] == "done" and not any(ev["event"] == "error" for ev in events)
+    steps = json.loads(next(ev["data"] for ev in events if ev["event"] == "trace"))["steps"]
+    assert steps[0]["kind"] == "llm"  # the supervisor routed it
@@ -0,0 +1,118 @@
+"""Saved (approved) queries: SQLite store, paraphrase matching, usage stats."""
+from __future__ import annotations
+
+import json
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+SQL = "SELECT drg, SUM(cases) AS cases FROM utilization GROUP BY drg ORDER BY cases DESC LIMIT 10"
+
+
+@pytest.fixture()
+def db(tmp_path, monkeypatch):
+    from app import config
+
+    path = tmp_path / "saved_queries.db"
+    monkeypatch.setattr(config.get_settings(), "SAVED_QUERIES_PATH", str(path), raising=False)
+    return path
+
+
+def test_exact_and_paraphrase_matches(db):
+    from app.genie.saved_queries import match_saved, put_saved
+
+    put_saved("s1", "Top 10 DRGs by volume?", SQL)
+    exact = match_saved("s1", "  top 10 drgs by volume ")
+    assert exact.sql == SQL and exact.exact
+    para = match_saved("s1", "Which 10 DRGs have the most volume")
+    assert para.sql == SQL and para.question == "Top 10 DRGs by volume?" and not para.exact
+    assert match_saved("s2", "Top 10 DRGs by volume") is None  # other space
+
+
+@pytest.mark.parametrize("question", [
+    "Top 5 DRGs by volume",  # different number
+    "Top 10 DRGs by volume in TX",  # extra state
+    "Top 10 DRGs by volume without MCC",  # negation / severity
+    "Top 10 providers by average length of stay",  # different question
+])
+def test_answer_changing_words_do_not_match(db, question):
+    from app.genie.saved_queries import match_saved, put_saved
+
+    put_saved("s1", "Top 10 DRGs by volume", SQL)
+    assert match_saved("s1", question) is None
+
+
+@pytest.mark.parametrize("saved, asked", [
+    ("median length of stay by DRG and provider for heart failure inpatient claims in 2023",
+     "average length of stay by DRG and provider for heart failure inpatient claims in 2023"),
+    ("bottom 10 DRGs by volume for medicare inpatient claims in TX in 2023",
+     "top 10 DRGs by volume for medicare inpatient claims in TX in 2023"),
+    ("top 10 DRGs by volume for medicare outpatient claims in TX in 2023",
+     "top 10 DRGs by volume for medicare inpatient claims in TX in 2023"),
+    ("weekly claim volume for DRG 291 in 2023", "monthly claim volume for DRG 291 in 2023"),
+    # state names, payers and state codes that are also words
+    ("average length of stay for DRG 291 inpatient claims in Texas in 2023",
+     "average length of stay for DRG 291 inpatient claims in Florida in 2023"),
+    ("average length of stay for DRG 291 inpatient claims for medicare in 2023",
+     "average length of stay for DRG 291 inpatient claims for medicaid in 2023"),
+    ("DRG 291 claim volume by provider in PA in 2023", "DRG 291 claim volume by provider in MA in 2023"),
+    ("DRG 291 claim volume by provider in CO in 2023", "DRG 291 claim volume by provider in OH in 2023"),
+    # a filter only one of the questions has
+    ("average length of stay for DRG 291 in 2023", "average length of stay for DRG 291 in Texas in 2023"),
+])
+def test_near_misses_do_not_reuse_sql(db, saved, asked):
+    from app.genie.saved_queries import match_saved, put_saved, tokens
+
+    assert tokens(saved) != tokens(asked)
+    put_saved("s1", saved, SQL)
+    assert match_saved("s1", asked) is None
+
+
+def test_aggregation_synonyms_still_match(db):
+    from app.genie.saved_queries import match_saved, put_saved
+
+    put_saved("s1", "average length of stay by DRG in 2023", SQL)
+    assert match_saved("s1", "mean length of stay by DRG in 2023").sql == SQL
+
+
+def test_put_replaces_and_counts_use(db):
+    from app.genie.saved_queries import get_saved, list_saved, put_saved
+
+    put_saved("s1", "Top 10 DRGs by volume", "SELECT 1")
+    put_saved("s1", "top 10 drgs by volume?", SQL)  # same normalized question: replaced
+    for _ in range(3):
+        assert get_saved("s1", "which 10 DRGs have the most volume") == SQL
+    [entry] = list_saved()
+    assert entry["use_count"] == 3 and entry["last_used"]
+    (tokens,) = sqlite3.connect(db).execute("SELECT tokens FROM saved_queries").fetchone()
+    assert json.loads(tokens) == ["10", "drg", "top", "volume"]
+
+
+def test_legacy_json_imported(db):
+    from app.genie.saved_queries import get_saved
+
+    db.with_suffix(".json").write_text(json.dumps({
+        "s1::total fare amount": {"space_id": "s1", "question": "Total fare amount", "sql": "SELECT 42"},
+    }))
+    assert get_saved("s1", "what is the total fare amount") == "SELECT 42"
+
+
+def test_writes_from_another_process_are_seen(db):
+    from app.genie.saved_queries import get_saved, put_saved
+
+    put_saved("s1", "warm up", "SELECT 0")  # this process holds an open connection
+    code = (
+        f"import sys; sys.path.insert(0, {str(ROOT)!r})\n"
+        "from app import config\n"
+        f"config.get_settings().SAVED_QUERIES_PATH = {str(db)!r}\n"
+        "from app.genie.saved_queries import put_saved\n"
+        "put_saved('s1', 'Top 10 DRGs by volume', 'SELECT 10')\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT)
+    assert get_saved("s1", "Which 10 DRGs have the most volume") == "SELECT 10"
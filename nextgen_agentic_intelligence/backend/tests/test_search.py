@@ -1,13 +1,30 @@
 """Unit tests for the DuckDuckGo web_search tool — no network calls."""
 from __future__ import annotations
 
+import asyncio
 import json
 import sys
+import threading
+import time
 from pathlib import Path
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 
+@pytest.fixture(autouse=True)
+def _search_settings(tmp_path, monkeypatch):
+    from app.config import get_settings
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "SEARCH_CACHE_PATH", str(tmp_path / "search_cache.sqlite"))
+    monkeypatch.setattr(settings, "SEARCH_CACHE_TTL_SECONDS", 3600)
+    monkeypatch.setattr(settings, "SEARCH_ENGINES", "langchain,ddgs")
+    monkeypatch.setattr(settings, "SEARCH_HEDGE_SECONDS", 0)
+    return settings
+
+
 def test_web_search_formats_results(monkeypatch):
     from app.tools import search_tools
 
@@ -54,3 +71,78 @@ def test_search_subagent_well_formed():
     assert SEARCH_SUBAGENT["name"] == "search-agent"
     assert SEARCH_SUBAGENT["tools"]
     assert SEARCH_SUBAGENT["tools"][0].name == "web_search"
+
+
+def test_repeated_query_is_served_from_the_cache(monkeypatch):
+    from app.tools import search_tools
+
+    calls = []
+
+    def engine(q, n):
+        calls.append(q)
+        return [{"title": "Two-midnight rule", "url": "https://cms.gov/2mn", "snippet": "..."}]
+
+    monkeypatch.setattr(search_tools, "_search_langchain", engine)
+    first = json.loads(search_tools.web_search.invoke({"query": "CMS two-midnight rule"}))
+    again = json.loads(asyncio.run(search_tools.web_search.ainvoke({"query": "  cms Two-Midnight   rule? "})))
+    assert first["cache"]["status"] == "miss" and again["cache"]["status"] == "hit"
+    assert again["results"] == first["results"] and again["engine"] == "langchain"
+    assert calls == ["CMS two-midnight rule"]
+
+
+def test_cache_entries_expire():
+    from app.tools.search_cache import SearchCache
+
+    now = [1000.0]
+    cache = SearchCache(":memory:", clock=lambda: now[0])
+    cache.put("IPPS final rule", [{"title": "t"}], "ddgs", ttl_seconds=60)
+    cache.put("empty", [], "ddgs", ttl_seconds=60)  # empty results are not kept
+    assert cache.get("ipps final rule.").results == [{"title": "t"}]
+    assert cache.get("empty") is None
+    now[0] += 61
+    assert cache.get("IPPS final rule") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["entries"] == 0
+
+
+def test_async_search_takes_the_first_good_engine(monkeypatch, _search_settings):
+    from app.tools import search_tools
+
+    def slow(q, n):
+        threading.Event().wait(1.0)  # a stalled request (not time.sleep, patched below)
+        return [{"title": "slow", "url": "https://slow", "snippet": ""}]
+
+    monkeypatch.setattr(search_tools, "_search_langchain", slow)
+    monkeypatch.setattr(search_tools, "_search_ddgs", lambda q, n: [{"title": "fast", "url": "https://f", "snippet": ""}])
+
+    async def timed():
+        started = time.perf_counter()
+        out = await search_tools.web_search.ainvoke({"query": "q"})
+        return json.loads(out), time.perf_counter() - started
+
+    out, took = asyncio.run(timed())
+    assert out["engine"] == "ddgs" and out["results"][0]["title"] == "fast"
+    assert took < 0.5  # not waiting for the slow engine
+
+    # an engine past its timeout is abandoned; the backoff never blocks the loop
+    monkeypatch.setattr(_search_settings, "SEARCH_ENGINE_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(search_tools, "_search_ddgs", lambda q, n: [])
+    monkeypatch.setattr(search_tools, "_BACKOFF_BASE", 0.02)
+    monkeypatch.setattr(search_tools.time, "sleep", lambda *_: pytest.fail("blocking sleep"))
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        out = json.loads(await search_tools.web_search.ainvoke({"query": "other"}))
+        task.cancel()
+        return out, ticks
+
+    out, ticks = asyncio.run(run())
+    assert out["results"] == [] and "note" in out
+    assert ticks >= 10  # the loop kept running through 3 rounds and 2 backoffs
@@ -56,3 +56,78 @@ def test_execute_sql_summary():
     out = SimpleNamespace(content='{"row_count": 3, "saved_as_tool": true}')
     s = _summarize("execute_sql", out)
     assert "3 row" in s and "saved" in s
+
+
+def test_steps_are_timed_spans_and_feed_metrics():
+    from app import trace
+
+    tid = "t-span"
+    trace.reset_trace(tid)
+    trace.METRICS.reset()
+    c = trace.TraceCollector(tid)
+    c.on_tool_start({"name": "task"}, "", run_id="r1", inputs={"subagent_type": "data-agent"})
+    c.on_chain_start({}, {}, run_id="c1", parent_run_id="r1")
+    c.on_chat_model_start({"name": "ChatOpenAI"}, [], run_id="m1", parent_run_id="c1",
+                          metadata={"ls_model_name": "gpt-5.5"})
+    c.on_llm_end(SimpleNamespace(generations=[], llm_output={"token_usage": {"total_tokens": 42}}), run_id="m1")
+    c.on_tool_start({"name": "execute_sql"}, "", run_id="r2", parent_run_id="c1", inputs={"sql": "SELECT 1"})
+    c.on_tool_error(RuntimeError("warehouse down"), run_id="r2")
+    c.on_tool_end(SimpleNamespace(content="done"), run_id="r1")
+
+    route, llm, sql = trace.get_trace(tid)
+    assert llm["kind"] == "llm" and llm["name"] == "gpt-5.5" and llm["tokens"] == 42
+    # nested under the route through the intermediate chain run
+    assert llm["parent_span_id"] == route["span_id"] == sql["parent_span_id"]
+    assert route["parent_span_id"] is None
+    for step in (route, llm, sql):
+        assert step["end_ns"] >= step["start_ns"] and step["duration_ms"] >= 0
+    assert sql["status"] == "error" and "warehouse down" in sql["summary"]
+
+    metrics = trace.METRICS.snapshot()
+    assert metrics["tool"]["execute_sql"]["count"] == 1
+    assert metrics["tool"]["execute_sql"]["errors"] == 1
+    assert metrics["llm"]["gpt-5.5"]["buckets_ms"]["+Inf"] == 1
+    assert metrics["route"]["task"]["errors"] == 0
+
+    mer = trace.steps_to_mermaid(tid, "q", "a")
+    assert "1 LLM call(s)" in mer and "⏱" in mer
+    assert "gpt-5.5" not in mer  # model calls are folded into the supervisor node
+
+    export = trace.export_spans(tid, "q")
+    spans = export["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root = spans[0]
+    assert len(spans) == 4 and {s["traceId"] for s in spans} == {root["traceId"]}
+    assert spans[1]["parentSpanId"] == root["spanId"]
+    assert spans[3]["status"]["code"] == 2  # error
+    assert trace.export_spans("t-unknown") is None
+
+
+def test_latency_histogram_quantiles():
+    from app.trace import LatencyHistogram
+
+    hist = LatencyHistogram()
+    for ms in [5] * 90 + [800] * 10:
+        hist.observe(ms)
+    out = hist.to_dict()
+    assert out["count"] == 100 and out["max_ms"] == 800
+    assert out["p50_ms"] <= 10
+    assert 500 < out["p95_ms"] <= 800
+    assert out["buckets_ms"]["10"] == 90 and out["buckets_ms"]["+Inf"] == 100
+
+
+def test_bounded_store_evicts_lru_and_idle():
+    from app.trace import BoundedStore
+
+    now = [0.0]
+    store = BoundedStore(max_items=2, ttl_seconds=10, clock=lambda: now[0])
+    store.set("a", 1)
+    store.set("b", 2)
+    assert store.get("a") == 1  # a is now most recently used
+    store.set("c", 3)
+    assert "b" not in store and store.get("a") == 1 and len(store) == 2
+
+    now[0] = 5.0
+    store.get("c")
+    now[0] = 12.0  # a last used at 0, c at 5
+    assert "a" not in store and store.get("c") == 3
+    assert store.pop("c") == 3 and len(store) == 0